@@ -10,6 +10,8 @@ from datetime import datetime
 from pathlib import Path
 from fastapi import APIRouter, HTTPException
 from fastapi.responses import JSONResponse
+from core.prompt_registry import init_prompt_registry, get_prompt_registry
+from core.tokens import is_exact as tokenizer_is_exact
 
 router = APIRouter()
 
@@ -55,8 +57,9 @@ def load_v2_prompt():
         print(f"[boot] FATAL: Failed to load V2 prompt: {e}")
         raise SystemExit(1)
 
-# Load prompt at module import (startup)
+# Load prompts at module import (startup)
 load_v2_prompt()
+init_prompt_registry()
 
 # Log build metadata on boot
 print(f"[BOOT] ONESource-ai {BUILD_SHA} @ {BUILT_AT}")
@@ -64,6 +67,8 @@ print(f"[BOOT] Environment: {os.environ.get('ENVIRONMENT', 'development')}")
 print(f"[BOOT] Redis: {bool(os.environ.get('REDIS_URL'))}")
 print(f"[BOOT] OpenAI: {bool(os.environ.get('OPENAI_API_KEY'))}")
 print(f"[BOOT] V2 Prompt: {bool(V2_PROMPT_CONTENT)}")
+print(f"[BOOT] System Prompt: {get_prompt_registry().source}")
+print(f"[BOOT] Tokenizer: {'tiktoken' if tokenizer_is_exact() else 'ESTIMATE (characters/4)'}")
 
 @router.get("/health")
 async def health_check():
@@ -123,11 +128,13 @@ async def version_info():
             "USE_V2_SCHEMA": os.environ.get('USE_V2_SCHEMA', 'true') == 'true',
             "REDIS_ENABLED": bool(os.environ.get('REDIS_URL')),
             "OPENAI_CONFIGURED": bool(os.environ.get('OPENAI_API_KEY')),
-            "V2_PROMPT_LOADED": bool(V2_PROMPT_CONTENT)
+            "V2_PROMPT_LOADED": bool(V2_PROMPT_CONTENT),
+            "EXACT_TOKEN_COUNTS": tokenizer_is_exact()
         },
         "prompt": {
             "path": "prompts/v2_system_prompt.txt",
-            "bytes": int(os.environ.get('V2_PROMPT_BYTES', 0))
+            "bytes": int(os.environ.get('V2_PROMPT_BYTES', 0)),
+            "system": get_prompt_registry().status()
         },
         "runtime": {
             "python": f"{sys.version_info.major}.{sys.version_info.minor}.{sys.version_info.micro}",
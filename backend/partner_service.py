@@ -356,11 +356,11 @@ class PartnerService:
         except Exception as e:
             print(f"Error sending welcome email: {e}")
     
-    async def send_upload_receipt_email(self, partner_record: Dict[str, Any], document_info: Dict[str, Any]):
-        """Send upload receipt email to partner"""
+    async def send_upload_receipt_email(self, partner_record: Dict[str, Any], document_info: Dict[str, Any]) -> bool:
+        """Send upload receipt email to partner; True only when SendGrid accepted it"""
         if not self.sendgrid_configured:
             print(f"Upload receipt skipped - SendGrid not configured for {document_info['filename']}")
-            return
+            return False
         
         try:
             subject = f"Document Upload Receipt - {document_info['filename']}"
@@ -435,11 +435,13 @@ class PartnerService:
             
             if response.status_code == 202:
                 print(f"✅ Upload receipt sent for {document_info['filename']}")
-            else:
-                print(f"⚠️ Upload receipt failed for {document_info['filename']}")
+                return True
+            print(f"⚠️ Upload receipt failed for {document_info['filename']}")
+            return False
                 
         except Exception as e:
             print(f"Error sending upload receipt: {e}")
+            return False
     
     async def get_all_partners(self) -> List[Dict[str, Any]]:
         """Get all registered partners (for admin use)"""
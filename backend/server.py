@@ -11,25 +11,25 @@ from motor.motor_asyncio import AsyncIOMotorClient
 from fastapi import FastAPI, APIRouter, Depends, HTTPException, Request, UploadFile, File, Form
 from fastapi.security import HTTPBearer
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel, EmailStr, Field
 from typing import List, Optional, Dict, Any
 import uuid
+import json
+import asyncio
 from datetime import datetime, timedelta
 import openai
-from openai import AsyncOpenAI
 import io
 import base64
 import mimetypes
-import hashlib
-import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
 import logging
 from pathlib import Path
 from dotenv import load_dotenv
 
 # Import AI Intelligence System
-from typing import Dict, Any
+from types import MappingProxyType
+from typing import Mapping
+from core.question_classifier import classify_question, get_question_classifier
 
 # Import Weekly Reporting Service
 from weekly_reporting_service import WeeklyReportingService, test_weekly_report
@@ -44,6 +44,23 @@ from core.observability import get_observability, record_request_metrics
 # Import Phase 3: Dynamic suggestions system
 from core.suggestions import detect_topic, suggest_actions
 
+# Import knowledge bank vector index
+from core.knowledge.vector_index import init_knowledge_index_manager, get_knowledge_index_manager, boost_weight
+from core.knowledge.embedding_cache import get_embedding_cache
+from core.knowledge.hydration import hydrate_documents
+from core.knowledge.embedding_codec import encode_embedding
+from core.knowledge.embeddings import (
+    generate_embeddings_batch, get_embedding_provider, init_embedding_provider,
+    LocalEmbeddingProvider, OpenAIEmbeddingProvider
+)
+from core.knowledge.ingestion import init_ingestion_queue, get_ingestion_queue, EMBEDDING
+from core.knowledge.extraction import get_extraction_service, ExtractionError
+from core.knowledge.uploads import receive_upload, remove_spooled, UploadTooLarge
+from core.knowledge.chunking import index_document_chunks, ensure_chunk_indexes, search_document_hits
+from core.config import config
+from core.llm_gateway import init_llm_gateway
+from core.stores.conversation_store import init_async_conversation_store, close_async_conversation_store
+
 # Import sample v2 endpoints for testing
 from sample_v2_endpoint import router as sample_router
 
@@ -54,15 +71,23 @@ from prompts_endpoints import router as prompts_router
 from backend.health_endpoints import router as health_router
 
 # Advanced AI Intelligence System
-class AIIntelligencePhases:
-    """3-Phase AI Intelligence System for Construction Industry"""
-    
-    @staticmethod
-    def get_enhanced_prompts() -> Dict[str, str]:
-        """Phase 1: Enhanced Prompting - Master Instruction System for Construction Industry"""
-        return {
-            # MASTER SYSTEM PROMPT - FOUNDATION
-            "general": """
+# Prompt and knowledge tables are built once at import and shared read-only between requests;
+# stage, discipline and sector come from the keyword index in core.question_classifier
+
+
+def _frozen(value: Any) -> Any:
+    """Read-only copy of nested literal data: dicts become mapping proxies, lists tuples"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _frozen(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_frozen(item) for item in value)
+    return value
+
+
+# Phase 1: Enhanced Prompting - Master Instruction System for Construction Industry
+ENHANCED_PROMPTS: Mapping[str, str] = _frozen({
+    # MASTER SYSTEM PROMPT - FOUNDATION
+    "general": """
 You are ONESource AI, the definitive construction compliance advisor for AU/NZ markets.
 
 ENHANCED SECTION FRAMEWORK - SELECTIVE USE ONLY:
@@ -102,8 +127,8 @@ CRITICAL: Always use 🧐 (professor with monocle) for Mentoring Insight section
 CRITICAL: Only include sections that add value to the specific question asked.
 """,
 
-            # SPECIALIZED DISCIPLINES
-            "hydraulic_engineering": """
+    # SPECIALIZED DISCIPLINES
+    "hydraulic_engineering": """
 You are a senior hydraulic engineer specializing in AU/NZ plumbing and drainage systems.
 
 ENHANCED SECTION FRAMEWORK - MANDATORY STRUCTURE:
@@ -138,7 +163,7 @@ RESPONSE APPROACH:
 - Address water authority approval processes
 """,
 
-            "structural_engineering": """
+    "structural_engineering": """
 You are a senior structural engineer specializing in AU/NZ structural design and construction.
 
 ENHANCED SECTION FRAMEWORK - MANDATORY STRUCTURE:
@@ -173,7 +198,7 @@ RESPONSE APPROACH:
 - Address peer review recommendations for complex projects
 """,
 
-            "fire_engineering": """
+    "fire_engineering": """
 You are a fire safety engineer specializing in AU/NZ fire engineering and performance-based solutions.
 
 ENHANCED SECTION FRAMEWORK - MANDATORY STRUCTURE:
@@ -208,7 +233,7 @@ RESPONSE APPROACH:
 - Address fire authority consultation requirements
 """,
 
-            "building_surveying": """
+    "building_surveying": """
 You are a registered building surveyor specializing in AU/NZ building compliance and certification.
 
 ENHANCED SECTION FRAMEWORK - MANDATORY STRUCTURE:
@@ -242,457 +267,322 @@ RESPONSE APPROACH:
 - Address inspection and certification schedules
 - Reference professional indemnity and registration requirements
 """,
-        }
-    
-    @staticmethod
-    def get_sector_contexts() -> Dict[str, str]:
-        """Industry sector-specific contexts for 17 sectors"""
-        return {
-            "commercial": """
+})
+
+# Industry sector-specific contexts for 17 sectors
+SECTOR_CONTEXTS: Mapping[str, str] = _frozen({
+    "commercial": """
             SECTOR CONTEXT: Commercial buildings (offices, retail, mixed-use developments)
             KEY CONSIDERATIONS: Open plan flexibility, high occupancy loads, 24/7 operations, tenant requirements, base building vs tenant fit-out, accessibility compliance, energy efficiency ratings
             TYPICAL CHALLENGES: Services distribution in open plan, acoustic privacy, after-hours security, parking ratios, waste management
             """,
-            
-            "industrial": """
+
+    "industrial": """
             SECTOR CONTEXT: Industrial facilities (warehouses, manufacturing plants, distribution hubs)
             KEY CONSIDERATIONS: Heavy loading, high bay construction, specialised services, process requirements, heavy vehicle access, dangerous goods storage
             TYPICAL CHALLENGES: Structural loads, fire protection for high rack storage, process ventilation, crane loads, truck maneuvering areas
             """,
-            
-            "mining_resources": """
+
+    "mining_resources": """
             SECTOR CONTEXT: Mining infrastructure (processing plants, camps, remote facilities)
             KEY CONSIDERATIONS: Remote locations, harsh environments, temporary vs permanent facilities, worker accommodation, process plant requirements
             TYPICAL CHALLENGES: Extreme weather design, logistics constraints, power generation, water supply, waste disposal
             """,
-            
-            "health": """
+
+    "health": """
             SECTOR CONTEXT: Healthcare facilities (hospitals, aged care, medical centres, specialist clinics)
             KEY CONSIDERATIONS: Infection control, life safety systems, medical gases, specialised equipment, patient accessibility, 24/7 operations
             TYPICAL CHALLENGES: Air pressure relationships, electrical reliability, water quality, medical equipment integration, patient flow
             """,
-            
-            "data_centres": """
+
+    "data_centres": """
             SECTOR CONTEXT: Data processing facilities (hyperscale, enterprise, colocation)
             KEY CONSIDERATIONS: Power density, cooling requirements, redundancy, security, electromagnetic compatibility, future expansion
             TYPICAL CHALLENGES: Power distribution, cooling efficiency, fire suppression (water-free), raised floor systems, cable management
             """,
-            
-            "residential": """
+
+    "residential": """
             SECTOR CONTEXT: Residential buildings (apartments, townhouses, detached housing)
             KEY CONSIDERATIONS: Acoustic privacy, accessibility, energy efficiency, natural ventilation, fire safety, building defects legislation
             TYPICAL CHALLENGES: Acoustic separation, waterproofing, thermal performance, fire egress, common area maintenance
             """,
-            
-            "hotels_hospitality": """
+
+    "hotels_hospitality": """
             SECTOR CONTEXT: Hospitality facilities (hotels, resorts, serviced apartments)
             KEY CONSIDERATIONS: Guest comfort, noise control, 24/7 operations, food service facilities, recreational amenities, security
             TYPICAL CHALLENGES: Acoustic privacy between rooms, hot water systems, kitchen ventilation, swimming pool areas, fire safety
             """,
-            
-            "education": """
+
+    "education": """
             SECTOR CONTEXT: Educational facilities (schools, universities, research facilities)
             KEY CONSIDERATIONS: Large occupancy numbers, varied age groups, specialised teaching spaces, accessibility, security, future flexibility
             TYPICAL CHALLENGES: Assembly occupancy, laboratory requirements, sports facility integration, acoustic control, technology infrastructure
             """,
-            
-            "transport_infrastructure": """
+
+    "transport_infrastructure": """
             SECTOR CONTEXT: Transport facilities (airports, rail, ports, roads, bridges)
             KEY CONSIDERATIONS: Public access, high traffic volumes, security requirements, weather exposure, maintenance access, future expansion
             TYPICAL CHALLENGES: Structural loads, environmental exposure, public safety, operational continuity, heritage considerations
             """,
-            
-            "energy_utilities": """
+
+    "energy_utilities": """
             SECTOR CONTEXT: Energy facilities (power generation, renewable energy, water/wastewater plants)
             KEY CONSIDERATIONS: Process requirements, environmental impact, safety systems, regulatory compliance, operational reliability
             TYPICAL CHALLENGES: Hazardous area design, environmental compliance, process safety, maintenance access, emergency systems
             """,
-            
-            "government_civic": """
+
+    "government_civic": """
             SECTOR CONTEXT: Government facilities (courthouses, civic centres, defence facilities)
             KEY CONSIDERATIONS: Public access, security requirements, ceremonial spaces, accessibility compliance, heritage considerations
             TYPICAL CHALLENGES: Security vs accessibility balance, public gathering areas, technology integration, long-term durability
             """,
-            
-            "retail_entertainment": """
+
+    "retail_entertainment": """
             SECTOR CONTEXT: Public facilities (shopping centres, cinemas, stadiums, cultural venues)
             KEY CONSIDERATIONS: High occupancy, emergency egress, accessibility, atmospheric control, entertainment systems, food service
             TYPICAL CHALLENGES: Large span structures, acoustic control, crowd management, fire safety in assembly spaces, HVAC for variable loads
             """,
-            
-            "agriculture_food": """
+
+    "agriculture_food": """
             SECTOR CONTEXT: Food processing facilities (abattoirs, cold storage, food manufacturing plants)
             KEY CONSIDERATIONS: Food safety requirements, temperature control, hygiene standards, process equipment, waste management
             TYPICAL CHALLENGES: Temperature and humidity control, drainage systems, equipment loads, cleaning requirements, pest exclusion
             """,
-            
-            "sports_recreation": """
+
+    "sports_recreation": """
             SECTOR CONTEXT: Recreation facilities (aquatic centres, gyms, sports complexes)
             KEY CONSIDERATIONS: Specialised environments, high humidity areas, equipment loads, spectator areas, accessibility
             TYPICAL CHALLENGES: Pool hall environments, equipment foundations, acoustic control, ventilation for high occupancy
             """,
-            
-            "mixed_use": """
+
+    "mixed_use": """
             SECTOR CONTEXT: Mixed-use developments (integrated residential/commercial/retail hubs)
             KEY CONSIDERATIONS: Multiple occupancy types, shared services, acoustic separation, fire separation, parking requirements
             TYPICAL CHALLENGES: Services distribution, fire compartmentation, acoustic separation, waste management, access control
             """,
-            
-            "specialist_facilities": """
+
+    "specialist_facilities": """
             SECTOR CONTEXT: Specialised facilities (laboratories, cleanrooms, high-security facilities)
             KEY CONSIDERATIONS: Controlled environments, specialised services, security requirements, contamination control, precise environmental control
             TYPICAL CHALLENGES: Air quality control, vibration control, electromagnetic compatibility, waste disposal, decontamination systems
             """,
-            
-            "others": """
+
+    "others": """
             SECTOR CONTEXT: Other specialised or unique facility types not covered by standard categories
             KEY CONSIDERATIONS: Project-specific requirements, unique challenges, specialised regulatory requirements, innovative solutions
             TYPICAL CHALLENGES: Non-standard design criteria, limited precedents, specialised approval processes, unique risk factors
             """
-        }
+})
+
+# Phase 2: Workflow recommendations per project stage
+WORKFLOW_STAGES: Mapping[str, Mapping[str, Any]] = _frozen({
+    "concept_planning": {
+        "current_stage": "Concept & Planning",
+        "typical_next_steps": [
+            "Engage architect/designer for preliminary concepts",
+            "Conduct site analysis and surveys",
+            "Preliminary budget estimation",
+            "Council pre-application advice",
+            "Geotechnical investigation if required"
+        ],
+        "key_consultants": ["Architect", "Town Planner", "Surveyor"],
+        "critical_considerations": ["Zoning compliance", "Site constraints", "Budget parameters"]
+    },
+    "design_development": {
+        "current_stage": "Design Development", 
+        "typical_next_steps": [
+            "Detailed architectural drawings",
+            "Structural engineering design",
+            "Services engineering (mechanical, electrical, hydraulic)",
+            "Energy efficiency modeling",
+            "Accessibility compliance review"
+        ],
+        "key_consultants": ["Structural Engineer", "Services Engineer", "Energy Assessor"],
+        "critical_considerations": ["NCC compliance", "Structural adequacy", "Energy efficiency"]
+    },
+    "regulatory_approval": {
+        "current_stage": "Regulatory Approval",
+        "typical_next_steps": [
+            "Building consent application preparation",
+            "Engineering calculations and certificates", 
+            "Fire safety report if required",
+            "Accessibility compliance statement",
+            "Council/certifier submission"
+        ],
+        "key_consultants": ["Building Certifier", "Fire Engineer", "Access Consultant"],
+        "critical_considerations": ["Complete documentation", "Professional certifications", "Authority requirements"]
+    },
+    "procurement": {
+        "current_stage": "Procurement & Tendering",
+        "typical_next_steps": [
+            "Tender documentation preparation",
+            "Contractor selection and vetting",
+            "Contract negotiation and execution",
+            "Insurance and bonding arrangements",
+            "Construction program development"
+        ],
+        "key_consultants": ["Quantity Surveyor", "Contract Administrator", "Project Manager"],  
+        "critical_considerations": ["Contract terms", "Insurance adequacy", "Quality assurance"]
+    },
+    "construction": {
+        "current_stage": "Construction Phase",
+        "typical_next_steps": [
+            "Regular site inspections and quality control",
+            "Progress payments and variation management", 
+            "Mandatory inspections scheduling",
+            "Material testing and compliance verification",
+            "Coordination of trades and services"
+        ],
+        "key_consultants": ["Site Supervisor", "Quality Assurance", "Testing Services"],
+        "critical_considerations": ["Safety compliance", "Quality control", "Program adherence"]
+    },
+    "completion": {
+        "current_stage": "Completion & Handover",
+        "typical_next_steps": [
+            "Final inspections and compliance verification",
+            "Defects identification and rectification",
+            "Completion certificates and warranties",
+            "Operation and maintenance manual handover",
+            "Final account settlement"
+        ],
+        "key_consultants": ["Building Inspector", "Maintenance Contractor", "Warranty Provider"],
+        "critical_considerations": ["Defects liability", "Warranty coverage", "Maintenance requirements"]
+    },
+    "general_inquiry": {
+        "current_stage": "Information Gathering",
+        "typical_next_steps": [
+            "Define project scope and objectives",
+            "Identify key stakeholders and consultants",
+            "Establish preliminary timeline and budget",
+            "Research applicable standards and regulations"
+        ],
+        "key_consultants": ["Project Advisor", "Relevant Specialist"],
+        "critical_considerations": ["Scope definition", "Resource planning", "Regulatory research"]
+    }
+})
+
+# Phase 3: Discipline-specific knowledge
+SPECIALIZED_KNOWLEDGE: Mapping[str, Mapping[str, Any]] = _frozen({
+    "structural": {
+        "key_standards": [
+            "AS 1170.0 - Structural design actions - General principles",
+            "AS 1170.1 - Permanent, imposed and other actions", 
+            "AS 1170.2 - Wind actions",
+            "AS 1170.4 - Earthquake actions",
+            "AS 3600 - Concrete structures",
+            "AS 4100 - Steel structures"
+        ],
+        "common_calculations": [
+            "Wind load calculations per AS 1170.2",
+            "Seismic design per AS 1170.4", 
+            "Concrete design per AS 3600",
+            "Steel connection design per AS 4100"
+        ],
+        "professional_requirements": [
+            "Structural engineer certification required",
+            "Professional indemnity insurance essential", 
+            "Regular CPD maintenance required",
+            "Peer review recommended for complex projects"
+        ]
+    },
+
+    "fire_safety": {
+        "key_standards": [
+            "AS 1530 - Methods for fire tests on building materials",
+            "AS 1851 - Maintenance of fire protection systems",
+            "AS 2118 - Automatic fire sprinkler systems", 
+            "AS 3786 - Smoke alarms using scattered light",
+            "AS 4072 - Components for fire detection systems"
+        ],
+        "design_considerations": [
+            "Building classification and fire safety objectives",
+            "Egress analysis and travel distances",
+            "Fire resistance levels (FRL) requirements",
+            "Smoke hazard management systems"
+        ],
+        "compliance_verification": [
+            "Fire engineering report required for performance solutions",
+            "Fire authority consultation for complex buildings",
+            "Third-party certification for critical systems"
+        ]
+    },
+
+    "mechanical": {
+        "key_standards": [
+            "AS 1668 - The use of mechanical ventilation",
+            "AS 3700 - Masonry structures", 
+            "AS 5601 - Gas installations",
+            "AS/NZS 3000 - Electrical installations"
+        ],
+        "system_design": [
+            "HVAC load calculations and equipment sizing",
+            "Ventilation rates per AS 1668",
+            "Energy efficiency per NCC Section J",
+            "Refrigerant selection and environmental impact"
+        ],
+        "installation_requirements": [
+            "Licensed tradesperson installation mandatory",
+            "Pressure testing and commissioning required",
+            "Operation and maintenance manual provision"
+        ]
+    },
+
+    "hydraulic": {
+        "key_standards": [
+            "AS/NZS 3500 - Plumbing and drainage",
+            "AS 2419 - Fire hydrant installations",
+            "AS 3500.1 - Water services",
+            "AS 3500.2 - Sanitary plumbing and drainage"  
+        ],
+        "design_principles": [
+            "Water supply sizing and pressure requirements",
+            "Drainage design and pipe sizing",
+            "Stormwater management and detention",
+            "Water efficiency and WELS compliance"
+        ],
+        "regulatory_aspects": [
+            "Licensed plumber installation required",
+            "Water authority approvals for connections",
+            "Backflow prevention device mandatory"
+        ]
+    }
+})
+
+CROSS_DISCIPLINE_CONSIDERATIONS = (
+    "Coordination with other engineering disciplines required",
+    "Integrated design approach recommended",
+    "Professional liability and insurance considerations",
+    "Quality assurance and peer review processes",
+)
+
+
+class AIIntelligencePhases:
+    """3-Phase AI Intelligence System for Construction Industry"""
+    
+    @staticmethod
+    def get_enhanced_prompts() -> Mapping[str, str]:
+        """Phase 1: Enhanced Prompting - Master Instruction System for Construction Industry"""
+        return ENHANCED_PROMPTS
+    
+    @staticmethod
+    def get_sector_contexts() -> Mapping[str, str]:
+        """Industry sector-specific contexts for 17 sectors"""
+        return SECTOR_CONTEXTS
     
     @staticmethod 
-    def detect_workflow_stage(question: str, context: Dict[str, Any] = None) -> Dict[str, Any]:
+    def detect_workflow_stage(question: str, context: Dict[str, Any] = None) -> Mapping[str, Any]:
         """Phase 2: Workflow Intelligence - Detect project stage and suggest next steps"""
-        
-        question_lower = question.lower()
-        
-        # Project stage detection
-        if any(word in question_lower for word in ["planning", "concept", "feasibility", "initial"]):
-            stage = "concept_planning"
-        elif any(word in question_lower for word in ["design", "drawings", "architect", "plans"]):
-            stage = "design_development"
-        elif any(word in question_lower for word in ["approval", "consent", "permit", "certifier"]):
-            stage = "regulatory_approval"  
-        elif any(word in question_lower for word in ["tender", "contractor", "quote", "pricing"]):
-            stage = "procurement"
-        elif any(word in question_lower for word in ["construction", "building", "site", "concrete"]):
-            stage = "construction"
-        elif any(word in question_lower for word in ["inspection", "completion", "handover", "defects"]):
-            stage = "completion"
-        else:
-            stage = "general_inquiry"
-        
-        # Workflow recommendations based on stage
-        workflows = {
-            "concept_planning": {
-                "current_stage": "Concept & Planning",
-                "typical_next_steps": [
-                    "Engage architect/designer for preliminary concepts",
-                    "Conduct site analysis and surveys",
-                    "Preliminary budget estimation",
-                    "Council pre-application advice",
-                    "Geotechnical investigation if required"
-                ],
-                "key_consultants": ["Architect", "Town Planner", "Surveyor"],
-                "critical_considerations": ["Zoning compliance", "Site constraints", "Budget parameters"]
-            },
-            "design_development": {
-                "current_stage": "Design Development", 
-                "typical_next_steps": [
-                    "Detailed architectural drawings",
-                    "Structural engineering design",
-                    "Services engineering (mechanical, electrical, hydraulic)",
-                    "Energy efficiency modeling",
-                    "Accessibility compliance review"
-                ],
-                "key_consultants": ["Structural Engineer", "Services Engineer", "Energy Assessor"],
-                "critical_considerations": ["NCC compliance", "Structural adequacy", "Energy efficiency"]
-            },
-            "regulatory_approval": {
-                "current_stage": "Regulatory Approval",
-                "typical_next_steps": [
-                    "Building consent application preparation",
-                    "Engineering calculations and certificates", 
-                    "Fire safety report if required",
-                    "Accessibility compliance statement",
-                    "Council/certifier submission"
-                ],
-                "key_consultants": ["Building Certifier", "Fire Engineer", "Access Consultant"],
-                "critical_considerations": ["Complete documentation", "Professional certifications", "Authority requirements"]
-            },
-            "procurement": {
-                "current_stage": "Procurement & Tendering",
-                "typical_next_steps": [
-                    "Tender documentation preparation",
-                    "Contractor selection and vetting",
-                    "Contract negotiation and execution",
-                    "Insurance and bonding arrangements",
-                    "Construction program development"
-                ],
-                "key_consultants": ["Quantity Surveyor", "Contract Administrator", "Project Manager"],  
-                "critical_considerations": ["Contract terms", "Insurance adequacy", "Quality assurance"]
-            },
-            "construction": {
-                "current_stage": "Construction Phase",
-                "typical_next_steps": [
-                    "Regular site inspections and quality control",
-                    "Progress payments and variation management", 
-                    "Mandatory inspections scheduling",
-                    "Material testing and compliance verification",
-                    "Coordination of trades and services"
-                ],
-                "key_consultants": ["Site Supervisor", "Quality Assurance", "Testing Services"],
-                "critical_considerations": ["Safety compliance", "Quality control", "Program adherence"]
-            },
-            "completion": {
-                "current_stage": "Completion & Handover",
-                "typical_next_steps": [
-                    "Final inspections and compliance verification",
-                    "Defects identification and rectification",
-                    "Completion certificates and warranties",
-                    "Operation and maintenance manual handover",
-                    "Final account settlement"
-                ],
-                "key_consultants": ["Building Inspector", "Maintenance Contractor", "Warranty Provider"],
-                "critical_considerations": ["Defects liability", "Warranty coverage", "Maintenance requirements"]
-            },
-            "general_inquiry": {
-                "current_stage": "Information Gathering",
-                "typical_next_steps": [
-                    "Define project scope and objectives",
-                    "Identify key stakeholders and consultants",
-                    "Establish preliminary timeline and budget",
-                    "Research applicable standards and regulations"
-                ],
-                "key_consultants": ["Project Advisor", "Relevant Specialist"],
-                "critical_considerations": ["Scope definition", "Resource planning", "Regulatory research"]
-            }
-        }
-        
-        return workflows.get(stage, workflows["general_inquiry"])
+        return WORKFLOW_STAGES[classify_question(question).stage]
     
     @staticmethod
     def get_specialized_context(discipline: str, question: str) -> Dict[str, Any]:
         """Phase 3: Specialized Training - Discipline-specific knowledge enhancement"""
-        
-        specialized_knowledge = {
-            "structural": {
-                "key_standards": [
-                    "AS 1170.0 - Structural design actions - General principles",
-                    "AS 1170.1 - Permanent, imposed and other actions", 
-                    "AS 1170.2 - Wind actions",
-                    "AS 1170.4 - Earthquake actions",
-                    "AS 3600 - Concrete structures",
-                    "AS 4100 - Steel structures"
-                ],
-                "common_calculations": [
-                    "Wind load calculations per AS 1170.2",
-                    "Seismic design per AS 1170.4", 
-                    "Concrete design per AS 3600",
-                    "Steel connection design per AS 4100"
-                ],
-                "professional_requirements": [
-                    "Structural engineer certification required",
-                    "Professional indemnity insurance essential", 
-                    "Regular CPD maintenance required",
-                    "Peer review recommended for complex projects"
-                ]
-            },
-            
-            "fire_safety": {
-                "key_standards": [
-                    "AS 1530 - Methods for fire tests on building materials",
-                    "AS 1851 - Maintenance of fire protection systems",
-                    "AS 2118 - Automatic fire sprinkler systems", 
-                    "AS 3786 - Smoke alarms using scattered light",
-                    "AS 4072 - Components for fire detection systems"
-                ],
-                "design_considerations": [
-                    "Building classification and fire safety objectives",
-                    "Egress analysis and travel distances",
-                    "Fire resistance levels (FRL) requirements",
-                    "Smoke hazard management systems"
-                ],
-                "compliance_verification": [
-                    "Fire engineering report required for performance solutions",
-                    "Fire authority consultation for complex buildings",
-                    "Third-party certification for critical systems"
-                ]
-            },
-            
-            "mechanical": {
-                "key_standards": [
-                    "AS 1668 - The use of mechanical ventilation",
-                    "AS 3700 - Masonry structures", 
-                    "AS 5601 - Gas installations",
-                    "AS/NZS 3000 - Electrical installations"
-                ],
-                "system_design": [
-                    "HVAC load calculations and equipment sizing",
-                    "Ventilation rates per AS 1668",
-                    "Energy efficiency per NCC Section J",
-                    "Refrigerant selection and environmental impact"
-                ],
-                "installation_requirements": [
-                    "Licensed tradesperson installation mandatory",
-                    "Pressure testing and commissioning required",
-                    "Operation and maintenance manual provision"
-                ]
-            },
-            
-            "hydraulic": {
-                "key_standards": [
-                    "AS/NZS 3500 - Plumbing and drainage",
-                    "AS 2419 - Fire hydrant installations",
-                    "AS 3500.1 - Water services",
-                    "AS 3500.2 - Sanitary plumbing and drainage"  
-                ],
-                "design_principles": [
-                    "Water supply sizing and pressure requirements",
-                    "Drainage design and pipe sizing",
-                    "Stormwater management and detention",
-                    "Water efficiency and WELS compliance"
-                ],
-                "regulatory_aspects": [
-                    "Licensed plumber installation required",
-                    "Water authority approvals for connections",
-                    "Backflow prevention device mandatory"
-                ]
-            }
-        }
-        
-        # Detect discipline from question content - ENHANCED DETECTION
-        question_lower = question.lower()
-        detected_discipline = "building_codes"  # Default
-        
-        # MECHANICAL & BUILDING SERVICES
-        if any(word in question_lower for word in ["hydraulic", "plumbing", "water supply", "drainage", "sewer", "pipes"]):
-            detected_discipline = "hydraulic_engineering"
-        elif any(word in question_lower for word in ["hvac", "mechanical", "ventilation", "heating", "cooling", "air conditioning"]):
-            detected_discipline = "mechanical_services"
-        elif any(word in question_lower for word in ["sprinkler", "fire pump", "suppression", "wet system", "dry system"]):
-            detected_discipline = "fire_protection_wet_dry"
-        elif any(word in question_lower for word in ["fire engineering", "performance based", "fire model", "egress"]):
-            detected_discipline = "fire_engineering"
-        elif any(word in question_lower for word in ["electrical", "power", "lighting", "switchboard", "cable"]):
-            detected_discipline = "electrical_engineering"
-        elif any(word in question_lower for word in ["communications", "ict", "data", "telecommunications", "network"]):
-            detected_discipline = "communications_ict"
-        elif any(word in question_lower for word in ["security", "access control", "cctv", "alarm"]):
-            detected_discipline = "security_systems"
-        elif any(word in question_lower for word in ["lift", "elevator", "escalator", "vertical transport"]):
-            detected_discipline = "vertical_transportation"
-        elif any(word in question_lower for word in ["bms", "building automation", "control system", "smart building"]):
-            detected_discipline = "building_automation"
-        elif any(word in question_lower for word in ["acoustic", "noise", "sound", "vibration"]):
-            detected_discipline = "acoustic_engineering"
-        elif any(word in question_lower for word in ["lighting design", "illumination", "daylight"]):
-            detected_discipline = "lighting_design"
-            
-        # STRUCTURAL & CIVIL
-        elif any(word in question_lower for word in ["structural", "beam", "column", "foundation", "load", "concrete", "steel"]):
-            detected_discipline = "structural_engineering"
-        elif any(word in question_lower for word in ["civil", "site development", "earthworks", "pavement", "infrastructure"]):
-            detected_discipline = "civil_engineering"
-        elif any(word in question_lower for word in ["geotechnical", "soil", "foundation", "pile", "bearing capacity"]):
-            detected_discipline = "geotechnical_engineering"
-        elif any(word in question_lower for word in ["seismic", "earthquake", "dynamic", "ductility"]):
-            detected_discipline = "seismic_engineering"
-            
-        # ARCHITECTURE & DESIGN
-        elif any(word in question_lower for word in ["architecture", "design", "space planning", "layout"]):
-            detected_discipline = "architecture"
-        elif any(word in question_lower for word in ["interior design", "fitout", "furniture", "finishes"]):
-            detected_discipline = "interior_design"
-        elif any(word in question_lower for word in ["landscape", "outdoor", "garden", "plaza"]):
-            detected_discipline = "landscape_architecture"
-        elif any(word in question_lower for word in ["urban planning", "town planning", "zoning"]):
-            detected_discipline = "urban_design"
-            
-        # SUSTAINABILITY & ENVIRONMENTAL
-        elif any(word in question_lower for word in ["sustainability", "green building", "environmental", "carbon"]):
-            detected_discipline = "sustainability"
-        elif any(word in question_lower for word in ["energy modelling", "energy efficiency", "thermal performance"]):
-            detected_discipline = "energy_modelling"
-            
-        # BUILDING ENVELOPE
-        elif any(word in question_lower for word in ["facade", "curtain wall", "glazing", "window"]):
-            detected_discipline = "facade_engineering"
-        elif any(word in question_lower for word in ["waterproofing", "membrane", "sealant", "water ingress"]):
-            detected_discipline = "waterproofing_design"
-        elif any(word in question_lower for word in ["roofing", "roof", "membrane", "tiles"]):
-            detected_discipline = "roofing_systems"
-        elif any(word in question_lower for word in ["cladding", "external wall", "panels"]):
-            detected_discipline = "cladding_systems"
-        elif any(word in question_lower for word in ["green star", "nabers", "well", "certification"]):
-            detected_discipline = "green_building_certification"
-            
-        # PROJECT MANAGEMENT & COMMERCIAL
-        elif any(word in question_lower for word in ["project management", "program", "schedule", "coordination"]):
-            detected_discipline = "project_management"
-        elif any(word in question_lower for word in ["cost", "quantity surveying", "estimate", "budget"]):
-            detected_discipline = "cost_planning"
-        elif any(word in question_lower for word in ["contract", "legal", "procurement", "tender"]):
-            detected_discipline = "contract_administration"
-        elif any(word in question_lower for word in ["design management", "coordination", "BIM"]):
-            detected_discipline = "design_management"
-        elif any(word in question_lower for word in ["risk", "safety", "hazard"]):
-            detected_discipline = "risk_management"
-            
-        # SPECIALIST DISCIPLINES
-        elif any(word in question_lower for word in ["heritage", "conservation", "restoration"]):
-            detected_discipline = "heritage_conservation"
-        elif any(word in question_lower for word in ["modular", "prefab", "offsite"]):
-            detected_discipline = "modular_prefabrication"
-        elif any(word in question_lower for word in ["industrial", "process", "manufacturing", "plant"]):
-            detected_discipline = "industrial_process"
-        elif any(word in question_lower for word in ["asbestos", "lead", "hazardous materials"]):
-            detected_discipline = "hazardous_materials"
-        elif any(word in question_lower for word in ["environmental engineering", "contamination", "remediation"]):
-            detected_discipline = "environmental_engineering"
-        elif any(word in question_lower for word in ["traffic", "transport", "parking", "roads"]):
-            detected_discipline = "traffic_transport"
-        elif any(word in question_lower for word in ["health planning", "medical", "hospital", "healthcare"]):
-            detected_discipline = "health_planning"
-        elif any(word in question_lower for word in ["wayfinding", "signage", "navigation"]):
-            detected_discipline = "wayfinding_signage"
-        elif any(word in question_lower for word in ["waste", "recycling", "garbage"]):
-            detected_discipline = "waste_management"
-        
-        # Detect sector from question content
-        detected_sector = "others"  # Default
-        
-        if any(word in question_lower for word in ["office", "commercial", "retail", "mixed use"]):
-            detected_sector = "commercial"
-        elif any(word in question_lower for word in ["warehouse", "industrial", "manufacturing", "factory"]):
-            detected_sector = "industrial"
-        elif any(word in question_lower for word in ["mining", "mine", "resources", "camp"]):
-            detected_sector = "mining_resources"  
-        elif any(word in question_lower for word in ["hospital", "medical", "health", "aged care", "clinic"]):
-            detected_sector = "health"
-        elif any(word in question_lower for word in ["data centre", "server", "data center"]):
-            detected_sector = "data_centres"
-        elif any(word in question_lower for word in ["residential", "apartment", "house", "townhouse"]):
-            detected_sector = "residential"
-        elif any(word in question_lower for word in ["hotel", "hospitality", "resort", "accommodation"]):
-            detected_sector = "hotels_hospitality"
-        elif any(word in question_lower for word in ["school", "university", "education", "classroom"]):
-            detected_sector = "education"
-        elif any(word in question_lower for word in ["airport", "rail", "transport", "infrastructure", "bridge"]):
-            detected_sector = "transport_infrastructure"
-        elif any(word in question_lower for word in ["power plant", "utility", "energy", "water treatment"]):
-            detected_sector = "energy_utilities"
-        elif any(word in question_lower for word in ["government", "civic", "courthouse", "defence"]):
-            detected_sector = "government_civic"
-        elif any(word in question_lower for word in ["shopping", "cinema", "stadium", "entertainment"]):
-            detected_sector = "retail_entertainment"
-        elif any(word in question_lower for word in ["food processing", "abattoir", "cold storage"]):
-            detected_sector = "agriculture_food"
-        elif any(word in question_lower for word in ["sports", "recreation", "gym", "aquatic"]):
-            detected_sector = "sports_recreation"
-        elif any(word in question_lower for word in ["laboratory", "cleanroom", "security facility"]):
-            detected_sector = "specialist_facilities"
-            
+        classification = classify_question(question)
         return {
-            "detected_discipline": detected_discipline,
-            "specialized_knowledge": specialized_knowledge.get(detected_discipline, {}),
-            "cross_discipline_considerations": [
-                "Coordination with other engineering disciplines required",
-                "Integrated design approach recommended", 
-                "Professional liability and insurance considerations",
-                "Quality assurance and peer review processes"
-            ]
+            "detected_discipline": classification.discipline,
+            "detected_sector": classification.sector,
+            "specialized_knowledge": SPECIALIZED_KNOWLEDGE.get(classification.discipline, {}),
+            "cross_discipline_considerations": list(CROSS_DISCIPLINE_CONSIDERATIONS)
         }
 
 # Import our services
@@ -710,8 +600,15 @@ mongo_url = os.environ['MONGO_URL']
 client = AsyncIOMotorClient(mongo_url)
 db = client[os.environ['DB_NAME']]
 
-# Initialize OpenAI client
-openai_client = AsyncOpenAI(api_key=os.environ.get('OPENAI_API_KEY'))
+# Initialize OpenAI client: one pooled async client shared by chat, vision, metadata and embeddings
+llm_gateway = init_llm_gateway(api_key=os.environ.get('OPENAI_API_KEY', ''))
+openai_client = llm_gateway.client
+
+# Embeddings: OpenAI when a key is configured, deterministic local stand-in otherwise
+if llm_gateway.available:
+    init_embedding_provider(OpenAIEmbeddingProvider(openai_client, model="text-embedding-ada-002"))
+else:
+    init_embedding_provider(LocalEmbeddingProvider())
 
 # Initialize payment service
 payment_service = PaymentService(db)
@@ -744,6 +641,7 @@ class UserOnboardingData(BaseModel):
 class ChatQuestion(BaseModel):
     question: str
     session_id: Optional[str] = None
+    stream: bool = False  # opt-in Server-Sent Events response
 
 class ChatFeedback(BaseModel):
     message_id: str
@@ -954,6 +852,109 @@ async def get_subscription_status(current_user: Dict[str, Any] = Depends(get_cur
         raise HTTPException(status_code=500, detail=f"Error checking subscription: {str(e)}")
 
 # AI Chat Routes
+def token_usage_meta(meta) -> Dict[str, Any]:
+    """Prompt/completion/cached split behind meta.tokens_used"""
+    return {
+        "prompt_tokens": meta.prompt_tokens,
+        "completion_tokens": meta.completion_tokens,
+        "cached_tokens": meta.cached_tokens,
+        "estimated": meta.tokens_estimated,
+    }
+
+def v2_response(response, **meta) -> Dict[str, Any]:
+    """ChatResponse -> native v2 payload (title/summary/blocks from the formatter), so the schema guard passes without repair"""
+    return {
+        "title": response.title,
+        "summary": response.summary,
+        "blocks": [block.model_dump(exclude_none=True) for block in response.blocks],
+        "meta": {
+            "emoji": response.meta.emoji or "💬",
+            "schema": "v2",
+            "mapped": True,
+            "tier": response.meta.tier,
+            "session_id": response.meta.session_id,
+            "tokens_used": response.meta.tokens_used,
+            "token_usage": token_usage_meta(response.meta),
+            **meta,
+        }
+    }
+
+def chat_api_response(response) -> Dict[str, Any]:
+    """ChatResponse -> /chat/ask payload before schema validation"""
+    return v2_response(response)
+
+def finalize_chat_response(api_response: Dict[str, Any], session_id: Optional[str], label: str = "") -> Dict[str, Any]:
+    """Schema guard (validates the v2 payload; repairs only malformed ones) plus Phase 3 suggested actions"""
+    # SCHEMA GUARD: Validate and repair response to v2 format
+    validated_response, was_repaired = validate_chat_response(api_response)
+    
+    if was_repaired:
+        print(f"⚠️ SCHEMA REPAIR: {label or 'Chat'} response for session {session_id} was auto-repaired to v2 format")
+    
+    # PHASE 3: Add dynamic follow-on suggestions
+    try:
+        # Extract text content from validated response blocks
+        full_text = ""
+        for block in validated_response.get("blocks", []):
+            if block.get("content"):
+                full_text += str(block["content"]) + " "
+        
+        # Detect topic and generate suggestions
+        detected_topic = detect_topic(full_text)
+        suggested_actions = suggest_actions(
+            topic=detected_topic,
+            blocks=validated_response.get("blocks", []),
+            full_text=full_text
+        )
+        
+        # Add suggestions to meta if any were generated
+        if suggested_actions:
+            validated_response["meta"]["suggested_actions"] = suggested_actions
+            
+            # Track that suggestions were shown
+            observability = get_observability()
+            for action in suggested_actions:
+                observability.record_suggested_action_shown(action["label"], detected_topic)
+            
+            print(f"DEBUG: Added {len(suggested_actions)} suggestions for topic '{detected_topic}'{f' ({label})' if label else ''}")
+        
+    except Exception as suggestions_error:
+        print(f"Warning: Failed to generate suggestions: {suggestions_error}")
+        # Continue without suggestions - not a blocking error
+    
+    return validated_response
+
+def wants_event_stream(chat_data: "ChatQuestion", request: Request) -> bool:
+    """Streaming is opt-in: `"stream": true` in the body or `Accept: text/event-stream`"""
+    return bool(chat_data.stream) or "text/event-stream" in request.headers.get("accept", "")
+
+def sse_event(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str, ensure_ascii=False)}\n\n"
+
+def chat_event_stream(events, to_api_response, session_id: Optional[str], label: str = "") -> StreamingResponse:
+    """
+    SSE response for a unified chat stream: `delta` events carry header-normalized text as
+    tokens arrive; the terminal `final` event carries the validated v2 response (blocks,
+    meta, suggested_actions), built only after the turn has been persisted
+    """
+    async def generate():
+        try:
+            async for event in events:
+                if event["type"] == "delta":
+                    yield sse_event("delta", {"text": event["text"]})
+                else:
+                    api_response = await to_api_response(event["response"])
+                    yield sse_event("final", finalize_chat_response(api_response, session_id, label))
+        except Exception as e:
+            print(f"Error in chat stream: {e}")
+            yield sse_event("error", {"detail": "Internal server error"})
+
+    return StreamingResponse(
+        generate(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 @api_router.post("/chat/ask")
 async def unified_chat_ask(
     chat_data: ChatQuestion,
@@ -970,227 +971,118 @@ async def unified_chat_ask(
         
         print("DEBUG: Imported unified services successfully")
         
-        # Initialize Redis conversation store if not already done
-        if not hasattr(unified_chat_service, '_conversation_store_initialized'):
-            from core.stores.conversation_store import init_conversation_store
-            init_conversation_store()
-            unified_chat_service._conversation_store_initialized = True
-            print("DEBUG: Redis conversation store initialized")
-        
         # Determine user info
         user_id = current_user["uid"] if current_user else None
         tier = "starter"  # Regular endpoint always uses starter tier
         
         print(f"DEBUG: Calling unified chat service with tier={tier}, user_id={user_id}")
         
-        # Generate unified response using SHARED ORCHESTRATOR - NO ENDPOINT-SPECIFIC LOGIC
-        response = await unified_chat_service.generate_unified_response(
+        chat_args = dict(
             question=chat_data.question,
             session_id=chat_data.session_id or str(uuid.uuid4()),
             tier=tier,
             user_id=user_id,
             knowledge_context=None,  # Regular endpoint has no enhanced knowledge
-            topics=getattr(chat_data, "topics", None)  # Pass through topics if provided
+            topics=getattr(chat_data, "topics", None),  # Pass through topics if provided
+            endpoint="chat/ask"
         )
         
-        print(f"DEBUG: Unified chat service returned response length: {len(response.text)}")
+        if wants_event_stream(chat_data, request):
+            async def to_api_response(response):
+                return chat_api_response(response)
+            return chat_event_stream(unified_chat_service.stream_unified_response(**chat_args), to_api_response, chat_data.session_id)
         
-        # Convert to API response format with SCHEMA VALIDATION
-        api_response = {
-            "text": response.text,
-            "emoji_map": [{"name": item.name, "char": item.char} for item in response.emoji_map],
-            "mentoring_insight": response.mentoring_insight,
-            "meta": {
-                "tier": response.meta.tier,
-                "session_id": response.meta.session_id,
-                "tokens_used": response.meta.tokens_used,
-            }
-        }
-        
-        # SCHEMA GUARD: Validate and repair response to v2 format
-        validated_response, was_repaired = validate_chat_response(api_response)
-        
-        if was_repaired:
-            print(f"⚠️ SCHEMA REPAIR: Response for session {chat_data.session_id} was auto-repaired to v2 format")
+        # Generate unified response using SHARED ORCHESTRATOR - NO ENDPOINT-SPECIFIC LOGIC
+        response = await unified_chat_service.generate_unified_response(**chat_args)
         
-        # PHASE 3: Add dynamic follow-on suggestions
-        try:
-            # Extract text content from validated response blocks
-            full_text = ""
-            for block in validated_response.get("blocks", []):
-                if block.get("content"):
-                    full_text += str(block["content"]) + " "
-            
-            # Detect topic and generate suggestions
-            detected_topic = detect_topic(full_text)
-            suggested_actions = suggest_actions(
-                topic=detected_topic,
-                blocks=validated_response.get("blocks", []),
-                full_text=full_text
-            )
-            
-            # Add suggestions to meta if any were generated
-            if suggested_actions:
-                validated_response["meta"]["suggested_actions"] = suggested_actions
-                
-                # Track that suggestions were shown
-                observability = get_observability()
-                for action in suggested_actions:
-                    observability.record_suggested_action_shown(action["label"], detected_topic)
-                
-                print(f"DEBUG: Added {len(suggested_actions)} suggestions for topic '{detected_topic}'")
-            
-        except Exception as suggestions_error:
-            print(f"Warning: Failed to generate suggestions: {suggestions_error}")
-            # Continue without suggestions - not a blocking error
+        print(f"DEBUG: Unified chat service returned response length: {len(response.text)}")
         
-        return validated_response
+        # Convert to API response format with SCHEMA VALIDATION and suggestions
+        return finalize_chat_response(chat_api_response(response), chat_data.session_id)
         
     except Exception as e:
         print(f"Error in unified chat ask: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
 # Document Processing and AI Functions
-async def extract_text_from_file(file_content: bytes, content_type: str, filename: str) -> str:
-    """Extract text content from uploaded files using AI and specialized libraries"""
-    try:
-        # For PDFs, use PyPDF2 for better text extraction
-        if content_type == 'application/pdf':
-            try:
-                import PyPDF2
-                import io
-                
-                pdf_file = io.BytesIO(file_content)
-                pdf_reader = PyPDF2.PdfReader(pdf_file)
-                
-                text_content = []
-                for page_num, page in enumerate(pdf_reader.pages):
-                    page_text = page.extract_text()
-                    if page_text.strip():
-                        text_content.append(f"Page {page_num + 1}:\n{page_text}")
-                
-                extracted_text = "\n\n".join(text_content)
-                
-                # If no text was extracted or very little, use AI vision as fallback
-                if len(extracted_text.strip()) < 50:
-                    return f"PDF text extraction yielded minimal content from {filename}. Consider using OCR for scanned documents."
-                
-                return extracted_text
-                
-            except Exception as pdf_error:
-                return f"Error extracting PDF content from {filename}: {str(pdf_error)}"
-        
-        # For Word documents, use python-docx
-        elif content_type in ['application/msword', 'application/vnd.openxmlformats-officedocument.wordprocessingml.document']:
-            try:
-                from docx import Document
-                import io
-                
-                doc_file = io.BytesIO(file_content)
-                doc = Document(doc_file)
-                
-                # Extract text from paragraphs
-                text_content = []
-                for paragraph in doc.paragraphs:
-                    if paragraph.text.strip():
-                        text_content.append(paragraph.text)
-                
-                # Extract text from tables
-                for table in doc.tables:
-                    for row in table.rows:
-                        row_text = []
-                        for cell in row.cells:
-                            if cell.text.strip():
-                                row_text.append(cell.text.strip())
-                        if row_text:
-                            text_content.append(" | ".join(row_text))
-                
-                extracted_text = "\n".join(text_content)
-                
-                if len(extracted_text.strip()) < 10:
-                    return f"Word document content extraction yielded no readable text from {filename}"
-                
-                return extracted_text
-                
-            except Exception as word_error:
-                return f"Error extracting Word document content from {filename}: {str(word_error)}"
-        
-        # For images, use OpenAI Vision API
-        elif content_type.startswith('image/'):
-            try:
-                base64_content = base64.b64encode(file_content).decode('utf-8')
-                
-                response = await openai_client.chat.completions.create(
-                    model="gpt-4-vision-preview",
-                    messages=[
-                        {
-                            "role": "user",
-                            "content": [
-                                {"type": "text", "text": "Extract all text content from this construction document image. Include technical specifications, dimensions, standards references, supplier information, and any visible text. If this appears to be a construction drawing or blueprint, describe the key elements and any text/labels visible."},
-                                {"type": "image_url", "image_url": {"url": f"data:{content_type};base64,{base64_content}"}}
-                            ]
-                        }
-                    ],
-                    max_tokens=2000
-                )
-                return response.choices[0].message.content
-                
-            except Exception as vision_error:
-                return f"Error extracting content from image {filename}: {str(vision_error)}"
-        
-        # For plain text files and other formats
-        else:
-            try:
-                # Try UTF-8 first
-                return file_content.decode('utf-8')
-            except UnicodeDecodeError:
-                try:
-                    # Fallback to latin-1
-                    return file_content.decode('latin-1')
-                except UnicodeDecodeError:
-                    return f"Unable to decode text content from {filename}. File may be in an unsupported encoding."
+async def extract_text_from_file(file_path: str, content_type: str, filename: str) -> str:
+    """
+    Extract text content from a spooled upload using AI and specialized libraries
+    Raises ExtractionError when no text could be extracted, so the ingestion job retries or fails
+    """
+    # PDFs (PyPDF2) and Word documents (python-docx) are CPU-bound: the extraction process
+    # pool reads and parses the spool file so a large upload never stalls the event loop
+    extraction_service = get_extraction_service()
+    if extraction_service.handles(content_type):
+        return await extraction_service.extract(file_path, content_type, filename)
+    
+    # Images and text are bounded by UPLOAD_MAX_BYTES and need the whole payload
+    file_content = await asyncio.to_thread(Path(file_path).read_bytes)
+    
+    # For images, use OpenAI Vision API
+    if content_type.startswith('image/'):
+        if not llm_gateway.available:
+            raise ExtractionError(f"Error extracting content from image {filename}: no OpenAI API key configured")
+        try:
+            base64_content = base64.b64encode(file_content).decode('utf-8')
             
-    except Exception as e:
-        return f"Error processing file {filename}: {str(e)}"
+            response = await openai_client.chat.completions.create(
+                model="gpt-4-vision-preview",
+                messages=[
+                    {
+                        "role": "user",
+                        "content": [
+                            {"type": "text", "text": "Extract all text content from this construction document image. Include technical specifications, dimensions, standards references, supplier information, and any visible text. If this appears to be a construction drawing or blueprint, describe the key elements and any text/labels visible."},
+                            {"type": "image_url", "image_url": {"url": f"data:{content_type};base64,{base64_content}"}}
+                        ]
+                    }
+                ],
+                max_tokens=2000
+            )
+            return response.choices[0].message.content
+            
+        except Exception as vision_error:
+            raise ExtractionError(f"Error extracting content from image {filename}: {str(vision_error)}") from vision_error
+    
+    # For plain text files and other formats
+    try:
+        # Try UTF-8 first
+        return file_content.decode('utf-8')
+    except UnicodeDecodeError:
+        # Fallback to latin-1 (decodes any byte sequence)
+        return file_content.decode('latin-1')
+
+async def _embed_one(text: str) -> List[float]:
+    return (await generate_embeddings_batch([text]))[0]
 
-async def generate_embeddings(text: str) -> List[float]:
-    """Generate vector embeddings for text using OpenAI"""
+async def generate_embeddings(text: str, use_cache: bool = True) -> List[float]:
+    """Generate vector embeddings for text (uploads pass use_cache=False)"""
     try:
-        # Check if we have a valid OpenAI API key
-        api_key = os.environ.get('OPENAI_API_KEY', '')
-        if not api_key or len(api_key) < 10:
-            # Mock embeddings for testing - generate a simple hash-based embedding
-            import hashlib
-            text_hash = hashlib.md5(text.encode()).hexdigest()
-            # Convert hex to float array (1536 dimensions like text-embedding-ada-002)
-            mock_embedding = []
-            for i in range(0, len(text_hash), 2):
-                hex_pair = text_hash[i:i+2]
-                mock_embedding.append(int(hex_pair, 16) / 255.0 - 0.5)  # Normalize to [-0.5, 0.5]
-            
-            # Pad or truncate to 1536 dimensions
-            while len(mock_embedding) < 1536:
-                mock_embedding.extend(mock_embedding[:min(len(mock_embedding), 1536 - len(mock_embedding))])
-            mock_embedding = mock_embedding[:1536]
-            
-            return mock_embedding
+        text = text[:8000]  # Limit to token constraints
+        if not use_cache:
+            return await _embed_one(text)
         
-        response = await openai_client.embeddings.create(
-            model="text-embedding-ada-002",
-            input=text[:8000]  # Limit to token constraints
-        )
-        return response.data[0].embedding
+        # Identical queries hit the cache and concurrent ones share a single API call;
+        # failures are not cached, so the mock fallback below never gets pinned to a query
+        return await get_embedding_cache().get_or_compute(get_embedding_provider().model, text, _embed_one)
     except Exception as e:
         print(f"Error generating embeddings: {e}")
         # Return mock embedding on error
         return [0.1] * 1536
 
+async def index_uploaded_chunks(bank: str, document_record: Dict[str, Any], extracted_text: str) -> int:
+    """Passage-level indexing for an upload; on failure the whole-document embedding stays searchable"""
+    try:
+        return await index_document_chunks(db.knowledge_chunks, bank, document_record, extracted_text, generate_embeddings_batch)
+    except Exception as e:
+        print(f"Chunk indexing warning for {document_record.get('document_id')}: {e}")
+        return 0
+
 async def parse_document_metadata(text_content: str, filename: str, is_supplier: bool = False) -> Dict[str, Any]:
     """AI-powered extraction of document metadata and tags"""
     try:
         # Check if we have a valid OpenAI API key
-        api_key = os.environ.get('OPENAI_API_KEY', '')
-        if not api_key or len(api_key) < 10:
+        if not llm_gateway.available:
             # Mock metadata extraction for testing
             mock_tags = ["construction"]
             if "steel" in text_content.lower() or "beam" in text_content.lower():
@@ -1270,50 +1162,57 @@ async def intelligent_knowledge_search(query: str, limit: int = 10) -> List[Dict
         if not query_embedding:
             return []
         
-        # Search in knowledge vault
-        cursor = db.knowledge_vault.find({})
-        documents = await cursor.to_list(length=1000)  # Get all for similarity comparison
+        # Search in knowledge vault via the vector index (supplier boost applied in the index)
+        hits = get_knowledge_index_manager().search("knowledge_vault", query_embedding, k=limit)
+        documents = await hydrate_documents(db.knowledge_vault, "knowledge_vault", [hit.doc_id for hit in hits])
         
         scored_docs = []
         
-        for doc in documents:
-            if 'embedding' in doc and doc['embedding']:
-                # Calculate cosine similarity
-                doc_embedding = np.array(doc['embedding']).reshape(1, -1)
-                query_emb = np.array(query_embedding).reshape(1, -1)
-                similarity = cosine_similarity(query_emb, doc_embedding)[0][0]
-                
-                # Boost supplier content
-                boost = 1.2 if doc.get('is_supplier_content', False) else 1.0
-                final_score = similarity * boost
-                
-                # Clean up MongoDB ObjectId for JSON serialization
-                doc_clean = dict(doc)
-                if '_id' in doc_clean:
-                    doc_clean['_id'] = str(doc_clean['_id'])
-                
-                scored_docs.append({
-                    'document': doc_clean,
-                    'similarity_score': final_score,
-                    'is_supplier': doc.get('is_supplier_content', False)
-                })
+        for hit in hits:
+            doc = documents.get(hit.doc_id)
+            if doc is None:
+                continue
+            
+            scored_docs.append({
+                'document': doc,
+                'similarity_score': hit.score,
+                'is_supplier': doc.get('is_supplier_content', False)
+            })
         
-        # Sort by similarity score and return top results
-        scored_docs.sort(key=lambda x: x['similarity_score'], reverse=True)
-        return scored_docs[:limit]
+        return scored_docs
         
     except Exception as e:
         print(f"Error in knowledge search: {e}")
         return []
 
 # Knowledge Bank Routes - Two-Tier System
+def ingestion_queue():
+    queue = get_ingestion_queue()
+    if queue is None:
+        raise HTTPException(status_code=503, detail="Document ingestion is not available yet")
+    return queue
+
+async def receive_spooled_upload(file: UploadFile):
+    """Stream an upload to disk (bounded memory); oversized files are rejected with 413"""
+    try:
+        return await receive_upload(file)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+async def submit_ingestion_job(upload, job: Dict[str, Any]) -> Dict[str, Any]:
+    try:
+        return await ingestion_queue().submit(job, upload.path)
+    except BaseException:
+        remove_spooled(upload.path)
+        raise
+
 @api_router.post("/knowledge/upload-community")
 async def upload_to_community_knowledge_bank(
     file: UploadFile = File(...),
     tags: str = Form(""),
     current_user: Dict[str, Any] = Depends(get_current_user)
 ):
-    """Upload document to Community Knowledge Bank (Partners and Admins only)"""
+    """Upload document to Community Knowledge Bank (Partners and Admins only) - processed in the background"""
     try:
         uid = current_user["uid"]
         email = current_user.get("email")
@@ -1330,88 +1229,44 @@ async def upload_to_community_knowledge_bank(
                 detail="Access denied. Only registered partners and administrators can upload to Community Knowledge Bank."
             )
         
-        # Read file content
-        file_content = await file.read()
+        # Stream the file to the spool directory, hashing as it arrives
+        upload = await receive_spooled_upload(file)
         content_type = file.content_type or mimetypes.guess_type(file.filename)[0]
+        file_hash = upload.sha256
         
-        # Generate file hash for deduplication
-        file_hash = hashlib.sha256(file_content).hexdigest()
-        
-        # Check for duplicates in community knowledge bank
-        existing = await db.community_knowledge_bank.find_one({"file_hash": file_hash})
-        if existing:
+        # Check for duplicates in community knowledge bank (stored or still being ingested)
+        existing = await db.community_knowledge_bank.find_one({"file_hash": file_hash}, {"_id": 1})
+        if existing or await ingestion_queue().find_active({"bank": "community_knowledge_bank", "file_hash": file_hash}):
+            remove_spooled(upload.path)
             raise HTTPException(status_code=400, detail="Document already exists in Community Knowledge Bank")
         
-        # Extract text content using AI
-        extracted_text = await extract_text_from_file(file_content, content_type, file.filename)
-        
-        # Generate AI metadata and tags
-        metadata = await parse_document_metadata(extracted_text, file.filename, True)  # Always supplier content for community
-        
-        # Generate embeddings for semantic search
-        embedding = await generate_embeddings(extracted_text)
-        
-        # Prepare document record for Community Knowledge Bank
-        document_record = {
+        job = await submit_ingestion_job(upload, {
+            "bank": "community_knowledge_bank",
             "document_id": str(uuid.uuid4()),
             "user_id": uid,
             "uploader_email": email,
             "filename": file.filename,
-            "original_size": len(file_content),
             "content_type": content_type,
+            "original_size": upload.size,
             "file_hash": file_hash,
-            "extracted_text": extracted_text,
-            "embedding": embedding,
-            "ai_metadata": metadata,
-            "tags": tags.split(",") if tags else metadata.get("tags", []),
-            "knowledge_bank_type": "community",  # Key distinction
+            "file_data_sample": upload.sample_base64,
+            "tags": tags,
             "partner_info": {
                 "company_name": partner["company_name"],
                 "partner_id": partner["partner_id"],
                 "abn": partner["abn"]
             } if partner else None,
-            "uploaded_by_admin": is_admin,
-            "upload_timestamp": datetime.utcnow(),
-            "status": "active",
-            "view_count": 0,
-            "reference_count": 0
-        }
-        
-        # Store file reference
-        try:
-            file_base64 = base64.b64encode(file_content).decode('utf-8')
-            storage_path = f"community_knowledge_bank/{document_record['document_id']}/{file.filename}"
-            document_record["storage_path"] = storage_path
-            document_record["file_data"] = file_base64[:1000]  # Store sample for testing
-        except Exception as storage_error:
-            print(f"Storage warning: {storage_error}")
-            document_record["storage_path"] = f"local_storage/{document_record['document_id']}"
-        
-        # Save to Community Knowledge Bank collection
-        await db.community_knowledge_bank.insert_one(document_record)
-        
-        # Update partner upload count
-        if partner:
-            await partner_service.increment_upload_count(partner["partner_id"])
-            
-            # Send upload receipt email
-            document_info = {
-                "filename": file.filename,
-                "document_id": document_record["document_id"],
-                "upload_date": document_record["upload_timestamp"].strftime("%d %B %Y at %H:%M AEDT"),
-                "file_size": f"{len(file_content) / 1024:.1f} KB",
-                "tags": document_record["tags"]
-            }
-            await partner_service.send_upload_receipt_email(partner, document_info)
+            "uploaded_by_admin": bool(is_admin)
+        })
         
         return {
-            "message": "Document uploaded to Community Knowledge Bank successfully",
-            "document_id": document_record["document_id"],
+            "message": "Document queued for Community Knowledge Bank ingestion",
+            "job_id": job["job_id"],
+            "status": job["status"],
+            "status_url": f"/api/knowledge/jobs/{job['job_id']}",
+            "document_id": job["document_id"],
             "knowledge_bank": "community",
-            "company_attribution": partner["company_name"] if partner else "ONESource-ai Admin",
-            "extracted_summary": metadata.get("summary", ""),
-            "detected_tags": metadata.get("tags", []),
-            "email_receipt_sent": bool(partner)
+            "company_attribution": partner["company_name"] if partner else "ONESource-ai Admin"
         }
         
     except HTTPException:
@@ -1425,73 +1280,44 @@ async def upload_to_personal_knowledge_bank(
     tags: str = Form(""),
     current_user: Dict[str, Any] = Depends(get_current_user)
 ):
-    """Upload document to Personal Knowledge Bank (Private to user)"""
+    """Upload document to Personal Knowledge Bank (Private to user) - processed in the background"""
     try:
         uid = current_user["uid"]
         
-        # Read file content
-        file_content = await file.read()
+        # Stream the file to the spool directory, hashing as it arrives
+        upload = await receive_spooled_upload(file)
         content_type = file.content_type or mimetypes.guess_type(file.filename)[0]
+        file_hash = upload.sha256
         
-        # Generate file hash for deduplication within user's personal bank
-        file_hash = hashlib.sha256(file_content).hexdigest()
-        
-        # Check for duplicates in user's personal knowledge bank
+        # Check for duplicates in user's personal knowledge bank (stored or still being ingested)
         existing = await db.personal_knowledge_bank.find_one({
             "user_id": uid,
             "file_hash": file_hash
-        })
-        if existing:
+        }, {"_id": 1})
+        if existing or await ingestion_queue().find_active({"bank": "personal_knowledge_bank", "user_id": uid, "file_hash": file_hash}):
+            remove_spooled(upload.path)
             raise HTTPException(status_code=400, detail="Document already exists in your Personal Knowledge Bank")
         
-        # Extract text content using AI
-        extracted_text = await extract_text_from_file(file_content, content_type, file.filename)
-        
-        # Generate AI metadata and tags
-        metadata = await parse_document_metadata(extracted_text, file.filename, False)  # Not supplier content
-        
-        # Generate embeddings for semantic search
-        embedding = await generate_embeddings(extracted_text)
-        
-        # Prepare document record for Personal Knowledge Bank
-        document_record = {
+        job = await submit_ingestion_job(upload, {
+            "bank": "personal_knowledge_bank",
             "document_id": str(uuid.uuid4()),
             "user_id": uid,
             "filename": file.filename,
-            "original_size": len(file_content),
             "content_type": content_type,
+            "original_size": upload.size,
             "file_hash": file_hash,
-            "extracted_text": extracted_text,
-            "embedding": embedding,
-            "ai_metadata": metadata,
-            "tags": tags.split(",") if tags else metadata.get("tags", []),
-            "knowledge_bank_type": "personal",  # Key distinction
-            "upload_timestamp": datetime.utcnow(),
-            "status": "active",
-            "view_count": 0,
-            "reference_count": 0
-        }
-        
-        # Store file reference
-        try:
-            file_base64 = base64.b64encode(file_content).decode('utf-8')
-            storage_path = f"personal_knowledge_bank/{uid}/{document_record['document_id']}/{file.filename}"
-            document_record["storage_path"] = storage_path
-            document_record["file_data"] = file_base64[:1000]  # Store sample for testing
-        except Exception as storage_error:
-            print(f"Storage warning: {storage_error}")
-            document_record["storage_path"] = f"local_storage/{document_record['document_id']}"
-        
-        # Save to Personal Knowledge Bank collection
-        await db.personal_knowledge_bank.insert_one(document_record)
+            "file_data_sample": upload.sample_base64,
+            "tags": tags
+        })
         
         return {
-            "message": "Document uploaded to Personal Knowledge Bank successfully",
-            "document_id": document_record["document_id"],
+            "message": "Document queued for Personal Knowledge Bank ingestion",
+            "job_id": job["job_id"],
+            "status": job["status"],
+            "status_url": f"/api/knowledge/jobs/{job['job_id']}",
+            "document_id": job["document_id"],
             "knowledge_bank": "personal",
-            "privacy": "Private to your account only",
-            "extracted_summary": metadata.get("summary", ""),
-            "detected_tags": metadata.get("tags", [])
+            "privacy": "Private to your account only"
         }
         
     except HTTPException:
@@ -1499,6 +1325,91 @@ async def upload_to_personal_knowledge_bank(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error uploading to Personal Knowledge Bank: {str(e)}")
 
+@api_router.get("/knowledge/jobs/{job_id}")
+async def get_ingestion_job_status(job_id: str, current_user: Dict[str, Any] = Depends(get_current_user)):
+    """Status of a background document ingestion job (queued/extracting/embedding/indexed/failed)"""
+    job = await ingestion_queue().get_job(job_id, user_id=current_user["uid"])
+    if not job:
+        raise HTTPException(status_code=404, detail="Ingestion job not found")
+    return job
+
+async def process_ingestion_job(job: Dict[str, Any], spool_path: str, queue) -> Dict[str, Any]:
+    """Ingestion worker: extract, analyse, embed, store and index one uploaded document"""
+    bank = job["bank"]
+    is_community = bank == "community_knowledge_bank"
+    
+    # Extract text content using AI
+    extracted_text = await extract_text_from_file(spool_path, job["content_type"], job["filename"])
+    
+    # Generate AI metadata and tags
+    metadata = await parse_document_metadata(extracted_text, job["filename"], is_community)  # Community is always supplier content
+    
+    # Generate embeddings for semantic search
+    await queue.set_status(job["job_id"], EMBEDDING)
+    embedding = await generate_embeddings(extracted_text, use_cache=False)
+    
+    # Prepare document record for the target knowledge bank
+    document_record = {
+        "document_id": job["document_id"],
+        "user_id": job["user_id"],
+        "filename": job["filename"],
+        "original_size": job["original_size"],
+        "content_type": job["content_type"],
+        "file_hash": job["file_hash"],
+        "extracted_text": extracted_text,
+        "embedding": encode_embedding(embedding, config.EMBEDDING_STORAGE_FORMAT),
+        "ai_metadata": metadata,
+        "tags": job["tags"].split(",") if job["tags"] else metadata.get("tags", []),
+        "knowledge_bank_type": "community" if is_community else "personal",  # Key distinction
+        "upload_timestamp": datetime.utcnow(),
+        "status": "active",
+        "view_count": 0,
+        "reference_count": 0
+    }
+    if is_community:
+        document_record["uploader_email"] = job.get("uploader_email")
+        document_record["partner_info"] = job.get("partner_info")
+        document_record["uploaded_by_admin"] = job.get("uploaded_by_admin", False)
+    
+    # Store file reference (the base64 sample of the first bytes was taken while streaming the upload)
+    owner_path = "" if is_community else f"{job['user_id']}/"
+    document_record["storage_path"] = f"{bank}/{owner_path}{document_record['document_id']}/{job['filename']}"
+    document_record["file_data"] = job.get("file_data_sample", "")  # Store sample for testing
+    
+    # Save to the knowledge bank collection (upsert so a retried job never duplicates the document)
+    await db[bank].replace_one({"document_id": document_record["document_id"]}, document_record, upsert=True)
+    get_knowledge_index_manager().add(
+        bank, document_record["document_id"], embedding,
+        owner=None if is_community else job["user_id"],
+        weight=boost_weight(bank, document_record)
+    )
+    await db.knowledge_chunks.delete_many({"document_id": document_record["document_id"]})
+    chunks_indexed = await index_uploaded_chunks(bank, document_record, extracted_text)
+    
+    # Update partner upload count and send upload receipt email
+    partner_info = job.get("partner_info")
+    email_receipt_sent = False
+    if is_community and partner_info:
+        partner = await partner_service.get_partner_by_email(job.get("uploader_email"))
+        if partner:
+            await partner_service.increment_upload_count(partner["partner_id"])
+            document_info = {
+                "filename": job["filename"],
+                "document_id": document_record["document_id"],
+                "upload_date": document_record["upload_timestamp"].strftime("%d %B %Y at %H:%M AEDT"),
+                "file_size": f"{job['original_size'] / 1024:.1f} KB",
+                "tags": document_record["tags"]
+            }
+            email_receipt_sent = await partner_service.send_upload_receipt_email(partner, document_info)
+    
+    return {
+        "document_id": document_record["document_id"],
+        "extracted_summary": metadata.get("summary", ""),
+        "detected_tags": metadata.get("tags", []),
+        "chunks_indexed": chunks_indexed,
+        "email_receipt_sent": email_receipt_sent
+    }
+
 # Legacy endpoint - deprecated but kept for backward compatibility
 @api_router.post("/knowledge/upload-document")
 async def upload_document(
@@ -1528,7 +1439,7 @@ async def create_mentor_note(
         
         # Generate embeddings for the note content
         full_text = f"{note_data.title} {note_data.content}"
-        embedding = await generate_embeddings(full_text)
+        embedding = await generate_embeddings(full_text, use_cache=False)
         
         # AI-powered categorization and tagging
         metadata = await parse_document_metadata(note_data.content, note_data.title, False)
@@ -1542,7 +1453,7 @@ async def create_mentor_note(
             "tags": note_data.tags + metadata.get("tags", []),
             "category": note_data.category or metadata.get("document_type", "general"),
             "attachment_url": note_data.attachment_url,
-            "embedding": embedding,
+            "embedding": encode_embedding(embedding, config.EMBEDDING_STORAGE_FORMAT),
             "ai_metadata": metadata,
             "created_timestamp": datetime.utcnow(),
             "status": "active",
@@ -1552,6 +1463,7 @@ async def create_mentor_note(
         }
         
         await db.mentor_notes.insert_one(mentor_note_record)
+        get_knowledge_index_manager().add("mentor_notes", mentor_note_record["note_id"], embedding)
         
         return {
             "message": "Mentor note created successfully",
@@ -1574,37 +1486,30 @@ async def search_knowledge_base(
     try:
         uid = current_user["uid"]
         
+        # Embed the query once and share it across all three banks
+        query_embedding = await generate_embeddings(query)
+        
         # Search Community Knowledge Bank (available to all users)
-        community_results = await search_community_knowledge_bank(query, limit)
+        community_results = await search_community_knowledge_bank(query, limit, query_embedding)
         
         # Search Personal Knowledge Bank (only user's own documents)
-        personal_results = await search_personal_knowledge_bank(query, uid, limit)
+        personal_results = await search_personal_knowledge_bank(query, uid, limit, query_embedding)
         
         # Search mentor notes if requested
         mentor_results = []
         if include_mentor_notes:
-            query_embedding = await generate_embeddings(query)
             if query_embedding:
-                cursor = db.mentor_notes.find({"status": "active"})
-                notes = await cursor.to_list(length=500)
+                # Threshold for relevance: 0.5
+                hits = get_knowledge_index_manager().search("mentor_notes", query_embedding, k=5, min_similarity=0.5)
+                notes = await hydrate_documents(db.mentor_notes, "mentor_notes", [hit.doc_id for hit in hits], {"status": "active"})
                 
-                for note in notes:
-                    if 'embedding' in note and note['embedding']:
-                        note_embedding = np.array(note['embedding']).reshape(1, -1)
-                        query_emb = np.array(query_embedding).reshape(1, -1)
-                        similarity = cosine_similarity(query_emb, note_embedding)[0][0]
-                        
-                        if similarity > 0.5:  # Threshold for relevance
-                            # Clean up MongoDB ObjectId for JSON serialization
-                            note_clean = dict(note)
-                            if '_id' in note_clean:
-                                note_clean['_id'] = str(note_clean['_id'])
-                            
-                            mentor_results.append({
-                                'type': 'mentor_note',
-                                'note': note_clean,
-                                'similarity_score': similarity
-                            })
+                for hit in hits:
+                    if hit.doc_id in notes:
+                        mentor_results.append({
+                            'type': 'mentor_note',
+                            'note': notes[hit.doc_id],
+                            'similarity_score': hit.similarity
+                        })
         
         return {
             "query": query,
@@ -1617,96 +1522,151 @@ async def search_knowledge_base(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error searching knowledge base: {str(e)}")
 
-async def search_community_knowledge_bank(query: str, limit: int = 10) -> List[Dict[str, Any]]:
+async def search_community_knowledge_bank(query: str, limit: int = 10, query_embedding: Optional[List[float]] = None) -> List[Dict[str, Any]]:
     """Search Community Knowledge Bank with partner attribution"""
     try:
-        query_embedding = await generate_embeddings(query)
+        if query_embedding is None:
+            query_embedding = await generate_embeddings(query)
         if not query_embedding:
             return []
             
-        # Get documents from Community Knowledge Bank
-        cursor = db.community_knowledge_bank.find({"status": "active"})
-        documents = await cursor.to_list(length=1000)
+        # Top-k documents ranked by their best-matching passage: 0.3 relevance threshold and
+        # partner 1.2x boost are applied inside the scoring engine
+        hits, best_chunks = search_document_hits("community_knowledge_bank", query_embedding, k=limit, min_similarity=0.3)
+        documents = await hydrate_documents(db.community_knowledge_bank, "community_knowledge_bank", [hit.doc_id for hit in hits], {"status": "active"})
+        passages = await hydrate_documents(db.knowledge_chunks, "community_knowledge_chunks", list(best_chunks.values()))
         
         scored_docs = []
-        for doc in documents:
-            if 'embedding' in doc and doc['embedding']:
-                doc_embedding = np.array(doc['embedding']).reshape(1, -1)
-                query_emb = np.array(query_embedding).reshape(1, -1)
-                similarity = cosine_similarity(query_emb, doc_embedding)[0][0]
-                
-                if similarity > 0.3:  # Threshold for relevance
-                    # Clean up MongoDB ObjectId for JSON serialization
-                    doc_clean = dict(doc)
-                    if '_id' in doc_clean:
-                        doc_clean['_id'] = str(doc_clean['_id'])
-                    
-                    # Partner content gets a boost in scoring
-                    final_score = similarity * 1.2 if doc.get('partner_info') else similarity
-                    
-                    scored_docs.append({
-                        'type': 'community_document',
-                        'document': doc_clean,
-                        'similarity_score': final_score,
-                        'source': 'Community Knowledge Bank',
-                        'company_attribution': doc.get('partner_info', {}).get('company_name', 'ONESource-ai Admin')
-                    })
-        
-        # Sort by similarity score and return top results
-        scored_docs.sort(key=lambda x: x['similarity_score'], reverse=True)
-        return scored_docs[:limit]
+        for hit in hits:
+            doc = documents.get(hit.doc_id)
+            if doc is None:
+                continue
+            
+            scored_docs.append({
+                'type': 'community_document',
+                'document': doc,
+                'similarity_score': hit.score,
+                'matched_passage': passages.get(best_chunks.get(hit.doc_id)),
+                'source': 'Community Knowledge Bank',
+                'company_attribution': (doc.get('partner_info') or {}).get('company_name', 'ONESource-ai Admin')
+            })
+        
+        return scored_docs
         
     except Exception as e:
         print(f"Error in community knowledge search: {e}")
         return []
 
-async def search_personal_knowledge_bank(query: str, user_id: str, limit: int = 10) -> List[Dict[str, Any]]:
+async def search_personal_knowledge_bank(query: str, user_id: str, limit: int = 10, query_embedding: Optional[List[float]] = None) -> List[Dict[str, Any]]:
     """Search user's Personal Knowledge Bank"""
     try:
-        query_embedding = await generate_embeddings(query)
+        if query_embedding is None:
+            query_embedding = await generate_embeddings(query)
         if not query_embedding:
             return []
             
-        # Get documents from user's Personal Knowledge Bank only
-        cursor = db.personal_knowledge_bank.find({
-            "user_id": user_id,
-            "status": "active"
-        })
-        documents = await cursor.to_list(length=1000)
+        # Top-k candidates from the user's Personal Knowledge Bank only
+        # Threshold for relevance: 0.3
+        hits, best_chunks = search_document_hits("personal_knowledge_bank", query_embedding, k=limit, owner=user_id, min_similarity=0.3)
+        documents = await hydrate_documents(
+            db.personal_knowledge_bank, "personal_knowledge_bank", [hit.doc_id for hit in hits],
+            {"user_id": user_id, "status": "active"}
+        )
+        passages = await hydrate_documents(
+            db.knowledge_chunks, "personal_knowledge_chunks", list(best_chunks.values()), {"user_id": user_id}
+        )
         
         scored_docs = []
-        for doc in documents:
-            if 'embedding' in doc and doc['embedding']:
-                doc_embedding = np.array(doc['embedding']).reshape(1, -1)
-                query_emb = np.array(query_embedding).reshape(1, -1)
-                similarity = cosine_similarity(query_emb, doc_embedding)[0][0]
-                
-                if similarity > 0.3:  # Threshold for relevance
-                    # Clean up MongoDB ObjectId for JSON serialization
-                    doc_clean = dict(doc)
-                    if '_id' in doc_clean:
-                        doc_clean['_id'] = str(doc_clean['_id'])
-                    
-                    scored_docs.append({
-                        'type': 'personal_document',
-                        'document': doc_clean,
-                        'similarity_score': similarity,
-                        'source': 'Personal Knowledge Bank',
-                        'privacy': 'Private to your account'
-                    })
-        
-        # Sort by similarity score and return top results
-        scored_docs.sort(key=lambda x: x['similarity_score'], reverse=True)
-        return scored_docs[:limit]
+        for hit in hits:
+            doc = documents.get(hit.doc_id)
+            if doc is None:
+                continue
+            
+            scored_docs.append({
+                'type': 'personal_document',
+                'document': doc,
+                'similarity_score': hit.similarity,
+                'matched_passage': passages.get(best_chunks.get(hit.doc_id)),
+                'source': 'Personal Knowledge Bank',
+                'privacy': 'Private to your account'
+            })
+        
+        return scored_docs
         
     except Exception as e:
         print(f"Error in personal knowledge search: {e}")
         return []
 
+def matched_text(result: Dict[str, Any]) -> str:
+    """Best-matching passage for a search result, else the document excerpt (pre-chunking uploads)"""
+    passage = result.get('matched_passage')
+    if passage and passage.get('text'):
+        return passage['text']
+    return result['document'].get('excerpt', '')
+
+async def gather_enhanced_knowledge(question: str, uid: str) -> Dict[str, Any]:
+    """Search both knowledge banks and build the knowledge context for an enhanced answer"""
+    query_embedding = await generate_embeddings(question)
+    community_results = await search_community_knowledge_bank(question, limit=3, query_embedding=query_embedding)
+    personal_results = await search_personal_knowledge_bank(question, uid, limit=2, query_embedding=query_embedding)
+    
+    # Build knowledge context
+    knowledge_context = []
+    partner_attributions = []
+    
+    # Process Community Knowledge Bank results
+    for result in community_results:
+        if result['similarity_score'] > 0.6:
+            excerpt = matched_text(result)
+            company_name = result.get('company_attribution', 'Community')
+            partner_attributions.append(company_name)
+            knowledge_context.append(f"From {company_name} (Community): {excerpt}")
+    
+    # Process Personal Knowledge Bank results  
+    for result in personal_results:
+        if result['similarity_score'] > 0.6:
+            excerpt = matched_text(result)
+            knowledge_context.append(f"From your personal documents: {excerpt}")
+    
+    return {
+        "context_string": "\n".join(knowledge_context) if knowledge_context else None,
+        "knowledge_context": knowledge_context,
+        "partner_attributions": partner_attributions,
+        "community_results": community_results,
+        "personal_results": personal_results,
+    }
+
+async def enhanced_api_response(response, knowledge: Dict[str, Any]) -> Dict[str, Any]:
+    """Record knowledge references, then ChatResponse -> /chat/ask-enhanced payload"""
+    # Update document reference counts
+    for result in knowledge["community_results"][:3]:
+        if result['similarity_score'] > 0.6:
+            await db.community_knowledge_bank.update_one(
+                {"document_id": result['document']['document_id']},
+                {"$inc": {"reference_count": 1}}
+            )
+    
+    for result in knowledge["personal_results"][:2]:
+        if result['similarity_score'] > 0.6:
+            await db.personal_knowledge_bank.update_one(
+                {"document_id": result['document']['document_id']},
+                {"$inc": {"reference_count": 1}}
+            )
+    
+    return v2_response(
+        response,
+        knowledge_enhanced=len(knowledge["knowledge_context"]) > 0,
+        partner_content_used=len(knowledge["partner_attributions"]) > 0,
+        community_sources_used=len(knowledge["community_results"]),
+        personal_sources_used=len(knowledge["personal_results"]),
+        partner_sources=knowledge["partner_attributions"],
+    )
+
 # Enhanced Chat with Knowledge Integration
 @api_router.post("/chat/ask-enhanced")
 async def unified_chat_ask_enhanced(
     question_data: ChatQuestion,
+    request: Request,
     current_user: Dict[str, Any] = Depends(get_current_user)
 ):
     """UNIFIED ENHANCED CHAT ENDPOINT - uses single code path with knowledge context"""
@@ -1715,126 +1675,35 @@ async def unified_chat_ask_enhanced(
         from core.chat_service import unified_chat_service
         from core.context_manager import init_context_manager
         
-        # Initialize Redis conversation store if not already done
-        if not hasattr(unified_chat_service, '_conversation_store_initialized'):
-            from core.stores.conversation_store import init_conversation_store
-            init_conversation_store()
-            unified_chat_service._conversation_store_initialized = True
-        
         uid = current_user["uid"]
         
         # Search knowledge banks for context (ENHANCED-SPECIFIC FEATURE)
-        community_results = await search_community_knowledge_bank(question_data.question, limit=3)
-        personal_results = await search_personal_knowledge_bank(question_data.question, uid, limit=2)
-        
-        # Build knowledge context
-        knowledge_context = []
-        partner_attributions = []
-        
-        # Process Community Knowledge Bank results
-        for result in community_results:
-            if result['similarity_score'] > 0.6:
-                doc = result['document']
-                excerpt = doc.get('extracted_text', '')[:500]
-                company_name = result.get('company_attribution', 'Community')
-                partner_attributions.append(company_name)
-                knowledge_context.append(f"From {company_name} (Community): {excerpt}")
-        
-        # Process Personal Knowledge Bank results  
-        for result in personal_results:
-            if result['similarity_score'] > 0.6:
-                doc = result['document']
-                excerpt = doc.get('extracted_text', '')[:500]
-                knowledge_context.append(f"From your personal documents: {excerpt}")
-        
-        # Build knowledge context string
-        context_string = "\n".join(knowledge_context) if knowledge_context else None
+        knowledge = await gather_enhanced_knowledge(question_data.question, uid)
         
         # Determine tier based on subscription
         subscription = await firebase_service.check_user_subscription(uid)
         tier = "pro_plus" if subscription.get("subscription_tier") == "pro_plus" else "pro"
         
-        # Generate unified response using SHARED ORCHESTRATOR - SAME AS REGULAR ENDPOINT
-        response = await unified_chat_service.generate_unified_response(
+        chat_args = dict(
             question=question_data.question,
             session_id=question_data.session_id or str(uuid.uuid4()),
             tier=tier,
             user_id=uid,
-            knowledge_context=context_string,  # Only difference: enhanced knowledge context
-            topics=getattr(question_data, "topics", None)  # Pass through topics if provided
+            knowledge_context=knowledge["context_string"],  # Only difference: enhanced knowledge context
+            topics=getattr(question_data, "topics", None),  # Pass through topics if provided
+            endpoint="chat/ask-enhanced"
         )
         
-        # Update document reference counts
-        for result in community_results[:3]:
-            if result['similarity_score'] > 0.6:
-                await db.community_knowledge_bank.update_one(
-                    {"document_id": result['document']['document_id']},
-                    {"$inc": {"reference_count": 1}}
-                )
-        
-        for result in personal_results[:2]:
-            if result['similarity_score'] > 0.6:
-                await db.personal_knowledge_bank.update_one(
-                    {"document_id": result['document']['document_id']},
-                    {"$inc": {"reference_count": 1}}
-                )
-        
-        # Convert to API response format with SCHEMA VALIDATION
-        api_response = {
-            "text": response.text,
-            "emoji_map": [{"name": item.name, "char": item.char} for item in response.emoji_map],
-            "mentoring_insight": response.mentoring_insight,
-            "knowledge_enhanced": len(knowledge_context) > 0,
-            "partner_content_used": len(partner_attributions) > 0,
-            "community_sources_used": len(community_results),
-            "personal_sources_used": len(personal_results),
-            "meta": {
-                "tier": response.meta.tier,
-                "tokens_used": response.meta.tokens_used,
-                "session_id": response.meta.session_id,
-                "partner_sources": partner_attributions
-            }
-        }
-        
-        # SCHEMA GUARD: Validate and repair response to v2 format  
-        from middleware.schema_guard import validate_chat_response
-        validated_response, was_repaired = validate_chat_response(api_response)
+        if wants_event_stream(question_data, request):
+            async def to_api_response(response):
+                return await enhanced_api_response(response, knowledge)
+            return chat_event_stream(unified_chat_service.stream_unified_response(**chat_args), to_api_response, question_data.session_id, "enhanced")
         
-        if was_repaired:
-            print(f"⚠️ SCHEMA REPAIR: Enhanced response for session {question_data.session_id} was auto-repaired to v2 format")
-        
-        # PHASE 3: Add dynamic follow-on suggestions
-        try:
-            # Extract text content from validated response blocks
-            full_text = ""
-            for block in validated_response.get("blocks", []):
-                if block.get("content"):
-                    full_text += str(block["content"]) + " "
-            
-            # Detect topic and generate suggestions
-            detected_topic = detect_topic(full_text)
-            suggested_actions = suggest_actions(
-                topic=detected_topic,
-                blocks=validated_response.get("blocks", []),
-                full_text=full_text
-            )
-            
-            # Add suggestions to meta if any were generated
-            if suggested_actions:
-                validated_response["meta"]["suggested_actions"] = suggested_actions
-                
-                # Track that suggestions were shown
-                observability = get_observability()
-                for action in suggested_actions:
-                    observability.record_suggested_action_shown(action["label"], detected_topic)
-                
-                print(f"DEBUG: Added {len(suggested_actions)} suggestions for topic '{detected_topic}' (enhanced)")
-            
-        except Exception as suggestions_error:
-            print(f"Warning: Failed to generate suggestions: {suggestions_error}")
-            # Continue without suggestions - not a blocking error
+        # Generate unified response using SHARED ORCHESTRATOR - SAME AS REGULAR ENDPOINT
+        response = await unified_chat_service.generate_unified_response(**chat_args)
         
-        return validated_response
+        # Convert to API response format with SCHEMA VALIDATION and suggestions
+        return finalize_chat_response(await enhanced_api_response(response, knowledge), question_data.session_id, "enhanced")
         
     except Exception as e:
         print(f"Error in unified enhanced chat: {e}")
@@ -2029,8 +1898,7 @@ async def boost_response(
         """
         
         # Get AI response with enhanced prompting
-        api_key = os.environ.get('OPENAI_API_KEY', '')
-        if not api_key or len(api_key) < 10:
+        if not llm_gateway.available:
             # Enhanced mock response for booster using Enhanced Emoji Mapping
             boosted_response = f"""Here is your boosted response.
 
@@ -2062,12 +1930,8 @@ This enhanced analysis demonstrates the systematic approach available with upgra
 3. Authority coordination and approval processes"""
         else:
             try:
-                from openai import OpenAI
-                client = OpenAI(api_key=api_key)
-                
-                response = client.chat.completions.create(
-                    model="gpt-4o-mini",
-                    messages=[
+                boosted_response = await llm_gateway.chat_completion(
+                    [
                         {"role": "system", "content": enhanced_system_prompt},
                         {"role": "user", "content": question}
                     ],
@@ -2075,8 +1939,6 @@ This enhanced analysis demonstrates the systematic approach available with upgra
                     temperature=0.7
                 )
                 
-                boosted_response = response.choices[0].message.content
-                
                 # CRITICAL FIX: Ensure Enhanced Emoji Mapping consistency
                 # Replace any incorrect emojis with the correct 🤓 emoji
                 boosted_response = boosted_response.replace("🧠 **Mentoring Insight**", "🤓 **Mentoring Insight**")
@@ -3052,6 +2914,45 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@app.on_event("startup")
+async def warm_knowledge_indexes():
+    """Load or rebuild the knowledge bank vector indexes"""
+    try:
+        await ensure_chunk_indexes(db.knowledge_chunks)
+    except Exception as e:
+        logger.warning(f"knowledge_chunks indexes not ensured: {e}")
+    counts = await init_knowledge_index_manager().warm_up(db)
+    logger.info(f"Knowledge indexes ready: {counts}")
+
+@app.on_event("startup")
+async def build_question_classifier():
+    """Build the stage/discipline/sector keyword index before the first question arrives"""
+    get_question_classifier()
+
+@app.on_event("startup")
+async def init_conversation_persistence():
+    """Build the conversation store selected by CONV_STORE_PRIMARY / CONV_DUAL_WRITE"""
+    store = init_async_conversation_store(db=db)
+    if hasattr(store, "ensure_indexes"):
+        try:
+            await store.ensure_indexes()
+        except Exception as e:
+            logger.warning(f"conversation_sessions indexes not ensured: {e}")
+
+@app.on_event("startup")
+async def start_ingestion_workers():
+    """Start the document ingestion worker pool and resume interrupted jobs"""
+    recovered = await init_ingestion_queue(db.ingestion_jobs, process_ingestion_job).start()
+    logger.info(f"Ingestion workers started ({recovered} jobs resumed)")
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    if get_ingestion_queue():
+        await get_ingestion_queue().stop()
+    get_extraction_service().shutdown()
+    get_knowledge_index_manager().save_all()
+    from core.chat_service import unified_chat_service
+    await unified_chat_service.wait_for_summaries()
+    await llm_gateway.aclose()
+    await close_async_conversation_store()
     client.close()
@@ -3,11 +3,10 @@ Enhanced Emoji Mapping - Shared Chat Response Module
 Unified backend logic for consistent emoji mapping across all chat endpoints
 """
 
-import os
-import openai
 from datetime import datetime
 from typing import Dict, Any, Optional, List
 import uuid
+from core.llm_gateway import get_llm_gateway
 
 
 class SharedChatResponseService:
@@ -21,16 +20,9 @@ class SharedChatResponseService:
         self._initialize_openai_client()
     
     def _initialize_openai_client(self):
-        """Initialize OpenAI client if API key is available"""
-        api_key = os.environ.get('OPENAI_API_KEY')
-        if api_key and api_key.strip():
-            try:
-                self.client = openai.OpenAI(api_key=api_key)
-            except Exception as e:
-                print(f"Error initializing OpenAI client: {e}")
-                self.client = None
-        else:
-            self.client = None
+        """Use the shared async LLM gateway if an API key is available"""
+        gateway = get_llm_gateway()
+        self.client = gateway if gateway.available else None
     
     def _build_enhanced_system_prompt(self, user_context: Optional[Dict] = None) -> str:
         """
@@ -243,7 +235,7 @@ Effective compliance management begins with understanding your project's risk pr
             print(f"Error building conversation context: {e}")
             return ""
 
-    def _make_unified_openai_call_with_history(self, question: str, system_prompt: str, conversation_history: Optional[List[Dict]] = None) -> str:
+    async def _make_unified_openai_call_with_history(self, question: str, system_prompt: str, conversation_history: Optional[List[Dict]] = None) -> str:
         """
         Make unified OpenAI API call with conversation history for context
         Enhanced with reference resolution for contextual pronouns
@@ -292,14 +284,12 @@ Effective compliance management begins with understanding your project's risk pr
             # Add current question
             messages.append({"role": "user", "content": question})
             
-            response = self.client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=messages,
+            return await self.client.chat_completion(
+                messages,
                 temperature=0.3,  # Slightly higher for better context understanding
                 top_p=1,
                 max_tokens=2000
             )
-            return response.choices[0].message.content
         except Exception as e:
             print(f"Error getting OpenAI response with history: {e}")
             # Return context-aware mock response as fallback
@@ -428,14 +418,13 @@ Installation timing should be coordinated with the overall construction program
         # Get base response for new topics (no conversation context)
         return self._get_unified_mock_response_with_context(question, user_context)
 
-    def _make_unified_openai_call(self, question: str, system_prompt: str) -> str:
+    async def _make_unified_openai_call(self, question: str, system_prompt: str) -> str:
         """
         Make unified OpenAI API call with identical parameters for both endpoints
         """
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
+            return await self.client.chat_completion(
+                [
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": question}
                 ],
@@ -443,7 +432,6 @@ Installation timing should be coordinated with the overall construction program
                 top_p=1,        # Consistent top_p
                 max_tokens=2000
             )
-            return response.choices[0].message.content
         except Exception as e:
             print(f"Error getting OpenAI response: {e}")
             # Return mock response as fallback
@@ -464,7 +452,7 @@ Installation timing should be coordinated with the overall construction program
             "endpoint_unified": True
         }
 
-    def get_unified_chat_response(self, question: str, session_id: str, user_context: Optional[Dict] = None, conversation_history: Optional[List[Dict]] = None) -> Dict[str, Any]:
+    async def get_unified_chat_response(self, question: str, session_id: str, user_context: Optional[Dict] = None, conversation_history: Optional[List[Dict]] = None) -> Dict[str, Any]:
         """
         Main unified function for generating chat responses
         Used by both regular and enhanced endpoints for 100% consistency
@@ -490,7 +478,7 @@ Installation timing should be coordinated with the overall construction program
             # Step 3: Make unified model call with conversation history
             if self.client:
                 # Real OpenAI call with unified parameters and conversation history
-                ai_response = self._make_unified_openai_call_with_history(question, system_prompt, conversation_history)
+                ai_response = await self._make_unified_openai_call_with_history(question, system_prompt, conversation_history)
                 tokens_used = 800  # Estimate for real calls
             else:
                 # Unified mock response with conversation context
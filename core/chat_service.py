@@ -3,13 +3,35 @@ Unified Chat Service - SINGLE ORCHESTRATOR for all tiers and endpoints
 Uses shared context building and response formatting - NO DIVERGENCE ALLOWED
 """
 
-import os
-import openai
-from typing import Dict, Any, Optional, Literal, List
+import asyncio
+from typing import Dict, Any, Optional, Literal, List, AsyncIterator, Tuple
 from datetime import datetime
 from core.schema import ChatResponse, Meta, EmojiItem
-from core.formatter import unified_formatter
-from core.stores.conversation_store import get_conversation_store, init_conversation_store
+from core.formatter import unified_formatter, StreamingSectionNormalizer
+from core.stores.conversation_store import get_async_conversation_store
+from core.llm_gateway import LLMGateway, get_llm_gateway
+from core.context_window import ContextWindow, get_context_window_builder
+from core.conversation_summary import ConversationSummarizer, SUMMARY_HEADER
+from core.prompt_registry import get_prompt_registry, build_request_context
+from core.config import config
+from core.tokens import TokenUsage
+from core.observability import get_observability
+from core.keyword_matcher import KeywordMatcher
+
+# Recent-topic hint from the last two turns; the first topic listed that appears wins
+RECENT_TOPIC_MATCHER = KeywordMatcher.from_terms({
+    "acoustic lagging": ["acoustic"],
+    "fire safety": ["fire"],
+    "building codes": ["building"],
+})
+
+# Primary emoji by conversation topic
+TOPIC_EMOJI = {"acoustic": "🔧", "fire": "🔧", "analysis": "🧐"}
+TOPIC_EMOJI_MATCHER = KeywordMatcher.from_terms({
+    "acoustic": ["acoustic", "sound", "noise"],
+    "fire": ["fire", "safety", "sprinkler"],
+    "analysis": ["analysis", "insight", "review"],
+})
 
 
 class ChatService:
@@ -19,26 +41,23 @@ class ChatService:
     """
     
     def __init__(self):
-        self.openai_client = None
-        self._init_openai_client()
+        self.llm: Optional[LLMGateway] = None
+        self._summary_tasks: Dict[str, asyncio.Task] = {}
+        self._init_llm_gateway()
     
-    def _init_openai_client(self):
-        """Initialize OpenAI client if API key available - lazy loading"""
-        if self.openai_client is not None:
+    def _init_llm_gateway(self):
+        """Attach the shared async LLM gateway if an API key is available - lazy loading"""
+        if self.llm is not None:
             return  # Already initialized
             
         # Load environment variables if not already loaded
         from dotenv import load_dotenv
         load_dotenv('/app/backend/.env')
         
-        api_key = os.environ.get('OPENAI_API_KEY')
-        if api_key and len(api_key) > 10:
-            try:
-                self.openai_client = openai.OpenAI(api_key=api_key)
-                print(f"✅ OpenAI client initialized successfully")
-            except Exception as e:
-                print(f"Error initializing OpenAI client: {e}")
-                self.openai_client = None
+        gateway = get_llm_gateway()
+        if gateway.available:
+            self.llm = gateway
+            print(f"✅ LLM gateway attached successfully")
         else:
             print("No OpenAI API key found, using context-aware fallback")
     
@@ -96,19 +115,19 @@ class ChatService:
             # Failsafe: still return a valid structure (prevents test crashes)
             return {"text": llm_text, "meta": {"emoji": "💬", "mapped": False}}
 
-        # Use unified formatter to enforce ALL rules
-        formatted_text, emoji_map = unified_formatter.format_response(llm_text)
-        
-        # Extract mentoring insight
-        mentoring_insight = unified_formatter.extract_mentoring_insight(formatted_text)
+        # Use unified formatter to enforce ALL rules; the same pass yields the v2 title/summary/blocks
+        formatted = unified_formatter.format_v2(llm_text)
         
         # Extract or derive emoji based on topics/intent
         primary_emoji = self._map_emoji_from_topics(topics) if topics else "🧐"
 
         return {
-            "text": formatted_text,
-            "emoji_map": [{"name": item.name, "char": item.char} for item in emoji_map],
-            "mentoring_insight": mentoring_insight,
+            "text": formatted.text,
+            "emoji_map": [{"name": item.name, "char": item.char} for item in formatted.emoji_map],
+            "mentoring_insight": formatted.mentoring_insight,
+            "title": formatted.title,
+            "summary": formatted.summary,
+            "blocks": formatted.blocks,
             "meta": {
                 "primary_emoji": primary_emoji,
                 "schema": "v2",
@@ -147,16 +166,8 @@ class ChatService:
             return "🧐"
         
         # Extract topic indicators for emoji mapping
-        topic_text = " ".join(topics.values()).lower()
-        
-        if any(term in topic_text for term in ["acoustic", "sound", "noise"]):
-            return "🔧"
-        elif any(term in topic_text for term in ["fire", "safety", "sprinkler"]):
-            return "🔧"  
-        elif any(term in topic_text for term in ["analysis", "insight", "review"]):
-            return "🧐"
-        else:
-            return "🧐"  # Default mentoring emoji
+        topic = TOPIC_EMOJI_MATCHER.first(" ".join(topics.values()))
+        return TOPIC_EMOJI.get(topic, "🧐")  # Default mentoring emoji
 
     async def generate_unified_response(
         self,
@@ -165,7 +176,8 @@ class ChatService:
         tier: Literal["starter", "pro", "pro_plus"],
         user_id: Optional[str] = None,
         knowledge_context: Optional[str] = None,
-        topics: Optional[Dict[str, str]] = None
+        topics: Optional[Dict[str, str]] = None,
+        endpoint: str = "unified"
     ) -> ChatResponse:
         """
         MAIN UNIFIED FUNCTION - uses Redis conversation store
@@ -173,125 +185,252 @@ class ChatService:
         """
         
         # INSTRUMENTATION: Log critical parameters
-        import hashlib
         prompt_hash = "none"
         history_turns = 0
         
         try:
-            # Step 1: Get conversation history from Redis store
-            conversation_store = get_conversation_store()
-            conversation_history = conversation_store.get(session_id)
-            history_turns = len(conversation_history)
-            
-            # LOGGING: Dispatch
-            print(f"DISPATCH: endpoint=unified, tier={tier}, session_id={session_id}, user_id={user_id}, has_knowledge={bool(knowledge_context)}, msg_count_before={history_turns}")
-            
-            # Step 2: Build message history for LLM context (REDIS VERSION)
-            # Conversation history is already in the right format: [{"role": "user", "content": "..."}, ...]
-            messages = conversation_history.copy()
-            
-            # Add current question to message history
-            messages.append({"role": "user", "content": question})
-            
-            # Step 3: Extract topics for context building (simplified)
-            context_topics = topics or {}
-            context_hint = ""
-            
-            if conversation_history and len(conversation_history) > 0:
-                # Simple topic extraction from recent conversation
-                recent_messages = conversation_history[-4:]  # Last 2 turns
-                topic_text = " ".join([msg.get("content", "") for msg in recent_messages])
-                
-                # Basic topic detection
-                if "acoustic" in topic_text.lower():
-                    context_topics["recent_topic"] = "acoustic lagging"
-                elif "fire" in topic_text.lower():
-                    context_topics["recent_topic"] = "fire safety"
-                elif "building" in topic_text.lower():
-                    context_topics["recent_topic"] = "building codes"
-                
-                if context_topics:
-                    context_hint = f"\n\nCONVERSATION CONTEXT:\nRecent discussion topics: {', '.join(context_topics.values())}\nCURRENT QUESTION CONTEXT:\nWhen the user refers to 'it', 'this', 'that', they likely mean: {context_topics.get('recent_topic', 'the previous topic')}"
-            
-            # Step 4: Build unified context using shared orchestrator
-            unified_context = self.build_conversation_context(
-                user_id=user_id or "anonymous",
-                conversation_id=session_id,  # Use session_id as conversation_id
-                messages=messages,
-                topics=context_topics,
-                tier=tier,
-                extra_knowledge={"knowledge_context": knowledge_context} if knowledge_context else None
-            )
-            
-            # Step 5: Build system prompt with tier and context
-            base_prompt = load_system_prompt(tier)
-            
-            # Add knowledge context if provided (for enhanced endpoint)
-            if knowledge_context:
-                base_prompt += f"\n\nKNOWLEDGE CONTEXT:\n{knowledge_context}"
-            
-            # Add conversation context hint
-            if context_hint:
-                base_prompt += context_hint
-            
-            # Calculate prompt hash for parity verification
-            prompt_hash = hashlib.md5(base_prompt.encode()).hexdigest()[:8]
-            
-            # INSTRUMENTATION: Log all critical parameters
-            print(f"INSTRUMENT: endpoint=unified, session_id={session_id}, prompt_hash={prompt_hash}, history_turns={history_turns}, tier={tier}, temperature=0.3")
+            # Steps 1-5: history, topics, unified context and system prompt
+            turn = await self._prepare_turn(question, session_id, tier, user_id, knowledge_context, topics)
+            turn["endpoint"] = endpoint
+            prompt_hash, history_turns = turn["prompt_hash"], turn["history_turns"]
             
             # Step 6: Generate AI response
-            # Ensure OpenAI client is initialized with latest environment
-            self._init_openai_client()
+            # Ensure the LLM gateway is attached with latest environment
+            self._init_llm_gateway()
             
-            if self.openai_client:
-                raw_response = await self._call_openai_api_with_history(question, base_prompt, messages)
-                tokens_used = 800  # Estimate for real API calls
+            if self.llm:
+                raw_response, usage = await self._call_openai_api_with_history(question, turn["system_prompt"], turn["messages"], tier, turn["summary"], turn["request_context"])
             else:
                 # Use context-aware fallback that maintains same structure
                 print("WARNING: No OpenAI client available, using context-aware fallback")
-                raw_response = self._generate_context_aware_fallback(question, tier, context_topics)
-                tokens_used = 400  # Estimate for fallback responses
+                raw_response = self._generate_context_aware_fallback(question, tier, turn["topics"])
+                usage = TokenUsage.estimate(0, raw_response)  # no LLM call: only the local text is counted
             
-            # Step 7: Apply unified formatting using shared formatter
-            formatted_response = self.format_enhanced_response(
-                llm_text=raw_response,
-                feature_flags=unified_context["feature_flags"],
-                topics=context_topics
-            )
+            # Steps 7-9: format, persist and build the unified response
+            return await self._complete_turn(turn, raw_response, tier, session_id, usage)
             
-            # Step 8: CRITICAL - Persist conversation history in Redis (ATOMIC UPSERT)
-            # Add the assistant's response to the history
-            updated_history = messages.copy()  # Contains user messages including current
-            updated_history.append({"role": "assistant", "content": formatted_response["text"]})
+        except Exception as e:
+            print(f"Error in unified chat service: {e}")
+            print(f"INSTRUMENT: FALLBACK - endpoint=unified, session_id={session_id}, prompt_hash={prompt_hash}, history_turns={history_turns}, tier={tier}")
+            return self._error_response(question, tier, session_id)
+    
+    async def stream_unified_response(
+        self,
+        question: str,
+        session_id: str,
+        tier: Literal["starter", "pro", "pro_plus"],
+        user_id: Optional[str] = None,
+        knowledge_context: Optional[str] = None,
+        topics: Optional[Dict[str, str]] = None,
+        endpoint: str = "unified"
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streaming variant of generate_unified_response - same context, prompt and persistence
+        Yields {"type": "delta", "text"} as tokens arrive (section headers normalized per line),
+        then {"type": "final", "response"} with the fully formatted ChatResponse. History is
+        persisted only once the completion has finished
+        """
+        prompt_hash = "none"
+        history_turns = 0
+        
+        try:
+            turn = await self._prepare_turn(question, session_id, tier, user_id, knowledge_context, topics)
+            turn["endpoint"] = endpoint
+            prompt_hash, history_turns = turn["prompt_hash"], turn["history_turns"]
             
-            # Store in Redis with TTL
-            conversation_store.set(session_id, updated_history)
+            self._init_llm_gateway()
             
-            # LOGGING: After save
-            final_msg_count = len(updated_history)
-            print(f"AFTER_SAVE: session_id={session_id}, msg_count_after={final_msg_count}, history_persisted=True")
+            # Filled from the API usage on the last chunk; stays an estimate if none arrives
+            usage = TokenUsage(estimated=True)
+            if self.llm:
+                deltas = self._stream_openai_api_with_history(question, turn["system_prompt"], turn["messages"], tier, turn["summary"], turn["request_context"], usage)
+            else:
+                print("WARNING: No OpenAI client available, using context-aware fallback")
+                deltas = _as_stream(self._generate_context_aware_fallback(question, tier, turn["topics"]))
+            
+            normalizer = StreamingSectionNormalizer()
+            raw_parts = []
+            async for delta in deltas:
+                raw_parts.append(delta)
+                text = normalizer.feed(delta)
+                if text:
+                    yield {"type": "delta", "text": text}
+            text = normalizer.flush()
+            if text:
+                yield {"type": "delta", "text": text}
+            
+            raw_response = "".join(raw_parts)
+            if usage.estimated:
+                usage = TokenUsage.estimate(usage.prompt_tokens, raw_response)
+            yield {"type": "final", "response": await self._complete_turn(turn, raw_response, tier, session_id, usage)}
             
-            # Step 9: Create unified response
-            response = ChatResponse(
-                text=formatted_response["text"],
-                emoji_map=[EmojiItem(name=item["name"], char=item["char"]) for item in formatted_response["emoji_map"]],
-                mentoring_insight=formatted_response.get("mentoring_insight"),
-                meta=Meta(
-                    tier=tier,
-                    session_id=session_id,
-                    tokens_used=tokens_used
-                )
+        except Exception as e:
+            print(f"Error in unified chat stream: {e}")
+            print(f"INSTRUMENT: FALLBACK - endpoint=unified_stream, session_id={session_id}, prompt_hash={prompt_hash}, history_turns={history_turns}, tier={tier}")
+            yield {"type": "final", "response": self._error_response(question, tier, session_id)}
+    
+    async def _prepare_turn(
+        self,
+        question: str,
+        session_id: str,
+        tier: Literal["starter", "pro", "pro_plus"],
+        user_id: Optional[str],
+        knowledge_context: Optional[str],
+        topics: Optional[Dict[str, str]]
+    ) -> Dict[str, Any]:
+        """Steps 1-5 shared by the buffered and streaming paths"""
+        # Step 1: Get conversation history and the running summary of trimmed turns (async, pooled)
+        conversation_store = get_async_conversation_store()
+        if config.CONV_SUMMARY_ENABLED:
+            conversation_history, summary = await asyncio.gather(
+                conversation_store.get(session_id),
+                conversation_store.get_summary(session_id),
             )
-            
-            return response
-            
+        else:
+            conversation_history, summary = await conversation_store.get(session_id), ""
+        history_turns = len(conversation_history)
+        
+        # LOGGING: Dispatch
+        print(f"DISPATCH: endpoint=unified, tier={tier}, session_id={session_id}, user_id={user_id}, has_knowledge={bool(knowledge_context)}, msg_count_before={history_turns}")
+        
+        # Step 2: Build message history for LLM context (REDIS VERSION)
+        # Conversation history is already in the right format: [{"role": "user", "content": "..."}, ...]
+        messages = conversation_history.copy()
+        
+        # Add current question to message history
+        messages.append({"role": "user", "content": question})
+        
+        # Step 3: Extract topics for context building (simplified)
+        context_topics = topics or {}
+        context_hint = ""
+        
+        if conversation_history and len(conversation_history) > 0:
+            # Simple topic extraction from recent conversation
+            recent_messages = conversation_history[-4:]  # Last 2 turns
+            topic_text = " ".join([msg.get("content", "") for msg in recent_messages])
+            
+            # Basic topic detection
+            recent_topic = RECENT_TOPIC_MATCHER.first(topic_text)
+            if recent_topic:
+                context_topics["recent_topic"] = recent_topic
+            
+            if context_topics:
+                context_hint = f"\n\nCONVERSATION CONTEXT:\nRecent discussion topics: {', '.join(context_topics.values())}\nCURRENT QUESTION CONTEXT:\nWhen the user refers to 'it', 'this', 'that', they likely mean: {context_topics.get('recent_topic', 'the previous topic')}"
+        
+        # Step 4: Build unified context using shared orchestrator
+        unified_context = self.build_conversation_context(
+            user_id=user_id or "anonymous",
+            conversation_id=session_id,  # Use session_id as conversation_id
+            messages=messages,
+            topics=context_topics,
+            tier=tier,
+            extra_knowledge={"knowledge_context": knowledge_context} if knowledge_context else None
+        )
+        
+        # Step 5: System prompt is the precomputed tier prefix, byte-identical across requests so the
+        # provider's prompt cache can reuse it. Knowledge context (enhanced endpoint, capped to its share
+        # of the tier budget) and the conversation context hint are sent separately after the history
+        prefix = get_prompt_registry().prefix(tier)
+        base_prompt, prompt_hash = prefix.text, prefix.prompt_hash
+        if knowledge_context:
+            knowledge_context = get_context_window_builder().fit_knowledge(knowledge_context, tier)
+        request_context = build_request_context(knowledge_context or "", context_hint)
+        
+        # INSTRUMENTATION: Log all critical parameters
+        print(f"INSTRUMENT: endpoint=unified, session_id={session_id}, prompt_hash={prompt_hash}, history_turns={history_turns}, tier={tier}, temperature=0.3")
+        
+        return {
+            "store": conversation_store,
+            "user_id": user_id,
+            "messages": messages,
+            "summary": summary,
+            "topics": context_topics,
+            "feature_flags": unified_context["feature_flags"],
+            "system_prompt": base_prompt,
+            "request_context": request_context,
+            "prompt_hash": prompt_hash,
+            "history_turns": history_turns,
+        }
+    
+    async def _complete_turn(
+        self,
+        turn: Dict[str, Any],
+        raw_response: str,
+        tier: Literal["starter", "pro", "pro_plus"],
+        session_id: str,
+        usage: TokenUsage
+    ) -> ChatResponse:
+        """Steps 7-9 shared by the buffered and streaming paths"""
+        # Step 7: Apply unified formatting using shared formatter
+        formatted_response = self.format_enhanced_response(
+            llm_text=raw_response,
+            feature_flags=turn["feature_flags"],
+            topics=turn["topics"]
+        )
+        
+        # Step 8: CRITICAL - Persist this turn in Redis (ATOMIC APPEND + TRIM + TTL)
+        # Only the new user/assistant pair is written; earlier turns are never rewritten.
+        # The turn's token usage rides on the assistant message (history sent to the LLM keeps role/content only)
+        new_messages = [
+            turn["messages"][-1],  # current user question
+            {"role": "assistant", "content": formatted_response["text"], "usage": usage.to_dict()},
+        ]
+        final_msg_count = await turn["store"].append(session_id, new_messages)
+        
+        # LOGGING: After save
+        print(f"AFTER_SAVE: session_id={session_id}, msg_count_after={final_msg_count}, history_persisted=True")
+        
+        # Fold the turns the append trimmed away into the running summary, off the response path
+        evicted = (turn["messages"][:-1] + new_messages)[:-config.CONV_MAX_TURNS]
+        if evicted and config.CONV_SUMMARY_ENABLED:
+            self._schedule_summary(turn["store"], session_id, evicted)
+        
+        # Token accounting per user/tier/endpoint
+        get_observability().record_token_usage(turn["user_id"], tier, turn.get("endpoint", "unified"), usage)
+        print(f"TOKENS: session_id={session_id}, tier={tier}, prompt={usage.prompt_tokens}, completion={usage.completion_tokens}, cached={usage.cached_tokens}, estimated={usage.estimated}")
+        
+        # Step 9: Create unified response
+        return ChatResponse(
+            text=formatted_response["text"],
+            emoji_map=[EmojiItem(name=item["name"], char=item["char"]) for item in formatted_response["emoji_map"]],
+            mentoring_insight=formatted_response.get("mentoring_insight"),
+            title=formatted_response.get("title"),
+            summary=formatted_response.get("summary"),
+            blocks=formatted_response.get("blocks", []),
+            meta=_usage_meta(tier, session_id, usage, formatted_response["meta"].get("primary_emoji"))
+        )
+    
+    def _schedule_summary(self, store, session_id: str, evicted: List[Dict[str, str]]) -> None:
+        """Background fold; folds for one session run one after another so none is lost"""
+        previous = self._summary_tasks.get(session_id)
+        task = asyncio.create_task(self._fold_summary(store, session_id, evicted, previous))
+        self._summary_tasks[session_id] = task
+        
+        def _forget(done: asyncio.Task) -> None:
+            if self._summary_tasks.get(session_id) is done:
+                del self._summary_tasks[session_id]
+        task.add_done_callback(_forget)
+    
+    async def _fold_summary(self, store, session_id: str, evicted: List[Dict[str, str]], previous: Optional[asyncio.Task]) -> None:
+        try:
+            if previous is not None:
+                await previous
+            summary = await store.fetch_summary(session_id)
+            folded = await ConversationSummarizer(self.llm).fold(summary, evicted)
+            await store.set_summary(session_id, folded)
+            print(f"SUMMARY: session_id={session_id}, folded_messages={len(evicted)}, summary_chars={len(folded)}")
         except Exception as e:
-            print(f"Error in unified chat service: {e}")
-            print(f"INSTRUMENT: FALLBACK - endpoint=unified, session_id={session_id}, prompt_hash={prompt_hash}, history_turns={history_turns}, tier={tier}")
-            
-            # Generate fallback response using shared formatter
-            fallback_text = f"""## 🔧 **Technical Answer**
+            print(f"ERROR: Failed to update conversation summary for {session_id}: {e}")
+    
+    async def wait_for_summaries(self) -> None:
+        """Let in-flight summary folds finish (application shutdown, tests)"""
+        while self._summary_tasks:
+            await asyncio.gather(*list(self._summary_tasks.values()), return_exceptions=True)
+    
+    def _error_response(self, question: str, tier: Literal["starter", "pro", "pro_plus"], session_id: str) -> ChatResponse:
+        """Formatted apology used when the unified pipeline fails"""
+        # Generate fallback response using shared formatter
+        fallback_text = f"""## 🔧 **Technical Answer**
 
 I apologize, but I encountered an error processing your question about {question}. Please try rephrasing your question or contact support if the issue persists.
 
@@ -304,54 +443,85 @@ Technical issues can occur with complex systems. Consider providing more specifi
 1. Rephrase your question with more specific details
 2. Contact support if the issue continues
 3. Try asking about a specific construction topic"""
-            
-            # Use shared formatter for consistent fallback
-            fallback_response = self.format_enhanced_response(
-                llm_text=fallback_text,
-                feature_flags={"enhanced_emoji_mapping": True, "response_structure_v2": True},
-                topics={}
-            )
-            
-            return ChatResponse(
-                text=fallback_response["text"],
-                emoji_map=[EmojiItem(name=item["name"], char=item["char"]) for item in fallback_response["emoji_map"]],
-                mentoring_insight=fallback_response.get("mentoring_insight"),
-                meta=Meta(
-                    tier=tier,
-                    session_id=session_id,
-                    tokens_used=200
-                )
-            )
+        
+        # Use shared formatter for consistent fallback
+        fallback_response = self.format_enhanced_response(
+            llm_text=fallback_text,
+            feature_flags={"enhanced_emoji_mapping": True, "response_structure_v2": True},
+            topics={}
+        )
+        
+        return ChatResponse(
+            text=fallback_response["text"],
+            emoji_map=[EmojiItem(name=item["name"], char=item["char"]) for item in fallback_response["emoji_map"]],
+            mentoring_insight=fallback_response.get("mentoring_insight"),
+            title=fallback_response.get("title"),
+            summary=fallback_response.get("summary"),
+            blocks=fallback_response.get("blocks", []),
+            meta=_usage_meta(tier, session_id, TokenUsage.estimate(0, fallback_text), fallback_response["meta"].get("primary_emoji"))
+        )
+    
+    def _build_context_window(self, system_prompt: str, message_history: List[Dict[str, str]], tier: str = "starter", summary: str = "", request_context: str = "") -> ContextWindow:
+        """System prompt, running summary, canonicalized history and per-request context, packed into the tier's token budget"""
+        window = get_context_window_builder().build(
+            system_prompt,
+            self._canonicalize_messages(message_history),
+            tier,
+            summary=f"{SUMMARY_HEADER}\n{summary}" if summary else "",
+            request_context=request_context,
+        )
+        print(f"CONTEXT_WINDOW: tier={tier}, prompt_tokens={window.prompt_tokens}/{window.budget}, history_kept={window.history_kept}, history_dropped={window.history_dropped}, truncated={window.truncated}")
+        return window
+    
+    def _build_llm_messages(self, system_prompt: str, message_history: List[Dict[str, str]], tier: str = "starter", summary: str = "", request_context: str = "") -> List[Dict[str, str]]:
+        return self._build_context_window(system_prompt, message_history, tier, summary, request_context).messages
     
-    async def _call_openai_api_with_history(self, question: str, system_prompt: str, message_history: List[Dict[str, str]]) -> str:
-        """Call OpenAI API with FULL conversation history"""
+    async def _call_openai_api_with_history(self, question: str, system_prompt: str, message_history: List[Dict[str, str]], tier: str = "starter", summary: str = "", request_context: str = "") -> Tuple[str, TokenUsage]:
+        """Call OpenAI API with FULL conversation history; returns the text and its token usage"""
+        window = self._build_context_window(system_prompt, message_history, tier, summary, request_context)
         try:
-            # Build messages with system prompt + FULL history
-            messages = [{"role": "system", "content": system_prompt}]
-            
-            # Add ALL message history (canonicalized and token-trimmed)
-            canonicalized_history = self._canonicalize_messages(message_history)
-            
-            # Token trimming: keep at least last 6-8 turns symmetrically
-            if len(canonicalized_history) > 16:  # 8 user + 8 assistant turns
-                # Keep first 2 and last 14 messages to maintain context
-                canonicalized_history = canonicalized_history[:2] + canonicalized_history[-14:]
-            
-            messages.extend(canonicalized_history)
-            
-            response = self.openai_client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=messages,
+            text, usage = await self.llm.chat_completion_with_usage(
+                window.messages,
                 temperature=0.3,
                 top_p=1,
                 max_tokens=2000
             )
-            
-            return response.choices[0].message.content
+            return text, usage or TokenUsage.estimate(window.prompt_tokens, text)
             
         except Exception as e:
             print(f"Error calling OpenAI API: {e}")
-            return self._generate_context_aware_fallback(question, "starter", {})
+            fallback = self._generate_context_aware_fallback(question, "starter", {})
+            return fallback, TokenUsage.estimate(0, fallback)
+    
+    async def _stream_openai_api_with_history(self, question: str, system_prompt: str, message_history: List[Dict[str, str]], tier: str = "starter", summary: str = "", request_context: str = "", usage: Optional[TokenUsage] = None) -> AsyncIterator[str]:
+        """
+        Stream the OpenAI completion; falls back like the buffered call if it fails before any output.
+        `usage` is updated in place: the local prompt estimate first, the API-reported usage once it arrives
+        """
+        usage = usage if usage is not None else TokenUsage(estimated=True)
+        window = self._build_context_window(system_prompt, message_history, tier, summary, request_context)
+        usage.prompt_tokens = window.prompt_tokens
+        
+        def _reported(api_usage: TokenUsage) -> None:
+            vars(usage).update(vars(api_usage))
+        
+        started = False
+        try:
+            async for delta in self.llm.stream_chat_completion(
+                window.messages,
+                on_usage=_reported,
+                temperature=0.3,
+                top_p=1,
+                max_tokens=2000
+            ):
+                started = True
+                yield delta
+        except Exception as e:
+            if started:
+                raise
+            print(f"Error streaming OpenAI API: {e}")
+            usage.prompt_tokens = 0
+            yield self._generate_context_aware_fallback(question, "starter", {})
 
     def _generate_context_aware_fallback(self, question: str, tier: str, topics: Dict[str, str]) -> str:
         """Generate context-aware fallback response - ROUTES THROUGH SAME V2 FORMATTER"""
@@ -473,44 +643,28 @@ Construction projects require careful coordination between multiple disciplines
 4. Verify requirements with local building authority"""
 
 
+async def _as_stream(text: str) -> AsyncIterator[str]:
+    """A complete response as a one-chunk stream"""
+    yield text
+
+
+def _usage_meta(tier: str, session_id: str, usage: TokenUsage, emoji: Optional[str] = None) -> Meta:
+    return Meta(
+        tier=tier,
+        session_id=session_id,
+        emoji=emoji,
+        tokens_used=usage.total_tokens,
+        prompt_tokens=usage.prompt_tokens,
+        completion_tokens=usage.completion_tokens,
+        cached_tokens=usage.cached_tokens,
+        tokens_estimated=usage.estimated
+    )
+
+
 def load_system_prompt(tier: Literal["starter", "pro", "pro_plus"]) -> str:
-    """
-    Load master system prompt and inject tier
-    SINGLE SOURCE OF TRUTH - no variations allowed
-    """
-    try:
-        with open('/app/core/prompts/system_master.txt', 'r') as f:
-            base_prompt = f.read()
-    except FileNotFoundError:
-        print("Warning: system_master.txt not found, using fallback")
-        base_prompt = """You are ONESource AI, the definitive construction compliance advisor for AU/NZ markets.
-
-ENHANCED SECTION FRAMEWORK - SELECTIVE USE ONLY:
-
-ALWAYS INCLUDE (Core sections for every response):
-🔧 **Technical Answer** - Comprehensive technical guidance with specific code references
-🧐 **Mentoring Insight** - Professional development context and strategic guidance  
-📋 **Next Steps** - Prioritized implementation roadmap
-
-CONDITIONAL SECTIONS (Use when relevant):
-📊 **Code Requirements** - Specific NCC/AS references and compliance pathways
-✅ **Compliance Verification** - Testing, certification and approval processes
-🔄 **Alternative Solutions** - Performance-based or alternative compliance options
-🏛️ **Authority Requirements** - Local council, certifier or authority-specific guidance
-📄 **Documentation Needed** - Required documentation, plans, certificates
-⚙️ **Workflow Recommendations** - Project sequencing and trade coordination
-❓ **Clarifying Questions** - Essential missing information for precise guidance"""
-    
-    # Inject tier-specific instructions
-    if tier == "pro":
-        base_prompt += "\n\nTIER: PRO - Provide detailed technical guidance with specific code references."
-    elif tier == "pro_plus":
-        base_prompt += "\n\nTIER: PRO_PLUS - Provide comprehensive analysis with advanced alternatives and workflow guidance."
-    else:
-        base_prompt += "\n\nTIER: STARTER - Provide clear, accessible guidance with essential compliance information."
-    
-    return base_prompt
+    """Master system prompt with tier instructions (precomputed by the prompt registry)"""
+    return get_prompt_registry().prefix(tier).text
 
 
 # Global service instance
-unified_chat_service = ChatService()
\ No newline at end of file
+unified_chat_service = ChatService()
@@ -16,18 +16,59 @@ class ProductionConfig:
     USE_UNIFIED_PIPELINE = os.getenv("USE_UNIFIED_PIPELINE", "1") == "1"
     CONV_STORE_PRIMARY = os.getenv("CONV_STORE_PRIMARY", "redis")  # redis|mongo
     CONV_DUAL_WRITE = os.getenv("CONV_DUAL_WRITE", "0") == "1"  # 0|1 (forensic periods)
+    CONV_SUMMARY_ENABLED = os.getenv("CONV_SUMMARY_ENABLED", "1") == "1"  # rolling summary of trimmed turns
     FEATURE_DYNAMIC_PROMPTS = os.getenv("FEATURE_DYNAMIC_PROMPTS", "0") == "1"  # Phase 3
     FEATURE_SUGGESTED_ACTIONS = os.getenv("FEATURE_SUGGESTED_ACTIONS", "0") == "1"  # Phase 3
     
     # Environment Configuration
     CONV_TTL_SECONDS = int(os.getenv("CONV_TTL_SECONDS", "2592000"))  # 30 days
     CONV_MAX_TURNS = int(os.getenv("CONV_MAX_TURNS", "16"))
+    CONV_READ_TIMEOUT_MS = int(os.getenv("CONV_READ_TIMEOUT_MS", "250"))  # primary read before secondary fallback
+    CONTEXT_TOKEN_BUDGET_STARTER = int(os.getenv("CONTEXT_TOKEN_BUDGET_STARTER", "6000"))  # prompt tokens per request
+    CONTEXT_TOKEN_BUDGET_PRO = int(os.getenv("CONTEXT_TOKEN_BUDGET_PRO", "12000"))
+    CONTEXT_TOKEN_BUDGET_PRO_PLUS = int(os.getenv("CONTEXT_TOKEN_BUDGET_PRO_PLUS", "24000"))
+    CONTEXT_MAX_MESSAGE_TOKENS = int(os.getenv("CONTEXT_MAX_MESSAGE_TOKENS", "1500"))  # per history message
+    CONTEXT_KNOWLEDGE_MAX_SHARE = float(os.getenv("CONTEXT_KNOWLEDGE_MAX_SHARE", "0.4"))  # of the tier budget
+    CONTEXT_TOKEN_CACHE_ENTRIES = int(os.getenv("CONTEXT_TOKEN_CACHE_ENTRIES", "8192"))
+    QUESTION_CLASSIFICATION_CACHE_ENTRIES = int(os.getenv("QUESTION_CLASSIFICATION_CACHE_ENTRIES", "4096"))
+    CONV_SUMMARY_MAX_TOKENS = int(os.getenv("CONV_SUMMARY_MAX_TOKENS", "300"))
     SCHEMA_REPAIR_RATE_ALERT = float(os.getenv("SCHEMA_REPAIR_RATE_ALERT", "0.005"))  # 0.5%
     REDIS_SOCKET_TIMEOUT_MS = int(os.getenv("REDIS_SOCKET_TIMEOUT_MS", "200"))
     REDIS_CONNECT_TIMEOUT_MS = int(os.getenv("REDIS_CONNECT_TIMEOUT_MS", "100"))
+    REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))
     LLM_TIMEOUT_MS = int(os.getenv("LLM_TIMEOUT_MS", "20000"))  # 20 seconds
+    LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "100"))
+    LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "1"))
     RENDER_P95_BUDGET_MS = int(os.getenv("RENDER_P95_BUDGET_MS", "150"))
     
+    # Prompts
+    SYSTEM_PROMPT_PATH = os.getenv("SYSTEM_PROMPT_PATH", "/app/core/prompts/system_master.txt")
+    PROMPT_RELOAD_CHECK_SECONDS = float(os.getenv("PROMPT_RELOAD_CHECK_SECONDS", "5"))  # mtime poll interval
+    
+    # Knowledge Search
+    VECTOR_INDEX_DIR = os.getenv("VECTOR_INDEX_DIR", "/app/data/vector_index")
+    VECTOR_INDEX_NPROBE = int(os.getenv("VECTOR_INDEX_NPROBE", "16"))
+    VECTOR_INDEX_TRAIN_THRESHOLD = int(os.getenv("VECTOR_INDEX_TRAIN_THRESHOLD", "4096"))
+    KNOWLEDGE_CHUNK_TOKENS = int(os.getenv("KNOWLEDGE_CHUNK_TOKENS", "256"))
+    KNOWLEDGE_CHUNK_OVERLAP_TOKENS = int(os.getenv("KNOWLEDGE_CHUNK_OVERLAP_TOKENS", "32"))
+    UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(50 * 1024 * 1024)))
+    INGESTION_WORKERS = int(os.getenv("INGESTION_WORKERS", "2"))
+    INGESTION_SPOOL_DIR = os.getenv("INGESTION_SPOOL_DIR", "/app/data/ingestion_spool")
+    INGESTION_MAX_ATTEMPTS = int(os.getenv("INGESTION_MAX_ATTEMPTS", "3"))  # handler runs per job, restarts included
+    INGESTION_RETRY_BACKOFF_SECONDS = float(os.getenv("INGESTION_RETRY_BACKOFF_SECONDS", "5"))  # doubled per failed attempt
+    EXTRACTION_WORKERS = int(os.getenv("EXTRACTION_WORKERS", "2"))
+    EXTRACTION_TIMEOUT_SECONDS = float(os.getenv("EXTRACTION_TIMEOUT_SECONDS", "60"))
+    EXTRACTION_MAX_PAGES = int(os.getenv("EXTRACTION_MAX_PAGES", "500"))
+    EXTRACTION_MEMORY_LIMIT_MB = int(os.getenv("EXTRACTION_MEMORY_LIMIT_MB", "1024"))  # 0 = no cap
+    EMBEDDING_STORAGE_FORMAT = os.getenv("EMBEDDING_STORAGE_FORMAT", "float32")  # float32 | int8 | list (legacy)
+    EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "256"))
+    EMBEDDING_MAX_CONCURRENCY = int(os.getenv("EMBEDDING_MAX_CONCURRENCY", "4"))
+    EMBEDDING_MAX_RETRIES = int(os.getenv("EMBEDDING_MAX_RETRIES", "4"))
+    EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "2048"))
+    EMBEDDING_CACHE_TTL_SECONDS = int(os.getenv("EMBEDDING_CACHE_TTL_SECONDS", "3600"))
+    EMBEDDING_CACHE_REDIS_URL = os.getenv("EMBEDDING_CACHE_REDIS_URL", "")  # empty = in-process tier only
+    EMBEDDING_CACHE_REDIS_TTL_SECONDS = int(os.getenv("EMBEDDING_CACHE_REDIS_TTL_SECONDS", "604800"))
+    
     # Build Information
     GIT_COMMIT = os.getenv("GIT_COMMIT", "unknown")
     BUILD_TIME = os.getenv("BUILD_TIME", "unknown")
@@ -49,15 +90,47 @@ class ProductionConfig:
                 "unified_pipeline": cls.USE_UNIFIED_PIPELINE,
                 "conv_store_primary": cls.CONV_STORE_PRIMARY,
                 "conv_dual_write": cls.CONV_DUAL_WRITE,
+                "conv_summary": cls.CONV_SUMMARY_ENABLED,
                 "dynamic_prompts": cls.FEATURE_DYNAMIC_PROMPTS,
                 "suggested_actions": cls.FEATURE_SUGGESTED_ACTIONS
             },
             "timeouts": {
                 "conv_ttl_seconds": cls.CONV_TTL_SECONDS,
                 "conv_max_turns": cls.CONV_MAX_TURNS,
+                "conv_read_timeout_ms": cls.CONV_READ_TIMEOUT_MS,
                 "redis_socket_timeout_ms": cls.REDIS_SOCKET_TIMEOUT_MS,
+                "redis_connect_timeout_ms": cls.REDIS_CONNECT_TIMEOUT_MS,
+                "redis_max_connections": cls.REDIS_MAX_CONNECTIONS,
                 "llm_timeout_ms": cls.LLM_TIMEOUT_MS,
-                "render_p95_budget_ms": cls.RENDER_P95_BUDGET_MS
+                "llm_max_connections": cls.LLM_MAX_CONNECTIONS,
+                "llm_max_retries": cls.LLM_MAX_RETRIES,
+                "render_p95_budget_ms": cls.RENDER_P95_BUDGET_MS,
+                "prompt_reload_check_seconds": cls.PROMPT_RELOAD_CHECK_SECONDS
+            },
+            "context_window": {
+                "token_budget_starter": cls.CONTEXT_TOKEN_BUDGET_STARTER,
+                "token_budget_pro": cls.CONTEXT_TOKEN_BUDGET_PRO,
+                "token_budget_pro_plus": cls.CONTEXT_TOKEN_BUDGET_PRO_PLUS,
+                "max_message_tokens": cls.CONTEXT_MAX_MESSAGE_TOKENS,
+                "knowledge_max_share": cls.CONTEXT_KNOWLEDGE_MAX_SHARE,
+                "summary_max_tokens": cls.CONV_SUMMARY_MAX_TOKENS
+            },
+            "knowledge_search": {
+                "vector_index_nprobe": cls.VECTOR_INDEX_NPROBE,
+                "vector_index_train_threshold": cls.VECTOR_INDEX_TRAIN_THRESHOLD,
+                "knowledge_chunk_tokens": cls.KNOWLEDGE_CHUNK_TOKENS,
+                "knowledge_chunk_overlap_tokens": cls.KNOWLEDGE_CHUNK_OVERLAP_TOKENS,
+                "upload_max_bytes": cls.UPLOAD_MAX_BYTES,
+                "ingestion_workers": cls.INGESTION_WORKERS,
+                "extraction_workers": cls.EXTRACTION_WORKERS,
+                "extraction_timeout_seconds": cls.EXTRACTION_TIMEOUT_SECONDS,
+                "extraction_max_pages": cls.EXTRACTION_MAX_PAGES,
+                "embedding_storage_format": cls.EMBEDDING_STORAGE_FORMAT,
+                "embedding_batch_size": cls.EMBEDDING_BATCH_SIZE,
+                "embedding_max_concurrency": cls.EMBEDDING_MAX_CONCURRENCY,
+                "embedding_cache_max_entries": cls.EMBEDDING_CACHE_MAX_ENTRIES,
+                "embedding_cache_ttl_seconds": cls.EMBEDDING_CACHE_TTL_SECONDS,
+                "embedding_cache_redis_enabled": bool(cls.EMBEDDING_CACHE_REDIS_URL)
             },
             "version": {
                 "git_commit": cls.GIT_COMMIT[:8] if cls.GIT_COMMIT != "unknown" else "unknown",
@@ -8,6 +8,17 @@ from datetime import datetime, timezone, timedelta
 from typing import List, Dict, Optional, Any
 from pymongo import ASCENDING, DESCENDING
 import uuid
+from core.keyword_matcher import KeywordMatcher
+
+# Topics for pronoun resolution: key -> (what "it" most likely refers to, terms that signal it)
+CONTEXT_TOPICS = {
+    "acoustic_system": ("acoustic lagging installation", ["acoustic", "lagging"]),
+    "fire_system": ("fire safety requirements", ["fire", "safety", "sprinkler"]),
+    "structural_system": ("structural requirements", ["structural", "structure", "beam", "column"]),
+    "water_system": ("water system installation", ["water", "plumbing", "hydraulic"]),
+    "electrical_system": ("electrical installation", ["electrical", "wiring", "power"]),
+}
+CONTEXT_TOPIC_MATCHER = KeywordMatcher.from_terms({key: terms for key, (_, terms) in CONTEXT_TOPICS.items()})
 
 class ConversationContextManager:
     """
@@ -123,29 +134,17 @@ class ConversationContextManager:
         topics = {}
         
         for conv in conversations:
-            question = conv.get("question", "").lower()
+            question = conv.get("question", "")
             response = conv.get("response", "")
             
             if isinstance(response, dict):
                 response = response.get("technical", "") or str(response)
             
-            response_text = str(response).lower()
-            
-            # Extract specific topics for pronoun resolution
-            if any(term in question or term in response_text for term in ['acoustic', 'lagging']):
-                topics["acoustic_system"] = "acoustic lagging installation"
-            
-            if any(term in question or term in response_text for term in ['fire', 'safety', 'sprinkler']):
-                topics["fire_system"] = "fire safety requirements"
-            
-            if any(term in question or term in response_text for term in ['structural', 'structure', 'beam', 'column']):
-                topics["structural_system"] = "structural requirements"
-            
-            if any(term in question or term in response_text for term in ['water', 'plumbing', 'hydraulic']):
-                topics["water_system"] = "water system installation"
-            
-            if any(term in question or term in response_text for term in ['electrical', 'wiring', 'power']):
-                topics["electrical_system"] = "electrical installation"
+            # Extract specific topics for pronoun resolution (one scan over question and response)
+            found = CONTEXT_TOPIC_MATCHER.present(f"{question}\n{response}")
+            for key, (label, _) in CONTEXT_TOPICS.items():
+                if key in found:
+                    topics[key] = label
         
         return topics
     
@@ -0,0 +1,177 @@
+"""
+Context window builder - packs the system prompt, knowledge context and history into a per-tier token budget
+History is added newest-first until the budget is spent; token counts are cached per message content
+"""
+
+import hashlib
+from collections import OrderedDict
+from typing import Callable, Dict, List, NamedTuple, Optional, Union
+from core.config import config
+from core.tokens import count_tokens, truncate_to_tokens
+
+MESSAGE_OVERHEAD_TOKENS = 4  # role and separators per chat message
+TRUNCATION_MARKER = "\n…[truncated]"
+
+
+class ContextWindow(NamedTuple):
+    """Messages ready for the LLM plus what the packing kept and dropped"""
+    messages: List[Dict[str, str]]
+    prompt_tokens: int
+    budget: int
+    history_kept: int
+    history_dropped: int
+    truncated: int
+
+
+class TokenCountCache:
+    """
+    LRU keyed by a digest of the text, so stored history is tokenized once: holds token
+    counts and the truncated prefixes of messages longer than their cap
+    """
+
+    def __init__(self, max_entries: int = 8192):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[bytes, Union[int, str]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def count(self, text: str) -> int:
+        return self._get_or_compute(self._digest(text), lambda: count_tokens(text))
+
+    def prefix(self, text: str, max_tokens: int) -> str:
+        """Longest prefix of text within max_tokens"""
+        key = self._digest(text) + max_tokens.to_bytes(4, "big")
+        return self._get_or_compute(key, lambda: truncate_to_tokens(text, max_tokens))
+
+    @staticmethod
+    def _digest(text: str) -> bytes:
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+    def _get_or_compute(self, key: bytes, compute: Callable[[], Union[int, str]]) -> Union[int, str]:
+        cached = self._entries.get(key)
+        if cached is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return cached
+
+        self.misses += 1
+        value = compute()
+        self._entries[key] = value
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return value
+
+
+class ContextWindowBuilder:
+    """
+    The system prompt and the current question are always sent. Earlier messages are
+    added newest-first, each capped at CONTEXT_MAX_MESSAGE_TOKENS, until the next one
+    no longer fits; everything older than that is dropped so the kept history stays contiguous
+    """
+
+    def __init__(
+        self,
+        budgets: Optional[Dict[str, int]] = None,
+        max_message_tokens: Optional[int] = None,
+        knowledge_max_share: Optional[float] = None,
+        cache: Optional[TokenCountCache] = None,
+    ):
+        self.budgets = budgets or {
+            "starter": config.CONTEXT_TOKEN_BUDGET_STARTER,
+            "pro": config.CONTEXT_TOKEN_BUDGET_PRO,
+            "pro_plus": config.CONTEXT_TOKEN_BUDGET_PRO_PLUS,
+        }
+        self.max_message_tokens = max_message_tokens or config.CONTEXT_MAX_MESSAGE_TOKENS
+        self.knowledge_max_share = config.CONTEXT_KNOWLEDGE_MAX_SHARE if knowledge_max_share is None else knowledge_max_share
+        self.cache = cache or TokenCountCache(config.CONTEXT_TOKEN_CACHE_ENTRIES)
+
+    def budget_for(self, tier: str) -> int:
+        return self.budgets.get(tier, self.budgets["starter"])
+
+    def fit_knowledge(self, knowledge_context: str, tier: str) -> str:
+        """Knowledge context capped at CONTEXT_KNOWLEDGE_MAX_SHARE of the tier budget"""
+        return self._fit(knowledge_context, int(self.budget_for(tier) * self.knowledge_max_share))
+
+    def build(
+        self,
+        system_prompt: str,
+        history: List[Dict[str, str]],
+        tier: str,
+        summary: str = "",
+        request_context: str = "",
+    ) -> ContextWindow:
+        """
+        history ends with the current user message. Layout, most stable first so the provider's
+        prefix cache covers as much as possible: system prompt, running summary, earlier turns,
+        per-request context, current question
+        """
+        budget = self.budget_for(tier)
+        pinned = [{"role": "system", "content": system_prompt}]
+        used = self._cost(system_prompt)
+        truncated = 0
+
+        if summary:
+            summary = self._fit(summary, self.max_message_tokens)
+            pinned.append({"role": "system", "content": summary})
+            used += self._cost(summary)
+
+        tail = []
+        if request_context:
+            tail.append({"role": "system", "content": request_context})
+            used += self._cost(request_context)
+
+        if not history:
+            return ContextWindow(pinned + tail, used, budget, 0, 0, 0)
+
+        # The current question always goes; it only loses its tail if it alone overflows the budget
+        current = history[-1]
+        question_tokens = max(budget - used - MESSAGE_OVERHEAD_TOKENS, self.max_message_tokens)
+        content = self._fit(current["content"], question_tokens)
+        if content is not current["content"]:
+            current = {"role": current["role"], "content": content}
+            truncated += 1
+        used += self._cost(current["content"])
+
+        kept: List[Dict[str, str]] = []
+        earlier = history[:-1]
+        for message in reversed(earlier):
+            content = self._fit(message["content"], self.max_message_tokens)
+            cost = self._cost(content)
+            if used + cost > budget:
+                break
+            if content is not message["content"]:
+                message = {"role": message["role"], "content": content}
+                truncated += 1
+            kept.append(message)
+            used += cost
+        kept.reverse()
+
+        return ContextWindow(
+            pinned + kept + tail + [current],
+            used,
+            budget,
+            history_kept=len(kept),
+            history_dropped=len(earlier) - len(kept),
+            truncated=truncated,
+        )
+
+    def _cost(self, text: str) -> int:
+        return self.cache.count(text) + MESSAGE_OVERHEAD_TOKENS
+
+    def _fit(self, text: str, max_tokens: int) -> str:
+        """text itself when it fits, else its longest prefix that fits with the truncation marker"""
+        if self.cache.count(text) <= max_tokens:
+            return text
+        return self.cache.prefix(text, max_tokens - self.cache.count(TRUNCATION_MARKER)) + TRUNCATION_MARKER
+
+
+# Global context window builder instance
+_context_window_builder: Optional[ContextWindowBuilder] = None
+
+
+def get_context_window_builder() -> ContextWindowBuilder:
+    """Get global context window builder (budgets from config)"""
+    global _context_window_builder
+    if _context_window_builder is None:
+        _context_window_builder = ContextWindowBuilder()
+    return _context_window_builder
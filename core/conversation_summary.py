@@ -0,0 +1,61 @@
+"""
+Rolling conversation summary - folds turns trimmed out of the history window into one running summary
+Runs in the background after the response is returned; ChatService injects it ahead of the recent turns
+"""
+
+from typing import Dict, List, Optional
+from core.config import config
+from core.tokens import count_tokens
+from core.llm_gateway import LLMGateway
+
+SUMMARY_HEADER = "EARLIER IN THIS CONVERSATION (summary of turns no longer shown):"
+
+SUMMARY_INSTRUCTIONS = (
+    "You maintain a running summary of a construction compliance conversation. "
+    "Update the summary with the new turns below. Keep project facts, building class, "
+    "locations, code clauses (NCC/AS), decisions and open questions; drop greetings and "
+    "formatting. Reply with the updated summary only, at most {max_words} words."
+)
+
+
+class ConversationSummarizer:
+    """Folds evicted messages into the previous summary with a small LLM call, or extractively without one"""
+
+    def __init__(self, llm: Optional[LLMGateway] = None, max_tokens: Optional[int] = None):
+        self.llm = llm
+        self.max_tokens = max_tokens or config.CONV_SUMMARY_MAX_TOKENS
+
+    async def fold(self, summary: str, evicted: List[Dict[str, str]]) -> str:
+        """Previous summary plus the evicted messages, condensed to at most CONV_SUMMARY_MAX_TOKENS"""
+        if not evicted:
+            return summary
+        if self.llm is not None and self.llm.available:
+            try:
+                folded = await self.llm.chat_completion(
+                    self._build_messages(summary, evicted),
+                    temperature=0,
+                    max_tokens=self.max_tokens,
+                )
+                if folded and folded.strip():
+                    return folded.strip()
+            except Exception as e:
+                print(f"WARNING: Summary LLM call failed, using extractive summary: {e}")
+        return self._extractive(summary, evicted)
+
+    def _build_messages(self, summary: str, evicted: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        transcript = "\n".join(f"{message['role'].upper()}: {message['content']}" for message in evicted)
+        return [
+            {"role": "system", "content": SUMMARY_INSTRUCTIONS.format(max_words=self.max_tokens * 3 // 4)},
+            {"role": "user", "content": f"CURRENT SUMMARY:\n{summary or '(none)'}\n\nNEW TURNS:\n{transcript}"},
+        ]
+
+    def _extractive(self, summary: str, evicted: List[Dict[str, str]]) -> str:
+        """One line per evicted user question; the oldest lines go first once over budget"""
+        lines = summary.splitlines() if summary else []
+        for message in evicted:
+            if message.get("role") == "user":
+                first_line = message.get("content", "").strip().split("\n", 1)[0]
+                lines.append(f"- User asked: {first_line[:200]}")
+        while len(lines) > 1 and count_tokens("\n".join(lines)) > self.max_tokens:
+            lines.pop(0)
+        return "\n".join(lines)
@@ -5,196 +5,396 @@ TIERS DO NOT CHANGE FORMATTING - only content depth
 """
 
 import re
-from typing import List, Dict, Tuple, Optional
-from core.schema import CANONICAL_EMOJI_MAP, EmojiItem
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple
+from core.schema import CANONICAL_EMOJI_MAP, Block, EmojiItem
+
+SECTION_NAMES = tuple(CANONICAL_EMOJI_MAP)
+SECTION_HEADERS = tuple(f"## {emoji} **{name}**" for name, emoji in CANONICAL_EMOJI_MAP.items())
+SECTION_MARKERS = {f"{emoji} **{name}**": index for index, (name, emoji) in enumerate(CANONICAL_EMOJI_MAP.items())}
+
+# Emojis models put in front of section titles (the canonical set plus the wrong mentoring variants)
+HEADER_EMOJI = "[🔧🧐📋📊✅🔄🏛️📄⚙️❓🧠💡🤓]"
+
+# Section title at the start of a line, with any '#', emoji and bold decoration and an optional colon.
+# One group per section, in CANONICAL_EMOJI_MAP order
+HEADER_PATTERN = re.compile(
+    rf"#*\s*{HEADER_EMOJI}*\s*\*?\*?(?:{'|'.join(f'({re.escape(name)})' for name in SECTION_NAMES)})\*?\*?:?",
+    re.IGNORECASE,
+)
+# A line holding only header decoration; the title may follow on the next line
+HEADER_PREFIX_PATTERN = re.compile(rf"#*\s*{HEADER_EMOJI}*\s*")
+# List markers; the group number is also the order the rewrites apply in (bullets, *, numbers, -)
+LIST_MARKER_PATTERN = re.compile(r"(?:([•●○▸▪▫‣⁃])|(\*)|(\d+)[.)]|(-))(?:\s+|$)")
+TABLE_SEPARATOR_PATTERN = re.compile(r"[-:\s|]+")
+SECTION_MARKER_PATTERN = re.compile("|".join(re.escape(marker) for marker in SECTION_MARKERS))
+NEWLINE_RUN_PATTERN = re.compile(r"\n{3,}")
+
+# CRITICAL: wrong emojis models use for the mentoring section
+WRONG_EMOJI_REPLACEMENTS = {
+    "🧠 **Mentoring Insight**": "🧐 **Mentoring Insight**",
+    "💡 **Mentoring Insight**": "🧐 **Mentoring Insight**",
+    "🤓 **Mentoring Insight**": "🧐 **Mentoring Insight**",
+    "🧠 Mentoring Insight": "🧐 Mentoring Insight",
+    "💡 Mentoring Insight": "🧐 Mentoring Insight",
+    "🤓 Mentoring Insight": "🧐 Mentoring Insight"
+}
+
+MENTORING_INDEX = SECTION_NAMES.index("Mentoring Insight")
+
+# Formatted text: canonical headers on their own lines, "- " / "1. " list markers, tables as HTML
+SECTION_SPLIT_PATTERN = re.compile(f"^({'|'.join(re.escape(header) for header in SECTION_HEADERS)})$", re.MULTILINE)
+LIST_ITEM_PATTERN = re.compile(r"\s*(?:-|\d+\.)(?: |$)")
+TABLE_OPEN = '<div class="os-table-container">'
+CODE_FENCE = "```"
+DEFAULT_SUMMARY = "Professional construction guidance provided."
+
+
+class Token(NamedTuple):
+    """One line's content, stripped, and the whitespace before it; section is set for header lines"""
+    gap: str
+    text: str
+    section: Optional[int]
+
+
+class TableData(NamedTuple):
+    headers: List[str]
+    rows: List[List[str]]
+
+
+class FormattedResponse(NamedTuple):
+    """Formatted text and emoji map plus the same text as CHAT_V2 title, summary and blocks"""
+    text: str
+    emoji_map: List[EmojiItem]
+    mentoring_insight: Optional[str]
+    title: str
+    summary: str
+    blocks: List[Block]
+
+
+def _fix_mentoring_emoji(line: str) -> str:
+    if "Mentoring Insight" in line:
+        for wrong, correct in WRONG_EMOJI_REPLACEMENTS.items():
+            line = line.replace(wrong, correct)
+    return line
+
 
 class UnifiedFormatter:
     """
     Single formatter that applies ALL visual/emoji/table rules
     NO tier-specific formatting variations allowed
+    One scan splits the text into lines and rewrites section headers; a second walk over those
+    lines emits lists, tables and spacing and collects the emoji map at the same time
     """
     
-    def __init__(self):
-        self.section_patterns = self._build_section_patterns()
-    
-    def _build_section_patterns(self) -> Dict[str, re.Pattern]:
-        """Build regex patterns for section detection and normalization"""
-        patterns = {}
-        
-        # Match any variation of section headers and normalize to canonical
-        for section_name, canonical_emoji in CANONICAL_EMOJI_MAP.items():
-            # Match various emoji + title combinations
-            pattern = rf"(?:^|\n)(?:[🔧🧐📋📊✅🔄🏛️📄⚙️❓🧠💡🤓]+)\s*\*?\*?{re.escape(section_name)}\*?\*?:?"
-            patterns[section_name] = re.compile(pattern, re.IGNORECASE | re.MULTILINE)
-        
-        return patterns
-    
     def format_response(self, raw_text: str) -> Tuple[str, List[EmojiItem]]:
         """
         Main formatting function - enforces ALL rules
         Returns: (formatted_text, emoji_map)
         """
-        # Step 1: Normalize section headers with canonical emojis
-        formatted_text = self._normalize_section_headers(raw_text)
-        
-        # Step 2: Apply typography rules  
-        formatted_text = self._apply_typography_rules(formatted_text)
-        
-        # Step 3: Format lists with consistent styling
-        formatted_text = self._normalize_lists(formatted_text)
-        
-        # Step 4: Convert markdown tables to professional HTML
-        formatted_text = self._format_tables(formatted_text)
-        
-        # Step 5: Extract emoji map from formatted text
-        emoji_map = self._extract_emoji_map(formatted_text)
-        
-        # Step 6: Final cleanup and validation
-        formatted_text = self._final_cleanup(formatted_text)
-        
-        return formatted_text, emoji_map
+        formatted_text, found, _ = self._render(raw_text)
+        return formatted_text, self._emoji_map(found)
     
-    def _normalize_section_headers(self, text: str) -> str:
+    def format_v2(self, raw_text: str) -> FormattedResponse:
         """
-        Enforce canonical emoji + header format
-        Replace ANY variation with: ## {canonical_emoji} **{Title}**
+        format_response plus the v2 structure (title, summary, one typed block per section)
+        built from the same pass, so the response validates against CHAT_V2 without repair
         """
-        formatted = text
-        
-        # CRITICAL: Replace wrong emojis with correct ones
-        wrong_emoji_replacements = {
-            "🧠 **Mentoring Insight**": "🧐 **Mentoring Insight**",
-            "💡 **Mentoring Insight**": "🧐 **Mentoring Insight**", 
-            "🤓 **Mentoring Insight**": "🧐 **Mentoring Insight**",
-            "🧠 Mentoring Insight": "🧐 Mentoring Insight",
-            "💡 Mentoring Insight": "🧐 Mentoring Insight",
-            "🤓 Mentoring Insight": "🧐 Mentoring Insight"
-        }
-        
-        for wrong, correct in wrong_emoji_replacements.items():
-            formatted = formatted.replace(wrong, correct)
-        
-        # Normalize all section headers to H2 format
-        for section_name, canonical_emoji in CANONICAL_EMOJI_MAP.items():
-            # Find existing headers and normalize them
-            pattern = rf"(?:^|\n)(?:#*\s*)?(?:[🔧🧐📋📊✅🔄🏛️📄⚙️❓🧠💡🤓]*)\s*\*?\*?{re.escape(section_name)}\*?\*?:?"
-            replacement = f"\n\n## {canonical_emoji} **{section_name}**\n\n"
-            formatted = re.sub(pattern, replacement, formatted, flags=re.IGNORECASE | re.MULTILINE)
-        
-        return formatted
+        formatted_text, found, tables = self._render(raw_text)
+        mentoring_insight = self.extract_mentoring_insight(formatted_text)
+        blocks = self._blocks(formatted_text, tables)
+        title = next((SECTION_HEADERS[SECTION_NAMES.index(b.section)] for b in blocks if b.section), SECTION_HEADERS[0])
+        return FormattedResponse(
+            text=formatted_text,
+            emoji_map=self._emoji_map(found),
+            mentoring_insight=mentoring_insight,
+            title=title,
+            summary=self._summary(mentoring_insight, blocks),
+            blocks=blocks,
+        )
     
-    def _apply_typography_rules(self, text: str) -> str:
-        """Apply consistent typography and spacing"""
-        # Ensure proper spacing around sections
-        text = re.sub(r'\n{3,}', '\n\n', text)  # Max 2 newlines
-        
-        # Ensure single space after section headers
-        text = re.sub(r'(\*\*)\s*\n\s*', r'\1\n\n', text)
-        
-        # Fix paragraph spacing
-        text = re.sub(r'\n([A-Z])', r'\n\n\1', text)
+    def _render(self, raw_text: str) -> Tuple[str, Set[int], List[TableData]]:
+        """Formatted text, the sections it contains and the headers/rows of each table, in order"""
+        tokens, _ = self._tokenize(raw_text)
+        out: List[str] = []
+        found: Set[int] = set()
+        tables: List[TableData] = []
+        previous = ""      # last content written; the spacing rules look at how it ends
+        join_rank = 0      # a bare list marker ("-" alone on its line) takes the next line onto its own
+        after_table = False
+        k = 0
+        while k < len(tokens):
+            gap, text, section = tokens[k]
+            self._collect_sections(tokens[k], found)
+            rank, item, bare = self._list_item(text, k + 1 < len(tokens))
+            
+            if join_rank:
+                # Now mid-line: rewritten only by an earlier list pass, or by the same one if it starts the old line
+                if rank and (rank < join_rank or rank == join_rank and gap.endswith("\n")):
+                    text = item
+                    join_rank = rank if bare else 0
+                else:
+                    join_rank = 0
+                out.append(text)
+            else:
+                sep = "" if k == 0 or after_table else self._separator(gap, previous, text, rank)
+                after_table = False
+                if rank:
+                    text = item
+                    join_rank = rank if bare else 0
+                elif text[0] == "|" and (k == 0 or sep.endswith("\n")):
+                    table = self._table(tokens, k)
+                    if table:
+                        html, last, leftover, data = table
+                        tables.append(data)
+                        for token in tokens[k + 1:last + 1]:
+                            self._collect_sections(token, found)
+                        out.append(sep)
+                        out.append(html)
+                        # Text after a row's last pipe stays on the line after the table
+                        text = leftover or tokens[last].text
+                        if leftover:
+                            out.append(leftover)
+                        after_table = not leftover
+                        previous = text
+                        k = last + 1
+                        continue
+                out.append(sep)
+                out.append(text)
+            previous = text
+            k += 1
         
-        return text.strip()
+        formatted_text = "".join(out).strip()
+        return self._add_required_sections(formatted_text, found), found, tables
+    
+    def _tokenize(self, text: str) -> Tuple[List[Token], str]:
+        """
+        Split text into content lines and the whitespace between them, replacing any section header
+        with ## {canonical_emoji} **{Title}**. Returns the tokens and the trailing whitespace
+        """
+        lines = text.split("\n")
+        last = len(lines) - 1
+        tokens: List[Token] = []
+        gap = ""
+        i = 0
+        while i <= last:
+            line = _fix_mentoring_emoji(lines[i])
+            after = -1  # text following a header on the same line can only open a later section
+            while True:
+                content = line.strip()
+                if not content:
+                    gap += line
+                    break
+                header = self._match_header(line, lines, i, after)
+                if header is None:
+                    lead = len(line) - len(line.lstrip())
+                    tokens.append(Token(gap + line[:lead], content, None))
+                    gap = line[lead + len(content):]
+                    break
+                # The header absorbs the blank lines above it; a '#' header only the newline before it.
+                # Directly below a header for the same or a later section it stops at that header's line
+                if line[0] == "#":
+                    gap = gap[:-1]
+                elif not tokens:
+                    gap = ""
+                else:
+                    keep = 2 if tokens[-1].section is not None and tokens[-1].section >= header[0] else 0
+                    gap = gap[:keep + gap[keep:].find("\n")]
+                after, line, i = header
+                tokens.append(Token(gap + "\n\n", SECTION_HEADERS[after], after))
+                gap = "\n\n"
+            if i < last:
+                gap += "\n"
+            i += 1
+        return tokens, gap
     
-    def _normalize_lists(self, text: str) -> str:
-        """Normalize all lists to consistent format"""
-        # Convert various bullet styles to standard -
-        text = re.sub(r'^[\s]*[•●○▸▪▫‣⁃]\s+', '- ', text, flags=re.MULTILINE)
-        text = re.sub(r'^[\s]*[\*]\s+', '- ', text, flags=re.MULTILINE)
+    def _match_header(self, line: str, lines: List[str], i: int, after: int) -> Optional[Tuple[int, str, int]]:
+        """(section, text after the header, index of the line it ends on) if line opens a section after `after`"""
+        match = HEADER_PATTERN.match(line)
+        j = i
+        if match is None and HEADER_PREFIX_PATTERN.fullmatch(line):
+            # e.g. an emoji or "##" alone on its line with the title below it
+            chunk = line
+            while j < len(lines) - 1:
+                j += 1
+                following = _fix_mentoring_emoji(lines[j])
+                chunk += "\n" + following
+                if following.strip() and not HEADER_PREFIX_PATTERN.fullmatch(following):
+                    break
+            match = HEADER_PATTERN.match(chunk)
+            line = chunk
+        if match is None or match.lastindex - 1 <= after:
+            return None
+        return match.lastindex - 1, line[match.end():], j
+    
+    @staticmethod
+    def _separator(gap: str, previous: str, text: str, rank: int) -> str:
+        """Whitespace written between two content lines"""
+        if previous.endswith("**"):
+            gap = "\n\n"  # blank line after headers and bold lines
+        elif "\n\n\n" in gap:
+            gap = NEWLINE_RUN_PATTERN.sub("\n\n", gap)  # max 2 newlines
+        if rank:
+            return gap[:gap.find("\n") + 1]  # list items follow the previous line directly
+        if gap[-1] == "\n" and "A" <= text[0] <= "Z":
+            return gap + "\n"  # paragraph spacing
+        return gap
+    
+    @staticmethod
+    def _list_item(text: str, has_next: bool) -> Tuple[int, str, bool]:
+        """(rank, normalized item, bare marker) for a list line; rank 0 when it is not one"""
+        match = LIST_MARKER_PATTERN.match(text)
+        if match is None:
+            return 0, text, False
+        bare = match.end() == len(text)
+        if bare and not has_next:
+            return 0, text, False
+        rank = match.lastindex
+        marker = f"{match.group(3)}. " if rank == 3 else "- "
+        return rank, marker + text[match.end():], bare
+    
+    def _table(self, tokens: List[Token], k: int) -> Optional[Tuple[str, int, str, TableData]]:
+        """
+        Markdown table starting at tokens[k] as professional HTML with ONESource styling
+        Returns (html, index of its last row, text after that row's last pipe, headers and rows) or None
+        """
+        header = tokens[k].text
+        if len(header) < 3 or header[-1] != "|":
+            return None
         
-        # Normalize numbered lists
-        text = re.sub(r'^[\s]*(\d+)[\.\)]\s+', r'\1. ', text, flags=re.MULTILINE)
+        # The separator may run over several lines of '-', ':' and '|'; the longest one that
+        # still leaves a body row wins
+        if k + 1 >= len(tokens) or not tokens[k + 1].gap.endswith("\n") or tokens[k + 1].text[0] != "|":
+            return None
+        end = k
+        while end + 1 < len(tokens) and TABLE_SEPARATOR_PATTERN.fullmatch(tokens[end + 1].text):
+            end += 1
+        while end > k and not (
+            tokens[end].text[-1] == "|"
+            and (end > k + 1 or len(tokens[end].text) >= 3)
+            and self._first_row(tokens, end + 1)
+        ):
+            end -= 1
+        if end == k:
+            return None
         
-        # Ensure proper indentation (single space before -)
-        text = re.sub(r'^[\s]*-\s+', '- ', text, flags=re.MULTILINE)
+        rows, leftover = [], ""
+        j = end + 1
+        while j < len(tokens) and tokens[j].text[0] == "|":
+            row = tokens[j].text
+            last_pipe = row.rfind("|")
+            if last_pipe < 2:
+                break
+            rows.append([cell.strip() for cell in row[:last_pipe + 1].split("|") if cell.strip()])
+            if last_pipe < len(row) - 1:
+                leftover = row[last_pipe + 1:].lstrip()
+                break
+            j += 1
+        last = end + len(rows)
         
-        return text
+        headers = [h.strip() for h in header[1:-1].split("|") if h.strip()]
+        rows = [row for row in rows if row]
+        html = [TABLE_OPEN, '\n<table class="os-table">\n<thead>\n<tr>\n']
+        html.extend(f'<th class="os-th">{h}</th>\n' for h in headers)
+        html.append('</tr>\n</thead>\n<tbody>\n')
+        for i, cells in enumerate(rows):
+            css_class = "os-tr-even" if i % 2 == 0 else "os-tr-odd"
+            html.append(f'<tr class="{css_class}">\n')
+            html.extend(f'<td class="os-td">{cell}</td>\n' for cell in cells)
+            html.append('</tr>\n')
+        html.append('</tbody>\n</table>\n</div>\n')
+        return "".join(html), last, leftover, TableData(headers, rows)
     
-    def _format_tables(self, text: str) -> str:
-        """Convert markdown tables to professional HTML with ONESource styling"""
-        # Detect markdown tables
-        table_pattern = r'^\|(.+)\|\s*\n\|[-:\s|]+\|\s*\n((?:\|.+\|\s*\n?)+)'
-        
-        def table_replacer(match):
-            header_row = match.group(1)
-            body_rows = match.group(2)
-            
-            # Parse header
-            headers = [h.strip() for h in header_row.split('|') if h.strip()]
-            
-            # Parse body rows
-            rows = []
-            for row_line in body_rows.strip().split('\n'):
-                if row_line.strip():
-                    cells = [cell.strip() for cell in row_line.split('|') if cell.strip()]
-                    if cells:
-                        rows.append(cells)
-            
-            # Generate professional HTML table
-            html = '<div class="os-table-container">\n'
-            html += '<table class="os-table">\n'
-            
-            # Header
-            html += '<thead>\n<tr>\n'
-            for header in headers:
-                html += f'<th class="os-th">{header}</th>\n'
-            html += '</tr>\n</thead>\n'
-            
-            # Body
-            html += '<tbody>\n'
-            for i, row in enumerate(rows):
-                css_class = "os-tr-even" if i % 2 == 0 else "os-tr-odd"
-                html += f'<tr class="{css_class}">\n'
-                for cell in row:
-                    html += f'<td class="os-td">{cell}</td>\n'
-                html += '</tr>\n'
-            html += '</tbody>\n'
-            
-            html += '</table>\n</div>\n'
-            return html
-        
-        return re.sub(table_pattern, table_replacer, text, flags=re.MULTILINE)
+    @staticmethod
+    def _first_row(tokens: List[Token], j: int) -> bool:
+        return (
+            j < len(tokens)
+            and tokens[j].gap.endswith("\n")
+            and tokens[j].text[0] == "|"
+            and tokens[j].text.rfind("|") >= 2
+        )
     
-    def _extract_emoji_map(self, text: str) -> List[EmojiItem]:
-        """Extract emoji map from formatted text"""
-        emoji_items = []
-        
-        for section_name, emoji_char in CANONICAL_EMOJI_MAP.items():
-            if f"{emoji_char} **{section_name}**" in text:
-                emoji_items.append(EmojiItem(
-                    name=section_name.lower().replace(" ", "_"),
-                    char=emoji_char
-                ))
+    def _blocks(self, text: str, tables: List[TableData]) -> List[Block]:
+        """One block per section, its header line included, typed by what the section body holds"""
+        parts = SECTION_SPLIT_PATTERN.split(text)
+        chunks = [(None, "", parts[0])]
+        chunks.extend((SECTION_NAMES[SECTION_HEADERS.index(header)], header, body) for header, body in zip(parts[1::2], parts[2::2]))
+        remaining = iter(tables)
+        blocks = []
+        for section, header, body in chunks:
+            content = (header + body).strip()
+            if not content:
+                continue
+            body = body.strip()
+            section_tables = [next(remaining, None) for _ in range(body.count(TABLE_OPEN))]
+            blocks.append(Block(content=content, section=section, **self._block_type(body, section_tables)))
+        return blocks
+    
+    @staticmethod
+    def _block_type(body: str, tables: List[Optional[TableData]]) -> Dict[str, Any]:
+        if body.startswith(CODE_FENCE) and body.endswith(CODE_FENCE) and body.count(CODE_FENCE) == 2 and "\n" in body:
+            return {"type": "code", "language": body[len(CODE_FENCE):body.find("\n")].strip() or None}
+        if len(tables) == 1 and tables[0] and body.startswith(TABLE_OPEN) and body.endswith("</div>"):
+            return {"type": "table", "headers": tables[0].headers, "rows": tables[0].rows}
+        lines = [line for line in body.split("\n") if line.strip()]
+        if lines and all(LIST_ITEM_PATTERN.match(line) for line in lines):
+            return {"type": "list"}
+        return {"type": "markdown"}
+    
+    @staticmethod
+    def _summary(mentoring_insight: Optional[str], blocks: List[Block]) -> str:
+        """Mentoring insight, else the first plain line of the response (200 chars)"""
+        if mentoring_insight:
+            return mentoring_insight[:200]
+        for block in blocks:
+            for line in block.content.split("\n"):
+                line = line.strip()
+                if line and line not in SECTION_HEADERS and not line.startswith("<"):
+                    return line[:200]
+        return DEFAULT_SUMMARY
+    
+    @staticmethod
+    def _collect_sections(token: Token, found: Set[int]) -> None:
+        if token.section is not None:
+            found.add(token.section)
+        elif "**" in token.text:
+            found.update(SECTION_MARKERS[marker] for marker in SECTION_MARKER_PATTERN.findall(token.text))
+    
+    @staticmethod
+    def _emoji_map(found: Set[int]) -> List[EmojiItem]:
+        emoji_items = [
+            EmojiItem(name=name.lower().replace(" ", "_"), char=emoji)
+            for index, (name, emoji) in enumerate(CANONICAL_EMOJI_MAP.items())
+            if index in found
+        ]
         
         # Ensure mentoring_insight is always present if any sections found
-        if emoji_items and not any(item.name == "mentoring_insight" for item in emoji_items):
-            emoji_items.append(EmojiItem(
-                name="mentoring_insight",
-                char="🧐"
-            ))
+        if emoji_items and MENTORING_INDEX not in found:
+            emoji_items.append(EmojiItem(name="mentoring_insight", char="🧐"))
         
         return emoji_items
     
-    def _final_cleanup(self, text: str) -> str:
-        """Final cleanup and validation"""
-        # Remove excessive whitespace
-        text = re.sub(r'\n{4,}', '\n\n\n', text)
-        
-        # Ensure proper ending
-        text = text.strip()
-        
-        # Validate critical sections present
-        if "🔧 **Technical Answer**" not in text:
+    @staticmethod
+    def _add_required_sections(text: str, found: Set[int]) -> str:
+        """Validate critical sections present"""
+        if 0 not in found:
             text = "## 🔧 **Technical Answer**\n\n" + text
         
-        if "🧐 **Mentoring Insight**" not in text:
+        if MENTORING_INDEX not in found:
             text += "\n\n## 🧐 **Mentoring Insight**\n\nConsider professional consultation for project-specific guidance and compliance verification."
         
-        if "📋 **Next Steps**" not in text:
+        if SECTION_NAMES.index("Next Steps") not in found:
             text += "\n\n## 📋 **Next Steps**\n\n1. Review relevant NCC provisions\n2. Engage appropriate specialists as needed\n3. Confirm compliance with local authority requirements"
         
         return text
     
+    def _normalize_section_headers(self, text: str) -> str:
+        """
+        Enforce canonical emoji + header format
+        Replace ANY variation with: ## {canonical_emoji} **{Title}**
+        """
+        tokens, trailing = self._tokenize(text)
+        return "".join(gap + content for gap, content, _ in tokens) + trailing
+    
     def extract_mentoring_insight(self, text: str) -> Optional[str]:
         """Extract mentoring insight section for separate field"""
         pattern = r"## 🧐 \*\*Mentoring Insight\*\*\n\n(.*?)(?=\n\n##|\Z)"
@@ -204,4 +404,58 @@ class UnifiedFormatter:
         return None
 
 # Global formatter instance
-unified_formatter = UnifiedFormatter()
\ No newline at end of file
+unified_formatter = UnifiedFormatter()
+
+
+# Section headers are short: once a partial line is this long its header prefix can be normalized
+HEADER_PREFIX_CHARS = 64
+
+
+class StreamingSectionNormalizer:
+    """
+    Incremental section-header normalization for streamed model output
+    Text is released line by line (or once a line outgrows any header) so emoji/heading
+    fixes never straddle a chunk boundary; the full formatter still runs on completion
+    """
+
+    def __init__(self, formatter: Optional[UnifiedFormatter] = None):
+        self.formatter = formatter or unified_formatter
+        self._pending = ""
+        self._carry = ""  # newline held back so a following header can absorb it, as in the full pass
+        self._mid_line = False
+
+    def feed(self, delta: str) -> str:
+        """Add a streamed delta; returns the text that is ready to send"""
+        self._pending += delta
+        out = []
+        while self._pending:
+            line, sep, rest = self._pending.partition("\n")
+            if not sep:
+                if self._mid_line:
+                    # Header prefix already handled; pass the rest of the line straight through
+                    out.append(line)
+                    self._pending = ""
+                elif len(line) >= HEADER_PREFIX_CHARS:
+                    out.append(self._normalize(line))
+                    self._pending = ""
+                    self._mid_line = True
+                break
+            out.append(line if self._mid_line else self._normalize(line))
+            self._carry = sep
+            self._pending = rest
+            self._mid_line = False
+        return "".join(out)
+
+    def flush(self) -> str:
+        """Release whatever is buffered at the end of the stream"""
+        text, self._pending = self._pending, ""
+        if self._mid_line:
+            return text
+        return self._normalize(text) if text else self._take_carry()
+
+    def _normalize(self, line: str) -> str:
+        return self.formatter._normalize_section_headers(self._take_carry() + line)
+
+    def _take_carry(self) -> str:
+        carry, self._carry = self._carry, ""
+        return carry
@@ -0,0 +1,140 @@
+"""
+Keyword matcher - every pattern of every keyword group compiled into one regex and scanned in a single pass
+Counts match what a separate re.findall per pattern would give, overlaps between patterns included
+"""
+
+import re
+import string
+from typing import Dict, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+# Everything re.IGNORECASE matches against an ASCII letter, mapped to that letter:
+# ASCII capitals plus the four Unicode characters that fold onto i, s and k
+ASCII_CASE_FOLD = str.maketrans({
+    **{upper: upper.lower() for upper in string.ascii_uppercase},
+    "İ": "i", "ı": "i", "ſ": "s", "K": "k",
+})
+LITERAL_CHARS = frozenset(string.ascii_letters + string.digits + "-/")
+QUANTIFIERS = ("?", "*", "+", "{")
+
+
+class KeywordMatch(NamedTuple):
+    group: str
+    text: str
+    start: int
+
+
+class KeywordMatcher:
+    """
+    One regex over the case-folded text finds every position where some pattern's literal prefix
+    starts ("fire" for r"fire[- ]?rated?"); only the patterns whose prefix starts there are then
+    tried. Patterns that are nothing but their prefix need no regex call at all
+    """
+
+    def __init__(self, groups: Dict[str, Sequence[str]], flags: int = re.IGNORECASE):
+        self.groups = list(groups)
+        self._rank = {group: rank for rank, group in enumerate(self.groups)}
+        self._ignore_case = bool(flags & re.IGNORECASE)
+        self._patterns: List[re.Pattern] = []
+        self._group_of: List[str] = []
+        self._by_first: Dict[str, List[Tuple[int, str, bool]]] = {}  # (pattern, prefix, pattern is just the prefix)
+        self._unprefixed: List[int] = []
+        for group, patterns in groups.items():
+            for pattern in patterns:
+                compiled = re.compile(pattern, flags)
+                if compiled.groups:
+                    raise ValueError(f"keyword pattern must not capture: {pattern!r}")
+                i = len(self._patterns)
+                self._patterns.append(compiled)
+                self._group_of.append(group)
+                prefix = self._literal_prefix(pattern)
+                if not prefix:
+                    self._unprefixed.append(i)
+                    continue
+                folded = prefix.lower() if self._ignore_case else prefix
+                self._by_first.setdefault(folded[0], []).append((i, folded, prefix == pattern))
+
+        # Every pattern whose prefix is itself a prefix of a longer one is tried wherever the longer one is
+        # found; the scanner captures the longest prefix at each position, so one lookup gives all candidates
+        self._by_prefix: Dict[str, List[Tuple[int, int, bool]]] = {}  # (pattern, prefix length, pattern is just the prefix)
+        for members in self._by_first.values():
+            for longest in {prefix for _, prefix, _ in members}:
+                self._by_prefix[longest] = [
+                    (i, len(prefix), literal) for i, prefix, literal in members if longest.startswith(prefix)
+                ]
+
+        # Lookahead so overlapping starts ("wind load" / "load") are all reported; longest prefix first
+        branches = []
+        for first, members in self._by_first.items():
+            rests = sorted({prefix[1:] for _, prefix, _ in members}, key=len, reverse=True)
+            branches.append(f"{re.escape(first)}(?:{'|'.join(re.escape(rest) for rest in rests)})")
+        self._prefix_scanner = re.compile(f"(?=({'|'.join(branches)}))") if branches else None
+
+    @classmethod
+    def from_terms(cls, groups: Dict[str, Sequence[str]]) -> "KeywordMatcher":
+        """Plain substrings, matched case-insensitively (the `term in text.lower()` checks)"""
+        return cls({group: [re.escape(term) for term in terms] for group, terms in groups.items()})
+
+    def find(self, text: str) -> List[KeywordMatch]:
+        """All matches in text order; per pattern non-overlapping, as re.findall returns them"""
+        matches = [KeywordMatch(self._group_of[i], text[start:end], start) for i, start, end in self._spans(text)]
+        if self._unprefixed:
+            matches.sort(key=lambda match: match.start)
+        return matches
+
+    def counts(self, text: str) -> Dict[str, int]:
+        """Matches per group, in group order; groups without matches are left out"""
+        found: Dict[str, int] = {}
+        for i, _, _ in self._spans(text):
+            group = self._group_of[i]
+            found[group] = found.get(group, 0) + 1
+        return {group: found[group] for group in sorted(found, key=self._rank.__getitem__)}
+
+    def present(self, text: str) -> Set[str]:
+        """Groups with at least one match"""
+        return {match.group for match in self.find(text)}
+
+    def first(self, text: str) -> Optional[str]:
+        """First group, in group order, with a match (an if/elif chain over the groups)"""
+        found = self.present(text)
+        return next((group for group in self.groups if group in found), None)
+
+    def _spans(self, text: str) -> List[Tuple[int, int, int]]:
+        """(pattern, start, end) per match; in text order unless some pattern has no literal prefix"""
+        if not text:
+            return []
+        spans: List[Tuple[int, int, int]] = []
+        if self._prefix_scanner is not None:
+            folded = self._fold(text) if self._ignore_case else text  # same length as text
+            next_free: Dict[int, int] = {}  # where each pattern's last match ended
+            for hit in self._prefix_scanner.finditer(folded):
+                pos = hit.start()
+                for i, length, literal in self._by_prefix[hit.group(1)]:
+                    if pos < next_free.get(i, 0):
+                        continue
+                    if literal:
+                        end = pos + length
+                    else:
+                        match = self._patterns[i].match(text, pos)
+                        if match is None:
+                            continue
+                        end = match.end()
+                    spans.append((i, pos, end))
+                    next_free[i] = max(end, pos + 1)
+
+        for i in self._unprefixed:
+            spans.extend((i, m.start(), m.end()) for m in self._patterns[i].finditer(text))
+        return spans
+
+    @staticmethod
+    def _fold(text: str) -> str:
+        return text.lower() if text.isascii() else text.translate(ASCII_CASE_FOLD)
+
+    @staticmethod
+    def _literal_prefix(pattern: str) -> str:
+        """Leading run of plain characters every match starts with ("" for alternations)"""
+        if "|" in pattern:
+            return ""
+        end = 0
+        while end < len(pattern) and pattern[end] in LITERAL_CHARS and not pattern[end + 1:end + 2] in QUANTIFIERS:
+            end += 1
+        return pattern[:end]
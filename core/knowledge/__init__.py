@@ -0,0 +1,3 @@
+"""
+Knowledge search subsystem - vector indexing and retrieval for the knowledge banks
+"""
@@ -0,0 +1,219 @@
+"""
+Document chunking - overlapping token-bounded passages with per-chunk embeddings
+Chunks live in the `knowledge_chunks` collection and their own vector indexes, so
+search can return the passage that matched instead of the start of the document
+"""
+
+import re
+import logging
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Tuple
+from core.config import config
+from core.tokens import count_tokens, count_tokens_batch
+from core.knowledge.scoring import ScoredHit
+from core.knowledge.embedding_codec import encode_embedding
+from core.knowledge.vector_index import boost_weight, get_knowledge_index_manager
+
+logger = logging.getLogger(__name__)
+
+CHUNK_COLLECTION = "knowledge_chunks"
+
+# Document bank -> vector index bank for its chunks
+CHUNK_BANKS = {
+    "community_knowledge_bank": "community_knowledge_chunks",
+    "personal_knowledge_bank": "personal_knowledge_chunks",
+}
+
+# Chunk candidates fetched per requested document (several chunks of one document often rank together)
+CHUNK_CANDIDATES_PER_DOCUMENT = 4
+
+_WORD = re.compile(r"\S+\s*")
+_SENTENCE_END = re.compile(r"[.!?:;]['\")\]]?$")
+
+
+class TextChunk(NamedTuple):
+    """One passage of a document with its character span in the extracted text"""
+    index: int
+    text: str
+    start: int
+    end: int
+    token_count: int
+
+
+def _word_spans(text: str, max_tokens: int) -> Tuple[List[Tuple[int, int]], List[int]]:
+    spans = [(m.start(), m.end()) for m in _WORD.finditer(text)]
+    costs = count_tokens_batch([text[start:end].rstrip() for start, end in spans]) if spans else []
+
+    # Split pathological "words" (tables without spaces, base64 blobs) so one never exceeds a chunk
+    if costs and max(costs) > max_tokens:
+        split_spans, split_costs = [], []
+        for (start, end), cost in zip(spans, costs):
+            if cost <= max_tokens:
+                split_spans.append((start, end))
+                split_costs.append(cost)
+                continue
+            pieces = -(-cost // max_tokens)
+            while True:
+                step = -(-(end - start) // pieces)
+                piece_spans = [(piece_start, min(end, piece_start + step)) for piece_start in range(start, end, step)]
+                piece_costs = count_tokens_batch([text[a:b].rstrip() for a, b in piece_spans])
+                if max(piece_costs) <= max_tokens or step == 1:
+                    break
+                pieces += 1  # token boundaries rarely fall where the characters were cut
+            split_spans.extend(piece_spans)
+            split_costs.extend(piece_costs)
+        spans, costs = split_spans, split_costs
+    return spans, costs
+
+
+def chunk_text(text: str, max_tokens: Optional[int] = None, overlap_tokens: Optional[int] = None) -> List[TextChunk]:
+    """
+    Split text into chunks of at most max_tokens with ~overlap_tokens shared between neighbours
+    Chunks prefer to end on a sentence boundary in their last quarter
+    """
+    max_tokens = max_tokens or config.KNOWLEDGE_CHUNK_TOKENS
+    overlap_tokens = config.KNOWLEDGE_CHUNK_OVERLAP_TOKENS if overlap_tokens is None else overlap_tokens
+    spans, costs = _word_spans(text or "", max_tokens)
+
+    chunks: List[TextChunk] = []
+    start = 0
+    while start < len(spans):
+        end, total = start, 0
+        while end < len(spans) and (end == start or total + costs[end] <= max_tokens):
+            total += costs[end]
+            end += 1
+
+        if end < len(spans):
+            for boundary in range(end - 1, start + (end - start) * 3 // 4, -1):
+                word = text[spans[boundary][0]:spans[boundary][1]]
+                if _SENTENCE_END.search(word.rstrip()) or "\n" in word:
+                    total -= sum(costs[boundary + 1:end])
+                    end = boundary + 1
+                    break
+
+        char_start = spans[start][0]
+        passage = text[char_start:spans[end - 1][1]].rstrip()
+        # Per-word costs miss whitespace tokens (newline runs in tables, indented code); recount the
+        # passage and drop trailing words until it really fits
+        total = count_tokens(passage)
+        while total > max_tokens and end - start > 1:
+            end -= max(1, (end - start) * (total - max_tokens) // total)
+            end = max(end, start + 1)
+            passage = text[char_start:spans[end - 1][1]].rstrip()
+            total = count_tokens(passage)
+        chunks.append(TextChunk(len(chunks), passage, char_start, char_start + len(passage), total))
+        if end >= len(spans):
+            break
+
+        # Step back over whole words for the overlap, always advancing at least one word
+        next_start, overlap = end, 0
+        while next_start - 1 > start and overlap + costs[next_start - 1] <= overlap_tokens:
+            next_start -= 1
+            overlap += costs[next_start]
+        chunk_end = char_start + len(passage)
+        while next_start < end and count_tokens(text[spans[next_start][0]:chunk_end]) > overlap_tokens:
+            next_start += 1  # recounted like the passage; reaching end means no overlap
+        start = next_start
+    return chunks
+
+
+def chunk_id(document_id: str, index: int) -> str:
+    return f"{document_id}:{index}"
+
+
+def document_id_of(chunk_id_value: str) -> str:
+    return chunk_id_value.rsplit(":", 1)[0]
+
+
+def build_chunk_records(bank: str, document: Dict[str, Any], chunks: List[TextChunk], embeddings: List[List[float]]) -> List[Dict[str, Any]]:
+    """Mongo records for a document's chunks (bank is the parent document bank)"""
+    created = datetime.utcnow()
+    return [
+        {
+            "chunk_id": chunk_id(document["document_id"], chunk.index),
+            "document_id": document["document_id"],
+            "bank": bank,
+            "user_id": document.get("user_id"),
+            "chunk_index": chunk.index,
+            "text": chunk.text,
+            "start_char": chunk.start,
+            "end_char": chunk.end,
+            "token_count": chunk.token_count,
+            "embedding": encode_embedding(embedding, config.EMBEDDING_STORAGE_FORMAT),
+            "is_partner_content": bool(document.get("partner_info")),
+            "status": "active",
+            "created_timestamp": created,
+        }
+        for chunk, embedding in zip(chunks, embeddings)
+    ]
+
+
+async def index_document_chunks(
+    collection,
+    bank: str,
+    document: Dict[str, Any],
+    text: str,
+    embed_batch: Callable[[List[str]], Awaitable[List[List[float]]]],
+) -> int:
+    """Chunk, batch-embed, store and index one uploaded document; returns the chunk count"""
+    chunks = chunk_text(text)
+    if not chunks:
+        return 0
+
+    embeddings = await embed_batch([chunk.text for chunk in chunks])
+    records = build_chunk_records(bank, document, chunks, embeddings)
+    await collection.insert_many(records)
+
+    chunk_bank = CHUNK_BANKS[bank]
+    get_knowledge_index_manager().add_many(
+        chunk_bank,
+        [record["chunk_id"] for record in records],
+        embeddings,
+        [record["user_id"] for record in records] if bank == "personal_knowledge_bank" else None,
+        [boost_weight(chunk_bank, record) for record in records],
+    )
+    return len(records)
+
+
+async def ensure_chunk_indexes(collection) -> None:
+    await collection.create_index("chunk_id", unique=True)
+    await collection.create_index([("document_id", 1), ("chunk_index", 1)])
+    await collection.create_index([("bank", 1), ("status", 1), ("user_id", 1)])
+
+
+def merge_document_hits(document_hits: List[ScoredHit], chunk_hits: List[ScoredHit], k: int) -> Tuple[List[ScoredHit], Dict[str, str]]:
+    """
+    Combine whole-document and chunk hits into one ranked list of documents
+    Each document keeps its best score; returns (hits keyed by document id, document id -> best chunk id)
+    """
+    best: Dict[str, ScoredHit] = {}
+    best_chunk: Dict[str, str] = {}
+    for hit in chunk_hits:
+        document_id = document_id_of(hit.doc_id)
+        if document_id not in best_chunk:
+            # Chunk hits arrive best first
+            best_chunk[document_id] = hit.doc_id
+            best[document_id] = ScoredHit(document_id, hit.similarity, hit.score)
+    for hit in document_hits:
+        if hit.doc_id not in best or hit.score > best[hit.doc_id].score:
+            best[hit.doc_id] = hit
+
+    ranked = sorted(best.values(), key=lambda hit: hit.score, reverse=True)[:k]
+    return ranked, {hit.doc_id: best_chunk[hit.doc_id] for hit in ranked if hit.doc_id in best_chunk}
+
+
+def search_document_hits(
+    bank: str,
+    query_embedding: List[float],
+    k: int,
+    owner: Optional[str] = None,
+    min_similarity: Optional[float] = None,
+) -> Tuple[List[ScoredHit], Dict[str, str]]:
+    """Top-k documents of a bank, ranked by their best passage (documents indexed before chunking still match whole)"""
+    manager = get_knowledge_index_manager()
+    document_hits = manager.search(bank, query_embedding, k=k, owner=owner, min_similarity=min_similarity)
+    chunk_hits = manager.search(
+        CHUNK_BANKS[bank], query_embedding, k=k * CHUNK_CANDIDATES_PER_DOCUMENT,
+        owner=owner, min_similarity=min_similarity
+    )
+    return merge_document_hits(document_hits, chunk_hits, k)
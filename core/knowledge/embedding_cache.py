@@ -0,0 +1,156 @@
+"""
+Query Embedding Cache - content-addressed cache in front of generate_embeddings
+In-process LRU+TTL tier, optional Redis tier, and single-flight coalescing of
+concurrent identical requests
+"""
+
+import time
+import asyncio
+import hashlib
+import logging
+import numpy as np
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from core.config import config
+from core.observability import get_observability
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingCache:
+    """Two-tier embedding cache keyed by model + SHA-256 of the exact input text"""
+
+    def __init__(
+        self,
+        max_entries: int = 2048,
+        ttl_seconds: int = 3600,
+        redis_url: Optional[str] = None,
+        redis_ttl_seconds: int = 604800,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.redis_ttl_seconds = redis_ttl_seconds
+        # Entries are float32 arrays (~6KB at 1536 dims) rather than Python float lists (~50KB)
+        self._entries: "OrderedDict[str, Tuple[float, np.ndarray]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._redis = None
+
+        if redis_url:
+            try:
+                import redis.asyncio as aioredis
+                self._redis = aioredis.Redis.from_url(
+                    redis_url,
+                    socket_timeout=config.REDIS_SOCKET_TIMEOUT_MS / 1000,
+                    socket_connect_timeout=config.REDIS_CONNECT_TIMEOUT_MS / 1000,
+                )
+            except Exception as e:
+                logger.warning(f"Embedding cache: Redis tier disabled: {e}")
+
+    @staticmethod
+    def cache_key(model: str, text: str) -> str:
+        return f"emb:{model}:{hashlib.sha256(text.encode('utf-8')).hexdigest()}"
+
+    async def get_or_compute(
+        self,
+        model: str,
+        text: str,
+        compute: Callable[[str], Awaitable[List[float]]],
+    ) -> List[float]:
+        """
+        Return the cached embedding or compute it once
+        Concurrent callers for the same key share a single in-flight computation
+        """
+        observability = get_observability()
+        key = self.cache_key(model, text)
+
+        cached = self._get_local(key)
+        if cached is not None:
+            observability.record_embedding_cache("hit", "memory")
+            return cached.tolist()
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            observability.record_embedding_cache("coalesced")
+            return (await asyncio.shield(inflight)).tolist()
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            vector = await self._get_remote(key)
+            if vector is not None:
+                observability.record_embedding_cache("hit", "redis")
+            else:
+                observability.record_embedding_cache("miss")
+                vector = np.asarray(await compute(text), dtype=np.float32)
+                await self._set_remote(key, vector)
+
+            self._set_local(key, vector)
+            future.set_result(vector)
+            return vector.tolist()
+        except BaseException as e:
+            future.set_exception(e)
+            # Waiters re-raise; mark retrieved so an unobserved failure is not logged
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # ----- in-process tier -----
+    def _get_local(self, key: str) -> Optional[np.ndarray]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, vector = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return vector
+
+    def _set_local(self, key: str, vector: np.ndarray) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, vector)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    # ----- Redis tier (best effort) -----
+    async def _get_remote(self, key: str) -> Optional[np.ndarray]:
+        if self._redis is None:
+            return None
+        try:
+            raw = await self._redis.get(key)
+            return np.frombuffer(raw, dtype=np.float32) if raw else None
+        except Exception as e:
+            logger.warning(f"Embedding cache: Redis get failed: {e}")
+            return None
+
+    async def _set_remote(self, key: str, vector: np.ndarray) -> None:
+        if self._redis is None:
+            return
+        try:
+            await self._redis.set(key, vector.tobytes(), ex=self.redis_ttl_seconds)
+        except Exception as e:
+            logger.warning(f"Embedding cache: Redis set failed: {e}")
+
+
+# Global embedding cache instance
+_embedding_cache: Optional[EmbeddingCache] = None
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """Get global embedding cache instance"""
+    global _embedding_cache
+    if _embedding_cache is None:
+        _embedding_cache = EmbeddingCache(
+            max_entries=config.EMBEDDING_CACHE_MAX_ENTRIES,
+            ttl_seconds=config.EMBEDDING_CACHE_TTL_SECONDS,
+            redis_url=config.EMBEDDING_CACHE_REDIS_URL or None,
+            redis_ttl_seconds=config.EMBEDDING_CACHE_REDIS_TTL_SECONDS,
+        )
+    return _embedding_cache
@@ -0,0 +1,59 @@
+"""
+Embedding storage codec - packed binary vectors in Mongo instead of lists of doubles
+float32 (6KB at 1536 dims) or int8 with a per-vector scale (~1.5KB); decoding
+also accepts legacy list embeddings so reads work throughout the migration
+"""
+
+import numpy as np
+from bson.binary import Binary
+from typing import Any, Iterable, Optional
+
+# BSON user-defined binary subtypes (0x80-0xFF are reserved for applications)
+FLOAT32_SUBTYPE = 0x80
+INT8_SUBTYPE = 0x81
+
+STORAGE_FORMATS = ("float32", "int8", "list")
+
+_SCALE_BYTES = 4
+
+
+def encode_embedding(embedding: Iterable[float], storage_format: str = "float32") -> Any:
+    """Encode an embedding for storage; "list" keeps the legacy representation"""
+    if storage_format == "list":
+        return [float(x) for x in embedding]
+
+    vector = np.asarray(embedding, dtype=np.float32).reshape(-1)
+    if storage_format == "float32":
+        return Binary(vector.tobytes(), FLOAT32_SUBTYPE)
+    if storage_format == "int8":
+        # Symmetric per-vector quantization: the scale is stored as a float32 prefix
+        peak = float(np.max(np.abs(vector))) if vector.size else 0.0
+        scale = np.float32(peak / 127.0 if peak > 0 else 1.0)
+        quantized = np.clip(np.rint(vector / scale), -127, 127).astype(np.int8)
+        return Binary(scale.tobytes() + quantized.tobytes(), INT8_SUBTYPE)
+    raise ValueError(f"Unknown embedding storage format: {storage_format}")
+
+
+def decode_embedding(value: Any) -> Optional[np.ndarray]:
+    """
+    Decode a stored embedding to a float32 array, or None if missing/unrecognised
+    float32 binaries are wrapped zero-copy (the result is read-only)
+    """
+    if value is None:
+        return None
+    if isinstance(value, Binary):
+        if value.subtype == FLOAT32_SUBTYPE:
+            return np.frombuffer(value, dtype=np.float32)
+        if value.subtype == INT8_SUBTYPE:
+            scale = np.frombuffer(value, dtype=np.float32, count=1)[0]
+            return np.frombuffer(value, dtype=np.int8, offset=_SCALE_BYTES).astype(np.float32) * scale
+        return None
+    if isinstance(value, (list, tuple)):
+        # Legacy list-of-doubles documents
+        return np.asarray(value, dtype=np.float32) if value else None
+    return None
+
+
+def is_legacy_embedding(value: Any) -> bool:
+    """True for embeddings still stored as a BSON array"""
+    return isinstance(value, (list, tuple))
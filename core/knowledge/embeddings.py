@@ -0,0 +1,170 @@
+"""
+Batch embedding API - packs inputs into as few provider requests as the limits allow
+Bounded concurrency, retry with exponential backoff, and a deterministic local
+provider so ingestion throughput can be tested and benchmarked offline
+"""
+
+import re
+import random
+import asyncio
+import hashlib
+import logging
+import numpy as np
+from typing import List, Optional
+from core.config import config
+from core.tokens import count_tokens_batch
+
+logger = logging.getLogger(__name__)
+
+# Per-request limits of the OpenAI embeddings endpoint (inputs, total tokens) and per-input token cap
+MAX_INPUTS_PER_REQUEST = 2048
+MAX_TOKENS_PER_REQUEST = 300_000
+MAX_TOKENS_PER_INPUT = 8191
+MAX_INPUT_CHARS = 8000
+
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+
+class EmbeddingProvider:
+    """Embeds a batch of texts in one request; subclasses set `model` and `dim`"""
+    model = "unknown"
+    dim = 1536
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        raise NotImplementedError
+
+
+class OpenAIEmbeddingProvider(EmbeddingProvider):
+    """OpenAI embeddings endpoint via an AsyncOpenAI client"""
+
+    def __init__(self, client, model: str = "text-embedding-ada-002", dim: int = 1536):
+        self.client = client
+        self.model = model
+        self.dim = dim
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        response = await self.client.embeddings.create(model=self.model, input=texts)
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+
+class LocalEmbeddingProvider(EmbeddingProvider):
+    """
+    Deterministic stand-in: hashed bag-of-words features, so texts sharing words are similar
+    latency_ms/per_input_ms simulate API round-trip cost for benchmarks
+    """
+
+    _TOKEN = re.compile(r"\w+")
+
+    def __init__(self, dim: int = 1536, latency_ms: float = 0.0, per_input_ms: float = 0.0):
+        self.model = f"local-hash-{dim}"
+        self.dim = dim
+        self.latency_ms = latency_ms
+        self.per_input_ms = per_input_ms
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        delay = (self.latency_ms + self.per_input_ms * len(texts)) / 1000
+        if delay:
+            await asyncio.sleep(delay)
+        return [self.embed_text(text) for text in texts]
+
+    def embed_text(self, text: str) -> List[float]:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for token in self._TOKEN.findall(text.lower()) or [text]:
+            digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], "little") % self.dim
+            vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        if norm == 0:
+            vector[0] = 1.0
+            norm = 1.0
+        return (vector / norm).tolist()
+
+
+def pack_batches(token_counts: List[int], max_inputs: int, max_tokens: int = MAX_TOKENS_PER_REQUEST) -> List[range]:
+    """Group consecutive inputs into requests bounded by input count and total tokens"""
+    batches, start, tokens = [], 0, 0
+    for position, count in enumerate(token_counts):
+        if position > start and (position - start >= max_inputs or tokens + count > max_tokens):
+            batches.append(range(start, position))
+            start, tokens = position, 0
+        tokens += count
+    if start < len(token_counts):
+        batches.append(range(start, len(token_counts)))
+    return batches
+
+
+def is_retryable(error: Exception) -> bool:
+    status = getattr(error, "status_code", None)
+    if status is not None:
+        return status in RETRYABLE_STATUS_CODES
+    # Connection resets and timeouts carry no status code
+    name = type(error).__name__
+    return isinstance(error, (asyncio.TimeoutError, ConnectionError)) or name in ("APIConnectionError", "APITimeoutError")
+
+
+async def _embed_with_retry(provider: EmbeddingProvider, texts: List[str], max_retries: int, backoff_base: float) -> List[List[float]]:
+    attempt = 0
+    while True:
+        try:
+            embeddings = await provider.embed(texts)
+            if len(embeddings) != len(texts):
+                raise ValueError(f"Provider returned {len(embeddings)} embeddings for {len(texts)} inputs")
+            return embeddings
+        except Exception as e:
+            if attempt >= max_retries or not is_retryable(e):
+                raise
+            # Exponential backoff with full jitter so concurrent batches do not retry in lockstep
+            delay = random.uniform(0, backoff_base * (2 ** attempt))
+            attempt += 1
+            logger.warning(f"Embedding request failed ({e}); retry {attempt}/{max_retries} in {delay:.2f}s")
+            await asyncio.sleep(delay)
+
+
+async def generate_embeddings_batch(
+    texts: List[str],
+    provider: Optional[EmbeddingProvider] = None,
+    batch_size: Optional[int] = None,
+    max_concurrency: Optional[int] = None,
+    max_retries: Optional[int] = None,
+    backoff_base: float = 0.5,
+) -> List[List[float]]:
+    """
+    Embed texts with as few requests as possible, preserving input order
+    Raises the last error if a batch still fails after retries
+    """
+    if not texts:
+        return []
+    provider = provider or get_embedding_provider()
+    batch_size = min(batch_size or config.EMBEDDING_BATCH_SIZE, MAX_INPUTS_PER_REQUEST)
+    max_retries = config.EMBEDDING_MAX_RETRIES if max_retries is None else max_retries
+    semaphore = asyncio.Semaphore(max_concurrency or config.EMBEDDING_MAX_CONCURRENCY)
+
+    inputs = [text[:MAX_INPUT_CHARS] for text in texts]
+    token_counts = [min(count, MAX_TOKENS_PER_INPUT) for count in count_tokens_batch(inputs)]
+    batches = pack_batches(token_counts, batch_size)
+
+    async def run(batch: range) -> List[List[float]]:
+        async with semaphore:
+            return await _embed_with_retry(provider, [inputs[i] for i in batch], max_retries, backoff_base)
+
+    results = await asyncio.gather(*[run(batch) for batch in batches])
+    return [embedding for batch_embeddings in results for embedding in batch_embeddings]
+
+
+# Global embedding provider instance
+_provider: Optional[EmbeddingProvider] = None
+
+
+def init_embedding_provider(provider: EmbeddingProvider) -> EmbeddingProvider:
+    """Initialize the global embedding provider"""
+    global _provider
+    _provider = provider
+    return _provider
+
+
+def get_embedding_provider() -> EmbeddingProvider:
+    """Get global embedding provider instance (local stand-in until initialized)"""
+    global _provider
+    if _provider is None:
+        _provider = LocalEmbeddingProvider()
+    return _provider
@@ -0,0 +1,198 @@
+"""
+Document extraction service - PDF/DOCX parsing in bounded worker processes
+Keeps CPU-bound parsing off the event loop, with per-file timeouts, page limits
+and a per-worker address-space cap
+"""
+
+import io
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Optional, Union
+from core.config import config
+
+logger = logging.getLogger(__name__)
+
+PDF_CONTENT_TYPES = ("application/pdf",)
+WORD_CONTENT_TYPES = (
+    "application/msword",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+)
+
+
+class ExtractionError(Exception):
+    """No text could be extracted; raised so an ingestion job retries or fails instead of indexing the message"""
+
+
+def _open_source(source: Union[bytes, str]):
+    """Spool path (read by the worker itself) or in-memory bytes"""
+    return io.BytesIO(source) if isinstance(source, (bytes, bytearray)) else source
+
+
+def extract_pdf_text(source: Union[bytes, str], filename: str, max_pages: int) -> str:
+    """Extract text page by page with PyPDF2 (runs in a worker process)"""
+    try:
+        import PyPDF2
+
+        pdf_reader = PyPDF2.PdfReader(_open_source(source))
+        page_count = len(pdf_reader.pages)
+
+        text_content = []
+        for page_num, page in enumerate(pdf_reader.pages):
+            if page_num >= max_pages:
+                text_content.append(f"[Truncated: extracted the first {max_pages} of {page_count} pages]")
+                break
+            page_text = page.extract_text()
+            if page_text.strip():
+                text_content.append(f"Page {page_num + 1}:\n{page_text}")
+
+        extracted_text = "\n\n".join(text_content)
+
+        # If no text was extracted or very little, the PDF is probably scanned
+        if len(extracted_text.strip()) < 50:
+            return f"PDF text extraction yielded minimal content from {filename}. Consider using OCR for scanned documents."
+
+        return extracted_text
+
+    except MemoryError:
+        raise ExtractionError(f"Error extracting PDF content from {filename}: document exceeds the extraction memory limit")
+    except Exception as pdf_error:
+        raise ExtractionError(f"Error extracting PDF content from {filename}: {str(pdf_error)}")
+
+
+def extract_word_text(source: Union[bytes, str], filename: str) -> str:
+    """Extract paragraphs and table rows with python-docx (runs in a worker process)"""
+    try:
+        from docx import Document
+
+        doc = Document(_open_source(source))
+
+        # Extract text from paragraphs
+        text_content = [paragraph.text for paragraph in doc.paragraphs if paragraph.text.strip()]
+
+        # Extract text from tables
+        for table in doc.tables:
+            for row in table.rows:
+                row_text = [cell.text.strip() for cell in row.cells if cell.text.strip()]
+                if row_text:
+                    text_content.append(" | ".join(row_text))
+
+        extracted_text = "\n".join(text_content)
+
+        if len(extracted_text.strip()) < 10:
+            return f"Word document content extraction yielded no readable text from {filename}"
+
+        return extracted_text
+
+    except MemoryError:
+        raise ExtractionError(f"Error extracting Word document content from {filename}: document exceeds the extraction memory limit")
+    except Exception as word_error:
+        raise ExtractionError(f"Error extracting Word document content from {filename}: {str(word_error)}")
+
+
+def _init_worker(memory_limit_mb: int) -> None:
+    """Cap the worker's address space so a decompression bomb fails with MemoryError, not OOM kills"""
+    if memory_limit_mb <= 0:
+        return
+    try:
+        import resource
+        limit = memory_limit_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ImportError, ValueError, OSError) as e:
+        logger.warning(f"Extraction worker memory cap not applied: {e}")
+
+
+class ExtractionService:
+    """
+    Runs document parsers in max_workers single-process executors ("slots"), one file per slot at a
+    time. A file that times out or crashes its worker only recycles its own slot, so extractions
+    running next to it are never cancelled along with it
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        timeout_seconds: Optional[float] = None,
+        max_pages: Optional[int] = None,
+        memory_limit_mb: Optional[int] = None,
+    ):
+        self.max_workers = max_workers or config.EXTRACTION_WORKERS
+        self.timeout_seconds = timeout_seconds or config.EXTRACTION_TIMEOUT_SECONDS
+        self.max_pages = max_pages or config.EXTRACTION_MAX_PAGES
+        self.memory_limit_mb = config.EXTRACTION_MEMORY_LIMIT_MB if memory_limit_mb is None else memory_limit_mb
+        self._executors: List[Optional[ProcessPoolExecutor]] = [None] * self.max_workers
+        # Never queue more files (and their bytes) than there are workers to run them
+        self._free_slots: "asyncio.Queue[int]" = asyncio.Queue()
+        for slot in range(self.max_workers):
+            self._free_slots.put_nowait(slot)
+
+    def handles(self, content_type: Optional[str]) -> bool:
+        return content_type in PDF_CONTENT_TYPES or content_type in WORD_CONTENT_TYPES
+
+    async def extract(self, source: Union[bytes, str], content_type: str, filename: str) -> str:
+        """
+        Extract text from a PDF or Word document without blocking the event loop
+        Pass a file path where possible so the bytes are read by the worker, not copied to it
+        Raises ExtractionError for unreadable files, timeouts and crashed workers
+        """
+        if content_type in PDF_CONTENT_TYPES:
+            label, task = "PDF", (extract_pdf_text, source, filename, self.max_pages)
+        elif content_type in WORD_CONTENT_TYPES:
+            label, task = "Word document", (extract_word_text, source, filename)
+        else:
+            raise ValueError(f"Unsupported content type for extraction: {content_type}")
+
+        slot = await self._free_slots.get()
+        try:
+            future = asyncio.get_running_loop().run_in_executor(self._get_executor(slot), *task)
+            try:
+                return await asyncio.wait_for(future, timeout=self.timeout_seconds)
+            except asyncio.TimeoutError:
+                # A running worker cannot be cancelled; replace this slot's process so the stuck parser is killed
+                logger.warning(f"Extraction of {filename} timed out after {self.timeout_seconds}s; recycling worker {slot}")
+                self._recycle(slot)
+                raise ExtractionError(f"Error extracting {label} content from {filename}: extraction timed out after {self.timeout_seconds:g}s")
+            except BrokenProcessPool:
+                self._recycle(slot)
+                raise ExtractionError(f"Error extracting {label} content from {filename}: extraction worker crashed")
+        finally:
+            self._free_slots.put_nowait(slot)
+
+    def shutdown(self) -> None:
+        for slot, executor in enumerate(self._executors):
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+                self._executors[slot] = None
+
+    def _get_executor(self, slot: int) -> ProcessPoolExecutor:
+        if self._executors[slot] is None:
+            # spawn: forking a process that holds event loop, Mongo and Redis sockets is unsafe
+            self._executors[slot] = ProcessPoolExecutor(
+                max_workers=1,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.memory_limit_mb,),
+            )
+        return self._executors[slot]
+
+    def _recycle(self, slot: int) -> None:
+        executor, self._executors[slot] = self._executors[slot], None
+        if executor is None:
+            return
+        for process in list((getattr(executor, "_processes", None) or {}).values()):
+            process.terminate()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Global extraction service instance
+_extraction_service: Optional[ExtractionService] = None
+
+
+def get_extraction_service() -> ExtractionService:
+    """Get global extraction service instance"""
+    global _extraction_service
+    if _extraction_service is None:
+        _extraction_service = ExtractionService()
+    return _extraction_service
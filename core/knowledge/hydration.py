@@ -0,0 +1,88 @@
+"""
+Search result hydration - fetch display fields for the top-k winners only
+Scoring never touches Mongo documents; hydration never returns embeddings, raw file
+data or the full extracted text (a short excerpt is computed server-side instead)
+"""
+
+from typing import Any, Dict, List, Optional
+from bson import ObjectId
+from core.knowledge.vector_index import KNOWLEDGE_BANKS
+
+EXCERPT_CHARS = 500
+
+# Fields that must never leave the database on the search path
+HEAVY_FIELDS = ("embedding", "extracted_text", "file_data", "ai_metadata")
+
+_DOCUMENT_FIELDS = (
+    "document_id", "filename", "content_type", "original_size", "tags", "knowledge_bank_type",
+    "upload_timestamp", "status", "view_count", "reference_count",
+    "ai_metadata.summary", "ai_metadata.document_type",
+)
+
+_CHUNK_FIELDS = ("chunk_id", "document_id", "chunk_index", "text", "start_char", "end_char")
+
+# Inclusion projections per bank; None means "everything except HEAVY_FIELDS"
+# (the knowledge vault predates the upload endpoints and has no fixed shape)
+DISPLAY_FIELDS = {
+    "community_knowledge_bank": _DOCUMENT_FIELDS + ("partner_info", "uploaded_by_admin"),
+    "personal_knowledge_bank": _DOCUMENT_FIELDS + ("user_id",),
+    "mentor_notes": (
+        "note_id", "user_id", "user_email", "title", "content", "tags", "category", "attachment_url",
+        "created_timestamp", "status", "reference_count", "helpful_votes", "view_count",
+    ),
+    "knowledge_vault": None,
+    "community_knowledge_chunks": _CHUNK_FIELDS,
+    "personal_knowledge_chunks": _CHUNK_FIELDS,
+}
+
+# Source field for the server-side excerpt (mentor notes return their short content as-is)
+EXCERPT_SOURCE = {
+    "community_knowledge_bank": "extracted_text",
+    "personal_knowledge_bank": "extracted_text",
+    "knowledge_vault": "extracted_text",
+}
+
+
+def display_pipeline(bank: str, match: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Aggregation pipeline returning display fields plus an `excerpt` for matched documents"""
+    stages: List[Dict[str, Any]] = [{"$match": match}]
+
+    source = EXCERPT_SOURCE.get(bank)
+    if source:
+        stages.append({"$addFields": {
+            "excerpt": {"$substrCP": [{"$ifNull": [f"${source}", ""]}, 0, EXCERPT_CHARS]}
+        }})
+
+    fields = DISPLAY_FIELDS.get(bank)
+    if fields is None:
+        projection = {field: 0 for field in HEAVY_FIELDS}
+    else:
+        projection = {field: 1 for field in fields}
+        if source:
+            projection["excerpt"] = 1
+    stages.append({"$project": projection})
+    return stages
+
+
+async def hydrate_documents(
+    collection,
+    bank: str,
+    doc_ids: List[str],
+    query: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """Fetch display fields for index hits in one round-trip, keyed by id"""
+    if not doc_ids:
+        return {}
+
+    id_field = KNOWLEDGE_BANKS[bank]["id_field"]
+    lookup_ids = [ObjectId(doc_id) for doc_id in doc_ids] if id_field == "_id" else doc_ids
+    pipeline = display_pipeline(bank, {**(query or {}), id_field: {"$in": lookup_ids}})
+    documents = await collection.aggregate(pipeline).to_list(length=len(doc_ids))
+
+    hydrated = {}
+    for doc in documents:
+        # Clean up MongoDB ObjectId for JSON serialization
+        if '_id' in doc:
+            doc['_id'] = str(doc['_id'])
+        hydrated[str(doc[id_field])] = doc
+    return hydrated
@@ -0,0 +1,202 @@
+"""
+Background ingestion queue - uploads return a job id and are processed by a worker pool
+Jobs are persisted in Mongo (`ingestion_jobs`) with the raw file spooled to disk, so
+queued or interrupted work is picked up again after a restart. Handlers receive the
+spool path, never the file bytes
+"""
+
+import os
+import uuid
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from pymongo import ReturnDocument
+from core.config import config
+from core.knowledge.uploads import remove_spooled
+
+logger = logging.getLogger(__name__)
+
+# Job state machine: queued -> extracting -> embedding -> indexed; a handler error goes back to
+# queued (after a backoff) until max_attempts runs are used up, then to failed
+QUEUED = "queued"
+EXTRACTING = "extracting"
+EMBEDDING = "embedding"
+INDEXED = "indexed"
+FAILED = "failed"
+
+ACTIVE_STATES = (QUEUED, EXTRACTING, EMBEDDING)
+TERMINAL_STATES = (INDEXED, FAILED)
+
+# Fields returned by the status endpoint
+JOB_STATUS_PROJECTION = {
+    "_id": 0, "job_id": 1, "document_id": 1, "bank": 1, "filename": 1, "status": 1,
+    "error": 1, "result": 1, "attempts": 1, "created_at": 1, "updated_at": 1,
+}
+
+JobHandler = Callable[[Dict[str, Any], str, "IngestionQueue"], Awaitable[Dict[str, Any]]]
+
+
+class IngestionQueue:
+    """Mongo-backed job table plus an in-process asyncio worker pool"""
+
+    def __init__(
+        self,
+        collection,
+        handler: JobHandler,
+        spool_dir: Optional[str] = None,
+        workers: Optional[int] = None,
+        max_attempts: Optional[int] = None,
+        retry_backoff_seconds: Optional[float] = None,
+    ):
+        self.collection = collection
+        self.handler = handler
+        self.spool_dir = spool_dir or config.INGESTION_SPOOL_DIR
+        self.worker_count = workers or config.INGESTION_WORKERS
+        self.max_attempts = max_attempts or config.INGESTION_MAX_ATTEMPTS
+        self.retry_backoff_seconds = (
+            config.INGESTION_RETRY_BACKOFF_SECONDS if retry_backoff_seconds is None else retry_backoff_seconds
+        )
+        self._queue: "asyncio.Queue[str]" = asyncio.Queue()
+        self._workers: List[asyncio.Task] = []
+
+    async def start(self) -> int:
+        """Ensure indexes, requeue interrupted jobs and start the workers; returns jobs recovered"""
+        os.makedirs(self.spool_dir, exist_ok=True)
+        await self.collection.create_index("job_id", unique=True)
+        await self.collection.create_index([("status", 1), ("created_at", 1)])
+        await self.collection.create_index([("user_id", 1), ("bank", 1), ("file_hash", 1)])
+
+        recovered = await self.recover()
+        self._workers = [asyncio.create_task(self._worker(i)) for i in range(self.worker_count)]
+        return recovered
+
+    async def stop(self) -> None:
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def submit(self, job: Dict[str, Any], spooled_path: str) -> Dict[str, Any]:
+        """Persist a job, taking ownership of its already-spooled file, then enqueue it"""
+        now = datetime.utcnow()
+        job_id = str(uuid.uuid4())
+        spool_path = os.path.join(self.spool_dir, job_id)
+        os.replace(spooled_path, spool_path)
+
+        record = {
+            **job,
+            "job_id": job_id,
+            "status": QUEUED,
+            "spool_path": spool_path,
+            "attempts": 0,
+            "error": None,
+            "result": None,
+            "created_at": now,
+            "updated_at": now,
+        }
+        await self.collection.insert_one(record)
+        self._queue.put_nowait(job_id)
+        return record
+
+    async def set_status(self, job_id: str, status: str, **fields: Any) -> None:
+        await self.collection.update_one(
+            {"job_id": job_id},
+            {"$set": {"status": status, "updated_at": datetime.utcnow(), **fields}}
+        )
+
+    async def get_job(self, job_id: str, user_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        query = {"job_id": job_id}
+        if user_id is not None:
+            query["user_id"] = user_id
+        return await self.collection.find_one(query, JOB_STATUS_PROJECTION)
+
+    async def find_active(self, query: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """An unfinished job matching query (used to reject duplicate in-flight uploads)"""
+        return await self.collection.find_one({**query, "status": {"$in": list(ACTIVE_STATES)}}, {"job_id": 1})
+
+    async def recover(self) -> int:
+        """Requeue jobs left unfinished by a previous process"""
+        recovered = 0
+        async for job in self.collection.find({"status": {"$in": list(ACTIVE_STATES)}}, {"job_id": 1, "spool_path": 1, "attempts": 1}):
+            if job.get("attempts", 0) >= self.max_attempts or not os.path.exists(job.get("spool_path", "")):
+                await self._fail(job["job_id"], job.get("spool_path"), "Interrupted and could not be resumed")
+                continue
+            await self.set_status(job["job_id"], QUEUED)
+            self._queue.put_nowait(job["job_id"])
+            recovered += 1
+        if recovered:
+            logger.info(f"Ingestion: requeued {recovered} interrupted jobs")
+        return recovered
+
+    async def process(self, job_id: str) -> Optional[str]:
+        """Claim and run one job; returns its new status (None if another worker owns it)"""
+        # Atomic claim so a job requeued by two processes is only run once
+        job = await self.collection.find_one_and_update(
+            {"job_id": job_id, "status": QUEUED},
+            {"$set": {"status": EXTRACTING, "updated_at": datetime.utcnow()}, "$inc": {"attempts": 1}},
+            return_document=ReturnDocument.AFTER,
+        )
+        if job is None:
+            return None
+
+        spool_path = job.get("spool_path")
+        try:
+            result = await self.handler(job, spool_path, self)
+        except asyncio.CancelledError:
+            # Shutdown mid-job: leave it active so recover() picks it up on the next start
+            raise
+        except Exception as e:
+            attempts = job.get("attempts", 1)
+            if attempts < self.max_attempts:
+                # Transient OpenAI/Mongo errors: keep the spooled file and run the job again later
+                delay = self.retry_backoff_seconds * 2 ** (attempts - 1)
+                logger.warning(f"Ingestion job {job_id} attempt {attempts}/{self.max_attempts} failed, retrying in {delay:g}s: {e}")
+                await self.set_status(job_id, QUEUED, error=str(e))
+                self._requeue_later(job_id, delay)
+                return QUEUED
+            logger.error(f"Ingestion job {job_id} failed after {attempts} attempts: {e}")
+            await self._fail(job_id, spool_path, str(e))
+            return FAILED
+
+        await self.set_status(job_id, INDEXED, result=result, error=None)
+        remove_spooled(spool_path)
+        return INDEXED
+
+    def _requeue_later(self, job_id: str, delay: float) -> None:
+        if delay <= 0:
+            self._queue.put_nowait(job_id)
+        else:
+            asyncio.get_running_loop().call_later(delay, self._queue.put_nowait, job_id)
+
+    async def _fail(self, job_id: str, spool_path: Optional[str], error: str) -> None:
+        await self.set_status(job_id, FAILED, error=error)
+        remove_spooled(spool_path)
+
+    async def _worker(self, number: int) -> None:
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self.process(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Ingestion worker {number}: job {job_id} crashed: {e}")
+            finally:
+                self._queue.task_done()
+
+
+# Global ingestion queue instance
+_ingestion_queue: Optional[IngestionQueue] = None
+
+
+def init_ingestion_queue(collection, handler: JobHandler, **kwargs: Any) -> IngestionQueue:
+    """Initialize the global ingestion queue"""
+    global _ingestion_queue
+    _ingestion_queue = IngestionQueue(collection, handler, **kwargs)
+    return _ingestion_queue
+
+
+def get_ingestion_queue() -> Optional[IngestionQueue]:
+    """Get global ingestion queue instance"""
+    return _ingestion_queue
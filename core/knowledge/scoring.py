@@ -0,0 +1,164 @@
+"""
+Batch cosine scoring engine - shared by every knowledge search path
+Keeps pre-normalized embeddings in one contiguous float32 matrix per bank and scores
+a query with a single matrix-vector product plus argpartition for top-k
+"""
+
+import numpy as np
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+
+class ScoredHit(NamedTuple):
+    """One search result: raw cosine similarity and boosted ranking score"""
+    doc_id: str
+    similarity: float
+    score: float
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """L2-normalize rows in place (zero rows stay zero)"""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    matrix /= norms
+    return matrix
+
+
+def normalize_query(embedding: Iterable[float], dim: int) -> Optional[np.ndarray]:
+    """Query as a unit float32 vector, or None if unusable"""
+    query = np.asarray(embedding, dtype=np.float32).reshape(-1)
+    if query.shape[0] != dim:
+        return None
+    norm = np.linalg.norm(query)
+    if norm == 0:
+        return None
+    return query / norm
+
+
+def top_k_scores(
+    similarities: np.ndarray,
+    k: int,
+    weights: Optional[np.ndarray] = None,
+    min_similarity: Optional[float] = None,
+    valid: Optional[np.ndarray] = None,
+) -> tuple:
+    """
+    Apply threshold and boost as vector ops, then select top-k by boosted score
+    Returns (positions, similarities, scores) sorted best first
+    """
+    scores = similarities * weights if weights is not None else similarities.copy()
+    if valid is not None:
+        scores[~valid] = -np.inf
+    if min_similarity is not None:
+        # Thresholds apply to raw similarity, before any boost (matches legacy behaviour)
+        scores[similarities <= min_similarity] = -np.inf
+
+    k = min(k, scores.shape[0])
+    if k <= 0:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, similarities[empty], scores[empty]
+
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.argsort(-scores[top], kind="stable")]
+    top = top[np.isfinite(scores[top])]
+    return top, similarities[top], scores[top]
+
+
+class EmbeddingMatrix:
+    """
+    Contiguous float32 row store with ids, liveness, owner codes and per-row boost weights
+    Capacity grows by doubling so appends are amortised O(1)
+    """
+
+    def __init__(self, dim: int):
+        self.dim = dim
+        self.vectors = np.zeros((0, dim), dtype=np.float32)
+        self.alive = np.zeros(0, dtype=bool)
+        self.owners = np.zeros(0, dtype=np.int32)
+        self.weights = np.zeros(0, dtype=np.float32)
+        self.size = 0
+        self.ids: List[str] = []
+        self.row_by_id: Dict[str, int] = {}
+        self.owner_codes: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.row_by_id)
+
+    def append(self, doc_ids: List[str], matrix: np.ndarray, owners: List[Optional[str]], weights: List[float]) -> np.ndarray:
+        """Append normalized rows, replacing existing ids; returns the new row numbers"""
+        start, count = self.size, len(doc_ids)
+        self._ensure_capacity(start + count)
+        self.vectors[start:start + count] = normalize_rows(matrix)
+        self.alive[start:start + count] = True
+        self.owners[start:start + count] = [self.owner_code(owner) for owner in owners]
+        self.weights[start:start + count] = weights
+
+        for offset, doc_id in enumerate(doc_ids):
+            # Replacing an id tombstones its previous row
+            self.tombstone(doc_id)
+            self.ids.append(doc_id)
+            self.row_by_id[doc_id] = start + offset
+        self.size += count
+        return np.arange(start, start + count)
+
+    def tombstone(self, doc_id: str) -> bool:
+        row = self.row_by_id.pop(doc_id, None)
+        if row is None:
+            return False
+        self.alive[row] = False
+        return True
+
+    def owner_code(self, owner: Optional[str]) -> int:
+        if owner is None:
+            return -1
+        if owner not in self.owner_codes:
+            self.owner_codes[owner] = len(self.owner_codes)
+        return self.owner_codes[owner]
+
+    def live_rows(self) -> np.ndarray:
+        return np.flatnonzero(self.alive[:self.size])
+
+    def owner_rows(self, owner: str) -> np.ndarray:
+        code = self.owner_codes.get(owner)
+        if code is None:
+            return np.zeros(0, dtype=np.int64)
+        return np.flatnonzero((self.owners[:self.size] == code) & self.alive[:self.size])
+
+    def score(
+        self,
+        query: np.ndarray,
+        k: int,
+        rows: Optional[np.ndarray] = None,
+        min_similarity: Optional[float] = None,
+        boost: bool = True,
+    ) -> List[ScoredHit]:
+        """Score a unit query against all live rows (or a candidate subset)"""
+        valid = None
+        if rows is None:
+            # Exact scan: one matrix-vector product over the whole bank, dead rows masked out
+            rows = np.arange(self.size)
+            similarities = self.vectors[:self.size] @ query
+            valid = self.alive[:self.size]
+        else:
+            similarities = self.vectors[rows] @ query
+
+        weights = self.weights[rows] if boost else None
+        positions, sims, scores = top_k_scores(similarities, k, weights, min_similarity, valid)
+        return [
+            ScoredHit(self.ids[row], float(sim), float(score))
+            for row, sim, score in zip(rows[positions].tolist(), sims.tolist(), scores.tolist())
+        ]
+
+    def _ensure_capacity(self, rows: int) -> None:
+        capacity = self.vectors.shape[0]
+        if rows <= capacity:
+            return
+        new_capacity = max(rows, capacity * 2, 1024)
+        vectors = np.zeros((new_capacity, self.dim), dtype=np.float32)
+        vectors[:self.size] = self.vectors[:self.size]
+        alive = np.zeros(new_capacity, dtype=bool)
+        alive[:self.size] = self.alive[:self.size]
+        owners = np.full(new_capacity, -1, dtype=np.int32)
+        owners[:self.size] = self.owners[:self.size]
+        weights = np.ones(new_capacity, dtype=np.float32)
+        weights[:self.size] = self.weights[:self.size]
+        self.vectors, self.alive, self.owners, self.weights = vectors, alive, owners, weights
@@ -0,0 +1,371 @@
+"""
+Vector Index - in-process ANN search over knowledge bank embeddings
+IVF-flat index on a contiguous float32 matrix, built from Mongo and updated on upload
+"""
+
+import os
+import logging
+import threading
+import numpy as np
+from typing import Any, Dict, Iterable, List, Optional
+from core.config import config
+from core.knowledge.scoring import EmbeddingMatrix, ScoredHit, normalize_query, normalize_rows
+from core.knowledge.embedding_codec import decode_embedding
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_DIM = 1536
+KMEANS_ITERATIONS = 8
+KMEANS_SAMPLE_PER_LIST = 32
+ASSIGN_CHUNK_ROWS = 65536
+
+PARTNER_BOOST = 1.2
+
+# Indexed banks: the collection carrying an `embedding` field (defaults to the bank name) and how to index it
+# boost_field: documents with a truthy value get PARTNER_BOOST applied to their score
+KNOWLEDGE_BANKS = {
+    "community_knowledge_bank": {"id_field": "document_id", "filter": {"status": "active"}, "owner_field": None, "boost_field": "partner_info"},
+    "personal_knowledge_bank": {"id_field": "document_id", "filter": {"status": "active"}, "owner_field": "user_id", "boost_field": None},
+    "mentor_notes": {"id_field": "note_id", "filter": {"status": "active"}, "owner_field": None, "boost_field": None},
+    "knowledge_vault": {"id_field": "_id", "filter": {}, "owner_field": None, "boost_field": "is_supplier_content"},
+    # Per-passage indexes over the shared knowledge_chunks collection
+    "community_knowledge_chunks": {"collection": "knowledge_chunks", "id_field": "chunk_id", "filter": {"bank": "community_knowledge_bank", "status": "active"}, "owner_field": None, "boost_field": "is_partner_content"},
+    "personal_knowledge_chunks": {"collection": "knowledge_chunks", "id_field": "chunk_id", "filter": {"bank": "personal_knowledge_bank", "status": "active"}, "owner_field": "user_id", "boost_field": None},
+}
+
+
+def bank_collection(bank: str) -> str:
+    """Mongo collection backing a bank"""
+    return KNOWLEDGE_BANKS[bank].get("collection", bank)
+
+
+def boost_weight(bank: str, doc: Dict[str, Any]) -> float:
+    """Score multiplier for a document in a bank"""
+    boost_field = KNOWLEDGE_BANKS[bank]["boost_field"]
+    return PARTNER_BOOST if boost_field and doc.get(boost_field) else 1.0
+
+
+class VectorIndex:
+    """
+    IVF-flat index: exact matrix scan below train_threshold, inverted lists above it
+    Rows live in an EmbeddingMatrix so inner product == cosine similarity
+    """
+
+    def __init__(self, name: str, dim: int = EMBEDDING_DIM, nprobe: int = 16, train_threshold: int = 4096):
+        self.name = name
+        self.dim = dim
+        self.nprobe = nprobe
+        self.train_threshold = train_threshold
+        self._lock = threading.RLock()
+        self._matrix = EmbeddingMatrix(dim)
+
+        # Coarse quantizer (None until trained)
+        self._centroids: Optional[np.ndarray] = None
+        self._lists: List[List[int]] = []
+        self._list_arrays: Dict[int, np.ndarray] = {}
+        self._trained_on = 0
+
+    def __len__(self) -> int:
+        return len(self._matrix)
+
+    @property
+    def is_trained(self) -> bool:
+        return self._centroids is not None
+
+    # ----- writes -----
+    def add(self, doc_id: str, embedding: Iterable[float], owner: Optional[str] = None, weight: float = 1.0) -> bool:
+        """Insert or replace a single vector"""
+        return self.add_many([doc_id], [embedding], [owner], [weight]) == 1
+
+    def add_many(
+        self,
+        doc_ids: List[str],
+        embeddings: List[Iterable[float]],
+        owners: Optional[List[Optional[str]]] = None,
+        weights: Optional[List[float]] = None,
+    ) -> int:
+        """Insert or replace vectors in bulk, returns number of rows added"""
+        matrix = np.array(embeddings, dtype=np.float32)
+        if matrix.ndim != 2 or matrix.shape[1] != self.dim:
+            logger.warning(f"Vector index {self.name}: rejected batch with shape {matrix.shape}, expected (*, {self.dim})")
+            return 0
+
+        with self._lock:
+            rows = self._matrix.append(
+                [str(doc_id) for doc_id in doc_ids],
+                matrix,
+                owners or [None] * len(doc_ids),
+                weights or [1.0] * len(doc_ids),
+            )
+
+            if self._centroids is not None:
+                self._assign_rows(rows)
+
+            if self._needs_training():
+                self._train()
+
+        return len(rows)
+
+    def remove(self, doc_id: str) -> bool:
+        """Remove a vector by id"""
+        with self._lock:
+            return self._matrix.tombstone(str(doc_id))
+
+    # ----- reads -----
+    def search(
+        self,
+        embedding: Iterable[float],
+        k: int = 10,
+        owner: Optional[str] = None,
+        min_similarity: Optional[float] = None,
+        boost: bool = True,
+    ) -> List[ScoredHit]:
+        """
+        Top-k cosine similarity search with per-row boost weights applied
+        Returns ScoredHit(doc_id, similarity, score) sorted by score, best first
+        """
+        query = normalize_query(embedding, self.dim)
+        if query is None or k <= 0:
+            return []
+
+        with self._lock:
+            if self._matrix.size == 0:
+                return []
+
+            if owner is not None:
+                rows = self._matrix.owner_rows(owner)
+            elif self._centroids is not None:
+                rows = self._probe(query)
+            else:
+                rows = None
+
+            if rows is not None and rows.size == 0:
+                return []
+            return self._matrix.score(query, k, rows=rows, min_similarity=min_similarity, boost=boost)
+
+    # ----- persistence -----
+    def save(self, path: str) -> None:
+        """Write an atomic snapshot of the live rows"""
+        with self._lock:
+            matrix = self._matrix
+            live = matrix.live_rows()
+            owner_names = [None] * len(matrix.owner_codes)
+            for name, code in matrix.owner_codes.items():
+                owner_names[code] = name
+
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "wb") as f:
+                np.savez(
+                    f,
+                    name=np.array(self.name),
+                    vectors=matrix.vectors[live],
+                    ids=np.array([matrix.ids[i] for i in live], dtype=str),
+                    owners=matrix.owners[live],
+                    owner_names=np.array(owner_names, dtype=str),
+                    weights=matrix.weights[live],
+                )
+            os.replace(tmp_path, path)
+        logger.info(f"Vector index {self.name}: saved {len(live)} vectors to {path}")
+
+    @classmethod
+    def load(cls, path: str, nprobe: int = 16, train_threshold: int = 4096) -> "VectorIndex":
+        """Load a snapshot written by save()"""
+        with np.load(path, allow_pickle=False) as data:
+            vectors = data["vectors"]
+            index = cls(str(data["name"]), dim=vectors.shape[1], nprobe=nprobe, train_threshold=train_threshold)
+            owner_names = [str(name) for name in data["owner_names"]]
+            owners = [owner_names[code] if code >= 0 else None for code in data["owners"]]
+            weights = data["weights"].tolist() if "weights" in data else None
+            if len(vectors):
+                index.add_many([str(i) for i in data["ids"]], vectors, owners, weights)
+        return index
+
+    # ----- internals -----
+    def _needs_training(self) -> bool:
+        live = len(self._matrix)
+        if live < self.train_threshold:
+            return False
+        return self._centroids is None or live >= 2 * self._trained_on
+
+    def _train(self) -> None:
+        """Spherical k-means on a sample of live rows, then rebuild inverted lists"""
+        vectors = self._matrix.vectors
+        rows = self._matrix.live_rows()
+        nlist = max(1, int(np.sqrt(len(rows))))
+        rng = np.random.default_rng(0)
+
+        sample_size = min(len(rows), nlist * KMEANS_SAMPLE_PER_LIST)
+        sample = vectors[rng.choice(rows, sample_size, replace=False)]
+        centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+
+        for _ in range(KMEANS_ITERATIONS):
+            assign = np.argmax(sample @ centroids.T, axis=1)
+            order = np.argsort(assign, kind="stable")
+            sorted_assign = assign[order]
+            starts = np.flatnonzero(np.r_[True, sorted_assign[1:] != sorted_assign[:-1]])
+            # Empty clusters keep their previous centroid
+            centroids[sorted_assign[starts]] = np.add.reduceat(sample[order], starts, axis=0)
+            normalize_rows(centroids)
+
+        self._centroids = centroids
+        self._lists = [[] for _ in range(nlist)]
+        self._list_arrays = {}
+        self._assign_rows(rows)
+        self._trained_on = len(rows)
+        logger.info(f"Vector index {self.name}: trained {nlist} lists on {len(rows)} vectors")
+
+    def _assign_rows(self, rows: np.ndarray) -> None:
+        vectors = self._matrix.vectors
+        for start in range(0, len(rows), ASSIGN_CHUNK_ROWS):
+            chunk = rows[start:start + ASSIGN_CHUNK_ROWS]
+            assign = np.argmax(vectors[chunk] @ self._centroids.T, axis=1)
+            for row, list_id in zip(chunk.tolist(), assign.tolist()):
+                self._lists[list_id].append(row)
+                self._list_arrays.pop(list_id, None)
+
+    def _probe(self, query: np.ndarray) -> np.ndarray:
+        centroid_scores = self._centroids @ query
+        nprobe = min(self.nprobe, centroid_scores.shape[0])
+        probe = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe]
+
+        arrays = []
+        for list_id in probe.tolist():
+            array = self._list_arrays.get(list_id)
+            if array is None:
+                array = np.asarray(self._lists[list_id], dtype=np.int64)
+                self._list_arrays[list_id] = array
+            arrays.append(array)
+
+        rows = np.concatenate(arrays) if arrays else np.zeros(0, dtype=np.int64)
+        return rows[self._matrix.alive[rows]]
+
+
+class KnowledgeIndexManager:
+    """Owns one VectorIndex per knowledge bank and keeps it in sync with Mongo"""
+
+    def __init__(self, index_dir: Optional[str] = None, nprobe: Optional[int] = None, train_threshold: Optional[int] = None):
+        self.index_dir = index_dir or config.VECTOR_INDEX_DIR
+        self.nprobe = nprobe or config.VECTOR_INDEX_NPROBE
+        self.train_threshold = train_threshold or config.VECTOR_INDEX_TRAIN_THRESHOLD
+        self.indexes: Dict[str, VectorIndex] = {}
+
+    def get_index(self, bank: str) -> VectorIndex:
+        if bank not in self.indexes:
+            self.indexes[bank] = VectorIndex(bank, nprobe=self.nprobe, train_threshold=self.train_threshold)
+        return self.indexes[bank]
+
+    def add(self, bank: str, doc_id: Any, embedding: Iterable[float], owner: Optional[str] = None, weight: float = 1.0) -> bool:
+        """Incremental update after an upload"""
+        if embedding is None or len(embedding) == 0:
+            return False
+        return self.get_index(bank).add(str(doc_id), embedding, owner, weight)
+
+    def add_many(
+        self,
+        bank: str,
+        doc_ids: List[Any],
+        embeddings: Iterable[Iterable[float]],
+        owners: Optional[List[Optional[str]]] = None,
+        weights: Optional[List[float]] = None,
+    ) -> None:
+        self.get_index(bank).add_many([str(doc_id) for doc_id in doc_ids], embeddings, owners, weights)
+
+    def remove(self, bank: str, doc_id: Any) -> bool:
+        return self.get_index(bank).remove(str(doc_id))
+
+    def search(
+        self,
+        bank: str,
+        embedding: Iterable[float],
+        k: int = 10,
+        owner: Optional[str] = None,
+        min_similarity: Optional[float] = None,
+    ) -> List[ScoredHit]:
+        return self.get_index(bank).search(embedding, k=k, owner=owner, min_similarity=min_similarity)
+
+    async def build_from_collection(self, bank: str, collection, batch_size: int = 1000) -> int:
+        """Stream ids + embeddings (no document bodies) from Mongo into a fresh index"""
+        spec = KNOWLEDGE_BANKS[bank]
+        projection = {spec["id_field"]: 1, "embedding": 1}
+        for field in (spec["owner_field"], spec["boost_field"]):
+            if field:
+                projection[field] = 1
+
+        index = VectorIndex(bank, nprobe=self.nprobe, train_threshold=self.train_threshold)
+        cursor = collection.find({**spec["filter"], "embedding": {"$exists": True}}, projection).batch_size(batch_size)
+
+        ids, vectors, owners, weights = [], [], [], []
+        async for doc in cursor:
+            # Accepts packed binary and legacy list embeddings alike
+            embedding = decode_embedding(doc.get("embedding"))
+            if embedding is None or embedding.shape[0] != index.dim:
+                continue
+            ids.append(str(doc[spec["id_field"]]))
+            vectors.append(embedding)
+            owners.append(doc.get(spec["owner_field"]) if spec["owner_field"] else None)
+            weights.append(boost_weight(bank, doc))
+            if len(ids) >= batch_size:
+                index.add_many(ids, vectors, owners, weights)
+                ids, vectors, owners, weights = [], [], [], []
+        if ids:
+            index.add_many(ids, vectors, owners, weights)
+
+        self.indexes[bank] = index
+        logger.info(f"Vector index {bank}: built {len(index)} vectors from Mongo")
+        return len(index)
+
+    async def warm_up(self, db) -> Dict[str, int]:
+        """Load snapshots where they match Mongo, rebuild the rest"""
+        counts = {}
+        for bank, spec in KNOWLEDGE_BANKS.items():
+            collection = db[bank_collection(bank)]
+            try:
+                expected = await collection.count_documents({**spec["filter"], "embedding": {"$exists": True}})
+                snapshot = self._snapshot_path(bank)
+                if os.path.exists(snapshot):
+                    index = VectorIndex.load(snapshot, nprobe=self.nprobe, train_threshold=self.train_threshold)
+                    if len(index) == expected:
+                        self.indexes[bank] = index
+                        counts[bank] = len(index)
+                        continue
+                    logger.info(f"Vector index {bank}: snapshot has {len(index)} vectors, Mongo has {expected} - rebuilding")
+
+                counts[bank] = await self.build_from_collection(bank, collection)
+                self.save(bank)
+            except Exception as e:
+                logger.error(f"Vector index {bank}: warm-up failed: {e}")
+                counts[bank] = len(self.get_index(bank))
+        return counts
+
+    def save(self, bank: str) -> None:
+        try:
+            os.makedirs(self.index_dir, exist_ok=True)
+            self.get_index(bank).save(self._snapshot_path(bank))
+        except OSError as e:
+            logger.warning(f"Vector index {bank}: snapshot not written: {e}")
+
+    def save_all(self) -> None:
+        for bank in self.indexes:
+            self.save(bank)
+
+    def _snapshot_path(self, bank: str) -> str:
+        return os.path.join(self.index_dir, f"{bank}.npz")
+
+
+# Global index manager instance
+_index_manager: Optional[KnowledgeIndexManager] = None
+
+
+def init_knowledge_index_manager(index_dir: Optional[str] = None) -> KnowledgeIndexManager:
+    """Initialize the global knowledge index manager"""
+    global _index_manager
+    _index_manager = KnowledgeIndexManager(index_dir)
+    return _index_manager
+
+
+def get_knowledge_index_manager() -> KnowledgeIndexManager:
+    """Get global knowledge index manager instance"""
+    global _index_manager
+    if _index_manager is None:
+        _index_manager = KnowledgeIndexManager()
+    return _index_manager
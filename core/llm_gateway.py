@@ -0,0 +1,145 @@
+"""
+LLM gateway - one AsyncOpenAI client on a shared, pooled HTTP client for every chat path
+Completions are awaited, never run on the event loop thread, and bounded by LLM_TIMEOUT_MS
+"""
+
+import os
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+import httpx
+import openai
+from openai import AsyncOpenAI
+from core.config import config
+from core.observability import get_observability
+from core.tokens import TokenUsage
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHAT_MODEL = "gpt-4o-mini"
+
+
+class LLMGateway:
+    """Shared AsyncOpenAI client; connections are pooled and reused across requests"""
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        timeout_ms: Optional[int] = None,
+        max_connections: Optional[int] = None,
+        max_retries: Optional[int] = None,
+    ):
+        self.api_key = api_key if api_key is not None else os.environ.get("OPENAI_API_KEY", "")
+        self.timeout_seconds = (timeout_ms or config.LLM_TIMEOUT_MS) / 1000
+        max_connections = max_connections or config.LLM_MAX_CONNECTIONS
+
+        self.http_client = None
+        self.client: Optional[AsyncOpenAI] = None
+        if not self.available:
+            return  # no usable credentials: callers check `available` and use their fallbacks
+
+        self.http_client = openai.DefaultAsyncHttpxClient(
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+        self.client = AsyncOpenAI(
+            api_key=self.api_key,
+            base_url=base_url,
+            http_client=self.http_client,
+            timeout=self.timeout_seconds,
+            max_retries=config.LLM_MAX_RETRIES if max_retries is None else max_retries,
+        )
+
+    @property
+    def available(self) -> bool:
+        """True when a real API key is configured; the one check for whether OpenAI calls are made"""
+        return bool(self.api_key) and len(self.api_key) > 10
+
+    async def chat_completion(
+        self,
+        messages: List[Dict[str, str]],
+        model: str = DEFAULT_CHAT_MODEL,
+        **params: Any,
+    ) -> str:
+        """Run a chat completion and return the message text; raises asyncio.TimeoutError past LLM_TIMEOUT_MS"""
+        text, _ = await self.chat_completion_with_usage(messages, model, **params)
+        return text
+
+    async def chat_completion_with_usage(
+        self,
+        messages: List[Dict[str, str]],
+        model: str = DEFAULT_CHAT_MODEL,
+        **params: Any,
+    ) -> Tuple[str, Optional[TokenUsage]]:
+        """chat_completion() plus the API-reported token usage (None if the response carried none)"""
+        # The SDK timeout is per attempt; wait_for caps the whole call including retries
+        response = await asyncio.wait_for(
+            self.client.chat.completions.create(model=model, messages=messages, **params),
+            timeout=self.timeout_seconds,
+        )
+        return response.choices[0].message.content, self._record_usage(model, response.usage)
+
+    async def stream_chat_completion(
+        self,
+        messages: List[Dict[str, str]],
+        model: str = DEFAULT_CHAT_MODEL,
+        on_usage: Optional[Callable[[TokenUsage], None]] = None,
+        **params: Any,
+    ) -> AsyncIterator[str]:
+        """Yield content deltas as they arrive; the whole stream is bounded by LLM_TIMEOUT_MS. on_usage gets the final usage"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout_seconds
+        params.setdefault("stream_options", {"include_usage": True})  # usage arrives on the last chunk
+        stream = await asyncio.wait_for(
+            self.client.chat.completions.create(model=model, messages=messages, stream=True, **params),
+            timeout=self.timeout_seconds,
+        )
+        try:
+            chunks = stream.__aiter__()
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(chunks.__anext__(), timeout=max(deadline - loop.time(), 0))
+                except StopAsyncIteration:
+                    return
+                if getattr(chunk, "usage", None):
+                    usage = self._record_usage(model, chunk.usage)
+                    if on_usage is not None:
+                        on_usage(usage)
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            await stream.close()
+
+    @staticmethod
+    def _record_usage(model: str, usage: Any) -> Optional[TokenUsage]:
+        """Token usage to observability; cached_tokens counts the prompt prefix served from the provider cache"""
+        if usage is None:
+            return None
+        token_usage = TokenUsage.from_api(usage)
+        get_observability().record_llm_usage(
+            model, token_usage.prompt_tokens, token_usage.cached_tokens, token_usage.completion_tokens
+        )
+        return token_usage
+
+    async def aclose(self) -> None:
+        if self.client is not None:
+            await self.client.close()
+
+
+# Global LLM gateway instance
+_llm_gateway: Optional[LLMGateway] = None
+
+
+def init_llm_gateway(**kwargs: Any) -> LLMGateway:
+    """Initialize the global LLM gateway"""
+    global _llm_gateway
+    _llm_gateway = LLMGateway(**kwargs)
+    return _llm_gateway
+
+
+def get_llm_gateway() -> LLMGateway:
+    """Get global LLM gateway instance (created from OPENAI_API_KEY on first use)"""
+    global _llm_gateway
+    if _llm_gateway is None:
+        _llm_gateway = LLMGateway()
+    return _llm_gateway
@@ -80,6 +80,25 @@ class SchemaObservability:
             "examples_dismissed_total": 0,
             "example_ctr_by_topic": {},  # Click-through rate by topic
             "suggested_action_ctr": {},  # CTR for suggested actions
+            
+            # Knowledge search: query embedding cache
+            "embedding_cache_hits": 0,
+            "embedding_cache_misses": 0,
+            "embedding_cache_coalesced": 0,
+            "embedding_cache_hits_by_tier": {},
+            
+            # LLM usage: provider-side prompt (prefix) caching
+            "llm_requests_total": 0,
+            "llm_prompt_tokens_total": 0,
+            "llm_cached_prompt_tokens_total": 0,
+            "llm_completion_tokens_total": 0,
+            "llm_requests_with_cache_hit": 0,
+            "llm_usage_by_model": {},
+            
+            # Per-turn token accounting (capacity planning)
+            "token_usage_by_tier": {},
+            "token_usage_by_endpoint": {},
+            "token_usage_by_user": {},  # keyed by sha256[:8] of the user id (PII-safe)
         }
         
         # Latency buckets for percentile calculation
@@ -163,6 +182,45 @@ class SchemaObservability:
         """Record when examples are dismissed"""
         self.metrics["examples_dismissed_total"] += 1
     
+    def record_embedding_cache(self, result: str, tier: Optional[str] = None):
+        """Record an embedding cache lookup: hit (with tier), miss, or coalesced"""
+        if result == "hit":
+            self.metrics["embedding_cache_hits"] += 1
+            by_tier = self.metrics["embedding_cache_hits_by_tier"]
+            by_tier[tier] = by_tier.get(tier, 0) + 1
+        elif result == "coalesced":
+            self.metrics["embedding_cache_coalesced"] += 1
+        else:
+            self.metrics["embedding_cache_misses"] += 1
+    
+    def record_llm_usage(self, model: str, prompt_tokens: int, cached_tokens: int, completion_tokens: int):
+        """Record token usage reported by the LLM API, including prompt tokens served from its prefix cache"""
+        self.metrics["llm_requests_total"] += 1
+        self.metrics["llm_prompt_tokens_total"] += prompt_tokens
+        self.metrics["llm_cached_prompt_tokens_total"] += cached_tokens
+        self.metrics["llm_completion_tokens_total"] += completion_tokens
+        if cached_tokens:
+            self.metrics["llm_requests_with_cache_hit"] += 1
+        
+        by_model = self.metrics["llm_usage_by_model"].setdefault(model, {"requests": 0, "prompt_tokens": 0, "cached_tokens": 0})
+        by_model["requests"] += 1
+        by_model["prompt_tokens"] += prompt_tokens
+        by_model["cached_tokens"] += cached_tokens
+    
+    def record_token_usage(self, user_id: Optional[str], tier: str, endpoint: str, usage: Any):
+        """Aggregate one chat turn's TokenUsage per tier, endpoint and user"""
+        user_key = hashlib.sha256(user_id.encode()).hexdigest()[:8] if user_id else "anonymous"
+        for group, key in (("token_usage_by_tier", tier), ("token_usage_by_endpoint", endpoint), ("token_usage_by_user", user_key)):
+            bucket = self.metrics[group].setdefault(key, {
+                "turns": 0, "prompt_tokens": 0, "completion_tokens": 0, "cached_tokens": 0, "estimated_turns": 0
+            })
+            bucket["turns"] += 1
+            bucket["prompt_tokens"] += usage.prompt_tokens
+            bucket["completion_tokens"] += usage.completion_tokens
+            bucket["cached_tokens"] += usage.cached_tokens
+            if usage.estimated:
+                bucket["estimated_turns"] += 1
+    
     def calculate_percentiles(self, data: list, percentiles: list) -> Dict[str, float]:
         """Calculate percentiles from latency data"""
         if not data:
@@ -216,6 +274,12 @@ class SchemaObservability:
                     "ctr_percent": (data["clicked"] / data["shown"]) * 100
                 }
         
+        embedding_lookups = self.metrics["embedding_cache_hits"] + self.metrics["embedding_cache_misses"] + self.metrics["embedding_cache_coalesced"]
+        embedding_cache_hit_rate = ((embedding_lookups - self.metrics["embedding_cache_misses"]) / embedding_lookups * 100) if embedding_lookups > 0 else 0
+        
+        llm_prompt_tokens = self.metrics["llm_prompt_tokens_total"]
+        llm_cached_rate = (self.metrics["llm_cached_prompt_tokens_total"] / llm_prompt_tokens * 100) if llm_prompt_tokens > 0 else 0
+        
         return {
             "timestamp": datetime.now().isoformat(),
             "uptime_seconds": round(uptime_seconds, 1),
@@ -269,6 +333,37 @@ class SchemaObservability:
                 "example_ctr_by_topic": example_ctr_data,
                 "suggested_action_ctr": suggested_action_ctr_data,
                 "low_ctr_alert": overall_example_ctr < 1.0 if self.metrics["examples_served_total"] > 10 else False
+            },
+            
+            # Knowledge search: query embedding cache
+            "embedding_cache": {
+                "hits": self.metrics["embedding_cache_hits"],
+                "misses": self.metrics["embedding_cache_misses"],
+                "coalesced": self.metrics["embedding_cache_coalesced"],
+                "hits_by_tier": self.metrics["embedding_cache_hits_by_tier"],
+                "hit_rate_percent": round(embedding_cache_hit_rate, 2)
+            },
+            
+            # LLM usage: provider-side prompt caching
+            "llm_usage": {
+                "requests": self.metrics["llm_requests_total"],
+                "prompt_tokens": llm_prompt_tokens,
+                "cached_prompt_tokens": self.metrics["llm_cached_prompt_tokens_total"],
+                "completion_tokens": self.metrics["llm_completion_tokens_total"],
+                "requests_with_cache_hit": self.metrics["llm_requests_with_cache_hit"],
+                "cached_prompt_percent": round(llm_cached_rate, 2),
+                "by_model": self.metrics["llm_usage_by_model"]
+            },
+            
+            # Per-turn token accounting
+            "token_usage": {
+                "by_tier": self.metrics["token_usage_by_tier"],
+                "by_endpoint": self.metrics["token_usage_by_endpoint"],
+                "top_users": dict(sorted(
+                    self.metrics["token_usage_by_user"].items(),
+                    key=lambda item: item[1]["prompt_tokens"] + item[1]["completion_tokens"],
+                    reverse=True,
+                )[:10])
             }
         }
     
@@ -0,0 +1,163 @@
+"""
+Prompt registry - system prompt templates loaded and validated once, with per-tier prefixes precomputed
+Files are re-read only when their mtime changes. The tier prefix is byte-identical across requests so the
+provider's prompt cache can reuse it; per-request content is built separately and sent after it
+"""
+
+import os
+import time
+import hashlib
+import threading
+from typing import Dict, NamedTuple, Optional
+from core.config import config
+
+# Sections every master prompt must define (the formatter and schema guard depend on them)
+REQUIRED_SECTIONS = ("Technical Answer", "Mentoring Insight", "Next Steps")
+
+TIER_INSTRUCTIONS = {
+    "starter": "\n\nTIER: STARTER - Provide clear, accessible guidance with essential compliance information.",
+    "pro": "\n\nTIER: PRO - Provide detailed technical guidance with specific code references.",
+    "pro_plus": "\n\nTIER: PRO_PLUS - Provide comprehensive analysis with advanced alternatives and workflow guidance.",
+}
+
+FALLBACK_MASTER_PROMPT = """You are ONESource AI, the definitive construction compliance advisor for AU/NZ markets.
+
+ENHANCED SECTION FRAMEWORK - SELECTIVE USE ONLY:
+
+ALWAYS INCLUDE (Core sections for every response):
+🔧 **Technical Answer** - Comprehensive technical guidance with specific code references
+🧐 **Mentoring Insight** - Professional development context and strategic guidance
+📋 **Next Steps** - Prioritized implementation roadmap
+
+CONDITIONAL SECTIONS (Use when relevant):
+📊 **Code Requirements** - Specific NCC/AS references and compliance pathways
+✅ **Compliance Verification** - Testing, certification and approval processes
+🔄 **Alternative Solutions** - Performance-based or alternative compliance options
+🏛️ **Authority Requirements** - Local council, certifier or authority-specific guidance
+📄 **Documentation Needed** - Required documentation, plans, certificates
+⚙️ **Workflow Recommendations** - Project sequencing and trade coordination
+❓ **Clarifying Questions** - Essential missing information for precise guidance"""
+
+
+class TierPrefix(NamedTuple):
+    """Static part of the system prompt for one tier"""
+    tier: str
+    text: str
+    prompt_hash: str  # md5[:8], as logged by INSTRUMENT lines
+
+
+class PromptRegistry:
+    """Holds the master prompt and its per-tier prefixes; reloads when the file's mtime changes"""
+
+    def __init__(self, master_path: Optional[str] = None, check_interval_seconds: Optional[float] = None):
+        self.master_path = master_path or config.SYSTEM_PROMPT_PATH
+        self.check_interval_seconds = (
+            config.PROMPT_RELOAD_CHECK_SECONDS if check_interval_seconds is None else check_interval_seconds
+        )
+        self.source = "unloaded"
+        self.master_sha256 = ""
+        self._mtime: Optional[float] = None
+        self._checked_at = 0.0
+        self._prefixes: Dict[str, TierPrefix] = {}
+        self._lock = threading.Lock()
+
+    def load(self) -> None:
+        """Read and validate the master prompt, then rebuild the tier prefixes"""
+        with self._lock:
+            self._checked_at = time.monotonic()
+            try:
+                mtime = os.stat(self.master_path).st_mtime
+            except OSError:
+                mtime = None
+
+            if mtime is None:
+                if not self._prefixes:
+                    print(f"Warning: {self.master_path} not found, using fallback system prompt")
+                    self._build(FALLBACK_MASTER_PROMPT, "fallback")
+                self._mtime = None
+                return
+
+            try:
+                with open(self.master_path, "r", encoding="utf-8") as f:
+                    text = f.read()
+                self._validate(text)
+            except (OSError, ValueError) as e:
+                # Keep serving the last good prompt; a half-written edit must not take chat down
+                print(f"Warning: system prompt {self.master_path} rejected: {e}")
+                if not self._prefixes:
+                    self._build(FALLBACK_MASTER_PROMPT, "fallback")
+                self._mtime = mtime
+                return
+
+            self._build(text, "file")
+            self._mtime = mtime
+            print(f"✅ System prompt loaded: {len(text)} chars from {self.master_path} (sha256 {self.master_sha256[:12]})")
+
+    def prefix(self, tier: str) -> TierPrefix:
+        """Precomputed tier prefix; re-stats the file at most every PROMPT_RELOAD_CHECK_SECONDS"""
+        self._maybe_reload()
+        return self._prefixes.get(tier) or self._prefixes["starter"]
+
+    def status(self) -> Dict[str, str]:
+        return {"path": self.master_path, "source": self.source, "sha256": self.master_sha256[:16]}
+
+    def _maybe_reload(self) -> None:
+        if not self._prefixes:
+            self.load()
+            return
+        if time.monotonic() - self._checked_at < self.check_interval_seconds:
+            return
+        try:
+            mtime = os.stat(self.master_path).st_mtime
+        except OSError:
+            mtime = None
+        self._checked_at = time.monotonic()
+        if mtime != self._mtime:
+            self.load()
+
+    @staticmethod
+    def _validate(text: str) -> None:
+        if not text.strip():
+            raise ValueError("prompt file is empty")
+        missing = [section for section in REQUIRED_SECTIONS if section not in text]
+        if missing:
+            raise ValueError(f"prompt is missing required sections: {', '.join(missing)}")
+
+    def _build(self, master: str, source: str) -> None:
+        prefixes = {}
+        for tier, instructions in TIER_INSTRUCTIONS.items():
+            text = master + instructions
+            prefixes[tier] = TierPrefix(tier, text, hashlib.md5(text.encode()).hexdigest()[:8])
+        self._prefixes = prefixes
+        self.source = source
+        self.master_sha256 = hashlib.sha256(master.encode("utf-8")).hexdigest()
+
+
+def build_request_context(knowledge_context: str = "", context_hint: str = "") -> str:
+    """Per-request system content (knowledge excerpts, conversation hint); never part of the cached prefix"""
+    parts = []
+    if knowledge_context:
+        parts.append(f"KNOWLEDGE CONTEXT:\n{knowledge_context}")
+    if context_hint:
+        parts.append(context_hint.strip())
+    return "\n\n".join(parts)
+
+
+# Global prompt registry instance
+_prompt_registry: Optional[PromptRegistry] = None
+
+
+def init_prompt_registry(master_path: Optional[str] = None) -> PromptRegistry:
+    """Initialize and load the global prompt registry (application startup)"""
+    global _prompt_registry
+    _prompt_registry = PromptRegistry(master_path)
+    _prompt_registry.load()
+    return _prompt_registry
+
+
+def get_prompt_registry() -> PromptRegistry:
+    """Get global prompt registry (loaded on first use if startup did not)"""
+    global _prompt_registry
+    if _prompt_registry is None:
+        _prompt_registry = PromptRegistry()
+    return _prompt_registry
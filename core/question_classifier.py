@@ -0,0 +1,175 @@
+"""
+Question classifier - workflow stage, discipline and sector from one keyword scan over the question
+Labels are listed in priority order: the first label with a match wins, as in the old if/elif chains
+"""
+
+from collections import OrderedDict
+from types import MappingProxyType
+from typing import Dict, Mapping, NamedTuple, Optional, Sequence
+from core.config import config
+from core.keyword_matcher import KeywordMatcher
+
+DEFAULT_STAGE = "general_inquiry"
+DEFAULT_DISCIPLINE = "building_codes"
+DEFAULT_SECTOR = "others"
+
+WORKFLOW_STAGE_TERMS: Dict[str, Sequence[str]] = {
+    "concept_planning": ["planning", "concept", "feasibility", "initial"],
+    "design_development": ["design", "drawings", "architect", "plans"],
+    "regulatory_approval": ["approval", "consent", "permit", "certifier"],
+    "procurement": ["tender", "contractor", "quote", "pricing"],
+    "construction": ["construction", "building", "site", "concrete"],
+    "completion": ["inspection", "completion", "handover", "defects"],
+}
+
+DISCIPLINE_TERMS: Dict[str, Sequence[str]] = {
+    # Mechanical & building services
+    "hydraulic_engineering": ["hydraulic", "plumbing", "water supply", "drainage", "sewer", "pipes"],
+    "mechanical_services": ["hvac", "mechanical", "ventilation", "heating", "cooling", "air conditioning"],
+    "fire_protection_wet_dry": ["sprinkler", "fire pump", "suppression", "wet system", "dry system"],
+    "fire_engineering": ["fire engineering", "performance based", "fire model", "egress"],
+    "electrical_engineering": ["electrical", "power", "lighting", "switchboard", "cable"],
+    "communications_ict": ["communications", "ict", "data", "telecommunications", "network"],
+    "security_systems": ["security", "access control", "cctv", "alarm"],
+    "vertical_transportation": ["lift", "elevator", "escalator", "vertical transport"],
+    "building_automation": ["bms", "building automation", "control system", "smart building"],
+    "acoustic_engineering": ["acoustic", "noise", "sound", "vibration"],
+    "lighting_design": ["lighting design", "illumination", "daylight"],
+    # Structural & civil
+    "structural_engineering": ["structural", "beam", "column", "foundation", "load", "concrete", "steel"],
+    "civil_engineering": ["civil", "site development", "earthworks", "pavement", "infrastructure"],
+    "geotechnical_engineering": ["geotechnical", "soil", "foundation", "pile", "bearing capacity"],
+    "seismic_engineering": ["seismic", "earthquake", "dynamic", "ductility"],
+    # Architecture & design
+    "architecture": ["architecture", "design", "space planning", "layout"],
+    "interior_design": ["interior design", "fitout", "furniture", "finishes"],
+    "landscape_architecture": ["landscape", "outdoor", "garden", "plaza"],
+    "urban_design": ["urban planning", "town planning", "zoning"],
+    # Sustainability & environmental
+    "sustainability": ["sustainability", "green building", "environmental", "carbon"],
+    "energy_modelling": ["energy modelling", "energy efficiency", "thermal performance"],
+    # Building envelope
+    "facade_engineering": ["facade", "curtain wall", "glazing", "window"],
+    "waterproofing_design": ["waterproofing", "membrane", "sealant", "water ingress"],
+    "roofing_systems": ["roofing", "roof", "membrane", "tiles"],
+    "cladding_systems": ["cladding", "external wall", "panels"],
+    "green_building_certification": ["green star", "nabers", "well", "certification"],
+    # Project management & commercial
+    "project_management": ["project management", "program", "schedule", "coordination"],
+    "cost_planning": ["cost", "quantity surveying", "estimate", "budget"],
+    "contract_administration": ["contract", "legal", "procurement", "tender"],
+    "design_management": ["design management", "coordination", "bim"],
+    "risk_management": ["risk", "safety", "hazard"],
+    # Specialist disciplines
+    "heritage_conservation": ["heritage", "conservation", "restoration"],
+    "modular_prefabrication": ["modular", "prefab", "offsite"],
+    "industrial_process": ["industrial", "process", "manufacturing", "plant"],
+    "hazardous_materials": ["asbestos", "lead", "hazardous materials"],
+    "environmental_engineering": ["environmental engineering", "contamination", "remediation"],
+    "traffic_transport": ["traffic", "transport", "parking", "roads"],
+    "health_planning": ["health planning", "medical", "hospital", "healthcare"],
+    "wayfinding_signage": ["wayfinding", "signage", "navigation"],
+    "waste_management": ["waste", "recycling", "garbage"],
+}
+
+SECTOR_TERMS: Dict[str, Sequence[str]] = {
+    "commercial": ["office", "commercial", "retail", "mixed use"],
+    "industrial": ["warehouse", "industrial", "manufacturing", "factory"],
+    "mining_resources": ["mining", "mine", "resources", "camp"],
+    "health": ["hospital", "medical", "health", "aged care", "clinic"],
+    "data_centres": ["data centre", "server", "data center"],
+    "residential": ["residential", "apartment", "house", "townhouse"],
+    "hotels_hospitality": ["hotel", "hospitality", "resort", "accommodation"],
+    "education": ["school", "university", "education", "classroom"],
+    "transport_infrastructure": ["airport", "rail", "transport", "infrastructure", "bridge"],
+    "energy_utilities": ["power plant", "utility", "energy", "water treatment"],
+    "government_civic": ["government", "civic", "courthouse", "defence"],
+    "retail_entertainment": ["shopping", "cinema", "stadium", "entertainment"],
+    "agriculture_food": ["food processing", "abattoir", "cold storage"],
+    "sports_recreation": ["sports", "recreation", "gym", "aquatic"],
+    "specialist_facilities": ["laboratory", "cleanroom", "security facility"],
+}
+
+# Dimension -> (labels in priority order, fallback label)
+DIMENSIONS = {
+    "stage": (WORKFLOW_STAGE_TERMS, DEFAULT_STAGE),
+    "discipline": (DISCIPLINE_TERMS, DEFAULT_DISCIPLINE),
+    "sector": (SECTOR_TERMS, DEFAULT_SECTOR),
+}
+
+
+class QuestionClassification(NamedTuple):
+    """Winning label per dimension plus the keyword hits behind it; shared between callers, so read-only"""
+    stage: str
+    discipline: str
+    sector: str
+    scores: Mapping[str, Mapping[str, int]]  # dimension -> label -> keyword hits, labels in priority order
+
+
+class QuestionClassifier:
+    """
+    Every dimension's terms live in one KeywordMatcher under "<dimension>:<label>" groups, so a
+    question is scanned once for all three. Results are kept in an LRU keyed by the question text
+    """
+
+    def __init__(self, max_entries: Optional[int] = None):
+        self.max_entries = config.QUESTION_CLASSIFICATION_CACHE_ENTRIES if max_entries is None else max_entries
+        self._labels = {
+            f"{dimension}:{label}": (dimension, label)
+            for dimension, (labels, _) in DIMENSIONS.items()
+            for label in labels
+        }
+        self.matcher = KeywordMatcher.from_terms({
+            group: DIMENSIONS[dimension][0][label] for group, (dimension, label) in self._labels.items()
+        })
+        self._entries: "OrderedDict[str, QuestionClassification]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def classify(self, question: str) -> QuestionClassification:
+        cached = self._entries.get(question)
+        if cached is not None:
+            self._entries.move_to_end(question)
+            self.hits += 1
+            return cached
+
+        self.misses += 1
+        result = self._classify(question)
+        if self.max_entries > 0:
+            self._entries[question] = result
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return result
+
+    def _classify(self, question: str) -> QuestionClassification:
+        scores: Dict[str, Dict[str, int]] = {dimension: {} for dimension in DIMENSIONS}
+        for group, count in self.matcher.counts(question).items():  # group order is priority order
+            dimension, label = self._labels[group]
+            scores[dimension][label] = count
+        winners = {
+            dimension: next(iter(scores[dimension]), default)
+            for dimension, (_, default) in DIMENSIONS.items()
+        }
+        return QuestionClassification(
+            stage=winners["stage"],
+            discipline=winners["discipline"],
+            sector=winners["sector"],
+            scores=MappingProxyType({dimension: MappingProxyType(found) for dimension, found in scores.items()}),
+        )
+
+
+# Global question classifier instance
+_question_classifier: Optional[QuestionClassifier] = None
+
+
+def get_question_classifier() -> QuestionClassifier:
+    """Get global question classifier (keyword index built on first use)"""
+    global _question_classifier
+    if _question_classifier is None:
+        _question_classifier = QuestionClassifier()
+    return _question_classifier
+
+
+def classify_question(question: str) -> QuestionClassification:
+    """Stage, discipline and sector for a question (cached)"""
+    return get_question_classifier().classify(question)
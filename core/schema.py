@@ -20,12 +20,28 @@ class Meta(BaseModel):
     request_id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     timestamp: datetime = Field(default_factory=datetime.utcnow)
     session_id: str
-    tokens_used: Optional[int] = None
+    tokens_used: Optional[int] = None          # prompt + completion
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+    cached_tokens: Optional[int] = None        # prompt tokens served from the provider's prefix cache
+    tokens_estimated: Optional[bool] = None    # True when counted locally (fallbacks, no usage reported)
+    emoji: Optional[str] = None                # primary emoji (v2 meta.emoji)
+
+class Block(BaseModel):
+    type: Literal["markdown", "code", "list", "table"]
+    content: str = Field(min_length=1)          # section markdown, header line included
+    section: Optional[str] = None               # canonical section name; None for text before the first header
+    headers: Optional[List[str]] = None         # table blocks
+    rows: Optional[List[List[str]]] = None      # table blocks
+    language: Optional[str] = None              # code blocks
 
 class ChatResponse(BaseModel):
     text: str = Field(min_length=1)           # final markdown after formatter
     emoji_map: List[EmojiItem]
     mentoring_insight: Optional[str] = None   # optional parsed snippet
+    title: Optional[str] = None               # v2 title (first section header)
+    summary: Optional[str] = None             # v2 summary
+    blocks: List[Block] = Field(default_factory=list)  # v2 blocks, one per section
     meta: Meta
 
     class Config:
@@ -5,10 +5,20 @@ Persistence backbone for session history with TTL=30d
 
 import json
 import os
+import asyncio
 import redis
+import redis.asyncio as aioredis
+import httpx
 import requests
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Optional, Tuple
+from pymongo import ReturnDocument
+from pymongo.errors import PyMongoError
+from core.config import config
+
+# Backend failures a read degrades on (JSONDecodeError is a ValueError)
+STORE_ERRORS = (redis.RedisError, PyMongoError, ValueError, asyncio.TimeoutError)
 
 
 class ConversationStore(ABC):
@@ -88,22 +98,7 @@ class RedisConversationStore(ConversationStore):
     
     def _trim_history(self, history: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Trim history to last 12-16 turns, keeping conversation pairs"""
-        if len(history) <= self.max_history_turns:
-            return history
-        
-        # Keep the most recent turns, but try to maintain user-assistant pairs
-        # Take the last max_history_turns messages
-        trimmed = history[-self.max_history_turns:]
-        
-        # If we start with an assistant message, try to include the user message before it
-        if len(trimmed) < len(history) and trimmed[0].get("role") == "assistant":
-            # Look for the preceding user message
-            preceding_idx = len(history) - len(trimmed) - 1
-            if preceding_idx >= 0 and history[preceding_idx].get("role") == "user":
-                trimmed = [history[preceding_idx]] + trimmed[1:]  # Replace first with user message
-        
-        print(f"DEBUG: Trimmed history from {len(history)} to {len(trimmed)} turns")
-        return trimmed
+        return trim_history(history, self.max_history_turns)
     
     def health_check(self) -> bool:
         """Check if Redis is healthy"""
@@ -114,8 +109,435 @@ class RedisConversationStore(ConversationStore):
             return False
 
 
+def trim_history(history: List[Dict[str, Any]], max_turns: int) -> List[Dict[str, Any]]:
+    """Keep the last max_turns messages, starting on a user message where possible"""
+    if len(history) <= max_turns:
+        return history
+    
+    # Keep the most recent turns, but try to maintain user-assistant pairs
+    # Take the last max_turns messages
+    trimmed = history[-max_turns:]
+    
+    # If we start with an assistant message, try to include the user message before it
+    if len(trimmed) < len(history) and trimmed[0].get("role") == "assistant":
+        # Look for the preceding user message
+        preceding_idx = len(history) - len(trimmed) - 1
+        if preceding_idx >= 0 and history[preceding_idx].get("role") == "user":
+            trimmed = [history[preceding_idx]] + trimmed[1:]  # Replace first with user message
+    
+    print(f"DEBUG: Trimmed history from {len(history)} to {len(trimmed)} turns")
+    return trimmed
+
+
+class AsyncConversationStore(ABC):
+    """Async interface for conversation persistence - used from the event loop by ChatService"""
+    
+    @abstractmethod
+    async def fetch(self, session_id: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Last `limit` messages for session_id (default CONV_MAX_TURNS); raises on backend failure"""
+        pass
+    
+    async def get(self, session_id: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Like fetch(), but a backend failure reads as an empty history"""
+        try:
+            return await self.fetch(session_id, limit)
+        except STORE_ERRORS as e:
+            print(f"ERROR: Failed to get conversation {session_id}: {e}")
+            return []
+    
+    @abstractmethod
+    async def append(self, session_id: str, messages: List[Dict[str, Any]], ttl_seconds: Optional[int] = None) -> int:
+        """Atomically append messages, trim to CONV_MAX_TURNS and refresh the TTL; returns stored length"""
+        pass
+    
+    @abstractmethod
+    async def set(self, session_id: str, history: List[Dict[str, Any]], ttl_seconds: Optional[int] = None) -> None:
+        """Replace conversation history with TTL (default CONV_TTL_SECONDS)"""
+        pass
+    
+    async def fetch_summary(self, session_id: str) -> str:
+        """Running summary of turns trimmed out of the history; raises on backend failure"""
+        return ""
+    
+    async def get_summary(self, session_id: str) -> str:
+        """Like fetch_summary(), but a backend failure reads as no summary"""
+        try:
+            return await self.fetch_summary(session_id)
+        except STORE_ERRORS as e:
+            print(f"ERROR: Failed to get conversation summary {session_id}: {e}")
+            return ""
+    
+    async def set_summary(self, session_id: str, summary: str, ttl_seconds: Optional[int] = None) -> None:
+        """Store the running summary alongside the session (stores without one keep none)"""
+        pass
+    
+    @abstractmethod
+    async def health_check(self) -> bool:
+        pass
+    
+    async def close(self) -> None:
+        pass
+
+
+MONGO_SESSION_COLLECTION = "conversation_sessions"
+
+
+def messages_key(session_id: str) -> str:
+    """Redis list holding one JSON-encoded message per element"""
+    return f"conv:{session_id}:messages"
+
+
+def legacy_key(session_id: str) -> str:
+    """Pre-list history: the whole conversation as one JSON string"""
+    return f"conv:{session_id}"
+
+
+def summary_key(session_id: str) -> str:
+    """Running summary of turns trimmed out of the list"""
+    return f"conv:{session_id}:summary"
+
+
+class RedisListConversationStore(AsyncConversationStore):
+    """
+    History as a Redis list: a turn is one RPUSH + LTRIM + EXPIRE transaction and a read is one
+    bounded LRANGE, so per-turn cost is constant and concurrent appends cannot drop messages.
+    Backends only provide execute(); legacy JSON-blob sessions are migrated on first read
+    """
+    
+    def __init__(self, max_history_turns: Optional[int] = None):
+        self.max_history_turns = max_history_turns or config.CONV_MAX_TURNS
+    
+    @abstractmethod
+    async def execute(self, commands: List[Tuple[Any, ...]], transaction: bool) -> List[Any]:
+        """Run commands in one round-trip (MULTI/EXEC when transaction); results in order"""
+        pass
+    
+    async def fetch(self, session_id: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        limit = limit or self.max_history_turns
+        raw_messages, legacy = await self.execute(
+            [("LRANGE", messages_key(session_id), -limit, -1), ("GET", legacy_key(session_id))],
+            transaction=False,
+        )
+        if not raw_messages and legacy:
+            raw_messages = await self._migrate_legacy(session_id, limit)
+        return [json.loads(message) for message in raw_messages or []]
+    
+    async def append(self, session_id: str, messages: List[Dict[str, Any]], ttl_seconds: Optional[int] = None) -> int:
+        if not messages:
+            return 0
+        key = messages_key(session_id)
+        ttl_seconds = ttl_seconds or config.CONV_TTL_SECONDS
+        pushed = (await self.execute([
+            ("RPUSH", key, *[json.dumps(message) for message in messages]),
+            ("LTRIM", key, -self.max_history_turns, -1),
+            ("EXPIRE", key, ttl_seconds),
+            ("EXPIRE", summary_key(session_id), ttl_seconds),
+        ], transaction=True))[0]
+        return min(int(pushed), self.max_history_turns)
+    
+    async def set(self, session_id: str, history: List[Dict[str, Any]], ttl_seconds: Optional[int] = None) -> None:
+        key = messages_key(session_id)
+        trimmed_history = trim_history(history, self.max_history_turns)
+        commands = [("DEL", key, legacy_key(session_id))]
+        if trimmed_history:
+            commands += [
+                ("RPUSH", key, *[json.dumps(message) for message in trimmed_history]),
+                ("EXPIRE", key, ttl_seconds or config.CONV_TTL_SECONDS),
+            ]
+        await self.execute(commands, transaction=True)
+    
+    async def fetch_summary(self, session_id: str) -> str:
+        (summary,) = await self.execute([("GET", summary_key(session_id))], transaction=False)
+        return summary or ""
+    
+    async def set_summary(self, session_id: str, summary: str, ttl_seconds: Optional[int] = None) -> None:
+        await self.execute(
+            [("SET", summary_key(session_id), summary, "EX", ttl_seconds or config.CONV_TTL_SECONDS)],
+            transaction=False,
+        )
+    
+    async def _migrate_legacy(self, session_id: str, limit: int) -> List[str]:
+        """Move a legacy JSON-blob history into the list; GETDEL lets exactly one request do it"""
+        key = messages_key(session_id)
+        (legacy,) = await self.execute([("GETDEL", legacy_key(session_id))], transaction=False)
+        if legacy:
+            history = trim_history(json.loads(legacy), self.max_history_turns)
+            if history:
+                # LPUSH in reverse keeps legacy messages ahead of any turn appended meanwhile
+                await self.execute([
+                    ("LPUSH", key, *[json.dumps(message) for message in reversed(history)]),
+                    ("LTRIM", key, -self.max_history_turns, -1),
+                    ("EXPIRE", key, config.CONV_TTL_SECONDS),
+                ], transaction=True)
+        (raw_messages,) = await self.execute([("LRANGE", key, -limit, -1)], transaction=False)
+        return raw_messages
+
+
+class AsyncRedisConversationStore(RedisListConversationStore):
+    """redis.asyncio store; one connection pool per store, bounded by REDIS_MAX_CONNECTIONS"""
+    
+    def __init__(self, redis_url: Optional[str] = None, max_connections: Optional[int] = None):
+        super().__init__()
+        self.redis_url = redis_url or os.environ.get("REDIS_URL", "redis://localhost:6379")
+        self.pool = aioredis.ConnectionPool.from_url(
+            self.redis_url,
+            decode_responses=True,
+            max_connections=max_connections or config.REDIS_MAX_CONNECTIONS,
+            socket_timeout=config.REDIS_SOCKET_TIMEOUT_MS / 1000,
+            socket_connect_timeout=config.REDIS_CONNECT_TIMEOUT_MS / 1000,
+        )
+        self.r = aioredis.Redis(connection_pool=self.pool)
+    
+    async def execute(self, commands: List[Tuple[Any, ...]], transaction: bool) -> List[Any]:
+        async with self.r.pipeline(transaction=transaction) as pipe:
+            for command in commands:
+                pipe.execute_command(*command)
+            return await pipe.execute()
+    
+    async def health_check(self) -> bool:
+        try:
+            return bool(await self.r.ping())
+        except redis.RedisError:
+            return False
+    
+    async def close(self) -> None:
+        await self.r.aclose()
+        await self.pool.disconnect()
+
+
+class UpstashConversationStore(RedisListConversationStore):
+    """Upstash Redis over its HTTP REST API (JSON command arrays, bearer token auth)"""
+    
+    def __init__(self, rest_url: str, token: str, max_connections: Optional[int] = None):
+        super().__init__()
+        self.rest_url = rest_url.rstrip("/")
+        max_connections = max_connections or config.REDIS_MAX_CONNECTIONS
+        self.client = httpx.AsyncClient(
+            headers={"Authorization": f"Bearer {token}"},
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            timeout=httpx.Timeout(config.REDIS_SOCKET_TIMEOUT_MS / 1000, connect=config.REDIS_CONNECT_TIMEOUT_MS / 1000),
+        )
+    
+    async def command(self, *args: Any) -> Any:
+        """Run one Redis command; returns its `result`, raises redis.RedisError on failure"""
+        return self._result(await self._post("", [str(arg) for arg in args]))
+    
+    async def execute(self, commands: List[Tuple[Any, ...]], transaction: bool) -> List[Any]:
+        # /multi-exec wraps the batch in MULTI/EXEC; /pipeline just saves round-trips
+        body = await self._post(
+            "/multi-exec" if transaction else "/pipeline",
+            [[str(arg) for arg in command] for command in commands],
+        )
+        if not isinstance(body, list):
+            return [self._result(body)]
+        return [self._result(item) for item in body]
+    
+    async def health_check(self) -> bool:
+        try:
+            return await self.command("PING") == "PONG"
+        except redis.RedisError:
+            return False
+    
+    async def close(self) -> None:
+        await self.client.aclose()
+    
+    async def _post(self, path: str, payload: Any) -> Any:
+        try:
+            response = await self.client.post(self.rest_url + path, json=payload)
+        except httpx.HTTPError as e:
+            raise redis.ConnectionError(f"Upstash request failed: {e}") from e
+        try:
+            body = response.json() if response.content else {}
+        except ValueError:
+            body = {}
+        if response.status_code != 200:
+            raise redis.ResponseError((isinstance(body, dict) and body.get("error")) or f"Upstash HTTP {response.status_code}")
+        return body
+    
+    @staticmethod
+    def _result(item: Any) -> Any:
+        if not isinstance(item, dict) or "error" in item:
+            raise redis.ResponseError(item.get("error") if isinstance(item, dict) else f"Unexpected Upstash reply: {item!r}")
+        return item.get("result")
+
+
+class MongoConversationStore(AsyncConversationStore):
+    """
+    One document per session: {_id: session_id, messages: [...], summary, updated_at, expires_at}
+    A turn is a single $push with $each/$slice upsert, so writes stay bounded and atomic;
+    expiry is a TTL index on expires_at
+    """
+    
+    def __init__(self, collection, max_history_turns: Optional[int] = None):
+        self.collection = collection
+        self.max_history_turns = max_history_turns or config.CONV_MAX_TURNS
+    
+    async def ensure_indexes(self) -> None:
+        await self.collection.create_index("expires_at", expireAfterSeconds=0)
+    
+    async def fetch(self, session_id: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        limit = limit or self.max_history_turns
+        doc = await self.collection.find_one({"_id": session_id}, {"_id": 0, "messages": {"$slice": -limit}})
+        return doc["messages"] if doc else []
+    
+    async def append(self, session_id: str, messages: List[Dict[str, Any]], ttl_seconds: Optional[int] = None) -> int:
+        if not messages:
+            return 0
+        now = datetime.utcnow()
+        doc = await self.collection.find_one_and_update(
+            {"_id": session_id},
+            {
+                "$push": {"messages": {"$each": messages, "$slice": -self.max_history_turns}},
+                "$set": {"updated_at": now, "expires_at": now + timedelta(seconds=ttl_seconds or config.CONV_TTL_SECONDS)},
+            },
+            projection={"_id": 0, "message_count": {"$size": "$messages"}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        return doc["message_count"] if doc else len(messages)
+    
+    async def set(self, session_id: str, history: List[Dict[str, Any]], ttl_seconds: Optional[int] = None) -> None:
+        now = datetime.utcnow()
+        await self.collection.update_one(
+            {"_id": session_id},
+            {"$set": {
+                "messages": trim_history(history, self.max_history_turns),
+                "updated_at": now,
+                "expires_at": now + timedelta(seconds=ttl_seconds or config.CONV_TTL_SECONDS),
+            }},
+            upsert=True,
+        )
+    
+    async def fetch_summary(self, session_id: str) -> str:
+        doc = await self.collection.find_one({"_id": session_id}, {"_id": 0, "summary": 1})
+        return (doc or {}).get("summary") or ""
+    
+    async def set_summary(self, session_id: str, summary: str, ttl_seconds: Optional[int] = None) -> None:
+        now = datetime.utcnow()
+        await self.collection.update_one(
+            {"_id": session_id},
+            {"$set": {
+                "summary": summary,
+                "updated_at": now,
+                "expires_at": now + timedelta(seconds=ttl_seconds or config.CONV_TTL_SECONDS),
+            }},
+            upsert=True,
+        )
+    
+    async def health_check(self) -> bool:
+        try:
+            await self.collection.database.command("ping")
+            return True
+        except PyMongoError:
+            return False
+
+
+class CompositeConversationStore(AsyncConversationStore):
+    """
+    CONV_DUAL_WRITE: writes go to both stores concurrently; reads come from the primary and
+    fall back to the secondary when the primary errors or exceeds CONV_READ_TIMEOUT_MS
+    """
+    
+    def __init__(self, primary: AsyncConversationStore, secondary: AsyncConversationStore, read_timeout_ms: Optional[int] = None):
+        self.primary = primary
+        self.secondary = secondary
+        self.read_timeout_seconds = (read_timeout_ms or config.CONV_READ_TIMEOUT_MS) / 1000
+    
+    async def ensure_indexes(self) -> None:
+        for store in (self.primary, self.secondary):
+            if hasattr(store, "ensure_indexes"):
+                await store.ensure_indexes()
+    
+    async def fetch(self, session_id: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        try:
+            return await asyncio.wait_for(self.primary.fetch(session_id, limit), timeout=self.read_timeout_seconds)
+        except STORE_ERRORS as e:
+            print(f"WARNING: Primary conversation store read failed for {session_id} ({type(e).__name__}); reading secondary")
+            return await self.secondary.fetch(session_id, limit)
+    
+    async def append(self, session_id: str, messages: List[Dict[str, Any]], ttl_seconds: Optional[int] = None) -> int:
+        results = await asyncio.gather(
+            self.primary.append(session_id, messages, ttl_seconds),
+            self.secondary.append(session_id, messages, ttl_seconds),
+            return_exceptions=True,
+        )
+        return self._settle("append", session_id, results)
+    
+    async def set(self, session_id: str, history: List[Dict[str, Any]], ttl_seconds: Optional[int] = None) -> None:
+        results = await asyncio.gather(
+            self.primary.set(session_id, history, ttl_seconds),
+            self.secondary.set(session_id, history, ttl_seconds),
+            return_exceptions=True,
+        )
+        self._settle("set", session_id, results)
+    
+    async def fetch_summary(self, session_id: str) -> str:
+        try:
+            return await asyncio.wait_for(self.primary.fetch_summary(session_id), timeout=self.read_timeout_seconds)
+        except STORE_ERRORS as e:
+            print(f"WARNING: Primary conversation store summary read failed for {session_id} ({type(e).__name__}); reading secondary")
+            return await self.secondary.fetch_summary(session_id)
+    
+    async def set_summary(self, session_id: str, summary: str, ttl_seconds: Optional[int] = None) -> None:
+        results = await asyncio.gather(
+            self.primary.set_summary(session_id, summary, ttl_seconds),
+            self.secondary.set_summary(session_id, summary, ttl_seconds),
+            return_exceptions=True,
+        )
+        self._settle("set_summary", session_id, results)
+    
+    async def health_check(self) -> bool:
+        return await self.primary.health_check()
+    
+    async def close(self) -> None:
+        await asyncio.gather(self.primary.close(), self.secondary.close(), return_exceptions=True)
+    
+    def _settle(self, operation: str, session_id: str, results: List[Any]) -> Any:
+        """A write succeeds if either store took it; one-sided failures are logged"""
+        errors = [result for result in results if isinstance(result, BaseException)]
+        for store, result in zip(("primary", "secondary"), results):
+            if isinstance(result, BaseException):
+                print(f"ERROR: Dual-write {operation} to {store} conversation store failed for {session_id}: {result}")
+        if len(errors) == len(results):
+            raise errors[0]
+        return next(result for result in results if not isinstance(result, BaseException))
+
+
+def create_redis_conversation_store(redis_url: Optional[str] = None) -> RedisListConversationStore:
+    """Upstash REST when REDIS_URL is https:// with REDIS_TOKEN set, else redis.asyncio"""
+    redis_url = redis_url or os.environ.get("REDIS_URL", "redis://localhost:6379")
+    token = os.environ.get("REDIS_TOKEN")
+    if redis_url.startswith("https://") and token:
+        print(f"✅ Using Upstash Redis REST: {redis_url}")
+        return UpstashConversationStore(redis_url, token)
+    return AsyncRedisConversationStore(redis_url)
+
+
+def create_async_conversation_store(redis_url: Optional[str] = None, db=None) -> AsyncConversationStore:
+    """
+    Build the store selected by CONV_STORE_PRIMARY (redis|mongo); with CONV_DUAL_WRITE the
+    other backend becomes the secondary of a CompositeConversationStore. Mongo needs `db`
+    """
+    if db is None:
+        return create_redis_conversation_store(redis_url)
+    
+    def mongo() -> MongoConversationStore:
+        return MongoConversationStore(db[MONGO_SESSION_COLLECTION])
+    
+    if config.CONV_STORE_PRIMARY == "mongo":
+        primary = mongo()
+        secondary = create_redis_conversation_store(redis_url) if config.CONV_DUAL_WRITE else None
+    else:
+        primary = create_redis_conversation_store(redis_url)
+        secondary = mongo() if config.CONV_DUAL_WRITE else None
+    
+    print(f"✅ Conversation store: primary={config.CONV_STORE_PRIMARY}, dual_write={config.CONV_DUAL_WRITE}")
+    return CompositeConversationStore(primary, secondary) if secondary else primary
+
+
 # Global store instance - will be initialized by the application
 conversation_store: ConversationStore = None
+async_conversation_store: Optional[AsyncConversationStore] = None
 
 
 def init_conversation_store(redis_url: str = None) -> ConversationStore:
@@ -130,4 +552,26 @@ def get_conversation_store() -> ConversationStore:
     """Get the global conversation store instance"""
     if conversation_store is None:
         raise RuntimeError("Conversation store not initialized. Call init_conversation_store() first.")
-    return conversation_store
\ No newline at end of file
+    return conversation_store
+
+
+def init_async_conversation_store(redis_url: str = None, db=None) -> AsyncConversationStore:
+    """Initialize the global async conversation store (connections are opened lazily)"""
+    global async_conversation_store
+    async_conversation_store = create_async_conversation_store(redis_url, db)
+    return async_conversation_store
+
+
+def get_async_conversation_store() -> AsyncConversationStore:
+    """Get the global async conversation store instance"""
+    if async_conversation_store is None:
+        raise RuntimeError("Async conversation store not initialized. Call init_async_conversation_store() first.")
+    return async_conversation_store
+
+
+async def close_async_conversation_store() -> None:
+    """Close the global async store's connections (application shutdown)"""
+    global async_conversation_store
+    if async_conversation_store is not None:
+        await async_conversation_store.close()
+        async_conversation_store = None
@@ -3,12 +3,14 @@ Follow-On Suggestions System
 Generates context-aware "Would you like to..." suggestions for chat responses
 """
 
-import re
 from typing import List, Dict, Any, Optional
 import logging
+from core.keyword_matcher import KeywordMatch, KeywordMatcher
 
 logger = logging.getLogger(__name__)
 
+STANDARDS_GROUP = "standards"
+
 class SuggestionsEngine:
     """Generates context-aware follow-on suggestions based on response content"""
     
@@ -67,6 +69,10 @@ class SuggestionsEngine:
             r"Class\s+[1-9][a-z]?"
         ]
         
+        # Topics and standards found in one pass over the text
+        self.matcher = KeywordMatcher({**self.topic_patterns, STANDARDS_GROUP: self.standard_patterns})
+        self._last_scan = ("", [])
+        
         # Suggestion templates by topic
         self.suggestion_templates = {
             "fire": [
@@ -123,40 +129,37 @@ class SuggestionsEngine:
             {"label": "Explain with examples", "payload": "Give me practical examples of how to apply this requirement"}
         ]
     
+    def scan(self, text: str) -> List[KeywordMatch]:
+        """Topic and standard matches; the last text is remembered since detect_topic and suggest_actions see the same response"""
+        last_text, matches = self._last_scan
+        if text != last_text:
+            matches = self.matcher.find(text)
+            self._last_scan = (text, matches)
+        return matches
+    
     def detect_topic(self, text: str) -> Optional[str]:
         """Detect the primary topic from text content"""
         if not text:
             return None
-            
-        text_lower = text.lower()
-        topic_scores = {}
         
-        for topic, patterns in self.topic_patterns.items():
-            score = 0
-            for pattern in patterns:
-                matches = len(re.findall(pattern, text_lower, re.IGNORECASE))
-                score += matches
-            
-            if score > 0:
-                topic_scores[topic] = score
+        topic_scores = {}
+        for match in self.scan(text):
+            if match.group != STANDARDS_GROUP:
+                topic_scores[match.group] = topic_scores.get(match.group, 0) + 1
         
-        # Return topic with highest score
+        # Return topic with highest score (ties go to the topic listed first)
         if topic_scores:
-            return max(topic_scores.items(), key=lambda x: x[1])[0]
+            return max(self.topic_patterns, key=lambda topic: topic_scores.get(topic, 0))
         
         return None
     
     def detect_standards(self, text: str) -> List[str]:
-        """Extract mentioned standards/clauses from text"""
+        """Extract mentioned standards/clauses from text, in order of first mention"""
         if not text:
             return []
-            
-        standards = []
-        for pattern in self.standard_patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            standards.extend(matches)
         
-        return list(set(standards))  # Remove duplicates
+        standards = [match.text for match in self.scan(text) if match.group == STANDARDS_GROUP]
+        return list(dict.fromkeys(standards))  # Remove duplicates
     
     def suggest_actions(self, topic: Optional[str], blocks: List[Dict[str, Any]], full_text: str = "") -> List[Dict[str, str]]:
         """
@@ -0,0 +1,80 @@
+"""
+Token counting - tiktoken (a declared dependency); a characters/4 estimate, logged as a warning, if it fails to load
+Shared by document chunking, context budgeting and per-turn token accounting
+"""
+
+import logging
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, List
+
+logger = logging.getLogger(__name__)
+
+ENCODING_NAME = "cl100k_base"  # text-embedding-ada-002 and gpt-4o-mini family
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding(ENCODING_NAME)
+except Exception as e:  # not installed, or the encoding file could not be fetched (set TIKTOKEN_CACHE_DIR offline)
+    logger.warning(
+        f"tiktoken {ENCODING_NAME} unavailable ({e}); context budgets, chunk sizes and token usage fall back "
+        "to a characters/4 estimate and can be far off for code, tables and non-English text"
+    )
+    _encoding = None
+
+
+def is_exact() -> bool:
+    """True when counts come from the real tokenizer"""
+    return _encoding is not None
+
+
+def count_tokens(text: str) -> int:
+    if not text:
+        return 0
+    if _encoding is not None:
+        return len(_encoding.encode_ordinary(text))
+    return (len(text) + 3) // 4
+
+
+def count_tokens_batch(texts: List[str]) -> List[int]:
+    if _encoding is not None:
+        return [len(tokens) for tokens in _encoding.encode_ordinary_batch(texts)]
+    return [(len(text) + 3) // 4 if text else 0 for text in texts]
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Longest prefix of text that fits in max_tokens"""
+    if max_tokens <= 0 or not text:
+        return ""
+    if _encoding is not None:
+        tokens = _encoding.encode_ordinary(text)
+        return text if len(tokens) <= max_tokens else _encoding.decode(tokens[:max_tokens])
+    return text[:max_tokens * 4]
+
+
+@dataclass
+class TokenUsage:
+    """Tokens for one LLM turn: from the API `usage` block, or estimated locally (fallbacks, missing usage)"""
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+    estimated: bool = False
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    @classmethod
+    def from_api(cls, usage: Any) -> "TokenUsage":
+        details = getattr(usage, "prompt_tokens_details", None)
+        return cls(
+            prompt_tokens=usage.prompt_tokens or 0,
+            completion_tokens=usage.completion_tokens or 0,
+            cached_tokens=(getattr(details, "cached_tokens", None) or 0) if details else 0,
+        )
+
+    @classmethod
+    def estimate(cls, prompt_tokens: int, completion_text: str) -> "TokenUsage":
+        return cls(prompt_tokens=prompt_tokens, completion_tokens=count_tokens(completion_text), estimated=True)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {**asdict(self), "total_tokens": self.total_tokens}
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Conversation store benchmark - p50/p95 per-turn latency (history read + turn append)
+Compares Redis lists, Mongo session documents and the dual-write composite
+
+Usage:
+    python scripts/benchmark_conversation_store.py --redis-url redis://localhost:6379 --mongo-url mongodb://localhost:27017
+    python scripts/benchmark_conversation_store.py --sessions 50 --turns 40 --concurrency 10
+"""
+
+import os
+import sys
+import time
+import uuid
+import asyncio
+import argparse
+import statistics
+from motor.motor_asyncio import AsyncIOMotorClient
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.stores.conversation_store import (
+    MONGO_SESSION_COLLECTION,
+    CompositeConversationStore,
+    MongoConversationStore,
+    create_redis_conversation_store,
+)
+
+
+def turn_messages(session_id: str, turn: int) -> list:
+    question = f"Turn {turn}: what FRL does a class 2 party wall need in session {session_id}?"
+    answer = "## 🔧 **Technical Answer**\n\n" + "NCC Spec C1.1 requires 90/90/90 for party walls. " * 12
+    return [{"role": "user", "content": question}, {"role": "assistant", "content": answer}]
+
+
+def percentile_ms(samples: list, p: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))] * 1000
+
+
+async def run_session(store, session_id: str, turns: int, samples: list) -> None:
+    for turn in range(turns):
+        t0 = time.perf_counter()
+        await store.fetch(session_id)
+        await store.append(session_id, turn_messages(session_id, turn))
+        samples.append(time.perf_counter() - t0)
+
+
+async def measure(name: str, store, sessions: int, turns: int, concurrency: int) -> None:
+    if not await store.health_check():
+        print(f"⚠️ {name}: backend unavailable, skipped")
+        return
+    if hasattr(store, "ensure_indexes"):
+        await store.ensure_indexes()
+
+    prefix = f"bench-{uuid.uuid4().hex[:8]}"
+    samples = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def bounded(i: int) -> None:
+        async with semaphore:
+            await run_session(store, f"{prefix}-{i}", turns, samples)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*[bounded(i) for i in range(sessions)])
+    elapsed = time.perf_counter() - t0
+
+    print(f"📊 {name}: {len(samples)} turns in {elapsed:.2f}s | p50 {percentile_ms(samples, 50):.2f}ms "
+          f"| p95 {percentile_ms(samples, 95):.2f}ms | mean {statistics.mean(samples) * 1000:.2f}ms")
+
+
+async def main_async(args) -> None:
+    mongo_client = AsyncIOMotorClient(args.mongo_url, serverSelectionTimeoutMS=2000)
+    collection = mongo_client[args.db_name][MONGO_SESSION_COLLECTION]
+
+    redis_store = create_redis_conversation_store(args.redis_url)
+    mongo_store = MongoConversationStore(collection)
+
+    print("🧪 Conversation store benchmark (fetch + append per turn)")
+    print(f"   {args.sessions} sessions x {args.turns} turns | concurrency {args.concurrency}")
+
+    await measure("redis", redis_store, args.sessions, args.turns, args.concurrency)
+    await measure("mongo", mongo_store, args.sessions, args.turns, args.concurrency)
+    await measure("dual-write (redis primary)", CompositeConversationStore(redis_store, mongo_store),
+                  args.sessions, args.turns, args.concurrency)
+    await measure("dual-write (mongo primary)", CompositeConversationStore(mongo_store, redis_store),
+                  args.sessions, args.turns, args.concurrency)
+
+    await redis_store.close()
+    mongo_client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark conversation store turn latency")
+    parser.add_argument("--redis-url", default=os.environ.get("REDIS_URL", "redis://localhost:6379"))
+    parser.add_argument("--mongo-url", default=os.environ.get("MONGO_URL", "mongodb://localhost:27017"))
+    parser.add_argument("--db-name", default="conversation_store_benchmark")
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
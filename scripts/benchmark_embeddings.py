@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Embedding ingestion benchmark - texts/sec for one-call-per-text vs batched requests
+Runs offline against the local stand-in provider with simulated API latency
+
+Usage:
+    python scripts/benchmark_embeddings.py --texts 2000
+    python scripts/benchmark_embeddings.py --texts 2000 --latency-ms 300 --batch-sizes 32,128,512 --concurrency 4
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.knowledge.embeddings import LocalEmbeddingProvider, generate_embeddings_batch
+
+
+def sample_texts(count: int) -> list:
+    return [
+        f"Chunk {i}: fire rated plasterboard wall type {i % 50} with {i % 7} layers per AS 1530.4 and NCC C3.15"
+        for i in range(count)
+    ]
+
+
+async def sequential(provider: LocalEmbeddingProvider, texts: list) -> float:
+    """Legacy ingestion path: one request per text, awaited in turn"""
+    start = time.perf_counter()
+    for text in texts:
+        await provider.embed([text])
+    return time.perf_counter() - start
+
+
+async def batched(provider: LocalEmbeddingProvider, texts: list, batch_size: int, concurrency: int) -> float:
+    start = time.perf_counter()
+    await generate_embeddings_batch(texts, provider, batch_size=batch_size, max_concurrency=concurrency)
+    return time.perf_counter() - start
+
+
+async def main_async(args) -> None:
+    provider = LocalEmbeddingProvider(latency_ms=args.latency_ms, per_input_ms=args.per_input_ms)
+    texts = sample_texts(args.texts)
+
+    print("🧪 Embedding ingestion benchmark")
+    print(f"   {args.texts} texts | simulated latency {args.latency_ms}ms/request + {args.per_input_ms}ms/input")
+
+    # The sequential path is slow by design; time a sample and extrapolate
+    sample = texts[:min(len(texts), args.sequential_sample)]
+    elapsed = await sequential(provider, sample) * len(texts) / len(sample)
+    print(f"\n📊 sequential (1 text/request): {elapsed:.1f}s | {len(texts) / elapsed:.0f} texts/s (extrapolated from {len(sample)})")
+
+    for batch_size in [int(b) for b in args.batch_sizes.split(",")]:
+        elapsed = await batched(provider, texts, batch_size, args.concurrency)
+        requests = -(-len(texts) // batch_size)
+        print(f"📊 batch={batch_size} concurrency={args.concurrency}: {elapsed:.2f}s | {len(texts) / elapsed:.0f} texts/s | {requests} requests")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batched embedding ingestion")
+    parser.add_argument("--texts", type=int, default=2000)
+    parser.add_argument("--latency-ms", type=float, default=200.0, help="Simulated round-trip per request")
+    parser.add_argument("--per-input-ms", type=float, default=0.5, help="Simulated server time per input")
+    parser.add_argument("--batch-sizes", default="16,64,256")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--sequential-sample", type=int, default=25)
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Extraction benchmark - chat latency while N PDF uploads are being parsed
+Simulated chat requests (a short await each) run alongside the uploads; with inline
+parsing they queue behind PyPDF2, with the process pool their p95 should hold
+
+Usage:
+    python scripts/benchmark_extraction.py --uploads 4 --pages 2000
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.knowledge.extraction import ExtractionService, extract_pdf_text
+
+
+def build_text_pdf(pages: int) -> bytes:
+    """Minimal valid PDF with one line of Helvetica text per page"""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for page in range(pages):
+        stream = f"BT /F1 12 Tf 72 720 Td (Page {page}: fire rated wall systems per NCC C3.15 and AS 1530.4) Tj ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents {len(objects)} 0 R /Resources << /Font << /F1 3 0 R >> >> >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    out, offsets = bytearray(b"%PDF-1.4\n"), []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(out)
+
+
+async def chat_requests(stop: asyncio.Event, service_ms: float) -> list:
+    """Stand-in for /chat/ask: each request awaits I/O for service_ms"""
+    latencies = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(service_ms / 1000)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+async def run_inline(pdf: bytes, uploads: int, max_pages: int) -> None:
+    # Legacy behaviour: the parser runs directly inside the coroutine
+    for i in range(uploads):
+        extract_pdf_text(pdf, f"upload-{i}.pdf", max_pages)
+        await asyncio.sleep(0)
+
+
+async def run_pool(service: ExtractionService, pdf: bytes, uploads: int) -> None:
+    await asyncio.gather(*[service.extract(pdf, "application/pdf", f"upload-{i}.pdf") for i in range(uploads)])
+
+
+async def measure(name: str, uploads_coro, service_ms: float) -> None:
+    stop = asyncio.Event()
+    chat = asyncio.create_task(chat_requests(stop, service_ms))
+    await asyncio.sleep(0.1)  # baseline samples before uploads arrive
+    start = time.perf_counter()
+    await uploads_coro
+    elapsed = time.perf_counter() - start
+    stop.set()
+    latencies = np.array(await chat) * 1000
+    print(f"📊 {name}: uploads done in {elapsed:.2f}s | chat p50 {np.percentile(latencies, 50):.1f}ms "
+          f"| p95 {np.percentile(latencies, 95):.1f}ms | max {latencies.max():.1f}ms ({len(latencies)} requests)")
+
+
+async def main_async(args) -> None:
+    pdf = build_text_pdf(args.pages)
+    service = ExtractionService(max_workers=args.workers, max_pages=args.pages, timeout_seconds=600)
+
+    print("🧪 Extraction benchmark")
+    print(f"   {args.uploads} uploads x {args.pages} pages ({len(pdf) / 1e6:.1f}MB each) | chat request = {args.chat_ms}ms await")
+
+    # Spawn the pool before timing so worker start-up is not counted against it
+    await service.extract(build_text_pdf(1), "application/pdf", "warmup.pdf")
+
+    await measure("inline (event loop)", run_inline(pdf, args.uploads, args.pages), args.chat_ms)
+    await measure(f"process pool ({args.workers} workers)", run_pool(service, pdf, args.uploads), args.chat_ms)
+    service.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark chat latency during PDF extraction")
+    parser.add_argument("--uploads", type=int, default=4)
+    parser.add_argument("--pages", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--chat-ms", type=float, default=5.0)
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
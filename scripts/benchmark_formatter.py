@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+"""
+Formatter benchmark - responses/second of UnifiedFormatter against the previous multi-pass implementation
+Also checks the two produce identical text and emoji maps on the golden corpus and on generated responses
+
+Usage:
+    python scripts/benchmark_formatter.py --iterations 2000
+    python scripts/benchmark_formatter.py --write-golden   # regenerate tests/golden/formatter_golden.json
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import random
+import argparse
+from typing import List, Optional, Tuple
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.formatter import UnifiedFormatter
+from core.schema import CANONICAL_EMOJI_MAP, EmojiItem
+
+GOLDEN_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tests", "golden", "formatter_golden.json")
+
+
+class MultiPassFormatter:
+    """UnifiedFormatter before the single-scan rewrite: one regex pass per rule (reference for parity and speed)"""
+    
+    def format_response(self, raw_text: str) -> Tuple[str, List[EmojiItem]]:
+        """
+        Main formatting function - enforces ALL rules
+        Returns: (formatted_text, emoji_map)
+        """
+        # Step 1: Normalize section headers with canonical emojis
+        formatted_text = self._normalize_section_headers(raw_text)
+        
+        # Step 2: Apply typography rules  
+        formatted_text = self._apply_typography_rules(formatted_text)
+        
+        # Step 3: Format lists with consistent styling
+        formatted_text = self._normalize_lists(formatted_text)
+        
+        # Step 4: Convert markdown tables to professional HTML
+        formatted_text = self._format_tables(formatted_text)
+        
+        # Step 5: Extract emoji map from formatted text
+        emoji_map = self._extract_emoji_map(formatted_text)
+        
+        # Step 6: Final cleanup and validation
+        formatted_text = self._final_cleanup(formatted_text)
+        
+        return formatted_text, emoji_map
+    
+    def _normalize_section_headers(self, text: str) -> str:
+        """
+        Enforce canonical emoji + header format
+        Replace ANY variation with: ## {canonical_emoji} **{Title}**
+        """
+        formatted = text
+        
+        # CRITICAL: Replace wrong emojis with correct ones
+        wrong_emoji_replacements = {
+            "🧠 **Mentoring Insight**": "🧐 **Mentoring Insight**",
+            "💡 **Mentoring Insight**": "🧐 **Mentoring Insight**", 
+            "🤓 **Mentoring Insight**": "🧐 **Mentoring Insight**",
+            "🧠 Mentoring Insight": "🧐 Mentoring Insight",
+            "💡 Mentoring Insight": "🧐 Mentoring Insight",
+            "🤓 Mentoring Insight": "🧐 Mentoring Insight"
+        }
+        
+        for wrong, correct in wrong_emoji_replacements.items():
+            formatted = formatted.replace(wrong, correct)
+        
+        # Normalize all section headers to H2 format
+        for section_name, canonical_emoji in CANONICAL_EMOJI_MAP.items():
+            # Find existing headers and normalize them
+            pattern = rf"(?:^|\n)(?:#*\s*)?(?:[🔧🧐📋📊✅🔄🏛️📄⚙️❓🧠💡🤓]*)\s*\*?\*?{re.escape(section_name)}\*?\*?:?"
+            replacement = f"\n\n## {canonical_emoji} **{section_name}**\n\n"
+            formatted = re.sub(pattern, replacement, formatted, flags=re.IGNORECASE | re.MULTILINE)
+        
+        return formatted
+    
+    def _apply_typography_rules(self, text: str) -> str:
+        """Apply consistent typography and spacing"""
+        # Ensure proper spacing around sections
+        text = re.sub(r'\n{3,}', '\n\n', text)  # Max 2 newlines
+        
+        # Ensure single space after section headers
+        text = re.sub(r'(\*\*)\s*\n\s*', r'\1\n\n', text)
+        
+        # Fix paragraph spacing
+        text = re.sub(r'\n([A-Z])', r'\n\n\1', text)
+        
+        return text.strip()
+    
+    def _normalize_lists(self, text: str) -> str:
+        """Normalize all lists to consistent format"""
+        # Convert various bullet styles to standard -
+        text = re.sub(r'^[\s]*[•●○▸▪▫‣⁃]\s+', '- ', text, flags=re.MULTILINE)
+        text = re.sub(r'^[\s]*[\*]\s+', '- ', text, flags=re.MULTILINE)
+        
+        # Normalize numbered lists
+        text = re.sub(r'^[\s]*(\d+)[\.\)]\s+', r'\1. ', text, flags=re.MULTILINE)
+        
+        # Ensure proper indentation (single space before -)
+        text = re.sub(r'^[\s]*-\s+', '- ', text, flags=re.MULTILINE)
+        
+        return text
+    
+    def _format_tables(self, text: str) -> str:
+        """Convert markdown tables to professional HTML with ONESource styling"""
+        # Detect markdown tables
+        table_pattern = r'^\|(.+)\|\s*\n\|[-:\s|]+\|\s*\n((?:\|.+\|\s*\n?)+)'
+        
+        def table_replacer(match):
+            header_row = match.group(1)
+            body_rows = match.group(2)
+            
+            # Parse header
+            headers = [h.strip() for h in header_row.split('|') if h.strip()]
+            
+            # Parse body rows
+            rows = []
+            for row_line in body_rows.strip().split('\n'):
+                if row_line.strip():
+                    cells = [cell.strip() for cell in row_line.split('|') if cell.strip()]
+                    if cells:
+                        rows.append(cells)
+            
+            # Generate professional HTML table
+            html = '<div class="os-table-container">\n'
+            html += '<table class="os-table">\n'
+            
+            # Header
+            html += '<thead>\n<tr>\n'
+            for header in headers:
+                html += f'<th class="os-th">{header}</th>\n'
+            html += '</tr>\n</thead>\n'
+            
+            # Body
+            html += '<tbody>\n'
+            for i, row in enumerate(rows):
+                css_class = "os-tr-even" if i % 2 == 0 else "os-tr-odd"
+                html += f'<tr class="{css_class}">\n'
+                for cell in row:
+                    html += f'<td class="os-td">{cell}</td>\n'
+                html += '</tr>\n'
+            html += '</tbody>\n'
+            
+            html += '</table>\n</div>\n'
+            return html
+        
+        return re.sub(table_pattern, table_replacer, text, flags=re.MULTILINE)
+    
+    def _extract_emoji_map(self, text: str) -> List[EmojiItem]:
+        """Extract emoji map from formatted text"""
+        emoji_items = []
+        
+        for section_name, emoji_char in CANONICAL_EMOJI_MAP.items():
+            if f"{emoji_char} **{section_name}**" in text:
+                emoji_items.append(EmojiItem(
+                    name=section_name.lower().replace(" ", "_"),
+                    char=emoji_char
+                ))
+        
+        # Ensure mentoring_insight is always present if any sections found
+        if emoji_items and not any(item.name == "mentoring_insight" for item in emoji_items):
+            emoji_items.append(EmojiItem(
+                name="mentoring_insight",
+                char="🧐"
+            ))
+        
+        return emoji_items
+    
+    def _final_cleanup(self, text: str) -> str:
+        """Final cleanup and validation"""
+        # Remove excessive whitespace
+        text = re.sub(r'\n{4,}', '\n\n\n', text)
+        
+        # Ensure proper ending
+        text = text.strip()
+        
+        # Validate critical sections present
+        if "🔧 **Technical Answer**" not in text:
+            text = "## 🔧 **Technical Answer**\n\n" + text
+        
+        if "🧐 **Mentoring Insight**" not in text:
+            text += "\n\n## 🧐 **Mentoring Insight**\n\nConsider professional consultation for project-specific guidance and compliance verification."
+        
+        if "📋 **Next Steps**" not in text:
+            text += "\n\n## 📋 **Next Steps**\n\n1. Review relevant NCC provisions\n2. Engage appropriate specialists as needed\n3. Confirm compliance with local authority requirements"
+        
+        return text
+    
+    def extract_mentoring_insight(self, text: str) -> Optional[str]:
+        """Extract mentoring insight section for separate field"""
+        pattern = r"## 🧐 \*\*Mentoring Insight\*\*\n\n(.*?)(?=\n\n##|\Z)"
+        match = re.search(pattern, text, re.DOTALL)
+        if match:
+            return match.group(1).strip()
+        return None
+
+
+
+# Representative model output; the golden file pins the multi-pass output for each
+GOLDEN_CASES = {
+    "starter_plain_headers": (
+        "Technical Answer:\nParty walls in class 2 buildings need an FRL of 90/90/90 under NCC Spec C1.1 "
+        "and must extend to the underside of the roof covering.\n"
+        "💡 **Mentoring Insight**\nConfirm the tested system matches the wall framing.\n"
+        "Next Steps:\n1. Check the fire engineer's report\n2. Book the inspection"
+    ),
+    "canonical_markdown": (
+        "## 🔧 **Technical Answer**\n\nUse AS 3740 for wet area waterproofing.\n\n"
+        "## 🧐 **Mentoring Insight**\n\nPhotograph each membrane stage before tiling.\n\n"
+        "## 📋 **Next Steps**\n\n1. Confirm the membrane class\n2. Arrange the flood test"
+    ),
+    "wrong_mentoring_emojis": (
+        "🔧 Technical Answer\nBalustrades need 1 m minimum height where the fall exceeds 1 m (NCC D2.16).\n\n"
+        "🧠 **Mentoring Insight**\nClients often ask for glass; check the 🤓 Mentoring Insight notes on fixings.\n\n"
+        "🤓 Mentoring Insight\nKeep the certifier in the loop.\n📋 Next Steps\n- Measure the fall height"
+    ),
+    "pro_plus_all_sections": (
+        "### 🔧 Technical Answer:\nClass 5 office fit-out on level 3.\n"
+        "**Code Requirements**\nNCC C2.2 and Spec C1.1 apply.\n"
+        "📊 Code Requirements: see above\n"
+        "✅ **Compliance Verification**: test reports to AS 1530.4\n"
+        "🔄 Alternative Solutions\nA performance solution may be cheaper.\n"
+        "## 🏛️ Authority Requirements\nCouncil CDC pathway applies.\n"
+        "📄 Documentation Needed:\n* Fire engineering report\n* Hydraulic drawings\n"
+        "⚙️ Workflow Recommendations\nSequence services before linings.\n"
+        "❓ Clarifying Questions\nWhat is the rise in storeys?\n"
+        "🧐 Mentoring Insight\nEngage the fire engineer early.\n"
+        "📋 Next Steps\n1) Confirm classification\n2) Brief the certifier"
+    ),
+    "mixed_list_styles": (
+        "Technical Answer\nTermite management options:\n\n"
+        "• Physical barriers\n●  Chemical soil treatment\n  ▸ Reticulation systems\n"
+        "*   Inspection zones\n-    Graded stone\n\n"
+        "1. Choose a system\n2) Install to AS 3660.1\n   10. Label the meter box"
+    ),
+    "markdown_table": (
+        "Technical Answer:\nMinimum FRLs:\n\n"
+        "| Element | Class 2 | Class 5 |\n|:--|:-:|--:|\n"
+        "| Party wall | 90/90/90 | 120/120/120 |\n| Floor | 90/90/90 | 120/120/120 |\n\n"
+        "Mentoring Insight:\nCheck the tested system."
+    ),
+    "ragged_table": (
+        "| Clause | Topic |\n\n| --- | --- |\n| C3.15 | Penetrations |\n\n"
+        "| D2.16 | Balustrades\n  | F2.5 | Wet areas |\nNotes follow the table."
+    ),
+    "inline_sections": (
+        "Technical Answer: Party walls need 90/90/90. Next Steps: 1. Check the report\n"
+        "Mentoring Insight: Next Steps are below\nnext steps: confirm with the certifier"
+    ),
+    "case_variants": (
+        "technical answer\nlower-case header.\n\nNEXT STEPS:\nUPPER-CASE header.\n"
+        "**mentoring insight**\nbold header."
+    ),
+    "no_sections": "The NCC does not set a minimum ceiling height for garages.",
+    "empty": "",
+    "whitespace_noise": (
+        "\r\n  \n\tTechnical Answer:  \r\nParty wall   \r\n\r\n\r\n\r\n  - item one \r\n"
+        "\t* item two\r\n\n\n\n\nMentoring Insight\r\n  Indented text\r\n   "
+    ),
+    "bold_lines_and_capitals": (
+        "**Technical Answer**\n**Note:**\nThe FRL applies to loadbearing walls.\nthis line starts lower case.\n"
+        "**Important** \n\n  Indented Paragraph\nNext Steps\nDone."
+    ),
+    "emoji_above_title": "🔧\nTechnical Answer\nBody text.\n##\n\nNext Steps\n- Do it\n🧐 \n  Mentoring Insight\nThink.",
+    "bare_list_markers": "Technical Answer\n-\nCheck the slab.\n1.\nSecond step\n•\n- Nested dash",
+}
+
+
+def generated_responses(count: int, seed: int) -> List[str]:
+    """Model-like responses: decorated section headers, paragraphs, mixed lists and tables"""
+    rng = random.Random(seed)
+    names = list(CANONICAL_EMOJI_MAP)
+    words = "the fire rating wall NCC Spec C1.1 FRL 90/90/90 party class building Sydney AS 1530.4 Check Install".split()
+    
+    def sentence() -> str:
+        text = " ".join(rng.choice(words) for _ in range(rng.randint(3, 18)))
+        return rng.choice([text, text.capitalize(), f"**{text}**", text + " **bold**"])
+    
+    responses = []
+    for _ in range(count):
+        lines = []
+        for name in rng.sample(names, rng.randint(3, len(names))):
+            emoji = rng.choice([CANONICAL_EMOJI_MAP[name], "", "💡", "🧠"])
+            lines.append(rng.choice([f"## {emoji} **{name}**", f"{emoji} {name}:", f"**{name}**", f"### {name}", f"{name}: {sentence()}"]))
+            for _ in range(rng.randint(1, 6)):
+                kind = rng.random()
+                if kind < 0.5:
+                    lines.append(sentence())
+                elif kind < 0.85:
+                    lines.append(rng.choice(["- ", "* ", "• ", "1. ", "2) ", "  - "]) + sentence())
+                else:
+                    lines += ["| Element | FRL |", "|---|---|"] + [f"| {sentence()} | 90/90/90 |" for _ in range(rng.randint(1, 4))]
+                if rng.random() < 0.3:
+                    lines.append(rng.choice(["", "  "]))
+        responses.append("\n".join(lines))
+    return responses
+
+
+def formatted(formatter, raw: str) -> Tuple[str, List[Tuple[str, str]]]:
+    text, emoji_map = formatter.format_response(raw)
+    return text, [(item.name, item.char) for item in emoji_map]
+
+
+def throughput(formatter, corpus: List[str], iterations: int) -> float:
+    start = time.perf_counter()
+    for i in range(iterations):
+        formatter.format_response(corpus[i % len(corpus)])
+    return iterations / (time.perf_counter() - start)
+
+
+def write_golden(reference: MultiPassFormatter) -> None:
+    cases = []
+    for name, raw in GOLDEN_CASES.items():
+        text, emoji_map = formatted(reference, raw)
+        cases.append({
+            "name": name,
+            "raw": raw,
+            "headers": reference._normalize_section_headers(raw),
+            "text": text,
+            "emoji_map": emoji_map,
+            "mentoring_insight": reference.extract_mentoring_insight(text),
+        })
+    os.makedirs(os.path.dirname(GOLDEN_PATH), exist_ok=True)
+    with open(GOLDEN_PATH, "w", encoding="utf-8") as f:
+        json.dump(cases, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+    print(f"✅ Wrote {len(cases)} golden cases to {GOLDEN_PATH}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="UnifiedFormatter throughput and parity")
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--responses", type=int, default=500, help="generated responses for the parity check")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--write-golden", action="store_true")
+    args = parser.parse_args()
+    
+    reference, formatter = MultiPassFormatter(), UnifiedFormatter()
+    if args.write_golden:
+        write_golden(reference)
+        return
+    
+    corpus = list(GOLDEN_CASES.values()) + generated_responses(args.responses, args.seed)
+    mismatches = [raw for raw in corpus if formatted(reference, raw) != formatted(formatter, raw)]
+    print(f"🔎 Parity: {len(corpus) - len(mismatches)}/{len(corpus)} responses identical")
+    for raw in mismatches[:3]:
+        print(f"   ❌ {raw[:120]!r}")
+    
+    sample = [raw for raw in corpus if raw]
+    avg_chars = sum(map(len, sample)) // len(sample)
+    old_rate = throughput(reference, sample, args.iterations)
+    new_rate = throughput(formatter, sample, args.iterations)
+    print(f"📊 multi-pass:  {old_rate:,.0f} responses/s (avg {avg_chars} chars)")
+    print(f"📊 single-scan: {new_rate:,.0f} responses/s ({new_rate / old_rate:.2f}x)")
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Schema guard microbenchmark - per-response validation cost, jsonschema.validate per call vs the
+compiled validator with the structural fast path
+
+Usage:
+    python scripts/benchmark_schema_guard.py --iterations 2000
+"""
+
+import os
+import sys
+import time
+import logging
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from jsonschema import validate, ValidationError
+from core.schemas import CHAT_V2
+from core.formatter import unified_formatter
+from middleware.schema_guard import SchemaGuard
+
+RAW_RESPONSE = """## Technical Answer
+Fire-isolated stairs in a Class 2 building need walls with an FRL of 120/120/120.
+
+| Element | FRL |
+|---|---|
+| Stair shaft walls | 120/120/120 |
+| Doors | -/60/30 |
+
+## Mentoring Insight
+Confirm the fire engineering brief before documenting the stair details.
+
+## Next Steps
+1. Check NCC Spec 5 for the building class
+2. Confirm door hardware with the certifier"""
+
+
+def legacy_ensure_v2_schema(guard: SchemaGuard, resp_json: dict) -> tuple:
+    """Verbatim shape of the pre-compiled guard: validate, catch, repair, validate again"""
+    try:
+        validate(resp_json, CHAT_V2)
+        return resp_json, False
+    except ValidationError as e:
+        repaired = guard._repair_response(resp_json, e)
+        validate(repaired, CHAT_V2)
+        return repaired, True
+
+
+def payloads() -> dict:
+    formatted = unified_formatter.format_v2(RAW_RESPONSE)
+    meta = {"tier": "starter", "session_id": "bench", "tokens_used": 900}
+    return {
+        "native v2": {
+            "title": formatted.title,
+            "summary": formatted.summary,
+            "blocks": [block.model_dump(exclude_none=True) for block in formatted.blocks],
+            "meta": {"emoji": "🧐", "schema": "v2", "mapped": True, **meta},
+        },
+        "legacy (repair)": {
+            "text": formatted.text,
+            "emoji_map": [{"name": item.name, "char": item.char} for item in formatted.emoji_map],
+            "mentoring_insight": formatted.mentoring_insight,
+            "meta": meta,
+        },
+    }
+
+
+def per_call(fn, payload: dict, iterations: int) -> float:
+    fn(payload)  # warm-up
+    t0 = time.perf_counter()
+    for _ in range(iterations):
+        fn(payload)
+    return (time.perf_counter() - t0) / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark schema guard validation")
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    logging.getLogger("middleware.schema_guard").setLevel(logging.ERROR)  # one warning per repaired call
+    guard = SchemaGuard()
+    print(f"🧪 Schema guard microbenchmark (per-response mean, {args.iterations} iterations)")
+    for name, payload in payloads().items():
+        before_result = legacy_ensure_v2_schema(guard, payload)
+        after_result = guard.ensure_v2_schema(payload)
+        before = per_call(lambda p: legacy_ensure_v2_schema(guard, p), payload, args.iterations)
+        after = per_call(guard.ensure_v2_schema, payload, args.iterations)
+        print(
+            f"   {name:<16} before {before * 1e6:8.1f}µs | after {after * 1e6:7.1f}µs | "
+            f"speedup {before / after:6.1f}x | same result: {before_result == after_result}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Scoring engine microbenchmark - batch matrix scoring vs the legacy per-document loop
+The legacy loop rebuilds numpy arrays and calls sklearn cosine_similarity once per document
+
+Usage:
+    python scripts/benchmark_scoring.py --sizes 100,1000,10000
+"""
+
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.knowledge.scoring import EmbeddingMatrix, normalize_query
+
+
+def legacy_loop(documents: list, query_embedding: list, limit: int) -> list:
+    """Verbatim shape of the pre-engine search_community_knowledge_bank loop"""
+    from sklearn.metrics.pairwise import cosine_similarity
+
+    scored_docs = []
+    for doc in documents:
+        if 'embedding' in doc and doc['embedding']:
+            doc_embedding = np.array(doc['embedding']).reshape(1, -1)
+            query_emb = np.array(query_embedding).reshape(1, -1)
+            similarity = cosine_similarity(query_emb, doc_embedding)[0][0]
+            if similarity > 0.3:
+                final_score = similarity * 1.2 if doc.get('partner_info') else similarity
+                scored_docs.append({'document_id': doc['document_id'], 'similarity_score': final_score})
+    scored_docs.sort(key=lambda x: x['similarity_score'], reverse=True)
+    return scored_docs[:limit]
+
+
+def run(size: int, dim: int, queries: int, limit: int) -> None:
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((size, dim)).astype(np.float32) + 0.5
+    partner = rng.random(size) < 0.2
+    documents = [
+        {"document_id": f"doc-{i}", "embedding": vectors[i].tolist(), "partner_info": {"company_name": "x"} if partner[i] else None}
+        for i in range(size)
+    ]
+    query_set = (rng.standard_normal((queries, dim)).astype(np.float32) + 0.5).tolist()
+
+    matrix = EmbeddingMatrix(dim)
+    matrix.append([d["document_id"] for d in documents], vectors.copy(), [None] * size, np.where(partner, 1.2, 1.0).tolist())
+
+    # Warm-up (sklearn import, BLAS init) outside the timed loops
+    legacy_loop(documents[:10], query_set[0], limit)
+    matrix.score(normalize_query(query_set[0], dim), limit)
+
+    t0 = time.perf_counter()
+    for query in query_set:
+        expected = legacy_loop(documents, query, limit)
+    legacy = (time.perf_counter() - t0) / queries
+
+    t0 = time.perf_counter()
+    for query in query_set:
+        hits = matrix.score(normalize_query(query, dim), limit, min_similarity=0.3)
+    engine = (time.perf_counter() - t0) / queries
+
+    same = [d["document_id"] for d in expected] == [hit.doc_id for hit in hits]
+    print(f"   n={size:>6,}: legacy {legacy * 1000:9.2f}ms | engine {engine * 1000:7.3f}ms | speedup {legacy / engine:7.1f}x | same top-{limit}: {same}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batch cosine scoring")
+    parser.add_argument("--sizes", default="100,1000,10000")
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"🧪 Scoring microbenchmark (dim={args.dim}, per-query mean)")
+    for size in [int(s) for s in args.sizes.split(",")]:
+        run(size, args.dim, args.queries, args.limit)
+
+
+if __name__ == "__main__":
+    main()
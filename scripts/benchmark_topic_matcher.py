@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Topic detection microbenchmark - one re.findall per pattern (legacy) vs the single-pass keyword matcher
+Runs detect_topic and detect_standards on the same response, as finalize_chat_response does
+
+Usage:
+    python scripts/benchmark_topic_matcher.py --lengths 2000,10000,50000
+"""
+
+import os
+import re
+import sys
+import time
+import random
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.suggestions import SuggestionsEngine
+
+SENTENCES = [
+    "Fire-rated walls must achieve an FRL of 90/90/90 under NCC Spec C1.1 for a Class 2 building.",
+    "Install the sprinkler system to AS 2118.1 and confirm smoke detection with the fire engineer.",
+    "Acoustic lagging reduces sound transmission from the plumbing stacks; check impact sound too.",
+    "Wind load and seismic actions follow AS 1170.2 and AS 1170.4 for the steel frame and concrete columns.",
+    "Waterproof every wet area to AS 3740 and fit backflow prevention at the water meter.",
+    "Switchboards, RCD protection and earthing are covered by AS/NZS 3000 wiring rules.",
+    "The building surveyor issues the approval once compliance with Volume 1 is demonstrated.",
+    "Coordinate trades early so the programme absorbs inspections without rework.",
+]
+
+
+def legacy_detect(engine: SuggestionsEngine, text: str) -> tuple:
+    """Verbatim shape of the per-pattern loops in detect_topic and detect_standards"""
+    text_lower = text.lower()
+    topic_scores = {}
+    for topic, patterns in engine.topic_patterns.items():
+        score = 0
+        for pattern in patterns:
+            score += len(re.findall(pattern, text_lower, re.IGNORECASE))
+        if score > 0:
+            topic_scores[topic] = score
+    topic = max(topic_scores.items(), key=lambda x: x[1])[0] if topic_scores else None
+
+    standards = []
+    for pattern in engine.standard_patterns:
+        standards.extend(re.findall(pattern, text, re.IGNORECASE))
+    return topic, set(standards)
+
+
+def response(length: int, seed: int) -> str:
+    rng = random.Random(seed)
+    parts, size = [], 0
+    while size < length:
+        sentence = rng.choice(SENTENCES)
+        parts.append(sentence)
+        size += len(sentence) + 1
+    return " ".join(parts)
+
+
+def run(length: int, responses: int) -> None:
+    texts = [response(length, seed) for seed in range(responses)]
+
+    engine = SuggestionsEngine()
+    t0 = time.perf_counter()
+    expected = [legacy_detect(engine, text) for text in texts]
+    legacy = (time.perf_counter() - t0) / responses
+
+    t0 = time.perf_counter()
+    results = [(engine.detect_topic(text), set(engine.detect_standards(text))) for text in texts]
+    matcher = (time.perf_counter() - t0) / responses
+
+    print(
+        f"   {length:>6,} chars: legacy {legacy * 1000:7.2f}ms | matcher {matcher * 1000:6.2f}ms | "
+        f"speedup {legacy / matcher:5.1f}x | same topic/standards: {results == expected}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark topic and standards detection")
+    parser.add_argument("--lengths", default="2000,10000,50000")
+    parser.add_argument("--responses", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"🧪 Topic matcher microbenchmark (per-response mean over {args.responses} responses)")
+    for length in [int(n) for n in args.lengths.split(",")]:
+        run(length, args.responses)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Vector index benchmark - p50/p95 query latency and recall at growing corpus sizes
+Compares the exact matrix scan with the trained IVF index
+
+Usage:
+    python scripts/benchmark_vector_index.py --sizes 10000,100000,1000000
+    python scripts/benchmark_vector_index.py --sizes 10000,100000 --dim 384   # low-memory run
+
+At 1536 dims a 1M vector corpus needs ~6GB of RAM for the matrix alone.
+"""
+
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.knowledge.vector_index import VectorIndex
+
+
+def clustered_corpus(n: int, dim: int, clusters: int, seed: int = 0) -> np.ndarray:
+    """Embeddings cluster by topic in practice; uniform noise would flatter neither index"""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    corpus = np.empty((n, dim), dtype=np.float32)
+    for start in range(0, n, 100_000):
+        end = min(n, start + 100_000)
+        corpus[start:end] = centers[rng.integers(0, clusters, end - start)]
+        corpus[start:end] += 0.5 * rng.standard_normal((end - start, dim)).astype(np.float32)
+    return corpus
+
+
+def percentile_ms(samples: list, p: float) -> float:
+    return float(np.percentile(samples, p) * 1000)
+
+
+def run(size: int, dim: int, queries: int, k: int, nprobe: int) -> None:
+    corpus = clustered_corpus(size, dim, clusters=max(16, size // 1000))
+    ids = [f"doc-{i}" for i in range(size)]
+    rng = np.random.default_rng(1)
+    query_set = corpus[rng.integers(0, size, queries)] + 0.1 * rng.standard_normal((queries, dim)).astype(np.float32)
+
+    exact = VectorIndex("exact", dim=dim, train_threshold=size + 1)
+    ivf = VectorIndex("ivf", dim=dim, nprobe=nprobe, train_threshold=min(4096, size))
+
+    t0 = time.perf_counter()
+    exact.add_many(ids, corpus)
+    exact_build = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    ivf.add_many(ids, corpus)
+    ivf_build = time.perf_counter() - t0
+    del corpus
+
+    exact_times, ivf_times, recalls = [], [], []
+    for query in query_set:
+        t0 = time.perf_counter()
+        expected = exact.search(query, k=k)
+        exact_times.append(time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        found = ivf.search(query, k=k)
+        ivf_times.append(time.perf_counter() - t0)
+
+        expected_ids = {hit.doc_id for hit in expected}
+        recalls.append(len(expected_ids & {hit.doc_id for hit in found}) / k)
+
+    print(f"\n📊 n={size:,} dim={dim} k={k} nprobe={nprobe}")
+    print(f"   build: exact {exact_build:.2f}s | ivf {ivf_build:.2f}s")
+    print(f"   exact: p50 {percentile_ms(exact_times, 50):.2f}ms | p95 {percentile_ms(exact_times, 95):.2f}ms")
+    print(f"   ivf:   p50 {percentile_ms(ivf_times, 50):.2f}ms | p95 {percentile_ms(ivf_times, 95):.2f}ms | recall@{k} {np.mean(recalls):.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the knowledge bank vector index")
+    parser.add_argument("--sizes", default="10000,100000,1000000", help="Comma-separated corpus sizes")
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nprobe", type=int, default=16)
+    args = parser.parse_args()
+
+    print("🧪 Vector index benchmark")
+    for size in [int(s) for s in args.sizes.split(",")]:
+        run(size, args.dim, args.queries, args.k, args.nprobe)
+
+
+if __name__ == "__main__":
+    main()
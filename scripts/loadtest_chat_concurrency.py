@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Chat concurrency load test - sessions in flight per worker, sync client vs async LLM gateway
+Runs N concurrent chat sessions on one event loop against a local OpenAI-compatible stub
+with fixed completion latency; the stub (on its own thread and loop, so a blocking client
+cannot stall it) reports how many requests it saw at once
+
+Usage:
+    python scripts/loadtest_chat_concurrency.py --sessions 20 --latency-ms 500
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+import threading
+import openai
+from aiohttp import web
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.llm_gateway import LLMGateway
+from core.chat_service import ChatService
+from core.tokens import TokenUsage
+
+API_KEY = "sk-loadtest-0000000000000000"
+
+
+class StubLLMServer:
+    """OpenAI-compatible /v1/chat/completions that sleeps for latency_ms and counts in-flight requests"""
+
+    def __init__(self, latency_ms: float):
+        self.latency_ms = latency_ms
+        self.active = 0
+        self.peak = 0
+        self.loop = None
+        self.runner = None
+        self.base_url = None
+
+    async def completions(self, request: web.Request) -> web.Response:
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.latency_ms / 1000)
+            return web.json_response({
+                "id": "chatcmpl-loadtest", "object": "chat.completion", "created": int(time.time()),
+                "model": "gpt-4o-mini",
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": "## 🔧 **Technical Answer**\n\nStub answer."}}],
+                "usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15},
+            })
+        finally:
+            self.active -= 1
+
+    def start(self) -> None:
+        """Serve from a background thread with its own event loop"""
+        ready = threading.Event()
+        self.loop = asyncio.new_event_loop()
+
+        async def serve():
+            app = web.Application()
+            app.router.add_post("/v1/chat/completions", self.completions)
+            self.runner = web.AppRunner(app)
+            await self.runner.setup()
+            site = web.TCPSite(self.runner, "127.0.0.1", 0)
+            await site.start()
+            port = site._server.sockets[0].getsockname()[1]
+            self.base_url = f"http://127.0.0.1:{port}/v1"
+            ready.set()
+
+        threading.Thread(target=self.loop.run_forever, daemon=True).start()
+        asyncio.run_coroutine_threadsafe(serve(), self.loop)
+        ready.wait()
+
+    def stop(self) -> None:
+        asyncio.run_coroutine_threadsafe(self.runner.cleanup(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+
+class LegacySyncChatService(ChatService):
+    """Pre-gateway behaviour: blocking openai.OpenAI call inside the async method"""
+
+    def __init__(self, base_url: str):
+        super().__init__()
+        self.sync_client = openai.OpenAI(api_key=API_KEY, base_url=base_url)
+
+    async def _call_openai_api_with_history(self, question, system_prompt, message_history):
+        messages = [{"role": "system", "content": system_prompt}] + message_history
+        response = self.sync_client.chat.completions.create(model="gpt-4o-mini", messages=messages, max_tokens=2000)
+        return response.choices[0].message.content, TokenUsage.from_api(response.usage)
+
+
+async def run_sessions(service: ChatService, sessions: int) -> float:
+    start = time.perf_counter()
+    await asyncio.gather(*[
+        service._call_openai_api_with_history(
+            f"Session {i}: what fire rating does a class 2 party wall need?",
+            "You are a construction compliance assistant.",
+            [{"role": "user", "content": f"Session {i}: what fire rating does a class 2 party wall need?"}],
+        )
+        for i in range(sessions)
+    ])
+    return time.perf_counter() - start
+
+
+async def measure(name: str, server: StubLLMServer, service: ChatService, sessions: int) -> None:
+    server.peak = 0
+    elapsed = await run_sessions(service, sessions)
+    print(f"📊 {name}: {sessions} sessions in {elapsed:.2f}s | {sessions / elapsed:.1f} sessions/s "
+          f"| peak concurrent LLM calls {server.peak}")
+
+
+async def main_async(args) -> None:
+    server = StubLLMServer(args.latency_ms)
+    server.start()
+
+    print("🧪 Chat concurrency load test (single worker, one event loop)")
+    print(f"   {args.sessions} concurrent sessions | stub completion latency {args.latency_ms}ms")
+
+    legacy = LegacySyncChatService(server.base_url)
+    await measure("sync client (legacy)", server, legacy, args.sessions)
+
+    gateway = LLMGateway(api_key=API_KEY, base_url=server.base_url, max_connections=args.max_connections)
+    service = ChatService()
+    service.llm = gateway
+    await measure(f"async gateway (pool {args.max_connections})", server, service, args.sessions)
+
+    await gateway.aclose()
+    server.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test concurrent chat sessions per worker")
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=500.0, help="Simulated completion latency")
+    parser.add_argument("--max-connections", type=int, default=100)
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Embedding storage migration - rewrite list-of-doubles embeddings as packed BSON binary
+Streams each collection (ids + embeddings only) and updates in unordered bulk batches.
+Only legacy array embeddings are selected, so the script is idempotent and resumable;
+readers decode both formats while it runs.
+
+Usage:
+    python scripts/migrate_embeddings.py --dry-run
+    python scripts/migrate_embeddings.py --format float32
+    python scripts/migrate_embeddings.py --format int8 --collections community_knowledge_bank
+"""
+
+import os
+import sys
+import time
+import argparse
+from pymongo import MongoClient, UpdateOne
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.knowledge.embedding_codec import encode_embedding
+from core.knowledge.vector_index import KNOWLEDGE_BANKS, bank_collection
+
+
+def migrate_collection(collection, storage_format: str, batch_size: int, dry_run: bool) -> dict:
+    legacy_filter = {"embedding": {"$type": "array"}}
+    stats = {"migrated": 0, "bytes_before": 0, "bytes_after": 0}
+
+    if dry_run:
+        stats["migrated"] = collection.count_documents(legacy_filter)
+        return stats
+
+    cursor = collection.find(legacy_filter, {"_id": 1, "embedding": 1}).batch_size(batch_size)
+    operations = []
+    for doc in cursor:
+        encoded = encode_embedding(doc["embedding"], storage_format)
+        # A BSON double array costs ~9 bytes per element plus its index key
+        stats["bytes_before"] += sum(9 + len(str(i)) + 1 for i in range(len(doc["embedding"])))
+        stats["bytes_after"] += len(encoded)
+        # Guard on the array type so a concurrent re-upload is never overwritten with stale data
+        operations.append(UpdateOne({"_id": doc["_id"], **legacy_filter}, {"$set": {"embedding": encoded}}))
+
+        if len(operations) >= batch_size:
+            stats["migrated"] += collection.bulk_write(operations, ordered=False).modified_count
+            operations = []
+    if operations:
+        stats["migrated"] += collection.bulk_write(operations, ordered=False).modified_count
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrate stored embeddings to packed binary")
+    parser.add_argument("--format", choices=["float32", "int8"], default="float32")
+    parser.add_argument("--collections", default=",".join(sorted({bank_collection(bank) for bank in KNOWLEDGE_BANKS})), help="Comma-separated collection names")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--dry-run", action="store_true", help="Count legacy documents without writing")
+    args = parser.parse_args()
+
+    client = MongoClient(os.environ["MONGO_URL"])
+    db = client[os.environ["DB_NAME"]]
+
+    print(f"🧪 Embedding migration -> {args.format}{' (dry run)' if args.dry_run else ''}")
+    for name in args.collections.split(","):
+        start = time.perf_counter()
+        stats = migrate_collection(db[name], args.format, args.batch_size, args.dry_run)
+        elapsed = time.perf_counter() - start
+        if args.dry_run:
+            print(f"📊 {name}: {stats['migrated']} legacy embeddings")
+        else:
+            saved_mb = (stats["bytes_before"] - stats["bytes_after"]) / 1e6
+            print(f"✅ {name}: {stats['migrated']} migrated in {elapsed:.1f}s (~{saved_mb:.1f}MB saved)")
+
+    client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,395 @@
+"""
+Async conversation store tests
+Tests list-based append/trim storage on the Upstash REST backend (local stand-in server),
+the Mongo session-document store, dual-write fallback and redis.asyncio timeouts
+"""
+
+import time
+import json
+from datetime import datetime, timedelta
+import asyncio
+import pytest
+import redis
+from aiohttp import web
+from core.stores.conversation_store import (
+    AsyncConversationStore,
+    AsyncRedisConversationStore,
+    CompositeConversationStore,
+    MongoConversationStore,
+    UpstashConversationStore,
+    create_async_conversation_store,
+)
+
+TOKEN = "upstash-test-token"
+
+
+class UpstashStandIn:
+    """Local stand-in for the Upstash REST API: JSON command arrays at /, /pipeline and /multi-exec"""
+
+    def __init__(self, token=TOKEN):
+        self.token = token
+        self.data = {}
+        self.expiry = {}
+        self.requests = []
+
+    def apply(self, command):
+        name, args = command[0].upper(), command[1:]
+        key = args[0] if args else None
+        if key in self.expiry and self.expiry[key] <= time.time():
+            self.data.pop(key, None)
+        if name == "PING":
+            return "PONG"
+        if name == "GET":
+            return self.data.get(key)
+        if name == "GETDEL":
+            self.expiry.pop(key, None)
+            return self.data.pop(key, None)
+        if name == "SET":
+            self.data[key] = args[1]
+            return "OK"
+        if name == "DEL":
+            return sum(self.data.pop(k, None) is not None for k in args)
+        if name in ("RPUSH", "LPUSH"):
+            items = self.data.setdefault(key, [])
+            for value in args[1:]:
+                items.append(value) if name == "RPUSH" else items.insert(0, value)
+            return len(items)
+        if name in ("LRANGE", "LTRIM"):
+            items = self.data.get(key, [])
+            start, stop = int(args[1]), int(args[2])
+            start = max(start + len(items), 0) if start < 0 else start
+            stop = stop + len(items) if stop < 0 else stop
+            selected = items[start:stop + 1]
+            if name == "LRANGE":
+                return selected
+            self.data[key] = selected
+            return "OK"
+        if name == "EXPIRE":
+            self.expiry[key] = time.time() + int(args[1])
+            return 1
+        raise ValueError(f"ERR unknown command '{name}'")
+
+    async def handle(self, request):
+        if request.headers.get("Authorization") != f"Bearer {self.token}":
+            return web.json_response({"error": "Unauthorized"}, status=401)
+        body = await request.json()
+        self.requests.append((request.path, body))
+        if request.path == "/":
+            body = [body]
+        results = []
+        for command in body:
+            try:
+                results.append({"result": self.apply(command)})
+            except ValueError as e:
+                results.append({"error": str(e)})
+        return web.json_response(results[0] if request.path == "/" else results)
+
+    async def __aenter__(self):
+        app = web.Application()
+        for path in ("/", "/pipeline", "/multi-exec"):
+            app.router.add_post(path, self.handle)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        self.url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.runner.cleanup()
+
+
+class FakeSessionCollection:
+    """Just enough of a motor collection for session documents ($push/$each/$slice upserts)"""
+
+    def __init__(self):
+        self.docs = {}
+        self.updates = []
+
+    async def create_index(self, *args, **kwargs):
+        return None
+
+    async def find_one(self, query, projection=None):
+        doc = self.docs.get(query["_id"])
+        if doc is None:
+            return None
+        if "summary" in projection:
+            return {"summary": doc["summary"]} if "summary" in doc else {}
+        return {"messages": doc["messages"][projection["messages"]["$slice"]:]}
+
+    async def find_one_and_update(self, query, update, projection=None, upsert=False, return_document=None):
+        self.updates.append(update)
+        doc = self.docs.setdefault(query["_id"], {"messages": []})
+        push = update["$push"]["messages"]
+        doc["messages"] = (doc["messages"] + push["$each"])[push["$slice"]:]
+        doc.update(update["$set"])
+        return {"message_count": len(doc["messages"])}
+
+    async def update_one(self, query, update, upsert=False):
+        self.docs.setdefault(query["_id"], {"messages": []}).update(update["$set"])
+
+
+class ScriptedStore(AsyncConversationStore):
+    """In-memory store whose reads/writes can be slowed down or made to fail"""
+
+    def __init__(self, delay=0.0, fail=False):
+        self.data = {}
+        self.delay = delay
+        self.fail = fail
+
+    async def fetch(self, session_id, limit=None):
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise redis.ConnectionError("down")
+        return list(self.data.get(session_id, []))
+
+    async def append(self, session_id, messages, ttl_seconds=None):
+        if self.fail:
+            raise redis.ConnectionError("down")
+        self.data.setdefault(session_id, []).extend(messages)
+        return len(self.data[session_id])
+
+    async def set(self, session_id, history, ttl_seconds=None):
+        self.data[session_id] = list(history)
+
+    async def health_check(self):
+        return not self.fail
+
+
+def history(turns):
+    return [{"role": "user" if i % 2 == 0 else "assistant", "content": f"message {i}"} for i in range(turns)]
+
+
+def test_upstash_store_appends_and_trims_with_ttl():
+    """Test that appends are one RPUSH/LTRIM/EXPIRE transaction and reads return the last turns"""
+    async def run():
+        async with UpstashStandIn() as server:
+            store = UpstashConversationStore(server.url, TOKEN)
+            try:
+                assert await store.health_check()
+                assert await store.get("sess-1") == []
+                for i in range(0, 20, 2):
+                    await store.append("sess-1", history(20)[i:i + 2], ttl_seconds=60)
+                return await store.get("sess-1"), await store.get("sess-1", limit=4), server
+            finally:
+                await store.close()
+
+    stored, last_four, server = asyncio.run(run())
+    assert stored == history(20)[-16:]
+    assert last_four == history(20)[-4:]
+    assert server.expiry["conv:sess-1:messages"] > time.time() + 50
+
+    # Every append sends only the new pair, whatever the history length
+    appends = [body for path, body in server.requests if path == "/multi-exec"]
+    assert len(appends) == 10
+    assert all(len(body[0]) == 4 and body[0][0] == "RPUSH" for body in appends)
+    assert [body[1][0] for body in appends] == ["LTRIM"] * 10
+
+
+def test_concurrent_appends_do_not_lose_messages():
+    """Test that interleaved writers on one session keep every message and pair order"""
+    async def run():
+        async with UpstashStandIn() as server:
+            store = UpstashConversationStore(server.url, TOKEN)
+            store.max_history_turns = 100
+            try:
+                await asyncio.gather(*[
+                    store.append("sess-race", [{"role": "user", "content": f"q{i}"}, {"role": "assistant", "content": f"a{i}"}])
+                    for i in range(20)
+                ])
+                return await store.get("sess-race")
+            finally:
+                await store.close()
+
+    stored = asyncio.run(run())
+    assert len(stored) == 40
+    for user, assistant in zip(stored[::2], stored[1::2]):
+        assert (user["role"], assistant["role"]) == ("user", "assistant")
+        assert assistant["content"] == "a" + user["content"][1:]
+
+
+def test_legacy_blob_history_is_migrated_on_first_read():
+    """Test that a pre-list JSON history is returned, moved into the list and then extended"""
+    async def run():
+        async with UpstashStandIn() as server:
+            server.data["conv:sess-old"] = json.dumps(history(6))
+            store = UpstashConversationStore(server.url, TOKEN)
+            try:
+                first = await store.get("sess-old")
+                await store.append("sess-old", [{"role": "user", "content": "next"}])
+                return first, await store.get("sess-old"), server.data
+            finally:
+                await store.close()
+
+    first, after, data = asyncio.run(run())
+    assert first == history(6)
+    assert after == history(6) + [{"role": "user", "content": "next"}]
+    assert "conv:sess-old" not in data
+
+
+def test_upstash_store_errors_surface_on_write_and_degrade_on_read():
+    """Test that a rejected token raises on append but returns empty history on get"""
+    async def run():
+        async with UpstashStandIn() as server:
+            store = UpstashConversationStore(server.url, "wrong-token")
+            try:
+                assert not await store.health_check()
+                assert await store.get("sess-1") == []
+                with pytest.raises(redis.RedisError):
+                    await store.append("sess-1", history(2))
+            finally:
+                await store.close()
+
+    asyncio.run(run())
+
+
+def test_redis_store_fails_fast_when_unreachable():
+    """Test that the redis.asyncio store honours the configured timeouts instead of hanging"""
+    async def run():
+        store = AsyncRedisConversationStore("redis://127.0.0.1:1/0")
+        try:
+            start = time.perf_counter()
+            result = await store.get("sess-1")
+            return result, time.perf_counter() - start, await store.health_check()
+        finally:
+            await store.close()
+
+    result, elapsed, healthy = asyncio.run(run())
+    assert result == []
+    assert not healthy
+    assert elapsed < 2
+
+
+def test_store_factory_selects_backend(monkeypatch):
+    """Test that https REDIS_URL with a token selects Upstash, anything else redis.asyncio"""
+    monkeypatch.setenv("REDIS_TOKEN", TOKEN)
+    upstash = create_async_conversation_store("https://example.upstash.io")
+    local = create_async_conversation_store("redis://localhost:6379")
+    assert isinstance(upstash, UpstashConversationStore)
+    assert isinstance(local, AsyncRedisConversationStore)
+    asyncio.run(upstash.close())
+    asyncio.run(local.close())
+
+
+def test_mongo_store_pushes_with_slice_and_reads_bounded():
+    """Test that each turn is one $push/$each/$slice upsert and reads use a $slice projection"""
+    async def run():
+        collection = FakeSessionCollection()
+        store = MongoConversationStore(collection)
+        counts = [await store.append("sess-m", history(20)[i:i + 2]) for i in range(0, 20, 2)]
+        return collection, counts, await store.get("sess-m"), await store.get("sess-m", limit=2)
+
+    collection, counts, stored, last_two = asyncio.run(run())
+    assert counts[-1] == 16
+    assert stored == history(20)[-16:]
+    assert last_two == history(20)[-2:]
+    assert all(len(update["$push"]["messages"]["$each"]) == 2 for update in collection.updates)
+    assert collection.docs["sess-m"]["expires_at"] > collection.docs["sess-m"]["updated_at"]
+
+
+def test_dual_write_reaches_both_stores_and_reads_primary():
+    """Test that the composite store writes to both backends and reads from the primary"""
+    async def run():
+        primary, secondary = ScriptedStore(), ScriptedStore()
+        store = CompositeConversationStore(primary, secondary, read_timeout_ms=100)
+        primary.data["sess-d"] = [{"role": "user", "content": "primary only"}]
+        await store.append("sess-d", history(2))
+        return primary, secondary, await store.get("sess-d")
+
+    primary, secondary, stored = asyncio.run(run())
+    assert secondary.data["sess-d"] == history(2)
+    assert primary.data["sess-d"][-2:] == history(2)
+    assert stored[0]["content"] == "primary only"
+
+
+def test_read_falls_back_to_secondary_on_primary_timeout_or_error():
+    """Test that a slow or failing primary read is answered from the secondary"""
+    async def run(primary):
+        secondary = ScriptedStore()
+        secondary.data["sess-f"] = history(4)
+        store = CompositeConversationStore(primary, secondary, read_timeout_ms=50)
+        start = time.perf_counter()
+        return await store.get("sess-f"), time.perf_counter() - start
+
+    stored, elapsed = asyncio.run(run(ScriptedStore(delay=1.0)))
+    assert stored == history(4)
+    assert elapsed < 0.5
+    stored, _ = asyncio.run(run(ScriptedStore(fail=True)))
+    assert stored == history(4)
+
+
+def test_dual_write_survives_one_failed_store():
+    """Test that a write lands if either store accepts it, and raises only if both fail"""
+    async def run():
+        healthy = ScriptedStore()
+        await CompositeConversationStore(ScriptedStore(fail=True), healthy).append("sess-w", history(2))
+        with pytest.raises(redis.RedisError):
+            await CompositeConversationStore(ScriptedStore(fail=True), ScriptedStore(fail=True)).append("sess-w", history(2))
+        return healthy
+
+    assert asyncio.run(run()).data["sess-w"] == history(2)
+
+
+def test_store_flags_select_primary_and_dual_write(monkeypatch):
+    """Test that CONV_STORE_PRIMARY and CONV_DUAL_WRITE pick the backends"""
+    from core.config import config
+    db = {"conversation_sessions": FakeSessionCollection()}
+
+    monkeypatch.setattr(config, "CONV_STORE_PRIMARY", "mongo")
+    monkeypatch.setattr(config, "CONV_DUAL_WRITE", False)
+    assert isinstance(create_async_conversation_store("redis://localhost:6379", db), MongoConversationStore)
+
+    monkeypatch.setattr(config, "CONV_STORE_PRIMARY", "redis")
+    monkeypatch.setattr(config, "CONV_DUAL_WRITE", True)
+    store = create_async_conversation_store("redis://localhost:6379", db)
+    assert isinstance(store, CompositeConversationStore)
+    assert isinstance(store.primary, AsyncRedisConversationStore)
+    assert isinstance(store.secondary, MongoConversationStore)
+    asyncio.run(store.close())
+
+
+def test_summary_stored_alongside_session_and_expires_with_it():
+    """Test that the running summary round-trips and each append refreshes its TTL with the list"""
+    async def run():
+        async with UpstashStandIn() as server:
+            store = UpstashConversationStore(server.url, TOKEN)
+            try:
+                assert await store.get_summary("sess-s") == ""
+                await store.set_summary("sess-s", "- User asked: party wall FRL", ttl_seconds=30)
+                await store.append("sess-s", history(2), ttl_seconds=600)
+                return await store.get_summary("sess-s"), server
+            finally:
+                await store.close()
+
+    summary, server = asyncio.run(run())
+    assert summary == "- User asked: party wall FRL"
+    assert server.expiry["conv:sess-s:summary"] > time.time() + 500
+
+
+def test_mongo_summary_survives_history_replace():
+    """Test that the summary lives on the session document and set() keeps it"""
+    async def run():
+        store = MongoConversationStore(FakeSessionCollection())
+        await store.append("sess-ms", history(2))
+        await store.set_summary("sess-ms", "earlier: class 2 building")
+        await store.set("sess-ms", history(4))
+        return await store.get_summary("sess-ms"), await store.get("sess-ms")
+
+    summary, stored = asyncio.run(run())
+    assert summary == "earlier: class 2 building"
+    assert stored == history(4)
+
+
+def test_mongo_summary_upsert_gets_an_expiry():
+    """Test that a summary written before any messages still creates a session document the TTL index expires"""
+    async def run():
+        collection = FakeSessionCollection()
+        store = MongoConversationStore(collection)
+        await store.set_summary("sess-new", "earlier: basement carpark", ttl_seconds=60)
+        return collection.docs["sess-new"]
+
+    before = datetime.utcnow()
+    doc = asyncio.run(run())
+    assert doc["summary"] == "earlier: basement carpark"
+    assert doc["updated_at"] >= before
+    assert doc["expires_at"] == doc["updated_at"] + timedelta(seconds=60)
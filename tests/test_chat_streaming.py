@@ -0,0 +1,201 @@
+"""
+Chat streaming tests
+Tests incremental header normalization, gateway token streaming and stream-then-persist ordering
+"""
+
+import json
+import asyncio
+import pytest
+from aiohttp import web
+from core.formatter import StreamingSectionNormalizer, unified_formatter
+from core.llm_gateway import LLMGateway
+from core.chat_service import ChatService
+from core.observability import get_observability
+from core.stores import conversation_store as store_module
+from core.stores.conversation_store import AsyncConversationStore
+
+API_KEY = "sk-test-00000000000000000000"
+
+RAW_ANSWER = (
+    "Technical Answer:\nParty walls in class 2 buildings need an FRL of 90/90/90 under NCC Spec C1.1 "
+    "and must extend to the underside of the roof covering.\n"
+    "💡 **Mentoring Insight**\nConfirm the tested system matches the wall framing.\n"
+    "Next Steps:\n1. Check the fire engineer's report\n2. Book the inspection"
+)
+
+
+class MemoryStore(AsyncConversationStore):
+    """In-process conversation store that records every write"""
+
+    def __init__(self):
+        self.data = {}
+        self.writes = 0
+
+    async def fetch(self, session_id, limit=None):
+        return list(self.data.get(session_id, []))
+
+    async def append(self, session_id, messages, ttl_seconds=None):
+        self.writes += 1
+        self.data.setdefault(session_id, []).extend(messages)
+        return len(self.data[session_id])
+
+    async def set(self, session_id, history, ttl_seconds=None):
+        self.writes += 1
+        self.data[session_id] = list(history)
+
+    async def health_check(self):
+        return True
+
+
+class StreamingStubServer:
+    """OpenAI-compatible streaming endpoint that sends the answer a few characters at a time"""
+
+    def __init__(self, text, chunk_chars=7, usage=None):
+        self.text = text
+        self.chunk_chars = chunk_chars
+        self.usage = usage
+
+    async def completions(self, request):
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        for i in range(0, len(self.text), self.chunk_chars):
+            chunk = {
+                "id": "chatcmpl-test", "object": "chat.completion.chunk", "created": 0, "model": "gpt-4o-mini",
+                "choices": [{"index": 0, "delta": {"content": self.text[i:i + self.chunk_chars]}, "finish_reason": None}],
+            }
+            await response.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            await asyncio.sleep(0)
+        if self.usage:
+            chunk = {"id": "chatcmpl-test", "object": "chat.completion.chunk", "created": 0, "model": "gpt-4o-mini",
+                     "choices": [], "usage": self.usage}
+            await response.write(f"data: {json.dumps(chunk)}\n\n".encode())
+        await response.write(b"data: [DONE]\n\n")
+        return response
+
+    async def __aenter__(self):
+        app = web.Application()
+        app.router.add_post("/v1/chat/completions", self.completions)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        self.base_url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}/v1"
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.runner.cleanup()
+
+
+@pytest.fixture
+def memory_store(monkeypatch):
+    store = MemoryStore()
+    monkeypatch.setattr(store_module, "async_conversation_store", store)
+    return store
+
+
+def test_streaming_normalizer_matches_whole_text_normalization():
+    """Test that per-chunk header normalization equals normalizing the complete text, for any split"""
+    expected = unified_formatter._normalize_section_headers(RAW_ANSWER)
+    for chunk_chars in (1, 3, 7, 50, len(RAW_ANSWER)):
+        normalizer = StreamingSectionNormalizer()
+        streamed = "".join(normalizer.feed(RAW_ANSWER[i:i + chunk_chars]) for i in range(0, len(RAW_ANSWER), chunk_chars))
+        streamed += normalizer.flush()
+        assert streamed == expected
+    assert "## 🧐 **Mentoring Insight**" in expected
+
+
+def test_streaming_normalizer_releases_long_lines_before_newline():
+    """Test that a long paragraph is sent as it streams instead of waiting for its newline"""
+    normalizer = StreamingSectionNormalizer()
+    released = normalizer.feed("Technical Answer: " + "fire separation " * 10)
+    assert released.startswith("\n\n## 🔧 **Technical Answer**")
+    assert normalizer.feed("more text") == "more text"
+
+
+def test_stream_unified_response_deltas_then_final_then_persist(memory_store):
+    """Test that deltas arrive before the final event and history is persisted only on completion"""
+    async def run():
+        async with StreamingStubServer(RAW_ANSWER) as server:
+            service = ChatService()
+            service.llm = LLMGateway(api_key=API_KEY, base_url=server.base_url, max_retries=0)
+            events = []
+            try:
+                async for event in service.stream_unified_response("party wall FRL?", "sess-stream", "starter"):
+                    events.append((event, memory_store.writes))
+            finally:
+                await service.llm.aclose()
+            return events
+
+    events = asyncio.run(run())
+    deltas = [event for event, _ in events if event["type"] == "delta"]
+    final, writes_at_final = events[-1]
+
+    assert len(deltas) > 3
+    assert all(writes == 0 for event, writes in events if event["type"] == "delta")
+    assert final["type"] == "final" and writes_at_final == 1
+
+    response = final["response"]
+    assert "## 🔧 **Technical Answer**" in response.text
+    assert response.mentoring_insight
+    history = memory_store.data["sess-stream"]
+    assert history[-2] == {"role": "user", "content": "party wall FRL?"}
+    assert history[-1]["role"] == "assistant" and history[-1]["content"] == response.text
+    assert history[-1]["usage"]["estimated"] is True  # the stub reports no usage
+
+
+def test_stream_and_buffered_paths_format_identically(memory_store):
+    """Test that the final streamed response equals the buffered response for the same completion"""
+    async def run():
+        async with StreamingStubServer(RAW_ANSWER) as server:
+            service = ChatService()
+            service.llm = LLMGateway(api_key=API_KEY, base_url=server.base_url, max_retries=0)
+            try:
+                final = None
+                async for event in service.stream_unified_response("q", "sess-a", "starter"):
+                    final = event
+                return final["response"].text, service.format_enhanced_response(
+                    RAW_ANSWER, {"enhanced_emoji_mapping": True}, {}
+                )["text"]
+            finally:
+                await service.llm.aclose()
+
+    streamed_text, buffered_text = asyncio.run(run())
+    assert streamed_text == buffered_text
+
+
+def test_streamed_turn_reports_api_token_usage(memory_store):
+    """Test that usage from the final stream chunk reaches Meta, the stored turn and per-tier observability"""
+    usage = {"prompt_tokens": 1800, "completion_tokens": 95, "total_tokens": 1895,
+             "prompt_tokens_details": {"cached_tokens": 1024}}
+
+    async def run():
+        async with StreamingStubServer(RAW_ANSWER, usage=usage) as server:
+            service = ChatService()
+            service.llm = LLMGateway(api_key=API_KEY, base_url=server.base_url, max_retries=0)
+            try:
+                async for event in service.stream_unified_response("q", "sess-usage", "pro", "user-1", endpoint="chat/ask"):
+                    final = event
+                return final["response"]
+            finally:
+                await service.llm.aclose()
+
+    bucket = lambda: dict(get_observability().metrics["token_usage_by_tier"].get("pro", {}))
+    before = bucket()
+    meta = asyncio.run(run()).meta
+    after = bucket()
+
+    assert (meta.tokens_used, meta.prompt_tokens, meta.completion_tokens, meta.cached_tokens) == (1895, 1800, 95, 1024)
+    assert meta.tokens_estimated is False
+    assert memory_store.data["sess-usage"][-1]["usage"]["total_tokens"] == 1895
+    assert after["prompt_tokens"] - before.get("prompt_tokens", 0) == 1800
+    assert after["cached_tokens"] - before.get("cached_tokens", 0) == 1024
+
+
+def test_fallback_turn_tokens_are_estimated(memory_store):
+    """Test that the no-LLM fallback counts its own text instead of a fixed number"""
+    service = ChatService()
+    service.llm = None
+    response = asyncio.run(service.generate_unified_response("party wall FRL?", "sess-fallback", "starter"))
+    assert response.meta.tokens_estimated is True
+    assert response.meta.prompt_tokens == 0
+    assert response.meta.tokens_used == response.meta.completion_tokens > 0
@@ -0,0 +1,114 @@
+"""
+Document chunking tests
+Tests token-bounded overlapping chunks, chunk indexing and passage-level ranking
+"""
+
+import asyncio
+import pytest
+import numpy as np
+from core.tokens import ENCODING_NAME, count_tokens, is_exact
+from core.knowledge.scoring import ScoredHit
+from core.knowledge.vector_index import init_knowledge_index_manager
+from core.knowledge.chunking import chunk_text, index_document_chunks, merge_document_hits, search_document_hits
+
+
+DOCUMENT = " ".join(
+    f"Section {i} covers fire rating requirements for wall type {i}, including fixings and sealants."
+    for i in range(200)
+)
+
+# Token-dense text where word-by-word costs undercount: newline runs, indentation, CJK, emoji
+MIXED_DOCUMENTS = [
+    "\n".join(f"| Wall {i} | 90/90/90 | AS 1530.4 |\n|---|---|---|" for i in range(120)),
+    "\n".join(f"    def rule_{i}(self):\n        return self.frl[{i}] * 2  # 🔥" for i in range(80)),
+    "防火墙的耐火等级必须符合国家建筑规范。 " * 150,
+]
+
+
+class FakeCollection:
+    def __init__(self):
+        self.records = []
+
+    async def insert_many(self, records):
+        self.records.extend(records)
+
+
+def test_chunks_are_token_bounded_and_cover_the_text():
+    """Test that every chunk fits the budget and chunks cover the document in order"""
+    chunks = chunk_text(DOCUMENT, max_tokens=64, overlap_tokens=8)
+
+    assert len(chunks) > 10
+    assert all(count_tokens(chunk.text) <= 64 for chunk in chunks)
+    assert chunks[0].start == 0 and chunks[-1].end == len(DOCUMENT)
+    for previous, current in zip(chunks, chunks[1:]):
+        assert current.start > previous.start
+        assert current.start <= previous.end  # neighbours overlap or touch
+    assert all(DOCUMENT[chunk.start:chunk.end] == chunk.text for chunk in chunks)
+
+
+def test_chunks_prefer_sentence_boundaries():
+    """Test that chunks end at the end of a sentence when one is close to the limit"""
+    chunks = chunk_text(DOCUMENT, max_tokens=100, overlap_tokens=0)
+
+    assert all(chunk.text.endswith(".") for chunk in chunks)
+
+
+def test_unbroken_text_is_split():
+    """Test that a single huge token-dense word cannot produce an oversized chunk"""
+    blob = "x" * 5000
+    chunks = chunk_text(blob, max_tokens=100, overlap_tokens=0)
+
+    assert "".join(chunk.text for chunk in chunks) == blob
+    assert all(chunk.token_count <= 100 for chunk in chunks)
+    assert chunk_text("") == []
+
+
+@pytest.mark.skipif(not is_exact(), reason="tiktoken encoding not available")
+@pytest.mark.parametrize("document", [DOCUMENT] + MIXED_DOCUMENTS, ids=["prose", "table", "code", "cjk"])
+def test_chunk_token_counts_match_real_encoder(document):
+    """Test that chunk sizes and overlaps hold when counted by the real tokenizer, not the estimate"""
+    import tiktoken
+    encoding = tiktoken.get_encoding(ENCODING_NAME)
+    chunks = chunk_text(document, max_tokens=64, overlap_tokens=8)
+
+    for chunk in chunks:
+        assert chunk.token_count == len(encoding.encode_ordinary(chunk.text)) <= 64
+    for previous, current in zip(chunks, chunks[1:]):
+        overlap = document[current.start:previous.end].strip()
+        assert len(encoding.encode_ordinary(overlap)) <= 8
+
+
+def test_merge_keeps_best_score_per_document():
+    """Test that chunk and whole-document hits merge into one ranked list of documents"""
+    document_hits = [ScoredHit("doc-a", 0.5, 0.5), ScoredHit("doc-c", 0.4, 0.4)]
+    chunk_hits = [ScoredHit("doc-b:3", 0.9, 0.9), ScoredHit("doc-a:1", 0.7, 0.7), ScoredHit("doc-b:0", 0.6, 0.6)]
+
+    hits, best_chunks = merge_document_hits(document_hits, chunk_hits, k=2)
+
+    assert [hit.doc_id for hit in hits] == ["doc-b", "doc-a"]
+    assert hits[1].score == 0.7
+    assert best_chunks == {"doc-b": "doc-b:3", "doc-a": "doc-a:1"}
+
+
+def test_indexed_chunks_are_searchable_by_passage(tmp_path):
+    """Test that an uploaded document is found through the passage that matches the query"""
+    init_knowledge_index_manager(str(tmp_path))
+    collection = FakeCollection()
+    rng = np.random.default_rng(0)
+    vectors = {}
+
+    async def embed_batch(texts):
+        for text in texts:
+            vectors.setdefault(text, rng.standard_normal(1536).tolist())
+        return [vectors[text] for text in texts]
+
+    document = {"document_id": "doc-1", "user_id": "user-a", "partner_info": None}
+    count = asyncio.run(index_document_chunks(collection, "personal_knowledge_bank", document, DOCUMENT, embed_batch))
+
+    assert count == len(collection.records) > 1
+    assert collection.records[0]["chunk_id"] == "doc-1:0"
+    target = collection.records[-1]
+    hits, best_chunks = search_document_hits("personal_knowledge_bank", vectors[target["text"]], k=3, owner="user-a")
+    assert hits[0].doc_id == "doc-1"
+    assert best_chunks["doc-1"] == target["chunk_id"]
+    assert search_document_hits("personal_knowledge_bank", vectors[target["text"]], k=3, owner="user-b")[0] == []
@@ -0,0 +1,89 @@
+"""
+Context window tests
+Tests token-budget packing of system prompt, knowledge context and newest-first history
+"""
+
+from core.tokens import count_tokens
+from core.context_window import ContextWindowBuilder, TRUNCATION_MARKER, MESSAGE_OVERHEAD_TOKENS
+
+BIG = "A" * 8000  # same pressure message as tests/test_token_pressure.py
+BUDGETS = {"starter": 1000, "pro": 3000, "pro_plus": 6000}
+
+
+def conversation(turns, words=60):
+    """Alternating user/assistant messages of roughly `words` tokens each, oldest first"""
+    messages = []
+    for i in range(turns):
+        messages.append({"role": "user", "content": f"Question {i}: " + "fire rating " * (words // 2)})
+        messages.append({"role": "assistant", "content": f"Answer {i}: " + "party wall " * (words // 2)})
+    return messages
+
+
+def window_tokens(window):
+    return sum(count_tokens(message["content"]) + MESSAGE_OVERHEAD_TOKENS for message in window.messages)
+
+
+def test_oversized_history_message_is_truncated_not_sent_in_full():
+    """Test that an 8000-character message in history is cut to the per-message cap"""
+    builder = ContextWindowBuilder(budgets=BUDGETS, max_message_tokens=300)
+    history = [{"role": "user", "content": BIG}, {"role": "assistant", "content": "Noted."},
+               {"role": "user", "content": "Summarise the last point only."}]
+    window = builder.build("system prompt", history, "pro")
+
+    first = window.messages[1]
+    assert first["content"].endswith(TRUNCATION_MARKER)
+    assert count_tokens(first["content"]) <= 300
+    assert window.truncated == 1
+    assert window.messages[-1] == history[-1]
+
+
+def test_history_packed_newest_first_within_budget():
+    """Test that the newest contiguous messages are kept and the prompt never exceeds the budget"""
+    builder = ContextWindowBuilder(budgets=BUDGETS)
+    history = conversation(20) + [{"role": "user", "content": "What testing is required?"}]
+    window = builder.build("system prompt", history, "starter")
+
+    assert window.prompt_tokens <= window.budget == 1000
+    assert window.prompt_tokens == window_tokens(window)
+    assert window.messages[0]["role"] == "system"
+    assert window.messages[1:] == history[-(window.history_kept + 1):]
+    assert window.history_dropped == len(history) - 1 - window.history_kept > 0
+
+
+def test_larger_tiers_keep_more_history():
+    """Test that the per-tier budget decides how much history is sent"""
+    builder = ContextWindowBuilder(budgets=BUDGETS)
+    history = conversation(40) + [{"role": "user", "content": "And for class 3?"}]
+    kept = [builder.build("system prompt", history, tier).history_kept for tier in ("starter", "pro", "pro_plus")]
+    assert kept[0] < kept[1] < kept[2]
+    assert builder.build("system prompt", history, "unknown").history_kept == kept[0]
+
+
+def test_current_question_always_sent():
+    """Test that the current question is kept (truncated) even when the system prompt fills the budget"""
+    builder = ContextWindowBuilder(budgets=BUDGETS, max_message_tokens=200)
+    window = builder.build("rules " * 2000, conversation(3) + [{"role": "user", "content": BIG}], "starter")
+    assert window.history_kept == 0
+    assert window.messages[-1]["role"] == "user"
+    assert window.messages[-1]["content"].startswith("AAAA")
+
+
+def test_token_counts_cached_across_turns():
+    """Test that stored messages are tokenized once, not on every turn"""
+    builder = ContextWindowBuilder(budgets=BUDGETS)
+    history = [{"role": "user", "content": BIG}] + conversation(10) + [{"role": "user", "content": "Which FRL?"}]
+    builder.build("system prompt", history, "pro_plus")
+    misses = builder.cache.misses
+
+    next_turn = history + [{"role": "assistant", "content": "Answer."}, {"role": "user", "content": "Next?"}]
+    builder.build("system prompt", next_turn, "pro_plus")
+    assert builder.cache.misses - misses == 2
+
+
+def test_knowledge_context_capped_to_share_of_budget():
+    """Test that knowledge context is limited to CONTEXT_KNOWLEDGE_MAX_SHARE of the tier budget"""
+    builder = ContextWindowBuilder(budgets=BUDGETS, knowledge_max_share=0.25)
+    assert builder.fit_knowledge("short excerpt", "starter") == "short excerpt"
+    fitted = builder.fit_knowledge("clause text " * 2000, "starter")
+    assert count_tokens(fitted) <= 250
+    assert fitted.endswith(TRUNCATION_MARKER)
@@ -0,0 +1,123 @@
+"""
+Rolling conversation summary tests
+Tests that trimmed turns are folded into a running summary after the response and injected ahead of history
+"""
+
+import asyncio
+import pytest
+from core.config import config
+from core.tokens import count_tokens
+from core.chat_service import ChatService
+from core.conversation_summary import ConversationSummarizer, SUMMARY_HEADER
+from core.stores import conversation_store as store_module
+from core.stores.conversation_store import AsyncConversationStore
+
+
+class MemoryStore(AsyncConversationStore):
+    """In-process conversation store with summaries, trimming like the real stores"""
+
+    def __init__(self, max_history_turns):
+        self.max_history_turns = max_history_turns
+        self.data = {}
+        self.summaries = {}
+
+    async def fetch(self, session_id, limit=None):
+        return list(self.data.get(session_id, []))
+
+    async def append(self, session_id, messages, ttl_seconds=None):
+        history = (self.data.get(session_id, []) + messages)[-self.max_history_turns:]
+        self.data[session_id] = history
+        return len(history)
+
+    async def set(self, session_id, history, ttl_seconds=None):
+        self.data[session_id] = list(history)[-self.max_history_turns:]
+
+    async def fetch_summary(self, session_id):
+        return self.summaries.get(session_id, "")
+
+    async def set_summary(self, session_id, summary, ttl_seconds=None):
+        self.summaries[session_id] = summary
+
+    async def health_check(self):
+        return True
+
+
+class RecordingGateway:
+    """Stands in for LLMGateway: returns a fixed summary and records what it was asked"""
+
+    available = True
+
+    def __init__(self, reply):
+        self.reply = reply
+        self.calls = []
+
+    async def chat_completion(self, messages, **params):
+        self.calls.append((messages, params))
+        return self.reply
+
+
+@pytest.fixture
+def memory_store(monkeypatch):
+    monkeypatch.setattr(config, "CONV_MAX_TURNS", 4)
+    monkeypatch.setattr(config, "CONV_SUMMARY_ENABLED", True)
+    store = MemoryStore(max_history_turns=4)
+    monkeypatch.setattr(store_module, "async_conversation_store", store)
+    return store
+
+
+def test_trimmed_turns_fold_into_summary_after_response(memory_store):
+    """Test that evicted turns reach the summary only after the response has been returned"""
+    async def run():
+        service = ChatService()
+        service.llm = None
+        pending = []
+        for i in range(4):
+            await service.generate_unified_response(f"Question {i} about fire doors", "sess-sum", "starter")
+            pending.append(dict(memory_store.summaries))
+            await service.wait_for_summaries()
+        return pending
+
+    pending = asyncio.run(run())
+    assert pending[2] == {}  # turn 3 evicted turn 1, but the fold had not run when the response returned
+    summary = memory_store.summaries["sess-sum"]
+    assert "Question 0" in summary and "Question 1" in summary
+    assert "Question 3" not in summary
+    assert len(memory_store.data["sess-sum"]) == 4
+
+
+def test_summary_injected_between_system_prompt_and_history():
+    """Test that the running summary is sent as a system message ahead of the recent turns"""
+    service = ChatService()
+    history = [{"role": "user", "content": "q1"}, {"role": "assistant", "content": "a1"}, {"role": "user", "content": "q2"}]
+    messages = service._build_llm_messages("system prompt", history, "starter", summary="- User asked: party wall FRL")
+
+    assert messages[0] == {"role": "system", "content": "system prompt"}
+    assert messages[1] == {"role": "system", "content": f"{SUMMARY_HEADER}\n- User asked: party wall FRL"}
+    assert messages[2:] == history
+    assert service._build_llm_messages("system prompt", history, "starter")[1:] == history
+
+
+def test_summarizer_uses_llm_and_falls_back_to_extractive():
+    """Test that the fold asks the LLM with the previous summary and degrades without it"""
+    evicted = [{"role": "user", "content": "Class 2 building in Sydney, party wall FRL?"},
+               {"role": "assistant", "content": "90/90/90 under NCC Spec C1.1"}]
+
+    gateway = RecordingGateway("Class 2, Sydney; party wall FRL 90/90/90 (NCC Spec C1.1)")
+    folded = asyncio.run(ConversationSummarizer(gateway, max_tokens=200).fold("Project: apartments", evicted))
+    (messages, params), = gateway.calls
+    assert folded == "Class 2, Sydney; party wall FRL 90/90/90 (NCC Spec C1.1)"
+    assert "Project: apartments" in messages[1]["content"] and "Spec C1.1" in messages[1]["content"]
+    assert params["max_tokens"] == 200
+
+    extractive = asyncio.run(ConversationSummarizer(None, max_tokens=200).fold("Project: apartments", evicted))
+    assert extractive == "Project: apartments\n- User asked: Class 2 building in Sydney, party wall FRL?"
+
+
+def test_extractive_summary_stays_within_token_cap():
+    """Test that the running summary drops its oldest lines instead of growing without bound"""
+    summarizer = ConversationSummarizer(None, max_tokens=60)
+    summary = ""
+    for i in range(30):
+        summary = asyncio.run(summarizer.fold(summary, [{"role": "user", "content": f"Question {i} about balustrade heights"}]))
+    assert "Question 29" in summary and "Question 0" not in summary
+    assert count_tokens(summary) <= 60
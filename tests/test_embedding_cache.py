@@ -0,0 +1,106 @@
+"""
+Embedding cache tests
+Tests LRU/TTL behaviour, key isolation, failure handling and in-flight coalescing
+"""
+
+import asyncio
+import pytest
+from core.knowledge.embedding_cache import EmbeddingCache
+
+
+class CountingEmbedder:
+    """Fake embedding API that counts calls and can be slowed down or made to fail"""
+
+    def __init__(self, delay: float = 0.0, fail: bool = False):
+        self.calls = 0
+        self.delay = delay
+        self.fail = fail
+
+    async def __call__(self, text: str):
+        self.calls += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("embedding API unavailable")
+        return [float(len(text)), 1.0, 0.5]
+
+
+def test_repeated_query_hits_cache():
+    """Test that an identical query is embedded once"""
+    cache = EmbeddingCache(max_entries=10)
+    embedder = CountingEmbedder()
+
+    async def run():
+        first = await cache.get_or_compute("model", "fire rating", embedder)
+        second = await cache.get_or_compute("model", "fire rating", embedder)
+        return first, second
+
+    first, second = asyncio.run(run())
+
+    assert first == second == [11.0, 1.0, 0.5]
+    assert embedder.calls == 1
+
+
+def test_key_includes_model():
+    """Test that the same text under a different model is a separate entry"""
+    assert EmbeddingCache.cache_key("a", "text") != EmbeddingCache.cache_key("b", "text")
+    assert EmbeddingCache.cache_key("a", "text") == EmbeddingCache.cache_key("a", "text")
+
+
+def test_lru_eviction_and_ttl(monkeypatch):
+    """Test that the least recently used entry is evicted and expired entries are recomputed"""
+    cache = EmbeddingCache(max_entries=2, ttl_seconds=60)
+    embedder = CountingEmbedder()
+    now = [1000.0]
+    monkeypatch.setattr("core.knowledge.embedding_cache.time.monotonic", lambda: now[0])
+
+    async def run():
+        await cache.get_or_compute("m", "a", embedder)
+        await cache.get_or_compute("m", "b", embedder)
+        await cache.get_or_compute("m", "a", embedder)  # touch "a" so "b" is oldest
+        await cache.get_or_compute("m", "c", embedder)  # evicts "b"
+        assert embedder.calls == 3
+        await cache.get_or_compute("m", "a", embedder)
+        assert embedder.calls == 3
+        await cache.get_or_compute("m", "b", embedder)
+        assert embedder.calls == 4
+
+        now[0] += 61
+        await cache.get_or_compute("m", "b", embedder)
+        assert embedder.calls == 5
+
+    asyncio.run(run())
+    assert len(cache) == 2
+
+
+def test_concurrent_identical_requests_coalesce():
+    """Test that concurrent identical queries share one in-flight API call"""
+    cache = EmbeddingCache()
+    embedder = CountingEmbedder(delay=0.05)
+
+    async def run():
+        return await asyncio.gather(*[cache.get_or_compute("m", "same query", embedder) for _ in range(10)])
+
+    results = asyncio.run(run())
+
+    assert embedder.calls == 1
+    assert all(result == results[0] for result in results)
+
+
+def test_failures_are_not_cached():
+    """Test that a failed call propagates to every waiter and is retried next time"""
+    cache = EmbeddingCache()
+    embedder = CountingEmbedder(delay=0.01, fail=True)
+
+    async def run():
+        results = await asyncio.gather(
+            *[cache.get_or_compute("m", "q", embedder) for _ in range(3)],
+            return_exceptions=True
+        )
+        assert all(isinstance(result, RuntimeError) for result in results)
+
+        embedder.fail = False
+        return await cache.get_or_compute("m", "q", embedder)
+
+    assert asyncio.run(run()) == [1.0, 1.0, 0.5]
+    assert embedder.calls == 2
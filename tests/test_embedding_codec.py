@@ -0,0 +1,52 @@
+"""
+Embedding codec tests
+Tests binary round-trips, zero-copy decoding and legacy list dual-read
+"""
+
+import pytest
+import numpy as np
+from bson import BSON
+from core.knowledge.embedding_codec import decode_embedding, encode_embedding, is_legacy_embedding
+
+
+@pytest.fixture
+def embedding():
+    return np.random.default_rng(0).standard_normal(1536).astype(np.float32).tolist()
+
+
+def test_float32_roundtrip_is_exact_and_compact(embedding):
+    """Test that float32 binaries survive BSON encoding unchanged and are >3x smaller"""
+    stored = BSON.decode(BSON.encode({"embedding": encode_embedding(embedding)}))["embedding"]
+    decoded = decode_embedding(stored)
+
+    assert decoded.dtype == np.float32
+    assert np.array_equal(decoded, np.asarray(embedding, dtype=np.float32))
+    assert not decoded.flags.owndata  # zero-copy view over the BSON payload
+    assert len(BSON.encode({"e": encode_embedding(embedding)})) * 3 < len(BSON.encode({"e": embedding}))
+
+
+def test_int8_roundtrip_preserves_similarity(embedding):
+    """Test that int8 quantization keeps cosine similarity close to the original"""
+    stored = encode_embedding(embedding, "int8")
+    decoded = decode_embedding(stored)
+    original = np.asarray(embedding, dtype=np.float32)
+
+    cosine = decoded @ original / (np.linalg.norm(decoded) * np.linalg.norm(original))
+    assert len(stored) == 1536 + 4
+    assert cosine > 0.999
+
+
+def test_legacy_lists_still_decode(embedding):
+    """Test dual-read of list embeddings written before the migration"""
+    assert is_legacy_embedding(embedding)
+    assert not is_legacy_embedding(encode_embedding(embedding))
+    assert np.allclose(decode_embedding(embedding), embedding)
+    assert decode_embedding([]) is None
+    assert decode_embedding(None) is None
+    assert encode_embedding(embedding, "list") == embedding
+
+
+def test_unknown_format_rejected(embedding):
+    """Test that a misconfigured storage format fails loudly"""
+    with pytest.raises(ValueError):
+        encode_embedding(embedding, "float16")
@@ -0,0 +1,84 @@
+"""
+Batch embedding tests
+Tests request packing, ordering, bounded concurrency and retry behaviour
+"""
+
+import asyncio
+import pytest
+import numpy as np
+from core.knowledge.embeddings import LocalEmbeddingProvider, generate_embeddings_batch, pack_batches
+
+
+class RecordingProvider(LocalEmbeddingProvider):
+    """Local provider that records batch sizes, peak concurrency and injected failures"""
+
+    def __init__(self, failures=None, **kwargs):
+        super().__init__(dim=16, **kwargs)
+        self.batches = []
+        self.active = 0
+        self.peak = 0
+        self.failures = list(failures or [])
+
+    async def embed(self, texts):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(0.01)
+            if self.failures:
+                raise self.failures.pop(0)
+            self.batches.append(len(texts))
+            return await super().embed(texts)
+        finally:
+            self.active -= 1
+
+
+class StatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+def test_pack_batches_respects_input_and_token_limits():
+    """Test that batches close on either the input count or the token budget"""
+    assert [list(b) for b in pack_batches([1] * 5, max_inputs=2)] == [[0, 1], [2, 3], [4]]
+    assert [list(b) for b in pack_batches([60, 60, 10, 90], max_inputs=10, max_tokens=100)] == [[0], [1, 2], [3]]
+    assert pack_batches([], max_inputs=4) == []
+
+
+def test_batch_preserves_order_and_bounds_concurrency():
+    """Test that results line up with inputs and no more than max_concurrency requests run at once"""
+    provider = RecordingProvider()
+    texts = [f"document chunk {i}" for i in range(50)]
+
+    embeddings = asyncio.run(generate_embeddings_batch(texts, provider, batch_size=8, max_concurrency=2))
+
+    assert embeddings == [provider.embed_text(text) for text in texts]
+    assert provider.batches == [8, 8, 8, 8, 8, 8, 2]
+    assert provider.peak == 2
+
+
+def test_transient_errors_are_retried():
+    """Test that rate limits are retried with backoff and permanent errors are raised"""
+    provider = RecordingProvider(failures=[StatusError(429), ConnectionError("reset")])
+    embeddings = asyncio.run(generate_embeddings_batch(["a", "b"], provider, max_retries=3, backoff_base=0.001))
+    assert len(embeddings) == 2
+
+    provider = RecordingProvider(failures=[StatusError(400)])
+    with pytest.raises(StatusError):
+        asyncio.run(generate_embeddings_batch(["a"], provider, max_retries=3, backoff_base=0.001))
+
+    provider = RecordingProvider(failures=[StatusError(503)] * 3)
+    with pytest.raises(StatusError):
+        asyncio.run(generate_embeddings_batch(["a"], provider, max_retries=2, backoff_base=0.001))
+
+
+def test_local_provider_is_deterministic_and_semantic():
+    """Test that the offline provider is stable and texts sharing words are closer"""
+    provider = LocalEmbeddingProvider()
+    fire, fire_again, hvac = asyncio.run(provider.embed([
+        "fire rated wall penetrations", "fire rated wall penetrations", "hvac duct sizing"
+    ]))
+    related = provider.embed_text("fire rated wall systems")
+
+    assert fire == fire_again and len(fire) == 1536
+    assert np.dot(fire, related) > np.dot(fire, hvac)
@@ -0,0 +1,138 @@
+"""
+Extraction service tests
+Tests process-pool PDF/DOCX extraction, page limits and timeouts
+"""
+
+import io
+import os
+import asyncio
+import pytest
+from docx import Document
+from core.knowledge.extraction import ExtractionService, ExtractionError, extract_pdf_text
+
+PDF = "application/pdf"
+DOCX = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+
+def build_text_pdf(pages):
+    """Minimal valid PDF with one line of Helvetica text per page"""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for text in pages:
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents {len(objects)} 0 R /Resources << /Font << /F1 3 0 R >> >> >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    out, offsets = bytearray(b"%PDF-1.4\n"), []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(out)
+
+
+@pytest.fixture
+def service():
+    service = ExtractionService(max_workers=1, timeout_seconds=30, max_pages=3, memory_limit_mb=0)
+    yield service
+    service.shutdown()
+
+
+def test_pdf_extracted_in_worker_with_page_limit(service, tmp_path):
+    """Test that PDFs are read from the spool file in the pool and stop at the page limit"""
+    pdf = tmp_path / "walls.pdf"
+    pdf.write_bytes(build_text_pdf([f"Page text {i} about fire rated wall penetrations" for i in range(5)]))
+
+    text = asyncio.run(service.extract(str(pdf), PDF, "walls.pdf"))
+
+    assert "Page 1:\nPage text 0 about fire rated wall penetrations" in text
+    assert "Page text 2" in text and "Page text 3" not in text
+    assert "[Truncated: extracted the first 3 of 5 pages]" in text
+
+
+def test_word_document_extracted_in_worker(service):
+    """Test that paragraphs and table rows come back from the worker"""
+    document = Document()
+    document.add_paragraph("Fire rated plasterboard specification")
+    table = document.add_table(rows=1, cols=2)
+    table.rows[0].cells[0].text = "FRL"
+    table.rows[0].cells[1].text = "90/90/90"
+    buffer = io.BytesIO()
+    document.save(buffer)
+
+    text = asyncio.run(service.extract(buffer.getvalue(), DOCX, "spec.docx"))
+
+    assert text == "Fire rated plasterboard specification\nFRL | 90/90/90"
+
+
+def test_timeout_raises_and_pool_recovers(service):
+    """Test that a slow file times out with ExtractionError without wedging later extractions"""
+    big = build_text_pdf([("Fire rated wall systems per NCC " * 3) for _ in range(3000)])
+    small = build_text_pdf(["Short document about acoustic ceilings and their ratings"])
+
+    async def run():
+        service.max_pages = 5000
+        service.timeout_seconds = 0.05
+        with pytest.raises(ExtractionError, match="huge.pdf: extraction timed out"):
+            await service.extract(big, PDF, "huge.pdf")
+        service.timeout_seconds = 30
+        return await service.extract(small, PDF, "small.pdf")
+
+    text = asyncio.run(run())
+
+    assert "acoustic ceilings" in text
+
+
+async def feed_pipe(path, data: bytes, timeout: float = 5) -> None:
+    """Write a small payload to a named pipe once its reader has opened it (never blocks the loop)"""
+    deadline = asyncio.get_running_loop().time() + timeout
+    while True:
+        try:
+            fd = os.open(path, os.O_WRONLY | os.O_NONBLOCK)  # ENXIO until a reader is waiting
+            break
+        except OSError:
+            if asyncio.get_running_loop().time() > deadline:
+                return  # reader never came (its worker was killed); the extraction reports the failure
+            await asyncio.sleep(0.05)
+    try:
+        os.write(fd, data)  # smaller than the pipe buffer
+    finally:
+        os.close(fd)
+
+
+@pytest.mark.skipif(not hasattr(os, "mkfifo"), reason="needs named pipes")
+def test_timeout_only_recycles_the_stuck_worker(tmp_path):
+    """Test that a file hanging past the timeout does not fail the extraction running beside it"""
+    stuck, neighbour = tmp_path / "stuck.pdf", tmp_path / "neighbour.pdf"
+    os.mkfifo(stuck)  # a worker reading a named pipe blocks until something writes to it
+    os.mkfifo(neighbour)
+    service = ExtractionService(max_workers=2, timeout_seconds=3, max_pages=3, memory_limit_mb=0)
+
+    async def extract_neighbour():
+        await asyncio.sleep(1.5)  # still in flight when the stuck file times out
+        return await service.extract(str(neighbour), PDF, "neighbour.pdf")
+
+    async def run():
+        neighbour_task = asyncio.create_task(extract_neighbour())
+        with pytest.raises(ExtractionError, match="stuck.pdf: extraction timed out"):
+            await service.extract(str(stuck), PDF, "stuck.pdf")
+        await feed_pipe(neighbour, build_text_pdf(["Neighbouring upload about acoustic ceilings and their ratings"]))
+        return await neighbour_task
+
+    try:
+        text = asyncio.run(run())
+    finally:
+        service.shutdown()
+
+    assert "acoustic ceilings" in text
+
+
+def test_unparseable_pdf_raises_extraction_error():
+    """Test that parser errors raise ExtractionError with the inline extractor's message"""
+    with pytest.raises(ExtractionError, match="^Error extracting PDF content from broken.pdf"):
+        extract_pdf_text(b"not a pdf", "broken.pdf", 10)
@@ -0,0 +1,42 @@
+"""
+Formatter golden-output tests
+Tests that the single-scan UnifiedFormatter reproduces the multi-pass formatter's output byte for byte
+Golden cases are regenerated with: python scripts/benchmark_formatter.py --write-golden
+"""
+
+import os
+import json
+import pytest
+from core.formatter import UnifiedFormatter, StreamingSectionNormalizer
+
+GOLDEN_PATH = os.path.join(os.path.dirname(__file__), "golden", "formatter_golden.json")
+
+with open(GOLDEN_PATH, encoding="utf-8") as f:
+    GOLDEN_CASES = json.load(f)
+
+
+@pytest.mark.parametrize("case", GOLDEN_CASES, ids=[case["name"] for case in GOLDEN_CASES])
+def test_format_response_matches_golden(case):
+    """Test that text, emoji map and mentoring insight match the pinned multi-pass output"""
+    formatter = UnifiedFormatter()
+    text, emoji_map = formatter.format_response(case["raw"])
+    assert text == case["text"]
+    assert [[item.name, item.char] for item in emoji_map] == case["emoji_map"]
+    assert formatter.extract_mentoring_insight(text) == case["mentoring_insight"]
+
+
+@pytest.mark.parametrize("case", GOLDEN_CASES, ids=[case["name"] for case in GOLDEN_CASES])
+def test_section_headers_match_golden(case):
+    """Test that header-only normalization (used while streaming) matches the pinned output"""
+    assert UnifiedFormatter()._normalize_section_headers(case["raw"]) == case["headers"]
+
+
+def test_streamed_headers_match_whole_text_on_golden_cases():
+    """Test that line-by-line header normalization agrees with the whole-text pass for single-newline text"""
+    for case in GOLDEN_CASES:
+        raw = case["raw"]
+        if "\n\n" in raw or "\r" in raw or raw != raw.strip():
+            continue  # blank lines are only absorbed by the whole-text pass
+        normalizer = StreamingSectionNormalizer()
+        streamed = normalizer.feed(raw) + normalizer.flush()
+        assert streamed == case["headers"], case["name"]
@@ -0,0 +1,34 @@
+"""
+Search hydration tests
+Tests that display projections never return embeddings or raw document data
+"""
+
+from core.knowledge.hydration import display_pipeline, EXCERPT_CHARS, HEAVY_FIELDS
+
+
+def test_document_banks_project_display_fields_and_excerpt():
+    """Test that document banks use an inclusion projection plus a server-side excerpt"""
+    for bank in ("community_knowledge_bank", "personal_knowledge_bank"):
+        match, add_fields, project = display_pipeline(bank, {"document_id": {"$in": ["a"]}})
+
+        assert match == {"$match": {"document_id": {"$in": ["a"]}}}
+        assert add_fields["$addFields"]["excerpt"]["$substrCP"][2] == EXCERPT_CHARS
+        projection = project["$project"]
+        assert projection["document_id"] == 1 and projection["excerpt"] == 1
+        assert not any(field in projection for field in HEAVY_FIELDS)
+
+
+def test_mentor_notes_have_no_excerpt_stage():
+    """Test that mentor notes return their content without computing an excerpt"""
+    stages = display_pipeline("mentor_notes", {})
+
+    assert len(stages) == 2
+    assert stages[1]["$project"]["content"] == 1
+    assert "embedding" not in stages[1]["$project"]
+
+
+def test_unstructured_bank_excludes_heavy_fields():
+    """Test that the knowledge vault falls back to excluding heavy fields"""
+    project = display_pipeline("knowledge_vault", {})[-1]["$project"]
+
+    assert project == {field: 0 for field in HEAVY_FIELDS}
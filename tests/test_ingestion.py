@@ -0,0 +1,226 @@
+"""
+Ingestion queue tests
+Tests the persisted job state machine, worker processing and restart recovery
+"""
+
+import os
+import asyncio
+import pytest
+from core.knowledge.extraction import ExtractionService
+from core.knowledge.ingestion import IngestionQueue, EMBEDDING, EXTRACTING, FAILED, INDEXED, QUEUED
+from tests.test_extraction import PDF, build_text_pdf
+
+
+class FakeJobCollection:
+    """Just enough of a motor collection for the job table"""
+
+    def __init__(self):
+        self.docs = []
+
+    def _match(self, doc, query):
+        for key, value in query.items():
+            if isinstance(value, dict) and "$in" in value:
+                if doc.get(key) not in value["$in"]:
+                    return False
+            elif doc.get(key) != value:
+                return False
+        return True
+
+    async def create_index(self, *args, **kwargs):
+        return None
+
+    async def insert_one(self, doc):
+        self.docs.append(dict(doc))
+
+    async def update_one(self, query, update):
+        for doc in self.docs:
+            if self._match(doc, query):
+                doc.update(update.get("$set", {}))
+                return
+
+    async def find_one(self, query, projection=None):
+        return next((dict(doc) for doc in self.docs if self._match(doc, query)), None)
+
+    async def find_one_and_update(self, query, update, return_document=None):
+        for doc in self.docs:
+            if self._match(doc, query):
+                doc.update(update.get("$set", {}))
+                for key, amount in update.get("$inc", {}).items():
+                    doc[key] = doc.get(key, 0) + amount
+                return dict(doc)
+        return None
+
+    def find(self, query, projection=None):
+        matches = [dict(doc) for doc in self.docs if self._match(doc, query)]
+
+        async def iterate():
+            for doc in matches:
+                yield doc
+        return iterate()
+
+    def job(self, job_id):
+        return next(doc for doc in self.docs if doc["job_id"] == job_id)
+
+
+@pytest.fixture
+def collection():
+    return FakeJobCollection()
+
+
+def make_queue(collection, tmp_path, handler):
+    return IngestionQueue(collection, handler, spool_dir=str(tmp_path), workers=2, max_attempts=3, retry_backoff_seconds=0)
+
+
+def spooled(tmp_path, content: bytes) -> str:
+    """An upload already streamed to the spool directory"""
+    path = tmp_path / f"upload-{len(list(tmp_path.iterdir()))}.part"
+    path.write_bytes(content)
+    return str(path)
+
+
+def test_job_moves_through_states_to_indexed(collection, tmp_path):
+    """Test that a worker runs the handler with the spooled file and records the result"""
+    seen = []
+
+    async def handler(job, spool_path, queue):
+        with open(spool_path, "rb") as f:
+            seen.append((collection.job(job["job_id"])["status"], f.read()))
+        await queue.set_status(job["job_id"], EMBEDDING)
+        seen.append(collection.job(job["job_id"])["status"])
+        return {"document_id": job["document_id"]}
+
+    async def run():
+        queue = make_queue(collection, tmp_path, handler)
+        await queue.start()
+        job = await queue.submit({"document_id": "doc-1", "user_id": "u1", "bank": "personal_knowledge_bank"}, spooled(tmp_path, b"file bytes"))
+        assert job["status"] == QUEUED
+        await asyncio.wait_for(queue._queue.join(), timeout=2)
+        await queue.stop()
+        return job
+
+    job = asyncio.run(run())
+    stored = collection.job(job["job_id"])
+
+    assert seen == [(EXTRACTING, b"file bytes"), EMBEDDING]
+    assert stored["status"] == INDEXED
+    assert stored["result"] == {"document_id": "doc-1"}
+    assert stored["attempts"] == 1
+    assert not os.path.exists(job["spool_path"])
+
+
+def test_handler_error_marks_job_failed(collection, tmp_path):
+    """Test that a job failing on every attempt ends failed with its error and the spooled file removed"""
+    async def handler(job, spool_path, queue):
+        raise ValueError("unsupported file")
+
+    async def run():
+        queue = make_queue(collection, tmp_path, handler)
+        job = await queue.submit({"user_id": "u1"}, spooled(tmp_path, b"x"))
+        statuses = [await queue.process(job["job_id"]) for _ in range(4)]
+        return job, statuses
+
+    job, statuses = asyncio.run(run())
+
+    assert statuses == [QUEUED, QUEUED, FAILED, None]  # max_attempts=3; finished jobs are not run again
+    assert collection.job(job["job_id"])["attempts"] == 3
+    assert collection.job(job["job_id"])["error"] == "unsupported file"
+    assert not os.path.exists(job["spool_path"])
+
+
+def test_extraction_timeout_is_retried_then_fails(collection, tmp_path):
+    """Test that a timed-out extraction retries and ends failed instead of indexing the error text"""
+    service = ExtractionService(max_workers=1, timeout_seconds=0.05, max_pages=5000)
+    indexed = []
+
+    async def handler(job, spool_path, queue):
+        text = await service.extract(spool_path, PDF, "huge.pdf")
+        indexed.append(text)
+        return {"document_id": job["document_id"]}
+
+    async def run():
+        queue = make_queue(collection, tmp_path, handler)
+        big = build_text_pdf([("Fire rated wall systems per NCC " * 3) for _ in range(3000)])
+        job = await queue.submit({"document_id": "doc-1", "user_id": "u1"}, spooled(tmp_path, big))
+        statuses = [await queue.process(job["job_id"]) for _ in range(3)]
+        return job, statuses
+
+    try:
+        job, statuses = asyncio.run(run())
+    finally:
+        service.shutdown()
+
+    assert statuses == [QUEUED, QUEUED, FAILED]
+    assert indexed == []
+    assert "timed out" in collection.job(job["job_id"])["error"]
+
+
+def test_transient_error_is_retried(collection, tmp_path):
+    """Test that a handler error requeues the job, keeping its spooled file, and a later attempt indexes it"""
+    calls = []
+
+    async def handler(job, spool_path, queue):
+        calls.append(os.path.exists(spool_path))
+        if len(calls) == 1:
+            raise ConnectionError("embedding API timed out")
+        return {"document_id": job["document_id"]}
+
+    async def run():
+        queue = make_queue(collection, tmp_path, handler)
+        await queue.start()
+        job = await queue.submit({"document_id": "doc-1", "user_id": "u1"}, spooled(tmp_path, b"x"))
+        for _ in range(100):
+            if collection.job(job["job_id"])["status"] == INDEXED:
+                break
+            await asyncio.sleep(0.01)
+        await queue.stop()
+        return job
+
+    job = asyncio.run(run())
+    stored = collection.job(job["job_id"])
+
+    assert calls == [True, True]
+    assert stored["status"] == INDEXED
+    assert stored["attempts"] == 2
+    assert stored["error"] is None
+
+
+def test_restart_requeues_interrupted_jobs(collection, tmp_path):
+    """Test that active jobs from a previous process resume, and unrecoverable ones fail"""
+    processed = []
+
+    async def handler(job, spool_path, queue):
+        processed.append(job["job_id"])
+        return {}
+
+    spool = tmp_path / "interrupted"
+    spool.write_bytes(b"pdf")
+    collection.docs = [
+        {"job_id": "interrupted", "status": EMBEDDING, "spool_path": str(spool), "attempts": 1, "user_id": "u1"},
+        {"job_id": "lost-file", "status": QUEUED, "spool_path": str(tmp_path / "missing"), "attempts": 0, "user_id": "u1"},
+        {"job_id": "done", "status": INDEXED, "spool_path": "", "attempts": 1, "user_id": "u1"},
+    ]
+
+    async def run():
+        queue = make_queue(collection, tmp_path, handler)
+        recovered = await queue.start()
+        await asyncio.wait_for(queue._queue.join(), timeout=2)
+        await queue.stop()
+        return recovered
+
+    assert asyncio.run(run()) == 1
+    assert processed == ["interrupted"]
+    assert collection.job("interrupted")["status"] == INDEXED
+    assert collection.job("lost-file")["status"] == FAILED
+    assert collection.job("done")["status"] == INDEXED
+
+
+def test_status_lookup_is_scoped_to_owner(collection, tmp_path):
+    """Test that users can only read their own jobs"""
+    async def run():
+        queue = make_queue(collection, tmp_path, None)
+        job = await queue.submit({"user_id": "u1"}, spooled(tmp_path, b"x"))
+        return await queue.get_job(job["job_id"], "u1"), await queue.get_job(job["job_id"], "u2")
+
+    own, other = asyncio.run(run())
+    assert own["status"] == QUEUED
+    assert other is None
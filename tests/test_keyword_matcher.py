@@ -0,0 +1,68 @@
+"""
+Keyword matcher tests
+Tests that the single-pass matcher counts like one re.findall per pattern and serves topic/standard detection
+"""
+
+import re
+import pytest
+from core.keyword_matcher import KeywordMatcher
+from core.suggestions import SuggestionsEngine
+from core.context_manager import ConversationContextManager
+
+TEXTS = [
+    "Wind load on the steel beam: AS 1170.2 and AS1170.4 apply.",
+    "A Class 2 building needs fire-rated doors, a sprinkler system to AS 2118 and smoke detection.",
+    "Sound transmission and impact sound: insulation to NCC F5.4; waterproof the wet area per AS 3740.",
+    "AS/NZS 3000 wiring, RCD protection and an energy efficiency check (R-value, glazing, solar heating).",
+    "clASS 9b volume 1 BCA C1.1 — access ramp, lift and accessible door width for DDA.",
+    "",
+]
+
+
+def findall_counts(groups, text):
+    counts = {}
+    for group, patterns in groups.items():
+        n = sum(len(re.findall(pattern, text, re.IGNORECASE)) for pattern in patterns)
+        if n:
+            counts[group] = n
+    return counts
+
+
+@pytest.mark.parametrize("text", TEXTS)
+def test_counts_match_findall_per_pattern(text):
+    """Test that overlapping patterns ("wind load" / "load", "sound transmission" / "sound") are each counted"""
+    engine = SuggestionsEngine()
+    groups = {**engine.topic_patterns, "standards": engine.standard_patterns}
+    assert engine.matcher.counts(text) == findall_counts(groups, text)
+
+
+def test_detect_topic_and_standards():
+    """Test that topic scoring and standards extraction agree with the per-pattern loops"""
+    engine = SuggestionsEngine()
+    assert engine.detect_topic(TEXTS[1]) == "fire"
+    assert engine.detect_topic("Generic text") is None
+    # Ties go to the topic listed first, as with max() over the old score dict
+    assert engine.detect_topic("noise and pipe") == "acoustic"
+    assert engine.detect_standards(TEXTS[0]) == ["AS 1170.2", "AS1170.4"]
+    assert engine.detect_standards(TEXTS[4]) == ["clASS 9b", "volume 1", "BCA C1.1"]
+
+
+def test_from_terms_is_case_insensitive_substring_match():
+    """Test that plain terms behave like `term in text.lower()` and first() like an if/elif chain"""
+    matcher = KeywordMatcher.from_terms({"acoustic lagging": ["acoustic"], "fire safety": ["fire"], "building codes": ["building"]})
+    assert matcher.present("FIREPROOF Building") == {"fire safety", "building codes"}
+    assert matcher.first("building near a fire, acoustically treated") == "acoustic lagging"
+    assert matcher.first("nothing relevant") is None
+    with pytest.raises(ValueError):
+        KeywordMatcher({"bad": [r"(fire)"]})
+
+
+def test_context_topics_keep_first_seen_order():
+    """Test that pronoun-resolution topics are collected per conversation in the original order"""
+    manager = ConversationContextManager.__new__(ConversationContextManager)
+    topics = manager.extract_context_topics([
+        {"question": "Fire rating for a party wall?", "response": {"technical": "Use a 90/90/90 wall"}},
+        {"question": "What about acoustic lagging?", "response": "Lag the PLUMBING stacks"},
+    ])
+    assert list(topics) == ["fire_system", "acoustic_system", "water_system"]
+    assert topics["water_system"] == "water system installation"
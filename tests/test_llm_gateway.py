@@ -0,0 +1,161 @@
+"""
+LLM gateway tests
+Tests concurrent async completions over the pooled client, the LLM_TIMEOUT_MS cap and fallbacks
+"""
+
+import time
+import asyncio
+import pytest
+from aiohttp import web
+from core.llm_gateway import LLMGateway
+from core.chat_service import ChatService
+from core.observability import get_observability
+from core.prompt_registry import get_prompt_registry
+
+API_KEY = "sk-test-00000000000000000000"
+
+
+class StubLLMServer:
+    """OpenAI-compatible chat completions endpoint with fixed latency and an in-flight counter"""
+
+    def __init__(self, latency_ms, cached_tokens=0):
+        self.latency_ms = latency_ms
+        self.cached_tokens = cached_tokens
+        self.active = 0
+        self.peak = 0
+        self.bodies = []
+
+    async def completions(self, request):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            self.bodies.append(await request.json())
+            await asyncio.sleep(self.latency_ms / 1000)
+            return web.json_response({
+                "id": "chatcmpl-test", "object": "chat.completion", "created": 0, "model": "gpt-4o-mini",
+                "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": "stub answer"}}],
+                "usage": {"prompt_tokens": 1500, "completion_tokens": 20, "total_tokens": 1520,
+                          "prompt_tokens_details": {"cached_tokens": self.cached_tokens}},
+            })
+        finally:
+            self.active -= 1
+
+    async def __aenter__(self):
+        app = web.Application()
+        app.router.add_post("/v1/chat/completions", self.completions)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        self.base_url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}/v1"
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.runner.cleanup()
+
+
+def test_completions_run_concurrently_on_one_loop():
+    """Test that concurrent sessions overlap their LLM calls instead of serialising"""
+    async def run():
+        async with StubLLMServer(latency_ms=200) as server:
+            gateway = LLMGateway(api_key=API_KEY, base_url=server.base_url, max_retries=0)
+            start = time.perf_counter()
+            answers = await asyncio.gather(*[
+                gateway.chat_completion([{"role": "user", "content": f"q{i}"}]) for i in range(10)
+            ])
+            elapsed = time.perf_counter() - start
+            await gateway.aclose()
+            return answers, elapsed, server.peak
+
+    answers, elapsed, peak = asyncio.run(run())
+    assert answers == ["stub answer"] * 10
+    assert peak > 1
+    assert elapsed < 10 * 0.2 / 2
+
+
+def test_llm_timeout_is_enforced():
+    """Test that a completion slower than LLM_TIMEOUT_MS raises instead of hanging"""
+    async def run():
+        async with StubLLMServer(latency_ms=2000) as server:
+            gateway = LLMGateway(api_key=API_KEY, base_url=server.base_url, timeout_ms=200, max_retries=0)
+            start = time.perf_counter()
+            try:
+                with pytest.raises(Exception):
+                    await gateway.chat_completion([{"role": "user", "content": "slow"}])
+            finally:
+                await gateway.aclose()
+            return time.perf_counter() - start
+
+    assert asyncio.run(run()) < 1.5
+
+
+def test_chat_service_falls_back_when_llm_call_fails():
+    """Test that ChatService returns its context-aware fallback when the gateway times out"""
+    async def run():
+        async with StubLLMServer(latency_ms=2000) as server:
+            service = ChatService()
+            service.llm = LLMGateway(api_key=API_KEY, base_url=server.base_url, timeout_ms=200, max_retries=0)
+            try:
+                return await service._call_openai_api_with_history("fire rating for party walls?", "system", [])
+            finally:
+                await service.llm.aclose()
+
+    answer, usage = asyncio.run(run())
+    assert "Technical Answer" in answer
+    assert usage.estimated and usage.prompt_tokens == 0
+
+
+def test_gateway_without_key_is_unavailable():
+    """Test that a gateway without credentials reports unavailable and builds no client"""
+    gateway = LLMGateway(api_key="")
+    assert not gateway.available
+    assert gateway.client is None
+
+
+def test_gateway_with_placeholder_key_builds_no_client():
+    """Test that a key too short to be real is treated as no key, so no client is built for it"""
+    gateway = LLMGateway(api_key="sk-test")
+    assert not gateway.available
+    assert gateway.client is None
+
+
+def test_cached_prompt_tokens_recorded_in_observability():
+    """Test that cached-token counts from the API usage block reach the observability metrics"""
+    async def run():
+        async with StubLLMServer(latency_ms=0, cached_tokens=1024) as server:
+            gateway = LLMGateway(api_key=API_KEY, base_url=server.base_url, max_retries=0)
+            try:
+                await gateway.chat_completion([{"role": "user", "content": "q"}])
+            finally:
+                await gateway.aclose()
+
+    metrics = get_observability().metrics
+    before = (metrics["llm_prompt_tokens_total"], metrics["llm_cached_prompt_tokens_total"], metrics["llm_requests_with_cache_hit"])
+    asyncio.run(run())
+    after = (metrics["llm_prompt_tokens_total"], metrics["llm_cached_prompt_tokens_total"], metrics["llm_requests_with_cache_hit"])
+    assert [b - a for a, b in zip(before, after)] == [1500, 1024, 1]
+    assert get_observability().get_dashboard_metrics()["llm_usage"]["cached_prompt_percent"] > 0
+
+
+def test_static_prompt_prefix_identical_across_requests():
+    """Test that per-request knowledge and context hints never change the leading system message"""
+    async def run():
+        async with StubLLMServer(latency_ms=0) as server:
+            service = ChatService()
+            service.llm = LLMGateway(api_key=API_KEY, base_url=server.base_url, max_retries=0)
+            history = [{"role": "user", "content": "earlier"}, {"role": "assistant", "content": "reply"}]
+            try:
+                for knowledge, hint in [("Spec C1.1 excerpt", "\n\nCONVERSATION CONTEXT: fire"), ("AS 1530.4 excerpt", "")]:
+                    await service._call_openai_api_with_history(
+                        "q", get_prompt_registry().prefix("pro").text, history + [{"role": "user", "content": "q"}],
+                        "pro", request_context=f"KNOWLEDGE CONTEXT:\n{knowledge}{hint}",
+                    )
+            finally:
+                await service.llm.aclose()
+            return server.bodies
+
+    first, second = [body["messages"] for body in asyncio.run(run())]
+    assert first[0] == second[0] and first[0]["content"] == get_prompt_registry().prefix("pro").text
+    assert first[1:3] == second[1:3]  # history also stays ahead of the per-request content
+    assert first[-2]["content"].startswith("KNOWLEDGE CONTEXT:\nSpec C1.1") and first[-1]["role"] == "user"
+    assert second[-2]["content"] == "KNOWLEDGE CONTEXT:\nAS 1530.4 excerpt"
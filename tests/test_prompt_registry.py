@@ -0,0 +1,67 @@
+"""
+Prompt registry tests
+Tests one-time load and validation, precomputed tier prefixes and mtime-based reload
+"""
+
+import os
+from core.prompt_registry import PromptRegistry, FALLBACK_MASTER_PROMPT, build_request_context
+
+MASTER = "You are ONESource AI.\n🔧 **Technical Answer**\n🧐 **Mentoring Insight**\n📋 **Next Steps**"
+
+
+def write_prompt(path, text, mtime):
+    path.write_text(text, encoding="utf-8")
+    os.utime(path, (mtime, mtime))
+
+
+def test_tier_prefixes_precomputed_and_request_context_kept_separate(tmp_path):
+    """Test that each tier gets its own prefix and hash, and per-request content is built outside it"""
+    path = tmp_path / "system_master.txt"
+    write_prompt(path, MASTER, 1_000_000)
+    registry = PromptRegistry(str(path), check_interval_seconds=0)
+
+    starter, pro = registry.prefix("starter"), registry.prefix("pro")
+    assert starter.text.startswith(MASTER) and "TIER: STARTER" in starter.text
+    assert "TIER: PRO" in pro.text and pro.prompt_hash != starter.prompt_hash
+    assert registry.prefix("unknown") is starter
+
+    context = build_request_context("NCC Spec C1.1 excerpt", "\n\nCONVERSATION CONTEXT: fire")
+    assert context == "KNOWLEDGE CONTEXT:\nNCC Spec C1.1 excerpt\n\nCONVERSATION CONTEXT: fire"
+    assert build_request_context() == ""
+    assert registry.prefix("pro") is pro
+    assert registry.source == "file"
+
+
+def test_file_reread_only_when_mtime_changes(tmp_path):
+    """Test that an unchanged mtime serves the cached prompt and a new mtime reloads it"""
+    path = tmp_path / "system_master.txt"
+    write_prompt(path, MASTER, 1_000_000)
+    registry = PromptRegistry(str(path), check_interval_seconds=0)
+    first = registry.prefix("starter")
+
+    write_prompt(path, MASTER + "\nEdited.", 1_000_000)
+    assert registry.prefix("starter") is first
+
+    write_prompt(path, MASTER + "\nEdited.", 1_000_100)
+    reloaded = registry.prefix("starter")
+    assert "Edited." in reloaded.text and reloaded.prompt_hash != first.prompt_hash
+
+
+def test_invalid_edit_keeps_last_good_prompt(tmp_path):
+    """Test that a prompt missing required sections is rejected without dropping the loaded one"""
+    path = tmp_path / "system_master.txt"
+    write_prompt(path, MASTER, 1_000_000)
+    registry = PromptRegistry(str(path), check_interval_seconds=0)
+    good = registry.prefix("starter")
+
+    write_prompt(path, "half-written prompt", 1_000_100)
+    assert registry.prefix("starter") is good
+    path.unlink()
+    assert registry.prefix("starter") is good
+
+
+def test_missing_file_uses_fallback_prompt(tmp_path):
+    """Test that the inline fallback is used when the master prompt file does not exist"""
+    registry = PromptRegistry(str(tmp_path / "missing.txt"))
+    assert registry.prefix("pro_plus").text.startswith(FALLBACK_MASTER_PROMPT)
+    assert registry.source == "fallback"
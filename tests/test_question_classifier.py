@@ -0,0 +1,65 @@
+"""
+Question classifier tests
+Tests that the single-scan keyword index picks the same stage, discipline and sector as the if/elif chains
+"""
+
+import pytest
+from core.question_classifier import (
+    QuestionClassifier, WORKFLOW_STAGE_TERMS, DISCIPLINE_TERMS, SECTOR_TERMS,
+    DEFAULT_STAGE, DEFAULT_DISCIPLINE, DEFAULT_SECTOR,
+)
+
+QUESTIONS = [
+    "What FRL do I need for a Class 2 apartment building?",
+    "Foundation design for a warehouse on reactive soil",
+    "Sprinkler and fire pump requirements for a hospital",
+    "HVAC ventilation rates for a data centre server room",
+    "Handover inspection checklist for school defects",
+    "Waterproofing membrane to a roof terrace of a hotel",
+    "Tender pricing for a mine camp",
+    "Seismic ductility of a bridge",
+    "How do I get a permit?",
+    "Hello there",
+    "",
+]
+
+
+def first_label(terms, question, default):
+    question_lower = question.lower()
+    return next((label for label, words in terms.items() if any(word in question_lower for word in words)), default)
+
+
+@pytest.mark.parametrize("question", QUESTIONS)
+def test_labels_match_first_match_chains(question):
+    """Test that each dimension resolves to the first label, in chain order, with a matching term"""
+    result = QuestionClassifier(max_entries=0).classify(question)
+    assert result.stage == first_label(WORKFLOW_STAGE_TERMS, question, DEFAULT_STAGE)
+    assert result.discipline == first_label(DISCIPLINE_TERMS, question, DEFAULT_DISCIPLINE)
+    assert result.sector == first_label(SECTOR_TERMS, question, DEFAULT_SECTOR)
+
+
+def test_scores_cover_every_matching_label():
+    """Test that scores list every label with hits in priority order, not just the winner"""
+    result = QuestionClassifier().classify("Foundation and pile design on soil, foundation depth")
+    assert result.discipline == "structural_engineering"
+    assert dict(result.scores["discipline"]) == {
+        "structural_engineering": 2,
+        "geotechnical_engineering": 4,
+        "architecture": 1,
+    }
+    assert dict(result.scores["stage"]) == {"design_development": 1}
+    assert dict(result.scores["sector"]) == {}
+    with pytest.raises(TypeError):
+        result.scores["sector"]["commercial"] = 1
+
+
+def test_classification_cache_is_lru():
+    """Test that repeated questions are served from the cache and the oldest entry is evicted"""
+    classifier = QuestionClassifier(max_entries=2)
+    first = classifier.classify("Concrete slab on site")
+    assert classifier.classify("Concrete slab on site") is first
+    classifier.classify("Roof tiles")
+    classifier.classify("Concrete slab on site")
+    classifier.classify("Lift shaft")  # evicts "Roof tiles"
+    classifier.classify("Roof tiles")
+    assert (classifier.hits, classifier.misses) == (2, 4)
@@ -5,7 +5,7 @@ Tests validation, auto-repair, and metrics collection
 
 import pytest
 import json
-from middleware.schema_guard import SchemaGuard, validate_chat_response, get_schema_metrics
+from middleware.schema_guard import SchemaGuard, validate_chat_response, get_schema_metrics, is_v2_shape, first_error
 from core.schemas import CHAT_V2
 from jsonschema import ValidationError
 
@@ -222,6 +222,80 @@ def test_summary_extraction():
     assert "Professional construction guidance" in summary
 
 
+def test_formatter_v2_output_needs_no_repair():
+    """Test that responses built from the formatter's v2 blocks pass the guard without repair"""
+    from core.formatter import unified_formatter
+    from tests.test_formatter_golden import GOLDEN_CASES
+    guard = SchemaGuard()
+    
+    for case in GOLDEN_CASES:
+        formatted = unified_formatter.format_v2(case["raw"])
+        payload = {
+            "title": formatted.title,
+            "summary": formatted.summary,
+            "blocks": [block.model_dump(exclude_none=True) for block in formatted.blocks],
+            "meta": {"emoji": "🧐", "schema": "v2", "mapped": True, "tier": "starter", "session_id": "s"}
+        }
+        result, was_repaired = guard.ensure_v2_schema(payload)
+        assert was_repaired is False, case["name"]
+        assert formatted.text == case["text"]
+        # Blocks split the text at section headers without losing any of it
+        assert "\n".join(block["content"] for block in result["blocks"]).split() == formatted.text.split()
+
+
+def test_formatter_v2_blocks_are_typed_per_section():
+    """Test that each section becomes one block typed by its body, tables carrying headers and rows"""
+    from core.formatter import unified_formatter
+    formatted = unified_formatter.format_v2(
+        "Technical Answer\nFire doors need an FRL of -/60/30.\n\n"
+        "Next Steps\n1. Check the door schedule\n2. Order doors\n\n"
+        "Code Requirements\n| Clause | Topic |\n|---|---|\n| C3.4 | Doors |\n\n"
+        "Workflow Recommendations\n```text\ninstall -> inspect\n```"
+    )
+    
+    assert formatted.title == "## 🔧 **Technical Answer**"
+    blocks = {block.section: block for block in formatted.blocks}
+    assert blocks["Technical Answer"].type == "markdown"
+    assert blocks["Next Steps"].type == "list"
+    assert blocks["Code Requirements"].type == "table"
+    assert blocks["Code Requirements"].headers == ["Clause", "Topic"]
+    assert blocks["Code Requirements"].rows == [["C3.4", "Doors"]]
+    assert blocks["Workflow Recommendations"].type == "code"
+    assert blocks["Workflow Recommendations"].language == "text"
+    assert blocks["Mentoring Insight"].content.startswith("## 🧐 **Mentoring Insight**")
+    assert formatted.summary == formatted.mentoring_insight
+
+
+def test_fast_path_never_accepts_what_the_validator_rejects(valid_v2_response, legacy_response):
+    """Test that the structural pre-check only short-circuits responses the compiled validator accepts"""
+    import copy
+    invalid = [
+        lambda r: r.pop("summary"),
+        lambda r: r.update(title=""),
+        lambda r: r.update(extra=1),
+        lambda r: r.update(blocks=[]),
+        lambda r: r["blocks"].append({"type": "image", "content": "x"}),
+        lambda r: r["blocks"].append({"type": "markdown", "content": ""}),
+        lambda r: r["blocks"].append("text"),
+        lambda r: r["meta"].update(schema="v1"),
+        lambda r: r["meta"].update(mapped=1),
+        lambda r: r["meta"].pop("emoji"),
+    ]
+    still_valid = [
+        lambda r: r["meta"].update(tier="pro", session_id="s"),
+        lambda r: r["blocks"][0].update(headers=["A"], rows=[["1"]]),
+    ]
+    for mutate in invalid + still_valid:
+        response = copy.deepcopy(valid_v2_response)
+        mutate(response)
+        assert is_v2_shape(response) == (mutate in still_valid)
+        assert (first_error(response) is None) == (mutate in still_valid)
+    
+    assert is_v2_shape(valid_v2_response) and first_error(valid_v2_response) is None
+    assert not is_v2_shape(legacy_response) and first_error(legacy_response) is not None
+    assert not is_v2_shape(None) and first_error(None) is not None
+
+
 if __name__ == "__main__":
     # Manual test runner for development
     print("🧪 Running Schema Guard Tests")
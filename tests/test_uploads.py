@@ -0,0 +1,62 @@
+"""
+Streaming upload tests
+Tests chunked spooling, incremental hashing, the stored sample and size limits
+"""
+
+import io
+import os
+import base64
+import asyncio
+import hashlib
+import pytest
+from starlette.datastructures import UploadFile
+from core.knowledge.uploads import UploadTooLarge, receive_upload
+
+
+class CountingUpload(UploadFile):
+    """UploadFile that records the size of every read"""
+
+    def __init__(self, content: bytes, declare_size: bool = True):
+        super().__init__(io.BytesIO(content), size=len(content) if declare_size else None, filename="spec.pdf")
+        self.reads = []
+
+    async def read(self, size: int = -1) -> bytes:
+        self.reads.append(size)
+        return await super().read(size)
+
+
+def test_upload_is_streamed_hashed_and_sampled(tmp_path):
+    """Test that the spool file, hash and 1000-char sample match a whole-file read"""
+    content = os.urandom(300_000)
+    upload = CountingUpload(content)
+
+    received = asyncio.run(receive_upload(upload, str(tmp_path), max_bytes=1_000_000, chunk_bytes=64 * 1024))
+
+    assert received.size == len(content)
+    assert received.sha256 == hashlib.sha256(content).hexdigest()
+    assert received.sample_base64 == base64.b64encode(content).decode("utf-8")[:1000]
+    with open(received.path, "rb") as f:
+        assert f.read() == content
+    assert all(size == 64 * 1024 for size in upload.reads)  # never a whole-file read
+
+
+def test_declared_oversize_rejected_before_reading(tmp_path):
+    """Test that a part declaring a size over the limit is rejected without reading it"""
+    upload = CountingUpload(b"x" * 2048)
+
+    with pytest.raises(UploadTooLarge):
+        asyncio.run(receive_upload(upload, str(tmp_path), max_bytes=1024))
+
+    assert upload.reads == []
+    assert os.listdir(tmp_path) == []
+
+
+def test_oversize_stream_stops_early_and_cleans_up(tmp_path):
+    """Test that an upload without a declared size stops at the limit and leaves no spool file"""
+    upload = CountingUpload(b"x" * (10 * 1024), declare_size=False)
+
+    with pytest.raises(UploadTooLarge):
+        asyncio.run(receive_upload(upload, str(tmp_path), max_bytes=4 * 1024, chunk_bytes=1024))
+
+    assert len(upload.reads) == 5
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,148 @@
+"""
+Vector index tests
+Tests exact/IVF search, owner filtering, incremental updates and snapshots
+"""
+
+import pytest
+import numpy as np
+from core.knowledge.vector_index import VectorIndex
+
+
+DIM = 32
+
+
+def random_vectors(n: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return rng.standard_normal((n, DIM)).astype(np.float32)
+
+
+def exact_top_k(vectors: np.ndarray, query: np.ndarray, k: int) -> list:
+    normed = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    scores = normed @ (query / np.linalg.norm(query))
+    return [f"doc-{i}" for i in np.argsort(-scores)[:k]]
+
+
+@pytest.fixture
+def small_index():
+    """Index below the training threshold (exact scan)"""
+    index = VectorIndex("test", dim=DIM, train_threshold=10_000)
+    vectors = random_vectors(200)
+    index.add_many([f"doc-{i}" for i in range(200)], vectors)
+    return index, vectors
+
+
+def test_exact_search_matches_brute_force(small_index):
+    """Test that flat search returns the same top-k as a brute force scan"""
+    index, vectors = small_index
+    query = random_vectors(1, seed=1)[0]
+
+    results = index.search(query, k=10)
+
+    assert [hit.doc_id for hit in results] == exact_top_k(vectors, query, 10)
+    assert all(results[i].score >= results[i + 1].score for i in range(len(results) - 1))
+    assert -1.0 <= results[-1].similarity <= 1.0
+
+
+def test_no_corpus_cap(small_index):
+    """Test that every document is searchable (no 1000-document limit)"""
+    index, _ = small_index
+    vectors = random_vectors(1500, seed=2)
+    index.add_many([f"bulk-{i}" for i in range(1500)], vectors)
+
+    # Querying with the last vector must find it
+    results = index.search(vectors[-1], k=1)
+    assert results[0].doc_id == "bulk-1499"
+    assert results[0].similarity == pytest.approx(1.0, abs=1e-5)
+
+
+def test_incremental_add_replace_and_remove(small_index):
+    """Test incremental updates are visible immediately"""
+    index, vectors = small_index
+    target = random_vectors(1, seed=3)[0]
+
+    index.add("new-doc", target)
+    assert index.search(target, k=1)[0].doc_id == "new-doc"
+
+    # Replacing an id keeps a single live row
+    index.add("new-doc", -target)
+    assert len(index) == 201
+    assert index.search(target, k=1)[0].doc_id != "new-doc"
+
+    index.remove("new-doc")
+    assert len(index) == 200
+    assert all(hit.doc_id != "new-doc" for hit in index.search(-target, k=5))
+
+
+def test_owner_filter():
+    """Test that owner-scoped search never returns other users' documents"""
+    index = VectorIndex("personal", dim=DIM, train_threshold=10_000)
+    vectors = random_vectors(100)
+    owners = ["user-a" if i % 2 == 0 else "user-b" for i in range(100)]
+    index.add_many([f"doc-{i}" for i in range(100)], vectors, owners)
+
+    results = index.search(vectors[1], k=10, owner="user-a")
+
+    assert len(results) == 10
+    assert all(int(hit.doc_id.split("-")[1]) % 2 == 0 for hit in results)
+    assert index.search(vectors[1], k=10, owner="unknown") == []
+
+
+def test_ivf_recall():
+    """Test that the trained IVF index keeps high recall on clustered data"""
+    rng = np.random.default_rng(4)
+    centers = rng.standard_normal((20, DIM)).astype(np.float32)
+    vectors = centers[rng.integers(0, 20, 5000)] + 0.3 * rng.standard_normal((5000, DIM)).astype(np.float32)
+
+    index = VectorIndex("ivf", dim=DIM, nprobe=8, train_threshold=1000)
+    index.add_many([f"doc-{i}" for i in range(5000)], vectors)
+    assert index.is_trained
+
+    recalls = []
+    for query in vectors[:50] + 0.1 * rng.standard_normal((50, DIM)).astype(np.float32):
+        expected = set(exact_top_k(vectors, query, 10))
+        found = {hit.doc_id for hit in index.search(query, k=10)}
+        recalls.append(len(expected & found) / 10)
+
+    assert np.mean(recalls) >= 0.9
+
+
+def test_snapshot_roundtrip(tmp_path, small_index):
+    """Test save/load preserves ids, owners and results"""
+    index, vectors = small_index
+    index.add("owned", vectors[0], owner="user-a")
+    index.remove("doc-5")
+    path = str(tmp_path / "test.npz")
+
+    index.save(path)
+    loaded = VectorIndex.load(path)
+
+    assert len(loaded) == len(index)
+    assert [hit.doc_id for hit in loaded.search(vectors[7], k=5)] == [hit.doc_id for hit in index.search(vectors[7], k=5)]
+    assert loaded.search(vectors[0], k=1, owner="user-a")[0].doc_id == "owned"
+    assert all(hit.doc_id != "doc-5" for hit in loaded.search(vectors[5], k=5))
+
+
+def test_boost_and_threshold_applied_in_index():
+    """Test partner boost re-ranks and the threshold filters on raw similarity"""
+    index = VectorIndex("community", dim=2, train_threshold=10_000)
+    index.add("plain", [1.0, 0.0])
+    index.add("partner", [0.9, 0.45], weight=1.2)  # similarity ~0.894, boosted ~1.07
+    index.add("weak-partner", [0.2, 1.0], weight=1.2)  # similarity ~0.196
+
+    results = index.search([1.0, 0.0], k=3, min_similarity=0.3)
+
+    assert [hit.doc_id for hit in results] == ["partner", "plain"]
+    assert results[0].score == pytest.approx(results[0].similarity * 1.2)
+    assert results[1].score == pytest.approx(1.0)
+
+    # Without boost the ranking falls back to raw similarity
+    assert [hit.doc_id for hit in index.search([1.0, 0.0], k=1, boost=False)] == ["plain"]
+
+
+def test_rejects_wrong_dimension(small_index):
+    """Test that malformed embeddings are rejected instead of corrupting the matrix"""
+    index, _ = small_index
+
+    assert index.add("bad", [0.1] * (DIM + 1)) is False
+    assert index.search([0.1] * (DIM + 1), k=5) == []
+    assert len(index) == 200